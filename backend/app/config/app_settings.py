@@ -1,7 +1,7 @@
 """
 General application configuration settings.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -104,6 +104,11 @@ class AppSettings(BaseSettings):
     STARTUP_VECTOR_STORE_SMOKE_TEST: bool = Field(
         False, env="STARTUP_VECTOR_STORE_SMOKE_TEST"
     )
+    # Initialize independent components concurrently (false: one after the other)
+    STARTUP_PARALLEL: bool = Field(True, env="STARTUP_PARALLEL")
+    # Warm optional components (reranker, classifier LLM, semantic cache) after the
+    # server is up instead of before; requests meanwhile create them on first use
+    STARTUP_BACKGROUND_WARMUP: bool = Field(True, env="STARTUP_BACKGROUND_WARMUP")
 
     # Admin Account Configuration
     ADMIN_USERNAME: str = Field("admin", env="ADMIN_USERNAME")
@@ -136,6 +141,35 @@ class AppSettings(BaseSettings):
     ENABLE_OVERRIDE_ESCALATION_JOB: bool = Field(True, env="ENABLE_OVERRIDE_ESCALATION_JOB")
     ENABLE_OVERRIDE_EXPIRATION_JOB: bool = Field(True, env="ENABLE_OVERRIDE_EXPIRATION_JOB")
     
+    # Job execution mode:
+    # - "inline": the API process runs queued jobs itself (APScheduler threads)
+    # - "worker": jobs are only persisted; a standalone worker (run_worker.py) claims and runs them
+    JOB_EXECUTION_MODE: str = Field("inline", env="JOB_EXECUTION_MODE")
+    # Hard timeout for a single job in inline mode (seconds)
+    JOB_TIMEOUT_SECONDS: int = Field(300, env="JOB_TIMEOUT_SECONDS")
+    
+    # Worker runtime (run_worker.py)
+    # Per job type concurrency as "job_type=limit" pairs, e.g. "file_ingestion=2,password_reset_email=8"
+    JOB_WORKER_CONCURRENCY: str = Field(
+        "file_ingestion=1,password_reset_email=8,password_changed_email=8",
+        env="JOB_WORKER_CONCURRENCY"
+    )
+    JOB_WORKER_DEFAULT_CONCURRENCY: int = Field(2, env="JOB_WORKER_DEFAULT_CONCURRENCY")  # Job types not listed above
+    JOB_WORKER_POLL_INTERVAL: float = Field(2.0, env="JOB_WORKER_POLL_INTERVAL")  # Seconds between queue polls when idle
+    JOB_VISIBILITY_TIMEOUT: int = Field(300, env="JOB_VISIBILITY_TIMEOUT")  # Lease length; expired leases are requeued
+    JOB_HEARTBEAT_INTERVAL: int = Field(30, env="JOB_HEARTBEAT_INTERVAL")  # How often running jobs extend their lease
+    JOB_WORKER_MAX_RUNTIME_SECONDS: int = Field(0, env="JOB_WORKER_MAX_RUNTIME_SECONDS")  # 0 = no ceiling (heartbeats keep the lease alive)
+    JOB_LEADER_ELECTION: bool = Field(True, env="JOB_LEADER_ELECTION")  # Only one replica runs each recurring job
+    
+    # Event Bus Configuration (background handlers such as save_message / activity_log)
+    EVENT_QUEUE_MAX_SIZE: int = Field(10000, env="EVENT_QUEUE_MAX_SIZE")  # Per handler; full queue = backpressure
+    EVENT_WORKERS_PER_TYPE: int = Field(4, env="EVENT_WORKERS_PER_TYPE")  # Default workers per handler
+    EVENT_BATCH_MAX_SIZE: int = Field(200, env="EVENT_BATCH_MAX_SIZE")  # Upper bound for batching handlers
+    EVENT_BATCH_FLUSH_INTERVAL: float = Field(0.05, env="EVENT_BATCH_FLUSH_INTERVAL")  # Seconds to collect a batch
+    EVENT_BACKPRESSURE_TIMEOUT: float = Field(0.25, env="EVENT_BACKPRESSURE_TIMEOUT")  # Max emit() wait on a full queue
+    EVENT_SPILL_PATH: str = Field("data/events/spill.jsonl", env="EVENT_SPILL_PATH")  # Overflow for durable events
+    EVENT_SPILL_REPLAY_INTERVAL: float = Field(30.0, env="EVENT_SPILL_REPLAY_INTERVAL")
+    
     # Production Configuration
     SKIP_AUTO_SETUP: bool = Field(False, env="SKIP_AUTO_SETUP")
     UVICORN_WORKERS: int = Field(1, env="UVICORN_WORKERS")
@@ -203,6 +237,18 @@ class AppSettings(BaseSettings):
             )
         return v_lower
 
+    @field_validator("JOB_EXECUTION_MODE")
+    @classmethod
+    def validate_job_execution_mode(cls, v: str) -> str:
+        """Validate job execution mode."""
+        allowed = {"inline", "worker"}
+        v_lower = v.lower()
+        if v_lower not in allowed:
+            raise ValueError(
+                f"JOB_EXECUTION_MODE must be one of {allowed}, got '{v}'"
+            )
+        return v_lower
+
     @field_validator("CHUNK_OVERLAP")
     @classmethod
     def validate_chunk_overlap(cls, v: int, info) -> int:
@@ -247,3 +293,32 @@ class AppSettings(BaseSettings):
             raise ValueError("CONVERSATION_RATE_LIMIT_PER_HOUR must be at least 1")
         if self.RATE_LIMIT_STORAGE == "redis" and not self.RATE_LIMIT_REDIS_URL:
             raise ValueError("RATE_LIMIT_REDIS_URL must be set when RATE_LIMIT_STORAGE is 'redis'")
+        
+        # Job worker validation
+        if self.JOB_HEARTBEAT_INTERVAL >= self.JOB_VISIBILITY_TIMEOUT:
+            raise ValueError("JOB_HEARTBEAT_INTERVAL must be less than JOB_VISIBILITY_TIMEOUT")
+        self.get_job_worker_concurrency()
+
+    def get_job_worker_concurrency(self) -> Dict[str, int]:
+        """
+        Parse JOB_WORKER_CONCURRENCY into a {job_type: limit} mapping.
+        
+        Returns:
+            Dict of per job type concurrency limits (job types not listed
+            use JOB_WORKER_DEFAULT_CONCURRENCY)
+        """
+        limits: Dict[str, int] = {}
+        for item in (self.JOB_WORKER_CONCURRENCY or "").split(","):
+            item = item.strip()
+            if not item:
+                continue
+            job_type, sep, limit = item.partition("=")
+            if not sep:
+                raise ValueError(
+                    f"JOB_WORKER_CONCURRENCY entries must look like 'job_type=limit', got '{item}'"
+                )
+            limit_value = int(limit.strip())
+            if limit_value < 1:
+                raise ValueError(f"JOB_WORKER_CONCURRENCY limit for '{job_type}' must be at least 1")
+            limits[job_type.strip().lower()] = limit_value
+        return limits
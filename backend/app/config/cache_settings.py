@@ -43,6 +43,27 @@ class CacheSettings(BaseSettings):
     CACHE_REDIS_RETRY_ON_TIMEOUT: bool = Field(True, env="CACHE_REDIS_RETRY_ON_TIMEOUT")
     CACHE_REDIS_HEALTH_CHECK_INTERVAL: int = Field(30, env="CACHE_REDIS_HEALTH_CHECK_INTERVAL")
     
+    # L1: per-process LRU in front of Redis, kept coherent via pub/sub invalidation
+    CACHE_L1_ENABLED: bool = Field(True, env="CACHE_L1_ENABLED")
+    CACHE_L1_MAX_ENTRIES: int = Field(10000, env="CACHE_L1_MAX_ENTRIES")
+    CACHE_L1_MAX_BYTES: int = Field(32 * 1024 * 1024, env="CACHE_L1_MAX_BYTES")  # 32 MB
+    CACHE_L1_TTL_SECONDS: int = Field(30, env="CACHE_L1_TTL_SECONDS")  # Max staleness if an invalidation is missed
+    
+    # get_or_compute stampede protection
+    CACHE_STALE_TTL_SECONDS: int = Field(30, env="CACHE_STALE_TTL_SECONDS")  # Serve an expired value this long while one request recomputes
+    CACHE_EARLY_REFRESH_BETA: float = Field(1.0, env="CACHE_EARLY_REFRESH_BETA")  # >1 refreshes earlier, 0 disables early refresh
+    CACHE_COMPUTE_LEASE_SECONDS: int = Field(10, env="CACHE_COMPUTE_LEASE_SECONDS")  # Max time one worker holds a recompute lease
+    
+    # Payload codec: serializer ("orjson", "msgpack", "json") and compression ("zstd", "lz4", "zlib", "none")
+    CACHE_CODEC_SERIALIZER: str = Field("orjson", env="CACHE_CODEC_SERIALIZER")
+    CACHE_CODEC_COMPRESSION: str = Field("zstd", env="CACHE_CODEC_COMPRESSION")
+    CACHE_CODEC_COMPRESS_MIN_BYTES: int = Field(1024, env="CACHE_CODEC_COMPRESS_MIN_BYTES")  # Smaller payloads stay uncompressed
+    CACHE_CODEC_COMPRESSION_LEVEL: int = Field(3, env="CACHE_CODEC_COMPRESSION_LEVEL")
+    
+    # Memory backend bounds (used when Redis is off)
+    CACHE_MEMORY_MAX_ENTRIES: int = Field(100000, env="CACHE_MEMORY_MAX_ENTRIES")
+    CACHE_MEMORY_MAX_BYTES: int = Field(256 * 1024 * 1024, env="CACHE_MEMORY_MAX_BYTES")  # 256 MB
+    
     # TTL Settings (Time To Live in seconds)
     CACHE_TTL_DEFAULT: int = Field(300, env="CACHE_TTL_DEFAULT")  # 5 minutes
     CACHE_TTL_STATS: int = Field(60, env="CACHE_TTL_STATS")  # 1 minute
@@ -50,6 +71,7 @@ class CacheSettings(BaseSettings):
     CACHE_TTL_USER_DATA: int = Field(300, env="CACHE_TTL_USER_DATA")  # 5 minutes
     CACHE_TTL_SESSION: int = Field(1800, env="CACHE_TTL_SESSION")  # 30 minutes
     CACHE_TTL_HISTORY: int = Field(3600, env="CACHE_TTL_HISTORY")  # 1 hour (sensitive data)
+    CACHE_TTL_QUERY_PLAN: int = Field(3600, env="CACHE_TTL_QUERY_PLAN")  # 1 hour (planner results by normalized query)
     
     # Conversation History Caching
     ENABLE_CACHE_HISTORY_ENCRYPTION: bool = Field(False, env="ENABLE_CACHE_HISTORY_ENCRYPTION")  # Encrypt history in cache
@@ -76,6 +98,9 @@ class CacheSettings(BaseSettings):
     CONTEXT_CACHE_MAX_ENTRIES: int = Field(1, env="CONTEXT_CACHE_MAX_ENTRIES")  # Max variations per cluster (1=single, >1=variations)
     CONTEXT_CACHE_DISTANCE_THRESHOLD: float = Field(0.05, env="CONTEXT_CACHE_DISTANCE_THRESHOLD")  # Stricter
     CONTEXT_CACHE_ENCRYPT: bool = Field(False, env="CONTEXT_CACHE_ENCRYPT")
+    # Store chunk ids + scores per entry and the chunk text once in a shared store
+    # (smaller entries, sources restored on hits) instead of the joined context text
+    CONTEXT_CACHE_STORE_CHUNK_REFS: bool = Field(False, env="CONTEXT_CACHE_STORE_CHUNK_REFS")
     
     def get_redis_url(self) -> str:
         """
@@ -129,6 +154,7 @@ class CacheSettings(BaseSettings):
                 "max_entries": self.CONTEXT_CACHE_MAX_ENTRIES,
                 "distance_threshold": self.CONTEXT_CACHE_DISTANCE_THRESHOLD,
                 "encrypt": self.CONTEXT_CACHE_ENCRYPT,
+                "store_chunk_refs": self.CONTEXT_CACHE_STORE_CHUNK_REFS,
             }
         }
 
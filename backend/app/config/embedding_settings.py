@@ -27,9 +27,32 @@ class EmbeddingSettings(BaseSettings):
     # Optional provider-specific fields (fill only when applicable)
     EMBEDDING_DIMENSIONS: Optional[int] = Field(None, env="EMBEDDING_DIMENSIONS")
     EMBEDDING_DEVICE: Optional[str] = Field(None, env="EMBEDDING_DEVICE")  # For HuggingFace
+    # HuggingFace inference runtime: torch (sentence-transformers), onnx or onnx-int8 (ONNX Runtime, CPU)
+    EMBEDDING_RUNTIME: str = Field("torch", env="EMBEDDING_RUNTIME")
     EMBEDDING_TASK_TYPE: Optional[str] = Field(None, env="EMBEDDING_TASK_TYPE")  # For Google
     EMBEDDING_INPUT_TYPE: Optional[str] = Field(None, env="EMBEDDING_INPUT_TYPE")  # For Cohere
     
+    # ============================================================================
+    # QUERY EMBEDDING BATCHING (shared by retriever and semantic cache)
+    # ============================================================================
+    # Concurrent query embeddings are collected and embedded in one batched call
+    EMBEDDING_BATCH_ENABLED: bool = Field(True, env="EMBEDDING_BATCH_ENABLED")
+    EMBEDDING_BATCH_MAX_SIZE: int = Field(32, env="EMBEDDING_BATCH_MAX_SIZE")  # A full batch is sent at once
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = Field(5.0, env="EMBEDDING_BATCH_MAX_WAIT_MS")  # Wait for more queries
+    EMBEDDING_QUERY_CACHE_SIZE: int = Field(1024, env="EMBEDDING_QUERY_CACHE_SIZE")  # Recent query vectors (0 = off)
+    
+    # ============================================================================
+    # ONNX RUNTIME (EMBEDDING_RUNTIME / RERANKER_RUNTIME = onnx | onnx-int8)
+    # ============================================================================
+    # Exported (and quantized) models are cached here; exported once with optimum
+    ONNX_MODEL_CACHE_DIR: str = Field("./data/onnx_models", env="ONNX_MODEL_CACHE_DIR")
+    ONNX_INTRA_OP_THREADS: int = Field(0, env="ONNX_INTRA_OP_THREADS")  # 0 = one per physical core
+    ONNX_INTER_OP_THREADS: int = Field(1, env="ONNX_INTER_OP_THREADS")
+    ONNX_MAX_SEQUENCE_LENGTH: int = Field(512, env="ONNX_MAX_SEQUENCE_LENGTH")  # Longer inputs are truncated
+    # Inputs are batched by similar length and padded to power-of-two buckets
+    ONNX_MAX_BATCH_SIZE: int = Field(32, env="ONNX_MAX_BATCH_SIZE")
+    ONNX_MAX_BATCH_TOKENS: int = Field(8192, env="ONNX_MAX_BATCH_TOKENS")  # Batch size x padded length
+    
     # ============================================================================
     # REDISVL VECTORIZER SETTINGS (for semantic cache)
     # ============================================================================
@@ -64,6 +87,11 @@ class EmbeddingSettings(BaseSettings):
                 f"Supported: {', '.join(supported_providers)}"
             )
         
+        if self.EMBEDDING_RUNTIME.lower() not in {"torch", "onnx", "onnx-int8"}:
+            raise ValueError(
+                f"Unsupported EMBEDDING_RUNTIME: {self.EMBEDDING_RUNTIME}. Supported: torch, onnx, onnx-int8"
+            )
+        
         # Validate required API keys for each provider
         if embedding_provider == "openai":
             if not self.EMBEDDING_API_KEY:
@@ -110,6 +138,7 @@ class EmbeddingSettings(BaseSettings):
                 "model": self.EMBEDDING_MODEL,
                 "device": self.EMBEDDING_DEVICE or "cpu",
                 "api_token": self.EMBEDDING_API_KEY,
+                "runtime": self.EMBEDDING_RUNTIME.lower(),
             }
         
         elif provider == "cohere":
@@ -54,6 +54,41 @@ class LLMSettings(BaseSettings):
     FALLBACK_LLM_TIMEOUT: Optional[int] = Field(None, env="FALLBACK_LLM_TIMEOUT")
     FALLBACK_LLM_TASK: Optional[str] = Field(None, env="FALLBACK_LLM_TASK")
 
+    # ============================================================================
+    # LLM HEALTH / CIRCUIT BREAKER / HEDGING
+    # ============================================================================
+    # Open the circuit (route straight to fallback) after this many consecutive
+    # failures, or when the error-rate EWMA crosses the threshold
+    LLM_CIRCUIT_BREAKER_ENABLED: bool = Field(True, env="LLM_CIRCUIT_BREAKER_ENABLED")
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = Field(3, env="LLM_CIRCUIT_FAILURE_THRESHOLD")
+    LLM_CIRCUIT_ERROR_RATE_THRESHOLD: float = Field(0.5, env="LLM_CIRCUIT_ERROR_RATE_THRESHOLD")
+    LLM_CIRCUIT_MIN_SAMPLES: int = Field(10, env="LLM_CIRCUIT_MIN_SAMPLES")  # Before the error rate counts
+    LLM_CIRCUIT_OPEN_SECONDS: int = Field(30, env="LLM_CIRCUIT_OPEN_SECONDS")  # Then one probe request is let through
+    LLM_HEALTH_EWMA_ALPHA: float = Field(0.2, env="LLM_HEALTH_EWMA_ALPHA")  # Weight of the newest sample
+    # Start the fallback stream if no first token arrives within this many seconds (0 = no hedging)
+    LLM_HEDGE_AFTER_SECONDS: float = Field(0.0, env="LLM_HEDGE_AFTER_SECONDS")
+
+    # ============================================================================
+    # LLM CONCURRENCY GOVERNOR
+    # ============================================================================
+    # Per-LLM admission control (per worker): requests beyond the in-flight limit
+    # or the requests-per-minute budget (0 = unlimited) wait in a queue that is
+    # shared fairly between users
+    LLM_GOVERNOR_ENABLED: bool = Field(True, env="LLM_GOVERNOR_ENABLED")
+    LLM_QUEUE_TIMEOUT_SECONDS: float = Field(60.0, env="LLM_QUEUE_TIMEOUT_SECONDS")  # Then fails like an LLM timeout
+    LLM_MAX_IN_FLIGHT: int = Field(16, env="LLM_MAX_IN_FLIGHT")
+    LLM_REQUESTS_PER_MINUTE: int = Field(0, env="LLM_REQUESTS_PER_MINUTE")
+    INTERNAL_LLM_MAX_IN_FLIGHT: int = Field(2, env="INTERNAL_LLM_MAX_IN_FLIGHT")  # Self-hosted models queue instead of overloading
+    INTERNAL_LLM_REQUESTS_PER_MINUTE: int = Field(0, env="INTERNAL_LLM_REQUESTS_PER_MINUTE")
+    FALLBACK_LLM_MAX_IN_FLIGHT: int = Field(8, env="FALLBACK_LLM_MAX_IN_FLIGHT")
+    FALLBACK_LLM_REQUESTS_PER_MINUTE: int = Field(0, env="FALLBACK_LLM_REQUESTS_PER_MINUTE")
+    CLASSIFIER_LLM_MAX_IN_FLIGHT: int = Field(16, env="CLASSIFIER_LLM_MAX_IN_FLIGHT")
+    CLASSIFIER_LLM_REQUESTS_PER_MINUTE: int = Field(0, env="CLASSIFIER_LLM_REQUESTS_PER_MINUTE")
+    # Identical concurrent streamed queries (same normalized query, context and
+    # conversation history) share one LLM generation; each request still saves
+    # its own response
+    ENABLE_QUERY_COALESCING: bool = Field(False, env="ENABLE_QUERY_COALESCING")
+
     # ============================================================================
     # INTERNAL LLM CONFIGURATION (Optional - for sensitive documents)
     # ============================================================================
@@ -75,6 +110,9 @@ class LLMSettings(BaseSettings):
     ENABLE_LLM_CLASSIFIER: bool = Field(False, env="ENABLE_LLM_CLASSIFIER")
     # Query decomposer (breaks complex queries into sub-queries using LLM)
     ENABLE_QUERY_DECOMPOSER: bool = Field(False, env="ENABLE_QUERY_DECOMPOSER")
+    # Combined planner: one structured call for classification + decomposition
+    # (used only when both ENABLE_LLM_CLASSIFIER and ENABLE_QUERY_DECOMPOSER are on)
+    ENABLE_QUERY_PLANNER: bool = Field(False, env="ENABLE_QUERY_PLANNER")
     
     # Classifier requires explicit configuration when enabled
     CLASSIFIER_LLM_PROVIDER: Optional[str] = Field(None, env="CLASSIFIER_LLM_PROVIDER")
@@ -140,6 +140,36 @@ Return this JSON structure:
         default="Query: {query}\n\nOptimize and return JSON:",
         env="DECOMPOSER_USER_PROMPT"
     )
+    
+    # Planner prompt - classification and decomposition in one structured call
+    PLANNER_SYSTEM_PROMPT: str = Field(
+        default="""Role: Query planner for a retrieval-augmented generation (RAG) system.
+        Task: In one pass, decide whether the query needs document retrieval and, if it does, produce the search queries.
+
+        Classification rules:
+        1. requires_rag = true if the query asks for factual information, policies, procedures, records, explanations, or any content that depends on stored documents or domain-specific knowledge.
+        2. requires_rag = false only for greetings, acknowledgements, thanks, small talk, or conversational filler.
+        3. When uncertain, default to requires_rag = true.
+        4. If requires_rag = false, write a brief, friendly response (1-2 sentences), set decomposed = false and queries = [].
+        5. If requires_rag = true, leave response as an empty string.
+
+        Decomposition rules (only when requires_rag = true):
+        1. Decompose if each sub-query can be answered accurately from different documents.
+        2. Do not decompose if meaning depends on context (comparisons, temporal ranges, pros/cons, hierarchical relationships).
+        3. Each query must be complete, standalone, and preserve exact terminology.
+        4. Max 4 queries per input. Rephrase only for clarity.
+        5. If the query is simple and asks one thing, return it as the single query with decomposed = false.
+
+Return this JSON structure:
+{{
+    "requires_rag": boolean,
+    "confidence": number,
+    "response": string,
+    "decomposed": boolean,
+    "queries": ["query1", ...]
+}}""",
+        env="PLANNER_SYSTEM_PROMPT"
+    )
 
     # Response when no relevant context
     RETRIEVAL_NO_CONTEXT_MESSAGE: str = Field(
@@ -20,6 +20,8 @@ class RerankerSettings(BaseSettings):
     RERANKER_PROVIDER: str = Field("huggingface", env="RERANKER_PROVIDER")
     RERANKER_MODEL: Optional[str] = Field(None, env="RERANKER_MODEL")
     RERANKER_API_KEY: Optional[str] = Field(None, env="RERANKER_API_KEY")
+    # HuggingFace inference runtime: torch (sentence-transformers), onnx or onnx-int8 (ONNX Runtime, CPU)
+    RERANKER_RUNTIME: str = Field("torch", env="RERANKER_RUNTIME")
     
     # Reranker Behavior
     RERANKER_SCORE_THRESHOLD: float = Field(0.5, env="RERANKER_SCORE_THRESHOLD")
@@ -37,7 +39,8 @@ class RerankerSettings(BaseSettings):
             model = self.RERANKER_MODEL or "cross-encoder/ms-marco-MiniLM-L-6-v2"
             return {
                 "provider": "huggingface",
-                "model": model
+                "model": model,
+                "runtime": self.RERANKER_RUNTIME.lower(),
             }
         
         elif provider == "cohere":
@@ -23,6 +23,12 @@ class VectorDBSettings(BaseSettings):
     VECTOR_STORE_COLLECTION_NAME: str = Field("rag_documents", env="VECTOR_STORE_COLLECTION_NAME")
     VECTOR_STORE_PERSIST_DIRECTORY: str = Field("./data/vector_store", env="VECTOR_STORE_PERSIST_DIRECTORY")
     
+    # FAISS: ingestion publishes versioned index snapshots; API workers poll and swap them in
+    VECTOR_SNAPSHOTS_ENABLED: bool = Field(True, env="VECTOR_SNAPSHOTS_ENABLED")
+    VECTOR_SNAPSHOT_POLL_SECONDS: float = Field(10.0, env="VECTOR_SNAPSHOT_POLL_SECONDS")
+    VECTOR_SNAPSHOT_KEEP: int = Field(3, env="VECTOR_SNAPSHOT_KEEP")  # Versions kept on disk
+    VECTOR_SNAPSHOT_MMAP: bool = Field(True, env="VECTOR_SNAPSHOT_MMAP")  # Memory-map served indexes where FAISS supports it
+    
     # ============================================================================
     # CONSOLIDATED PROVIDER-SPECIFIC SETTINGS
     # ============================================================================
@@ -45,8 +51,12 @@ class VectorDBSettings(BaseSettings):
     # HYBRID SEARCH CONFIGURATION
     # ============================================================================
     # Enable hybrid search (combines dense and sparse vectors using RRF)
-    # Only supported by: Qdrant, Weaviate, Milvus
+    # Qdrant, Weaviate, Milvus: native sparse vectors; FAISS, Chroma: in-process BM25 index
     ENABLE_HYBRID_SEARCH: bool = Field(False, env="ENABLE_HYBRID_SEARCH")
+    # FAISS/Chroma hybrid: RRF damping constant and the share of a query's IDF weight a
+    # keyword hit must contain to count as relevant without reranking (exact codes, SKUs)
+    SPARSE_RRF_K: int = Field(60, env="SPARSE_RRF_K")
+    SPARSE_MATCH_MIN_COVERAGE: float = Field(0.8, env="SPARSE_MATCH_MIN_COVERAGE")
     
     # hybrid search vector field names
     VECTOR_DB_DENSE_VECTOR_NAME: str = Field("dense", env="VECTOR_DB_DENSE_VECTOR_NAME")
@@ -58,6 +68,18 @@ class VectorDBSettings(BaseSettings):
     # Batch size for chunk ingestion to vector store (higher = faster but more memory)
     # Recommended: 1000+ for production environments
     CHUNK_INGESTION_BATCH_SIZE: int = Field(1000, env="CHUNK_INGESTION_BATCH_SIZE")
+    # Files claimed per ingestion round; batch jobs loop until no approved files remain
+    INGESTION_SHARD_SIZE: int = Field(50, env="INGESTION_SHARD_SIZE")
+    # Files stuck in PROCESSING longer than this (crashed node) can be claimed again
+    FILE_INGESTION_LEASE_SECONDS: int = Field(3600, env="FILE_INGESTION_LEASE_SECONDS")
+    # Batch jobs created per admin trigger; each claims its own shards (use with several workers/replicas)
+    INGESTION_PARALLEL_BATCH_JOBS: int = Field(1, env="INGESTION_PARALLEL_BATCH_JOBS")
+    # File parsing process pool (PDF/DOCX/Excel parsing is CPU-bound)
+    INGESTION_PARSE_WORKERS: int = Field(0, env="INGESTION_PARSE_WORKERS")  # 0 = one per CPU core
+    INGESTION_PARSE_TIMEOUT_SECONDS: int = Field(300, env="INGESTION_PARSE_TIMEOUT_SECONDS")
+    INGESTION_PARSE_MAX_MEMORY_MB: int = Field(4096, env="INGESTION_PARSE_MAX_MEMORY_MB")  # Per worker, 0 = unlimited
+    # Reuse parsed chunks/embeddings of files with identical bytes (only ACL metadata differs)
+    INGESTION_REUSE_ARTIFACTS: bool = Field(True, env="INGESTION_REUSE_ARTIFACTS")
 
     @field_validator("VECTOR_DB_PORT", "VECTOR_DB_GRPC_PORT", mode="before")
     @classmethod
@@ -100,8 +122,9 @@ class VectorDBSettings(BaseSettings):
         
         # Hybrid search validation: Check provider compatibility
         if self.ENABLE_HYBRID_SEARCH:
-            # Providers that natively support hybrid search with RRF (Reciprocal Rank Fusion)
-            hybrid_supported_providers = {"qdrant", "weaviate", "milvus"}
+            # Providers that natively support hybrid search with RRF (Reciprocal Rank Fusion),
+            # plus local providers backed by the in-process BM25 index
+            hybrid_supported_providers = {"qdrant", "weaviate", "milvus", "faiss", "chroma"}
             
             if vector_db not in hybrid_supported_providers:
                 raise ValueError(
@@ -1,16 +1,269 @@
 """
 Simple caching layer - Redis with in-memory fallback.
+
+With Redis, a small per-process L1 (bounded LRU with TTL) sits in front of it
+for hot keys. Writes and deletes are published on a Redis pub/sub channel so
+other processes drop their L1 copies; the L1 TTL bounds staleness if a
+message is missed.
+
+Cache.get_or_compute() protects computed entries from stampedes: one loader
+call per key at a time (per process, and across processes via a Redis lease),
+probabilistic early refresh before expiry, and a short stale-while-revalidate
+window after it.
+
+Values are stored as compact binary payloads (see cache_codec); entries
+written as JSON text before that are still read.
 """
 
+import asyncio
+import base64
+import fnmatch
 import json
-from typing import Any, Optional, Union
+import math
+import random
+import struct
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 from datetime import timedelta
 
 from app.core import get_logger
+from app.core.cache_codec import CacheCodec, get_cache_codec
 
 
 logger = get_logger(__name__)
 
+Value = Union[str, bytes]
+
+
+class LRUStore:
+    """
+    Size-bounded LRU of str/bytes values with per-entry TTL.
+    
+    Bounded by entry count and by approximate size (key + value length);
+    least recently used entries are evicted first. on_remove, if given, is
+    called with every key that leaves the store (evicted, expired, deleted).
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        max_bytes: int = 256 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+        on_remove: Optional[Callable[[str], None]] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._on_remove = on_remove
+        self._entries: "OrderedDict[str, Tuple[Value, Optional[float]]]" = OrderedDict()
+        self.size_bytes = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: str) -> Optional[Value]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and self._clock() >= expires_at:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: Value, ttl: Optional[float] = None) -> None:
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            self.delete(key)
+            return
+        if key in self._entries:
+            self._remove(key, replaced=True)
+        expires_at = self._clock() + ttl if ttl else None
+        self._entries[key] = (value, expires_at)
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+    
+    def delete(self, key: str) -> bool:
+        if key in self._entries:
+            self._remove(key)
+            return True
+        return False
+    
+    def delete_matching(self, pattern: str) -> int:
+        """Delete keys matching a glob pattern (as Redis KEYS/SCAN)."""
+        keys = [k for k in self._entries if fnmatch.fnmatchcase(k, pattern)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size_bytes = 0
+    
+    def _remove(self, key: str, replaced: bool = False) -> None:
+        value, _ = self._entries.pop(key)
+        self.size_bytes -= len(key) + len(value)
+        if self._on_remove and not replaced:
+            self._on_remove(key)
+
+
+def _key_prefix(key: str) -> str:
+    """Metrics bucket of a key: everything before its last segment."""
+    return key.rsplit(":", 1)[0] if ":" in key else key
+
+
+class L1Cache:
+    """
+    Per-process cache in front of Redis, kept coherent via pub/sub.
+    
+    Values are kept serialized so callers never share mutable objects.
+    """
+    
+    def __init__(
+        self,
+        channel: str,
+        max_entries: int = 10_000,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl: int = 30
+    ):
+        self.channel = channel
+        self.ttl = ttl
+        self.store = LRUStore(max_entries=max_entries, max_bytes=max_bytes)
+        self.origin = uuid.uuid4().hex
+        self.generation = 0  # Bumped on every invalidation
+        self.redis = None
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"l1_hits": 0, "l2_hits": 0, "misses": 0})
+        self._listener: Optional[asyncio.Task] = None
+    
+    def get(self, key: str) -> Optional[Value]:
+        value = self.store.get(key)
+        if value is not None:
+            self.stats[_key_prefix(key)]["l1_hits"] += 1
+        return value
+    
+    def fill(
+        self,
+        key: str,
+        value: Optional[Value],
+        ttl: Optional[int] = None,
+        generation: Optional[int] = None,
+        count: bool = True
+    ) -> None:
+        """
+        Keep a value read from (or written to) L2 for at most the L1 TTL.
+        
+        Args:
+            generation: self.generation before the L2 read; if an invalidation
+                        arrived meanwhile the value may be stale and isn't kept
+            count: Count as an L2 hit/miss (False for writes)
+        """
+        if count:
+            self.stats[_key_prefix(key)]["l2_hits" if value is not None else "misses"] += 1
+        if value is None or (generation is not None and generation != self.generation):
+            return
+        self.store.set(key, value, min(ttl, self.ttl) if ttl else self.ttl)
+    
+    def invalidate(self, keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> None:
+        self.generation += 1
+        for key in keys:
+            self.store.delete(key)
+        for pattern in patterns:
+            self.store.delete_matching(pattern)
+    
+    async def publish(self, keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> None:
+        """Tell other processes to drop these keys from their L1."""
+        if self.redis is None:
+            return
+        try:
+            await self.redis.publish(self.channel, invalidation_message(keys, patterns, self.origin))
+        except Exception as e:
+            logger.warning(f"L1 invalidation publish failed: {e}")
+    
+    async def start(self, redis) -> None:
+        """Start publishing to and listening for invalidations from other processes."""
+        self.redis = redis
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(redis))
+    
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+    
+    def handle_message(self, data: str) -> None:
+        message = json.loads(data)
+        if message.get("origin") == self.origin:
+            return
+        self.invalidate(message.get("keys", []), message.get("patterns", []))
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.store),
+            "size_bytes": self.store.size_bytes,
+            "max_bytes": self.store.max_bytes,
+            "evictions": self.store.evictions,
+            "by_prefix": {prefix: dict(counts) for prefix, counts in self.stats.items()},
+        }
+    
+    async def _listen(self, redis) -> None:
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.handle_message(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Invalidations may have been missed - start over empty
+                logger.warning(f"L1 invalidation listener failed: {e}, clearing L1 and resubscribing")
+                self.store.clear()
+                self.generation += 1
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+def invalidation_message(keys: Iterable[str] = (), patterns: Iterable[str] = (), origin: str = "") -> str:
+    """Pub/sub payload telling L1 caches to drop keys and glob patterns."""
+    return json.dumps({"origin": origin, "keys": list(keys), "patterns": list(patterns)})
+
+
+def l1_invalidation_channel() -> str:
+    """Pub/sub channel for L1 invalidations (shared by all processes)."""
+    from app.config.cache_settings import cache_settings
+    return f"{cache_settings.CACHE_KEY_PREFIX}:cache:invalidate"
+
+
+TAG_KEY_PREFIX = "cache:tag:"
+SCAN_BATCH_SIZE = 500
+
+# Delete the lease only if it still holds our token (it may have expired and
+# been taken by another worker)
+_RELEASE_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _tag_key(tag: str) -> str:
+    """Redis set listing the keys written with a tag."""
+    return f"{TAG_KEY_PREFIX}{tag}"
+
 
 class RedisBackend:
     """Redis cache backend."""
@@ -19,6 +272,7 @@ class RedisBackend:
         self.url = url
         self.redis_options = redis_options
         self._redis = None
+        self._binary = None  # Same server, no response decoding: cached values are bytes
     
     async def _get_redis(self):
         """Initialize Redis connection."""
@@ -35,27 +289,79 @@ class RedisBackend:
             
             self._redis = await aioredis.from_url(self.url, **options)
             await self._redis.ping()
+            self._binary = await aioredis.from_url(self.url, **{**options, "decode_responses": False})
             logger.info("✓ Redis cache connected")
         return self._redis
     
-    async def get(self, key: str) -> Optional[str]:
+    async def _get_binary_redis(self):
+        """Connection for cached values (bytes in, bytes out)."""
+        await self._get_redis()
+        return self._binary
+    
+    async def get(self, key: str) -> Optional[bytes]:
         try:
-            redis = await self._get_redis()
+            redis = await self._get_binary_redis()
             return await redis.get(key)
         except Exception as e:
             logger.warning(f"Redis get failed for {key}: {e}")
             return None
     
-    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
         try:
-            redis = await self._get_redis()
-            if ttl:
-                await redis.setex(key, ttl, value)
-            else:
-                await redis.set(key, value)
+            redis = await self._get_binary_redis()
+            return await redis.mget(keys)
+        except Exception as e:
+            logger.warning(f"Redis mget failed for {len(keys)} keys: {e}")
+            return [None] * len(keys)
+    
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None
+    ) -> bool:
+        if not tags:
+            try:
+                redis = await self._get_binary_redis()
+                if ttl:
+                    await redis.setex(key, ttl, value)
+                else:
+                    await redis.set(key, value)
+                return True
+            except Exception as e:
+                logger.warning(f"Redis set failed for {key}: {e}")
+                return False
+        return await self.set_many({key: value}, ttl, tags)
+    
+    async def set_many(
+        self,
+        items: Dict[str, bytes],
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None
+    ) -> bool:
+        if not items:
+            return True
+        try:
+            redis = await self._get_binary_redis()
+            pipe = redis.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(key, value, ex=ttl)
+            for tag in tags or []:
+                tag_key = _tag_key(tag)
+                pipe.sadd(tag_key, *items)
+                if ttl:
+                    # Tag set lives as long as its longest-lived key
+                    pipe.expire(tag_key, ttl, nx=True)
+                    pipe.expire(tag_key, ttl, gt=True)
+                else:
+                    pipe.persist(tag_key)
+            await pipe.execute()
             return True
         except Exception as e:
-            logger.warning(f"Redis set failed for {key}: {e}")
+            logger.warning(f"Redis set failed for {len(items)} keys: {e}")
             return False
     
     async def delete(self, key: str) -> bool:
@@ -67,66 +373,199 @@ class RedisBackend:
             logger.warning(f"Redis delete failed for {key}: {e}")
             return False
     
-    async def invalidate_pattern(self, pattern: str) -> int:
+    async def delete_many(self, keys: List[str]) -> int:
+        if not keys:
+            return 0
         try:
             redis = await self._get_redis()
-            keys = await redis.keys(pattern)
-            if keys:
-                return await redis.delete(*keys)
+            return await redis.unlink(*keys)
+        except Exception as e:
+            logger.warning(f"Redis delete failed for {len(keys)} keys: {e}")
             return 0
+    
+    async def invalidate_tags(self, tags: List[str]) -> List[str]:
+        """Delete the keys written with any of the tags; returns those keys."""
+        if not tags:
+            return []
+        try:
+            redis = await self._get_redis()
+            tag_keys = [_tag_key(tag) for tag in tags]
+            keys = list(await redis.sunion(tag_keys))
+            await redis.unlink(*keys, *tag_keys)
+            return keys
+        except Exception as e:
+            logger.warning(f"Redis tag invalidation failed for {tags}: {e}")
+            return []
+    
+    async def invalidate_pattern(self, pattern: str) -> int:
+        """Delete keys matching a glob pattern (incremental SCAN, for untagged keys)."""
+        try:
+            redis = await self._get_redis()
+            deleted = 0
+            batch = []
+            async for key in redis.scan_iter(match=pattern, count=SCAN_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= SCAN_BATCH_SIZE:
+                    deleted += await redis.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await redis.unlink(*batch)
+            return deleted
         except Exception as e:
             logger.warning(f"Redis pattern delete failed: {e}")
             return 0
     
+    async def acquire_lease(self, key: str, token: str, ttl: int) -> bool:
+        """Take a short exclusive lease (one worker recomputes a key)."""
+        try:
+            redis = await self._get_redis()
+            return bool(await redis.set(key, token, nx=True, ex=ttl))
+        except Exception as e:
+            logger.warning(f"Redis lease failed for {key}: {e}")
+            return True  # Compute locally rather than wait on a broken Redis
+    
+    async def release_lease(self, key: str, token: str) -> None:
+        """Release a lease if this process still holds it."""
+        try:
+            redis = await self._get_redis()
+            await redis.eval(_RELEASE_LEASE_SCRIPT, 1, key, token)
+        except Exception as e:
+            logger.warning(f"Redis lease release failed for {key}: {e}")
+    
     async def close(self):
+        if self._binary:
+            await self._binary.close()
         if self._redis:
             await self._redis.close()
 
 
 class MemoryBackend:
-    """In-memory cache backend."""
+    """In-memory cache backend (bounded LRU)."""
     
-    def __init__(self):
-        self._cache = {}
-        self._ttls = {}
+    def __init__(self, max_entries: int = 100_000, max_bytes: int = 256 * 1024 * 1024):
+        self._store = LRUStore(max_entries=max_entries, max_bytes=max_bytes, on_remove=self._untag)
+        self._tags: Dict[str, Set[str]] = defaultdict(set)
+        self._key_tags: Dict[str, Set[str]] = {}  # Reverse of _tags, to prune it as keys go
     
-    async def get(self, key: str) -> Optional[str]:
-        import time
-        if key in self._ttls and time.time() > self._ttls[key]:
-            del self._cache[key]
-            del self._ttls[key]
-            return None
-        return self._cache.get(key)
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._store.get(key)
     
-    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
-        import time
-        self._cache[key] = value
-        if ttl:
-            self._ttls[key] = time.time() + ttl
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self._store.get(key) for key in keys]
+    
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None
+    ) -> bool:
+        return await self.set_many({key: value}, ttl, tags)
+    
+    async def set_many(
+        self,
+        items: Dict[str, bytes],
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None
+    ) -> bool:
+        for key, value in items.items():
+            self._store.set(key, value, ttl)
+        for tag in tags or []:
+            self._tags[tag].update(items)
+            for key in items:
+                self._key_tags.setdefault(key, set()).add(tag)
         return True
     
     async def delete(self, key: str) -> bool:
-        self._cache.pop(key, None)
-        self._ttls.pop(key, None)
+        self._store.delete(key)
         return True
     
-    async def invalidate_pattern(self, pattern: str) -> int:
-        pattern = pattern.replace('*', '')
-        keys = [k for k in list(self._cache.keys()) if k.startswith(pattern)]
+    async def delete_many(self, keys: List[str]) -> int:
+        return sum(1 for key in keys if self._store.delete(key))
+    
+    async def invalidate_tags(self, tags: List[str]) -> List[str]:
+        keys = set().union(*(self._tags.pop(tag, set()) for tag in tags))
         for key in keys:
-            del self._cache[key]
-            self._ttls.pop(key, None)
-        return len(keys)
+            self._store.delete(key)
+        return list(keys)
+    
+    async def invalidate_pattern(self, pattern: str) -> int:
+        return self._store.delete_matching(pattern)
+    
+    async def acquire_lease(self, key: str, token: str, ttl: int) -> bool:
+        return True  # Single process: Cache's in-process single-flight suffices
+    
+    async def release_lease(self, key: str, token: str) -> None:
+        pass
     
     async def close(self):
         pass
+    
+    def _untag(self, key: str) -> None:
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+ENTRY_VALUE_FIELD = "__cached__"
+ENTRY_BYTES_FIELD = "__cached_b64__"  # bytes values, as written by earlier versions
+# bytes values: prefix | logical expiry (NaN if none), loader seconds | raw bytes
+ENTRY_BYTES_PREFIX = b"\x00cb1"
+_ENTRY_BYTES_HEADER = struct.Struct("!dd")
+_MISSING = object()
+LEASE_POLL_SECONDS = 0.05
+
+
+def _open_entry(value: Any) -> Tuple[Any, Optional[float], float]:
+    """Decoded cache value → (value, logical expiry or None, loader seconds)."""
+    if isinstance(value, dict) and ENTRY_VALUE_FIELD in value:
+        return value[ENTRY_VALUE_FIELD], value.get("exp"), value.get("delta", 0.0)
+    if isinstance(value, bytes) and value.startswith(ENTRY_BYTES_PREFIX):
+        start = len(ENTRY_BYTES_PREFIX)
+        expires_at, delta = _ENTRY_BYTES_HEADER.unpack_from(value, start)
+        return value[start + _ENTRY_BYTES_HEADER.size:], None if math.isnan(expires_at) else expires_at, delta
+    if isinstance(value, dict) and ENTRY_BYTES_FIELD in value:
+        return base64.b64decode(value[ENTRY_BYTES_FIELD]), value.get("exp"), value.get("delta", 0.0)
+    return value, None, 0.0
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # Loader errors reach the caller; don't also log them as unretrieved
+    if not future.cancelled():
+        future.exception()
 
 
 class Cache:
-    """Simple cache with JSON serialization."""
+    """
+    Simple cache with compact serialization (CacheCodec) and optional L1 in front.
+    
+    Keys written with tags can be invalidated by tag, touching only those
+    keys; invalidate_pattern scans the keyspace and is meant for untagged keys.
     
-    def __init__(self, backend):
+    Entries written by get_or_compute carry their logical expiry and loader
+    time; get() unwraps them, so any caller can read those keys.
+    """
+    
+    def __init__(
+        self,
+        backend,
+        l1: Optional[L1Cache] = None,
+        codec: Optional[CacheCodec] = None,
+        stale_ttl: int = 30,
+        early_refresh_beta: float = 1.0,
+        lease_seconds: int = 10
+    ):
         self.backend = backend
+        self.l1 = l1
+        self.codec = codec or get_cache_codec()
+        self.stale_ttl = stale_ttl
+        self.early_refresh_beta = early_refresh_beta
+        self.lease_seconds = lease_seconds
+        self._flights: Dict[str, asyncio.Future] = {}
+        self._lease_token = uuid.uuid4().hex
     
     @property
     def redis_client(self):
@@ -138,43 +577,301 @@ class Cache:
     async def get(self, key: str, default: Any = None) -> Any:
         """Get value from cache."""
         try:
-            value = await self.backend.get(key)
+            value = self.l1.get(key) if self.l1 else None
+            if value is None:
+                generation = self.l1.generation if self.l1 else 0
+                value = await self.backend.get(key)
+                if self.l1:
+                    self.l1.fill(key, value, generation=generation)
             if value is None:
                 return default
-            return json.loads(value)
+            return self._decode(value, default)
         except Exception as e:
             logger.warning(f"Cache get error for {key}: {e}")
             return default
     
-    async def set(self, key: str, value: Any, ttl: Optional[Union[int, timedelta]] = None) -> bool:
-        """Set value in cache."""
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several values in one round trip; missing keys are left out."""
+        try:
+            values: Dict[str, Value] = {}
+            if self.l1:
+                for key in keys:
+                    value = self.l1.get(key)
+                    if value is not None:
+                        values[key] = value
+            remaining = [key for key in keys if key not in values]
+            if remaining:
+                generation = self.l1.generation if self.l1 else 0
+                fetched = await self.backend.get_many(remaining)
+                for key, value in zip(remaining, fetched):
+                    if self.l1:
+                        self.l1.fill(key, value, generation=generation)
+                    if value is not None:
+                        values[key] = value
+            decoded = {key: self._decode(value, _MISSING) for key, value in values.items()}
+            return {key: value for key, value in decoded.items() if value is not _MISSING}
+        except Exception as e:
+            logger.warning(f"Cache get_many error for {len(keys)} keys: {e}")
+            return {}
+    
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[Union[int, timedelta]] = None,
+        tags: Optional[List[str]] = None
+    ) -> bool:
+        """
+        Set value in cache.
+        
+        Args:
+            tags: Groups the key belongs to, for invalidate_tags()
+        """
+        return await self.set_many({key: value}, ttl, tags)
+    
+    async def set_many(
+        self,
+        items: Dict[str, Any],
+        ttl: Optional[Union[int, timedelta]] = None,
+        tags: Optional[List[str]] = None
+    ) -> bool:
+        """Set several values (same TTL and tags) in one round trip."""
         try:
             if isinstance(ttl, timedelta):
                 ttl = int(ttl.total_seconds())
-            value_str = json.dumps(value)
-            return await self.backend.set(key, value_str, ttl)
+            serialized = {key: self.codec.encode(value) for key, value in items.items()}
+            stored = await self.backend.set_many(serialized, ttl, tags)
+            if self.l1:
+                self.l1.invalidate(keys=serialized)
+                if stored:
+                    for key, data in serialized.items():
+                        self.l1.fill(key, data, ttl, count=False)
+                await self.l1.publish(keys=serialized)
+            return stored
         except Exception as e:
-            logger.warning(f"Cache set error for {key}: {e}")
+            logger.warning(f"Cache set error for {list(items)[:5]}: {e}")
             return False
     
     async def delete(self, key: str) -> bool:
         """Delete key from cache."""
         try:
-            return await self.backend.delete(key)
+            deleted = await self.backend.delete(key)
+            if self.l1:
+                self.l1.invalidate(keys=[key])
+                await self.l1.publish(keys=[key])
+            return deleted
         except Exception as e:
             logger.warning(f"Cache delete error for {key}: {e}")
             return False
     
+    async def delete_many(self, keys: List[str]) -> int:
+        """Delete several keys in one round trip."""
+        try:
+            deleted = await self.backend.delete_many(keys)
+            if self.l1:
+                self.l1.invalidate(keys=keys)
+                await self.l1.publish(keys=keys)
+            return deleted
+        except Exception as e:
+            logger.warning(f"Cache delete error for {len(keys)} keys: {e}")
+            return 0
+    
+    async def invalidate_tags(self, tags: List[str]) -> int:
+        """Delete every key written with any of the tags."""
+        try:
+            keys = await self.backend.invalidate_tags(tags)
+            if self.l1 and keys:
+                self.l1.invalidate(keys=keys)
+                await self.l1.publish(keys=keys)
+            return len(keys)
+        except Exception as e:
+            logger.warning(f"Cache tag invalidation error for {tags}: {e}")
+            return 0
+    
     async def invalidate_pattern(self, pattern: str) -> int:
-        """Delete all keys matching pattern."""
+        """Delete all keys matching pattern (scans the keyspace; prefer tags)."""
         try:
-            return await self.backend.invalidate_pattern(pattern)
+            count = await self.backend.invalidate_pattern(pattern)
+            if self.l1:
+                self.l1.invalidate(patterns=[pattern])
+                await self.l1.publish(patterns=[pattern])
+            return count
         except Exception as e:
             logger.warning(f"Cache pattern error for {pattern}: {e}")
             return 0
     
+    async def get_or_compute(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[Union[int, timedelta]] = None,
+        tags: Optional[List[str]] = None
+    ) -> Any:
+        """
+        Get a value, computing and caching it on a miss, without stampedes.
+        
+        - Single-flight: concurrent misses in this process share one loader
+          call; with Redis a short lease lets one worker compute while the
+          others wait for its result.
+        - Early refresh: approaching expiry, a request may recompute ahead of
+          time, with a probability that grows with the loader's duration and
+          the closeness of expiry (XFetch); hot keys don't all expire at once.
+        - Stale-while-revalidate: for stale_ttl seconds after expiry the old
+          value is still served while one request recomputes.
+        
+        The loader runs in the calling request, never in the background, so it
+        may use the request's DB session. None results are not cached.
+        
+        Args:
+            key: Cache key
+            loader: Async callable returning the value
+            ttl: Seconds the value counts as fresh
+            tags: Groups the key belongs to, for invalidate_tags()
+            
+        Returns:
+            Cached or freshly computed value
+        """
+        if isinstance(ttl, timedelta):
+            ttl = int(ttl.total_seconds())
+        
+        entry = await self._read_entry(key)
+        if entry is not None:
+            value, expires_at, delta = entry
+            if key in self._flights or not self._should_refresh(expires_at, delta):
+                return value
+            try:
+                return await self._compute(key, loader, ttl, tags, current=entry)
+            except Exception as e:
+                logger.warning(f"Cache refresh failed for {key}, serving cached value: {e}")
+                return value
+        
+        flight = self._flights.get(key)
+        if flight is not None:
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+            # The computing request was cancelled; compute here instead
+        return await self._compute(key, loader, ttl, tags)
+    
+    async def _compute(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int],
+        tags: Optional[List[str]],
+        current: Optional[Tuple[Any, Optional[float], float]] = None
+    ) -> Any:
+        """Run the loader as this process's single flight for key and store its result."""
+        flight = asyncio.get_running_loop().create_future()
+        flight.add_done_callback(_consume_exception)
+        self._flights[key] = flight
+        lease_key = f"lease:{key}"
+        leased = False
+        try:
+            leased = await self.backend.acquire_lease(lease_key, self._lease_token, self.lease_seconds)
+            entry = None
+            if not leased:
+                # Another worker is computing: keep serving the current value,
+                # or wait for theirs on a miss
+                entry = current or await self._wait_for_entry(key, lease_key)
+            if entry is not None:
+                value = entry[0]
+            else:
+                started = time.monotonic()
+                value = await loader()
+                if value is not None:
+                    await self._store_entry(key, value, ttl, tags, time.monotonic() - started)
+            flight.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if leased:
+                await self.backend.release_lease(lease_key, self._lease_token)
+    
+    async def _read_entry(self, key: str) -> Optional[Tuple[Any, Optional[float], float]]:
+        """Entry for get_or_compute, including one past its logical expiry."""
+        try:
+            value = self.l1.get(key) if self.l1 else None
+            if value is None:
+                generation = self.l1.generation if self.l1 else 0
+                value = await self.backend.get(key)
+                if self.l1:
+                    self.l1.fill(key, value, generation=generation)
+            return None if value is None else _open_entry(self.codec.decode(value))
+        except Exception as e:
+            logger.warning(f"Cache get error for {key}: {e}")
+            return None
+    
+    async def _wait_for_entry(self, key: str, lease_key: str) -> Optional[Tuple[Any, Optional[float], float]]:
+        """Wait for the lease holder's result; None if it gave up or produced nothing."""
+        deadline = time.monotonic() + self.lease_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LEASE_POLL_SECONDS)
+            value = await self.backend.get(key)
+            if value is not None:
+                return _open_entry(self.codec.decode(value))
+            if await self.backend.get(lease_key) is None:
+                return None
+        return None
+    
+    async def _store_entry(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int],
+        tags: Optional[List[str]],
+        delta: float
+    ) -> None:
+        expires_at = stored_ttl = None
+        if ttl:
+            # Kept stale_ttl past its logical expiry for stale-while-revalidate
+            expires_at = time.time() + ttl
+            stored_ttl = ttl + self.stale_ttl
+        
+        if isinstance(value, bytes):
+            # Stored as-is behind a fixed-size header (the codec keeps bytes raw)
+            header = _ENTRY_BYTES_HEADER.pack(math.nan if expires_at is None else expires_at, round(delta, 4))
+            entry = ENTRY_BYTES_PREFIX + header + value
+        else:
+            entry = {ENTRY_VALUE_FIELD: value, "delta": round(delta, 4)}
+            if expires_at is not None:
+                entry["exp"] = expires_at
+        await self.set(key, entry, ttl=stored_ttl, tags=tags)
+    
+    def _should_refresh(self, expires_at: Optional[float], delta: float) -> bool:
+        if expires_at is None:
+            return False
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            return True
+        if self.early_refresh_beta <= 0 or delta <= 0:
+            return False
+        # XFetch: refresh early with probability rising as expiry approaches
+        return delta * self.early_refresh_beta * -math.log(1.0 - random.random()) >= remaining
+    
+    def _decode(self, value: Value, default: Any) -> Any:
+        value, expires_at, _ = _open_entry(self.codec.decode(value))
+        if expires_at is not None and time.time() >= expires_at:
+            return default  # Only get_or_compute serves stale entries
+        return value
+    
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """L1 size and per-key-prefix hit/miss counts (None without L1)."""
+        return self.l1.snapshot() if self.l1 else None
+    
     async def close(self):
         """Close cache connection."""
+        if self.l1:
+            await self.l1.stop()
         await self.backend.close()
 
 
@@ -207,12 +904,12 @@ async def initialize_cache(
     if _cache_instance is not None:
         return _cache_instance
     
+    from app.config.cache_settings import cache_settings
     backend = None
     
     # Try Redis if enabled
     if use_redis:
         try:
-            from app.config.cache_settings import cache_settings
             url = redis_url or cache_settings.get_redis_url()
             options = redis_options or cache_settings.get_redis_options()
             
@@ -229,10 +926,35 @@ async def initialize_cache(
     
     # Fallback to memory
     if backend is None:
-        backend = MemoryBackend()
+        backend = MemoryBackend(
+            max_entries=cache_settings.CACHE_MEMORY_MAX_ENTRIES,
+            max_bytes=cache_settings.CACHE_MEMORY_MAX_BYTES
+        )
         logger.info("✓ In-memory cache initialized")
     
-    _cache_instance = Cache(backend)
+    # Per-process L1 in front of Redis
+    l1 = None
+    if isinstance(backend, RedisBackend) and cache_settings.CACHE_L1_ENABLED:
+        l1 = L1Cache(
+            channel=l1_invalidation_channel(),
+            max_entries=cache_settings.CACHE_L1_MAX_ENTRIES,
+            max_bytes=cache_settings.CACHE_L1_MAX_BYTES,
+            ttl=cache_settings.CACHE_L1_TTL_SECONDS
+        )
+        await l1.start(backend._redis)
+        logger.info(
+            f"✓ L1 cache enabled ({cache_settings.CACHE_L1_MAX_BYTES // (1024 * 1024)}MB, "
+            f"ttl={cache_settings.CACHE_L1_TTL_SECONDS}s)"
+        )
+    
+    _cache_instance = Cache(
+        backend,
+        l1,
+        codec=get_cache_codec(),
+        stale_ttl=cache_settings.CACHE_STALE_TTL_SECONDS,
+        early_refresh_beta=cache_settings.CACHE_EARLY_REFRESH_BETA,
+        lease_seconds=cache_settings.CACHE_COMPUTE_LEASE_SECONDS
+    )
     return _cache_instance
 
 
@@ -0,0 +1,213 @@
+"""
+Cache payload codec - compact serialization and compression for cached values.
+
+Payloads are a serializer (orjson, msgpack or json) plus compression (zstd,
+lz4 or zlib) when the serialized value is above a size threshold, behind a
+4-byte header:
+
+    b"\\x00" | format version | serializer id | compressor id | payload
+
+Values written before the codec existed are plain JSON text, which never
+starts with NUL, so decode() reads them as JSON. The ids in the header say how
+to decode, so changing the configured codec doesn't invalidate stored entries.
+
+Optional libraries (orjson, msgpack, zstandard, lz4) fall back to the standard
+library (json, zlib) when not installed.
+"""
+
+import base64
+import json
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from app.core import get_logger
+
+
+logger = get_logger(__name__)
+
+MAGIC = 0
+FORMAT_VERSION = 1
+HEADER_SIZE = 4
+
+# Marks a compressed payload armored as text (for stores that only take text)
+TEXT_PREFIX = "z1:"
+
+# Serializer ids (RAW: bytes values stored as-is)
+RAW, JSON, ORJSON, MSGPACK = 0, 1, 2, 3
+SERIALIZERS = {"raw": RAW, "json": JSON, "orjson": ORJSON, "msgpack": MSGPACK}
+
+# Compressor ids
+NONE, ZLIB, ZSTD, LZ4 = 0, 1, 2, 3
+COMPRESSORS = {"none": NONE, "zlib": ZLIB, "zstd": ZSTD, "lz4": LZ4}
+
+
+Default = Optional[Callable[[Any], Any]]
+
+
+def _json_dumps(value: Any, default: Default = None) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=default).encode()
+
+
+def _load_serializers() -> Dict[int, Tuple[Callable[[Any, Default], bytes], Callable[[bytes], Any]]]:
+    serializers = {
+        RAW: (lambda value, default: bytes(value), bytes),
+        JSON: (_json_dumps, json.loads),
+    }
+    try:
+        import orjson
+        serializers[ORJSON] = (
+            lambda value, default: orjson.dumps(value, default=default, option=orjson.OPT_NON_STR_KEYS),
+            orjson.loads,
+        )
+    except ImportError:
+        pass
+    try:
+        import msgpack
+        serializers[MSGPACK] = (
+            lambda value, default: msgpack.packb(value, default=default, use_bin_type=True),
+            lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False),
+        )
+    except ImportError:
+        pass
+    return serializers
+
+
+def _load_compressors(level: int) -> Dict[int, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    compressors = {
+        ZLIB: (lambda data: zlib.compress(data, min(max(level, 1), 9)), zlib.decompress),
+    }
+    try:
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=level)
+        decompressor = zstandard.ZstdDecompressor()
+        compressors[ZSTD] = (compressor.compress, decompressor.decompress)
+    except ImportError:
+        pass
+    try:
+        import lz4.frame
+        compressors[LZ4] = (lz4.frame.compress, lz4.frame.decompress)
+    except ImportError:
+        pass
+    return compressors
+
+
+class CacheCodec:
+    """Encodes values to compact bytes (or text) and decodes any supported format."""
+
+    def __init__(
+        self,
+        serializer: str = "orjson",
+        compression: str = "zstd",
+        min_compress_bytes: int = 1024,
+        level: int = 3
+    ):
+        """
+        Args:
+            serializer: "orjson", "msgpack" or "json" (falls back to orjson/json if not installed)
+            compression: "zstd", "lz4", "zlib" or "none" (falls back to zlib if not installed)
+            min_compress_bytes: Serialized size from which payloads are compressed
+            level: Compression level (zstd/zlib)
+        """
+        self._serializers = _load_serializers()
+        self._compressors = _load_compressors(level)
+        self.min_compress_bytes = min_compress_bytes
+
+        self.serializer = self._pick(serializer, SERIALIZERS, self._serializers, ["orjson", "json"])
+        self.compression = (
+            NONE if compression == "none"
+            else self._pick(compression, COMPRESSORS, self._compressors, ["zlib"])
+        )
+
+    def encode(self, value: Any, default: Default = None) -> bytes:
+        """
+        Serialize (bytes values pass through) and compress if worthwhile.
+        
+        Args:
+            value: Value to encode
+            default: Converts values the serializer can't handle (as json.dumps)
+        """
+        serializer = RAW if isinstance(value, (bytes, bytearray)) else self.serializer
+        try:
+            payload = self._serializers[serializer][0](value, default)
+        except TypeError:
+            if serializer != ORJSON:
+                raise
+            # e.g. integers beyond 64 bits
+            serializer, payload = JSON, _json_dumps(value, default)
+
+        compression = NONE
+        if self.compression != NONE and len(payload) >= self.min_compress_bytes:
+            compressed = self._compressors[self.compression][0](payload)
+            if len(compressed) < len(payload):
+                compression, payload = self.compression, compressed
+
+        return bytes((MAGIC, FORMAT_VERSION, serializer, compression)) + payload
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        """
+        Decode a payload from encode() or legacy JSON text.
+
+        Raises:
+            ValueError: If the payload uses an unknown format or a library
+                        that isn't installed here
+        """
+        if isinstance(data, str):
+            data = data.encode()
+        if not data or data[0] != MAGIC:
+            return json.loads(data)
+
+        version, serializer, compression = data[1], data[2], data[3]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cache payload version {version}")
+        if serializer not in self._serializers or (compression != NONE and compression not in self._compressors):
+            raise ValueError(f"Cache payload codec not available (serializer={serializer}, compression={compression})")
+
+        payload = data[HEADER_SIZE:]
+        if compression != NONE:
+            payload = self._compressors[compression][1](payload)
+        return self._serializers[serializer][1](payload)
+
+    def encode_text(self, value: Any, default: Default = None) -> str:
+        """
+        Text form for stores that only hold strings: JSON when small,
+        otherwise the compressed payload, base64-armored with TEXT_PREFIX.
+        """
+        data = self.encode(value, default)
+        if data[3] == NONE and data[2] in (JSON, ORJSON):
+            return data[HEADER_SIZE:].decode()
+        if data[3] == NONE:
+            return json.dumps(value, default=default)
+        return TEXT_PREFIX + base64.b64encode(data).decode()
+
+    def decode_text(self, text: str) -> Any:
+        """Decode encode_text() output (or legacy JSON text)."""
+        if text.startswith(TEXT_PREFIX):
+            return self.decode(base64.b64decode(text[len(TEXT_PREFIX):]))
+        return json.loads(text)
+
+    @staticmethod
+    def _pick(name: str, ids: Dict[str, int], available: Dict[int, Any], fallbacks: list) -> int:
+        for candidate in [name, *fallbacks]:
+            if ids.get(candidate) in available:
+                if candidate != name:
+                    logger.warning(f"Cache codec '{name}' not available, using '{candidate}'")
+                return ids[candidate]
+        raise ValueError(f"Unknown cache codec '{name}'")
+
+
+# Singleton instance
+_codec: Optional[CacheCodec] = None
+
+
+def get_cache_codec() -> CacheCodec:
+    """Get the shared cache codec (configured from cache settings)."""
+    global _codec
+    if _codec is None:
+        from app.config.cache_settings import cache_settings
+        _codec = CacheCodec(
+            serializer=cache_settings.CACHE_CODEC_SERIALIZER,
+            compression=cache_settings.CACHE_CODEC_COMPRESSION,
+            min_compress_bytes=cache_settings.CACHE_CODEC_COMPRESS_MIN_BYTES,
+            level=cache_settings.CACHE_CODEC_COMPRESSION_LEVEL,
+        )
+    return _codec
@@ -4,6 +4,8 @@ Database utilities for managing connections, sessions, and migrations.
 This module provides utilities for database operations including session
 management, connection pooling, and migration handling.
 """
+import asyncio
+import weakref
 from typing import AsyncGenerator, Optional
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
@@ -263,16 +265,30 @@ def get_async_session_factory():
     return db_manager.get_session_factory()
 
 
+# Session factories created by get_fresh_async_session_factory(), one per event loop.
+# Entries disappear together with their loop.
+_loop_session_factories: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, async_sessionmaker]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
 async def get_fresh_async_session_factory():
     """
-    Create a fresh async session factory bound to the CURRENT event loop.
+    Get an async session factory bound to the CURRENT event loop.
     
     CRITICAL: Use this in background jobs that run in isolated event loops
     (via asyncio.run()). The regular get_async_session_factory() returns
     a factory bound to the main event loop, which will fail in isolated loops.
     
-    This creates a new engine and session factory for the current loop context.
+    The engine is created once per event loop and reused afterwards, so a
+    long-lived loop (the standalone job worker) shares a single connection
+    pool across jobs while isolated per-job loops still get their own engine.
     """
+    loop = asyncio.get_running_loop()
+    cached_factory = _loop_session_factories.get(loop)
+    if cached_factory is not None:
+        return cached_factory
+    
     settings = DatabaseSettings()
     config = settings.get_database_config()
     
@@ -301,11 +317,13 @@ async def get_fresh_async_session_factory():
     fresh_engine = create_async_engine(url, **engine_kwargs)
     
     # Create session factory bound to this engine
-    return async_sessionmaker(
+    session_factory = async_sessionmaker(
         fresh_engine,
         class_=AsyncSession,
         expire_on_commit=False,
     )
+    _loop_session_factories[loop] = session_factory
+    return session_factory
 
 
 def initialize_db_manager_sync():
@@ -0,0 +1,167 @@
+"""
+Embedding Batcher - Micro-batches concurrent query embeddings.
+
+Each request used to embed its query on its own (vector store search, then
+semantic cache lookups), so N concurrent users meant N forward passes or API
+calls. The batcher collects query texts for a short window (or until a batch
+is full), embeds them with one batched call in a worker thread and hands each
+waiting coroutine its vector. Identical texts in a window share one slot, and
+recently embedded queries are answered from a small LRU, so the same query
+isn't embedded again by each stage of one request.
+
+Shared by RetrieverService and SemanticCache (one batcher per worker process).
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from app.core import get_logger
+
+
+logger = get_logger(__name__)
+
+EmbedMany = Callable[[List[str]], List[List[float]]]
+
+
+def query_embedding_function(embeddings: Embeddings) -> EmbedMany:
+    """
+    Batched equivalent of embeddings.embed_query.
+
+    Most providers embed queries and documents the same way, so
+    embed_documents is used; Cohere and Google mark queries with their own
+    input/task type, which is kept here.
+    """
+    name = type(embeddings).__name__
+    if name == "CohereEmbeddings" and hasattr(embeddings, "embed"):
+        return lambda texts: embeddings.embed(texts, input_type="search_query")
+    if name == "GoogleGenerativeAIEmbeddings":
+        return lambda texts: embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+    return embeddings.embed_documents
+
+
+class EmbeddingBatcher:
+    """Collects embed() calls into batched embedding calls."""
+
+    def __init__(
+        self,
+        embed_many: EmbedMany,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        cache_size: int = 1024
+    ):
+        """
+        Args:
+            embed_many: Blocking function embedding a list of texts (one vector per text)
+            max_batch_size: Texts per batched call; a full batch is sent at once
+            max_wait_ms: How long the first text of a batch waits for others
+            cache_size: Recently embedded texts kept (0 disables the cache)
+        """
+        self.embed_many = embed_many
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max(max_wait_ms, 0.0) / 1000
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """Embedding of one query text, computed in a batch with concurrent calls."""
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            return cached
+
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures belong to one event loop; start over on a new one
+            self._loop, self._pending, self._timer = loop, {}, None
+
+        future = self._pending.get(text)
+        if future is None:
+            future = loop.create_future()
+            self._pending[text] = future
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_wait, self._flush)
+
+        # Shielded: a cancelled caller must not cancel the result others wait for
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[str, asyncio.Future]) -> None:
+        texts = list(batch)
+        try:
+            vectors = await asyncio.to_thread(self.embed_many, texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Embedding provider returned {len(vectors)} vectors for {len(texts)} texts")
+        except Exception as e:
+            logger.warning(f"Batched embedding of {len(texts)} queries failed: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Retrieved here so abandoned futures don't log "never retrieved"
+                    future.exception()
+            return
+
+        logger.debug(f"Embedded {len(texts)} queries in one batch")
+        for text, vector in zip(texts, vectors):
+            vector = list(vector)
+            self._remember(text, vector)
+            future = batch[text]
+            if not future.done():
+                future.set_result(vector)
+
+    def _remember(self, text: str, vector: List[float]) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[text] = vector
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+def embedding_batching_enabled() -> bool:
+    """Whether query embeddings go through the shared batcher."""
+    from app.config.settings import settings
+    return settings.EMBEDDING_BATCH_ENABLED
+
+
+# Singleton instance
+_embedding_batcher: Optional[EmbeddingBatcher] = None
+
+
+def create_embedding_batcher(embed_many: EmbedMany) -> EmbeddingBatcher:
+    """Batcher for an embedding function, configured from the EMBEDDING_BATCH_* settings."""
+    from app.config.settings import settings
+    return EmbeddingBatcher(
+        embed_many,
+        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+        cache_size=settings.EMBEDDING_QUERY_CACHE_SIZE,
+    )
+
+
+def get_embedding_batcher() -> Optional[EmbeddingBatcher]:
+    """Get the shared query batcher of the embedding provider (None if batching is disabled)."""
+    global _embedding_batcher
+    if not embedding_batching_enabled():
+        return None
+    if _embedding_batcher is None:
+        from app.core.embedding_factory import get_embedding_provider
+        _embedding_batcher = create_embedding_batcher(query_embedding_function(get_embedding_provider()))
+    return _embedding_batcher
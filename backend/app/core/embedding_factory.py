@@ -55,6 +55,11 @@ def _create_embedding_provider() -> Embeddings:
     provider = config["provider"].lower()
     
     if provider == "huggingface":
+        runtime = config.get("runtime", "torch")
+        if runtime != "torch":
+            from app.core.onnx_inference import OnnxEmbeddings, load_onnx_model
+            return OnnxEmbeddings(load_onnx_model(config["model"], "feature-extraction", runtime))
+        
         try:
             from langchain_huggingface import HuggingFaceEmbeddings
         except ImportError:
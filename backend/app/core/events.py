@@ -6,13 +6,26 @@ Decouples event producers from consumers, improving response latency.
 
 Events are processed in background tasks without blocking the main request flow.
 
+Each subscribed handler gets its own bounded queue and a fixed pool of worker
+tasks, so a burst of events can never open more database sessions than there
+are workers:
+- Backpressure: emit() waits (up to EVENT_BACKPRESSURE_TIMEOUT) for queue space
+- Micro-batching: handlers with batch_size > 1 receive events in batches
+  (e.g. one multi-row INSERT per flush interval)
+- Durable spill: when a queue stays full, events of durable handlers are appended
+  to a local JSONL file and replayed once the bus has capacity again
+
 The EventBus is responsible for managing all events. Individual event handlers
 are defined in the app/events/ directory for better modularity and scalability.
 """
 
-from typing import Callable, Dict, List, Any, Optional, Tuple
+from typing import IO, Callable, Dict, Iterator, List, Any, Optional, Tuple
 from collections import defaultdict
+from contextlib import contextmanager
 import asyncio
+import json
+import os
+import threading
 from datetime import datetime, timezone
 import importlib
 import pkgutil
@@ -21,9 +34,16 @@ from pathlib import Path
 from app.events.base import BaseEventHandler
 import app.events
 
+from app.config.settings import settings
 from app.core import get_logger
 
 
+try:
+    import fcntl
+except ImportError:  # Windows: processes sharing a spill file are not serialized
+    fcntl = None
+
+
 logger = get_logger(__name__)
 
 
@@ -50,16 +70,179 @@ def _get_handler_display_name(handler: Callable) -> str:
     return getattr(handler, "__name__", handler.__class__.__name__)
 
 
+class EventSpillFile:
+    """
+    Append-only JSONL overflow file for events that could not be queued.
+    
+    Replay renames the file before reading it, so events spilled during a
+    replay go to a fresh file. Delivery is at-least-once: a crash during
+    replay re-delivers the events of the file being replayed.
+    
+    The file may be shared by several processes (uvicorn workers): appends
+    and the rename hold a file lock, and one process at a time replays,
+    holding a second lock from take() to commit(). If that process dies,
+    the OS releases its lock and another one replays the leftover file.
+    """
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.replay_path = self.path.with_name(self.path.name + ".replay")
+        self._lock = threading.Lock()
+        self._replay_lock: Optional[IO] = None  # Held from take() to commit()
+    
+    def append(self, event_type: str, handler_name: str, data: Dict[str, Any]) -> None:
+        """Append one event (blocking; call via asyncio.to_thread)."""
+        line = json.dumps(
+            {"event_type": event_type, "handler": handler_name, "data": data},
+            default=str
+        )
+        with self._lock, self._file_lock():
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def has_pending(self) -> bool:
+        """Whether there is anything to replay."""
+        return self.replay_path.exists() or self.path.exists()
+    
+    def take(self) -> List[Dict[str, Any]]:
+        """
+        Read all spilled events (blocking; call via asyncio.to_thread).
+        
+        A leftover replay file from an interrupted replay is read first.
+        Call commit() once the events are queued again. Returns nothing
+        while another process is replaying.
+        """
+        if not self._acquire_replay_lock():
+            return []
+        with self._lock, self._file_lock():
+            if not self.replay_path.exists():
+                if not self.path.exists():
+                    self._release_replay_lock()
+                    return []
+                os.replace(self.path, self.replay_path)
+        
+        events = []
+        with open(self.replay_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning("Skipping corrupt line in event spill file")
+        return events
+    
+    def commit(self) -> None:
+        """Delete the replayed file."""
+        try:
+            self.replay_path.unlink()
+        except FileNotFoundError:
+            pass
+        self._release_replay_lock()
+    
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock against appends and renames of other processes."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        lock_file = open(self.path.with_name(self.path.name + ".lock"), "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the file releases the lock
+            lock_file.close()
+    
+    def _acquire_replay_lock(self) -> bool:
+        """Become the replaying process; False if another one is."""
+        if fcntl is None or self._replay_lock is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path.with_name(self.path.name + ".replay.lock"), "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._replay_lock = lock_file
+        return True
+    
+    def _release_replay_lock(self) -> None:
+        if self._replay_lock is not None:
+            self._replay_lock.close()
+            self._replay_lock = None
+
+
+class _HandlerLane:
+    """Bounded queue plus worker pool for one subscribed handler."""
+    
+    def __init__(self, event_type: str, handler: Callable, handler_name: str, owner: Any):
+        self.event_type = event_type
+        self.handler = handler
+        self.name = handler_name
+        self.owner = owner
+        self.concurrency = max(1, getattr(owner, "max_concurrency", None) or settings.EVENT_WORKERS_PER_TYPE)
+        self.batch_size = max(1, min(getattr(owner, "batch_size", 1) or 1, settings.EVENT_BATCH_MAX_SIZE))
+        self.durable = bool(getattr(owner, "durable", False))
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+    
+    def ensure_started(self) -> None:
+        """Create the queue and workers on the running loop (first emit)."""
+        if self.workers and not all(w.done() for w in self.workers):
+            return
+        self.queue = asyncio.Queue(maxsize=settings.EVENT_QUEUE_MAX_SIZE)
+        self.workers = [
+            asyncio.create_task(self._worker(), name=f"event-{self.event_type}-{i}")
+            for i in range(self.concurrency)
+        ]
+    
+    async def _worker(self) -> None:
+        """Take events (or batches) off the queue and run the handler."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            
+            # Coalesce whatever arrives within the flush interval
+            if self.batch_size > 1:
+                deadline = loop.time() + settings.EVENT_BATCH_FLUSH_INTERVAL
+                while len(batch) < self.batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+            
+            try:
+                if self.batch_size > 1:
+                    await self.owner.handle_batch(batch)
+                else:
+                    await self.handler(batch[0])
+            except Exception as e:
+                logger.error(
+                    f"Error in handler {self.name} for '{self.event_type}' event: {e}",
+                    exc_info=True
+                )
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+
 class EventBus:
     """
-    Simple in-process event bus for asynchronous task execution.
+    In-process event bus with bounded, batching handler queues.
     
     Features:
-    - Non-blocking event emission
+    - Non-blocking event emission (bounded wait when a queue is full)
     - Multiple subscribers per event type
-    - Background task execution
+    - Fixed worker pool per handler (caps concurrent DB sessions)
+    - Micro-batching for handlers that support it
+    - Durable spill to disk for handlers that must not lose events
     - Error isolation (handler failures don't block other handlers)
-    - Graceful degradation (events can be processed even if some handlers fail)
     """
     
     _instance: Optional['EventBus'] = None
@@ -75,8 +258,9 @@ class EventBus:
         if hasattr(self, '_initialized'):
             return
         
-        self._handlers: Dict[str, List[Callable]] = defaultdict(list)
-        self._background_tasks: set = set()
+        self._lanes: Dict[str, List[_HandlerLane]] = defaultdict(list)
+        self._spill = EventSpillFile(settings.EVENT_SPILL_PATH)
+        self._replay_task: Optional[asyncio.Task] = None
         self._initialized = True
     
     def subscribe(self, event_type: str, handler: Callable) -> None:
@@ -85,27 +269,31 @@ class EventBus:
         
         Args:
             event_type: Type of event to listen for (e.g., "activity_logged")
-            handler: Async callable that receives event data
+            handler: Async callable that receives event data. BaseEventHandler
+                     instances may set max_concurrency, batch_size and durable.
         """
         normalized_handler, handler_name = _resolve_handler(handler)
 
-        self._handlers[event_type].append(normalized_handler)
+        self._lanes[event_type].append(
+            _HandlerLane(event_type, normalized_handler, handler_name, owner=handler)
+        )
         logger.debug(f"Subscribed {handler_name} to '{event_type}' events")
     
     async def emit(self, event_type: str, data: Dict[str, Any]) -> None:
         """
         Emit an event to all subscribed handlers.
         
-        Handlers are executed in background tasks without blocking.
-        Failures in individual handlers are logged but don't affect others.
+        The event is queued for each handler's workers. If a queue is full,
+        emit waits up to EVENT_BACKPRESSURE_TIMEOUT; after that the event is
+        spilled to disk (durable handlers) or dropped with a warning.
         
         Args:
             event_type: Type of event being emitted
             data: Event payload (will be passed to handlers)
         """
-        handlers = self._handlers.get(event_type, [])
+        lanes = self._lanes.get(event_type, [])
         
-        if not handlers:
+        if not lanes:
             logger.debug(f"No handlers registered for '{event_type}' event")
             return
         
@@ -116,62 +304,128 @@ class EventBus:
             "_emitted_at": datetime.now(timezone.utc).isoformat()
         }
         
-        # Execute handlers in background
-        for handler in handlers:
-            task = asyncio.create_task(
-                self._execute_handler(event_type, handler, enriched_data)
-            )
-            # Track background tasks to prevent garbage collection
-            self._background_tasks.add(task)
-            task.add_done_callback(self._background_tasks.discard)
-        
-        logger.debug(f"Emitted '{event_type}' event to {len(handlers)} handler(s)")
-    
-    async def _execute_handler(
-        self, 
-        event_type: str, 
-        handler: Callable, 
-        data: Dict[str, Any]
-    ) -> None:
+        self._ensure_replay_task()
+        for lane in lanes:
+            await self._enqueue(lane, enriched_data, timeout=settings.EVENT_BACKPRESSURE_TIMEOUT)
+        
+        logger.debug(f"Emitted '{event_type}' event to {len(lanes)} handler(s)")
+    
+    async def _enqueue(self, lane: _HandlerLane, data: Dict[str, Any], timeout: Optional[float]) -> bool:
+        """Queue an event for one handler, spilling or dropping it if the queue stays full."""
+        lane.ensure_started()
+        try:
+            lane.queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            pass
+        
+        try:
+            await asyncio.wait_for(lane.queue.put(data), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            pass
+        
+        if lane.durable:
+            await asyncio.to_thread(self._spill.append, lane.event_type, lane.name, data)
+            logger.warning(f"Event queue for {lane.name} is full; spilled '{lane.event_type}' event to disk")
+        else:
+            logger.warning(f"Event queue for {lane.name} is full; dropped '{lane.event_type}' event")
+        return False
+    
+    def _ensure_replay_task(self) -> None:
+        """Start the background spill replayer on the running loop."""
+        if self._replay_task is None or self._replay_task.done():
+            self._replay_task = asyncio.create_task(self._replay_loop(), name="event-spill-replay")
+    
+    async def _replay_loop(self) -> None:
+        """Periodically re-queue spilled events once queues have room."""
+        while True:
+            try:
+                await self.replay_spilled()
+            except Exception as e:
+                logger.error(f"Failed to replay spilled events: {e}", exc_info=True)
+            await asyncio.sleep(settings.EVENT_SPILL_REPLAY_INTERVAL)
+    
+    async def replay_spilled(self) -> int:
         """
-        Execute a single event handler with error isolation.
+        Re-queue events from the spill file.
         
-        Args:
-            event_type: Type of event
-            handler: Handler function to execute
-            data: Event data
+        Skipped while any durable queue is more than half full. Replayed
+        events wait for queue space (no timeout), so they are not spilled
+        again unless the bus is shutting down.
+        
+        Returns:
+            Number of events re-queued
         """
-        try:
-            await handler(data)
-        except Exception as e:
-            handler_name = _get_handler_display_name(handler)
-            logger.error(
-                f"Error in handler {handler_name} for '{event_type}' event: {e}",
-                exc_info=True
-            )
+        if not self._spill.has_pending():
+            return 0
+        
+        durable_lanes = [lane for lanes in self._lanes.values() for lane in lanes if lane.durable]
+        if any(
+            lane.queue is not None and lane.queue.qsize() > lane.queue.maxsize // 2
+            for lane in durable_lanes
+        ):
+            return 0
+        
+        events = await asyncio.to_thread(self._spill.take)
+        count = 0
+        for event in events:
+            for lane in self._lanes.get(event.get("event_type"), []):
+                if lane.name == event.get("handler"):
+                    await self._enqueue(lane, event.get("data") or {}, timeout=None)
+                    count += 1
+        await asyncio.to_thread(self._spill.commit)
+        
+        if count:
+            logger.info(f"Replayed {count} spilled event(s)")
+        return count
     
     async def wait_for_pending_tasks(self, timeout: float = 5.0) -> None:
         """
-        Wait for all pending background tasks to complete.
+        Drain queued events, then stop the workers.
         
         Useful during application shutdown to ensure events are processed.
+        Events of durable handlers still queued after the timeout are
+        spilled to disk and replayed on next start.
         
         Args:
             timeout: Maximum time to wait in seconds
         """
-        if not self._background_tasks:
-            return
-        
-        logger.info(f"Waiting for {len(self._background_tasks)} pending event task(s)...")
+        lanes = [lane for lanes in self._lanes.values() for lane in lanes if lane.queue is not None]
+        pending = sum(lane.queue.qsize() for lane in lanes)
+        if pending:
+            logger.info(f"Waiting for {pending} pending event(s)...")
         
         try:
             await asyncio.wait_for(
-                asyncio.gather(*self._background_tasks, return_exceptions=True),
+                asyncio.gather(*(lane.queue.join() for lane in lanes)),
                 timeout=timeout
             )
-            logger.info("All event tasks completed")
+            if pending:
+                logger.info("All event tasks completed")
         except asyncio.TimeoutError:
             logger.warning(f"Timeout waiting for event tasks after {timeout}s")
+        
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+            self._replay_task = None
+        
+        for lane in lanes:
+            for worker in lane.workers:
+                worker.cancel()
+            await asyncio.gather(*lane.workers, return_exceptions=True)
+            lane.workers = []
+            
+            # Persist what didn't make it
+            spilled = 0
+            while not lane.queue.empty():
+                data = lane.queue.get_nowait()
+                if lane.durable:
+                    await asyncio.to_thread(self._spill.append, lane.event_type, lane.name, data)
+                    spilled += 1
+            if spilled:
+                logger.warning(f"Spilled {spilled} unprocessed '{lane.event_type}' event(s) to disk")
+            lane.queue = None
 
 
 # ============================================================================
@@ -5,6 +5,7 @@ Reuses instance if already initialized (from startup).
 """
 
 from typing import Optional
+import threading
 from langchain_core.language_models import BaseLanguageModel
 
 from app.config.settings import settings
@@ -18,6 +19,8 @@ _llm_instance: Optional[BaseLanguageModel] = None
 _fallback_llm_instance: Optional[BaseLanguageModel] = None
 _internal_llm_instance: Optional[BaseLanguageModel] = None
 _classifier_llm_instance: Optional[BaseLanguageModel] = None
+# Background warm-up and first requests may ask for it at the same time
+_classifier_llm_lock = threading.Lock()
 
 
 def get_llm_provider() -> BaseLanguageModel:
@@ -249,8 +252,10 @@ def get_classifier_llm() -> Optional[BaseLanguageModel]:
     if _classifier_llm_instance is not None:
         return _classifier_llm_instance
     
-    # Create new instance
-    _classifier_llm_instance = _create_classifier_llm()
+    # Create new instance (once, even if called from several threads)
+    with _classifier_llm_lock:
+        if _classifier_llm_instance is None:
+            _classifier_llm_instance = _create_classifier_llm()
     return _classifier_llm_instance
 
 
@@ -0,0 +1,293 @@
+"""
+ONNX Inference - CPU runtime for local HuggingFace embeddings and cross-encoders.
+
+Alternative to the PyTorch models behind HuggingFaceEmbeddings and
+sentence-transformers' CrossEncoder (EMBEDDING_RUNTIME / RERANKER_RUNTIME):
+- "onnx": the configured model exported to ONNX (same outputs, faster on CPU)
+- "onnx-int8": the ONNX export with dynamically int8-quantized weights
+
+Models are exported once with optimum and cached under ONNX_MODEL_CACHE_DIR
+({model}/model.onnx, model.int8.onnx, tokenizer.json); later starts only load
+the cached files, so torch is not needed at runtime. A model can also be
+exported ahead of time (optimum-cli export onnx) into that directory.
+
+Inputs are sorted by length and cut into batches under a token budget; each
+batch is padded only to its length bucket (powers of two), so short texts
+don't pay for the longest one and ONNX Runtime sees few distinct shapes.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core import get_logger
+from app.core.exceptions import ConfigurationError
+
+
+logger = get_logger(__name__)
+
+ONNX_RUNTIMES = {"onnx", "onnx-int8"}
+
+MIN_BUCKET = 16
+
+
+def bucket_length(length: int, max_length: int) -> int:
+    """Padded length for a sequence: next power of two (at least MIN_BUCKET), capped at max_length."""
+    bucket = MIN_BUCKET
+    while bucket < length:
+        bucket *= 2
+    return min(bucket, max_length)
+
+
+def plan_batches(
+    lengths: Sequence[int],
+    max_length: int,
+    max_batch_size: int,
+    max_batch_tokens: int
+) -> List[Tuple[List[int], int]]:
+    """
+    Group inputs into batches of similar length.
+
+    Args:
+        lengths: Token count of each input
+        max_length: Longest sequence the model takes
+        max_batch_size: Most inputs per batch
+        max_batch_tokens: Most padded tokens (batch size x bucket) per batch
+
+    Returns:
+        (input positions, padded length) per batch
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: List[Tuple[List[int], int]] = []
+    current: List[int] = []
+    current_bucket = 0
+    for i in order:
+        # Longest first, so the batch's bucket is set by its first input
+        bucket = current_bucket or bucket_length(lengths[i], max_length)
+        if current and (len(current) >= max_batch_size or (len(current) + 1) * bucket > max_batch_tokens):
+            batches.append((current, current_bucket))
+            current, bucket = [], bucket_length(lengths[i], max_length)
+        current.append(i)
+        current_bucket = bucket
+    if current:
+        batches.append((current, current_bucket))
+    return batches
+
+
+def pad_batch(encodings: Sequence[Dict[str, List[int]]], length: int, pad_id: int = 0) -> Dict[str, np.ndarray]:
+    """Stack token ids/attention masks/type ids, right-padded to length."""
+    batch: Dict[str, np.ndarray] = {}
+    for name in encodings[0]:
+        array = np.full((len(encodings), length), pad_id if name == "input_ids" else 0, dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            values = encoding[name][:length]
+            array[row, :len(values)] = values
+        batch[name] = array
+    return batch
+
+
+def _model_dir(cache_dir: str, model_name: str) -> Path:
+    return Path(cache_dir) / re.sub(r"[^A-Za-z0-9._-]+", "--", model_name)
+
+
+def _ensure_model_files(model_name: str, task: str, cache_dir: str, quantize: bool) -> Path:
+    """Export (and quantize) the model on first use; returns the .onnx file to load."""
+    directory = _model_dir(cache_dir, model_name)
+    fp32_path = directory / "model.onnx"
+
+    if not fp32_path.exists():
+        try:
+            from optimum.exporters.onnx import main_export
+        except ImportError:
+            raise ConfigurationError(
+                f"No ONNX export of {model_name} in {directory} and optimum is not installed. "
+                "Install with: pip install 'optimum[onnxruntime]' (or export the model there once)"
+            )
+        logger.info(f"Exporting {model_name} to ONNX (one-time)...")
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(dir=directory.parent, prefix=f".{directory.name}-"))
+        try:
+            library = "sentence_transformers" if task == "feature-extraction" else "transformers"
+            main_export(model_name, output=staging, task=task, library_name=library)
+            # Another worker may have finished first; either export is fine
+            if not fp32_path.exists():
+                shutil.rmtree(directory, ignore_errors=True)
+                os.replace(staging, directory)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    if not quantize:
+        return fp32_path
+
+    int8_path = directory / "model.int8.onnx"
+    if not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"Quantizing {model_name} to int8 (one-time)...")
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".model.int8-", suffix=".onnx")
+        os.close(fd)
+        try:
+            quantize_dynamic(str(fp32_path), temp_path, weight_type=QuantType.QInt8)
+            os.replace(temp_path, int8_path)
+        finally:
+            Path(temp_path).unlink(missing_ok=True)
+    return int8_path
+
+
+class OnnxModel:
+    """ONNX Runtime session plus fast tokenizer with length-bucketed batching."""
+
+    def __init__(
+        self,
+        model_name: str,
+        task: str,
+        cache_dir: str,
+        quantize: bool = False,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 1,
+        max_length: int = 512,
+        max_batch_size: int = 32,
+        max_batch_tokens: int = 8192
+    ):
+        """
+        Args:
+            model_name: HuggingFace model id
+            task: "feature-extraction" (embeddings) or "text-classification" (cross-encoder)
+            cache_dir: Where exported models are kept
+            quantize: Use the int8-quantized export
+            intra_op_threads: Threads per operator (0 = ONNX Runtime default, one per physical core)
+            inter_op_threads: Operators run in parallel
+            max_length: Tokens per input (longer inputs are truncated)
+            max_batch_size: Most inputs per session run
+            max_batch_tokens: Most padded tokens per session run
+        """
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise ConfigurationError(
+                "onnxruntime not installed. Install with: pip install onnxruntime tokenizers"
+            )
+
+        model_path = _ensure_model_files(model_name, task, cache_dir, quantize)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.output_names = [o.name for o in self.session.get_outputs()]
+
+        self.tokenizer = Tokenizer.from_file(str(model_path.parent / "tokenizer.json"))
+        padding = self.tokenizer.padding
+        self.pad_id = padding["pad_id"] if padding else (self.tokenizer.token_to_id("[PAD]") or 0)
+        # Padding is done per batch (to its bucket), not by the tokenizer
+        self.tokenizer.no_padding()
+        self.max_length = max_length
+        self.tokenizer.enable_truncation(max_length)
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        # The Rust tokenizer can't be borrowed by two threads at once
+        self._tokenizer_lock = threading.Lock()
+
+        logger.info(f"✓ Loaded ONNX model {model_name} ({model_path.name}, outputs: {', '.join(self.output_names)})")
+
+    def run(self, inputs: Sequence[Any], output: Optional[str] = None) -> List[Dict[str, np.ndarray]]:
+        """
+        Tokenize and run inputs (texts or (text, text) pairs) in length-bucketed batches.
+
+        Returns:
+            Per input, in input order: {output name: row of that output,
+            "attention_mask": padded mask of the input}
+        """
+        with self._tokenizer_lock:
+            encoded = self.tokenizer.encode_batch(list(inputs))
+        encodings = [
+            {"input_ids": e.ids, "attention_mask": e.attention_mask, "token_type_ids": e.type_ids}
+            for e in encoded
+        ]
+
+        names = [output] if output else self.output_names
+        results: List[Optional[Dict[str, np.ndarray]]] = [None] * len(encodings)
+        lengths = [len(e.ids) for e in encoded]
+        for positions, length in plan_batches(lengths, self.max_length, self.max_batch_size, self.max_batch_tokens):
+            batch = pad_batch([encodings[i] for i in positions], length, self.pad_id)
+            values = self.session.run(names, {k: v for k, v in batch.items() if k in self.input_names})
+            for row, i in enumerate(positions):
+                results[i] = {name: value[row] for name, value in zip(names, values)}
+                results[i]["attention_mask"] = batch["attention_mask"][row]
+        return results
+
+
+class OnnxEmbeddings(Embeddings):
+    """LangChain embeddings from an ONNX export of a sentence-transformers model."""
+
+    def __init__(self, model: OnnxModel):
+        self.model = model
+        # sentence-transformers exports include pooling/normalization as "sentence_embedding"
+        self._pooled = "sentence_embedding" in model.output_names
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if self._pooled:
+            rows = self.model.run(texts, output="sentence_embedding")
+            return [row["sentence_embedding"].astype(np.float32).tolist() for row in rows]
+
+        # Plain transformer export: mean pooling over real tokens, then normalize
+        rows = self.model.run(texts, output=self.model.output_names[0])
+        vectors = []
+        for row in rows:
+            hidden = row[self.model.output_names[0]]
+            mask = row["attention_mask"][:, None]
+            pooled = (hidden * mask).sum(axis=0) / max(mask.sum(), 1)
+            vectors.append((pooled / max(np.linalg.norm(pooled), 1e-12)).astype(np.float32).tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class OnnxCrossEncoder:
+    """ONNX cross-encoder with the CrossEncoder.predict() interface used by RerankerService."""
+
+    def __init__(self, model: OnnxModel):
+        self.model = model
+
+    def predict(self, pairs: Sequence[Sequence[str]], **kwargs) -> np.ndarray:
+        """Relevance score per (query, passage) pair; sigmoid for single-logit models, as CrossEncoder."""
+        if not pairs:
+            return np.array([], dtype=np.float32)
+        output = self.model.output_names[0]
+        logits = np.stack([row[output] for row in self.model.run([tuple(p) for p in pairs], output=output)])
+        if logits.ndim == 2 and logits.shape[1] == 1:
+            return (1.0 / (1.0 + np.exp(-logits[:, 0]))).astype(np.float32)
+        return logits.astype(np.float32)
+
+
+def load_onnx_model(model_name: str, task: str, runtime: str) -> OnnxModel:
+    """Create an OnnxModel for a runtime setting ("onnx" or "onnx-int8") from the ONNX_* settings."""
+    from app.config.settings import settings
+
+    if runtime not in ONNX_RUNTIMES:
+        raise ConfigurationError(f"Unsupported ONNX runtime '{runtime}'. Supported: {', '.join(sorted(ONNX_RUNTIMES))}")
+    return OnnxModel(
+        model_name,
+        task=task,
+        cache_dir=settings.ONNX_MODEL_CACHE_DIR,
+        quantize=runtime == "onnx-int8",
+        intra_op_threads=settings.ONNX_INTRA_OP_THREADS,
+        inter_op_threads=settings.ONNX_INTER_OP_THREADS,
+        max_length=settings.ONNX_MAX_SEQUENCE_LENGTH,
+        max_batch_size=settings.ONNX_MAX_BATCH_SIZE,
+        max_batch_tokens=settings.ONNX_MAX_BATCH_TOKENS,
+    )
@@ -3,12 +3,13 @@ Reranker Factory - Creates reranker instances with singleton pattern.
 Uses LangChain wrappers for provider compatibility.
 
 Supported providers:
-- HuggingFace: Cross-encoder models via sentence-transformers (local)
+- HuggingFace: Cross-encoder models via sentence-transformers or ONNX Runtime (local)
 - Cohere: LangChain CohereRerank wrapper
 - Jina: LangChain JinaRerank wrapper
 """
 
 from typing import Optional, Any
+import threading
 
 from app.config.settings import settings
 from app.core.exceptions import ConfigurationError
@@ -20,6 +21,8 @@ logger = get_logger(__name__)
 
 # Global instance (initialized in startup)
 _reranker_instance: Optional[Any] = None
+# Background warm-up and first requests may ask for it at the same time
+_reranker_lock = threading.Lock()
 
 
 def get_reranker() -> Optional[Any]:
@@ -41,8 +44,10 @@ def get_reranker() -> Optional[Any]:
     if _reranker_instance is not None:
         return _reranker_instance
     
-    # Create new instance
-    _reranker_instance = _create_reranker()
+    # Create new instance (once, even if called from several threads)
+    with _reranker_lock:
+        if _reranker_instance is None:
+            _reranker_instance = _create_reranker()
     return _reranker_instance
 
 
@@ -58,6 +63,11 @@ def _create_reranker() -> Any:
     provider = config["provider"].lower()
     
     if provider == "huggingface":
+        runtime = config.get("runtime", "torch")
+        if runtime != "torch":
+            from app.core.onnx_inference import OnnxCrossEncoder, load_onnx_model
+            return OnnxCrossEncoder(load_onnx_model(config["model"], "text-classification", runtime))
+        
         try:
             from sentence_transformers import CrossEncoder
             return CrossEncoder(config["model"])
@@ -8,16 +8,47 @@ Distance Threshold (set in config):
 - Lower values = more similar (0.1 = very similar, 0.5 = moderately similar, 1.0+ = dissimilar)
 - Use as-is, no conversion needed
 - Example: RESPONSE_CACHE_DISTANCE_THRESHOLD=0.1 means find very similar queries
+
+Source tracking:
+- Entries record the ids of the files their context came from (source_file_ids)
+- A Redis set per file and tier ({index_name}:{tier}:file:{file_id}) lists the
+  entry keys built from that file, so re-ingesting or deleting a file evicts
+  only those entries instead of clearing the whole cache
+
+Chunk references (CONTEXT_CACHE_STORE_CHUNK_REFS):
+- Context entries hold chunk ids + scores instead of the joined context text
+- Chunk text and metadata live once in a shared store ({index_name}:chunk:{id}),
+  however many entries reference them, and are resolved back into documents
+  on a hit so sources can be shown again
+
+Payloads (entries, chunks) are encoded with the cache codec: JSON when small,
+compressed and base64-armored when large; encrypted payloads are compressed
+before encryption. Entries written as plain JSON are still read.
+
+Query vectors come from the embedding batcher (shared with the retriever when
+the vectorizer reuses the embedding config), so concurrent lookups are embedded
+in one batch and each stage of a request reuses the same vector.
 """
 
+import hashlib
 import json
 import random
-from typing import Optional, Dict, Any, Literal
+import threading
+from typing import Optional, Dict, Any, Iterable, List, Literal
+from langchain_core.documents import Document
+import redis.asyncio as aioredis
 from redisvl.extensions.cache.llm import SemanticCache as RedisVLSemanticCache
 
 from app.core import get_logger
 from app.config.settings import settings
 from app.core.cache import get_cache
+from app.core.cache_codec import get_cache_codec
+from app.core.embedding_batcher import (
+    EmbeddingBatcher,
+    create_embedding_batcher,
+    embedding_batching_enabled,
+    get_embedding_batcher,
+)
 from app.core.embedding_factory import get_redisvl_vectorizer
 from app.utils.encryption import encrypt, decrypt
 
@@ -25,6 +56,40 @@ logger = get_logger(__name__)
 
 CacheType = Literal["response", "context"]
 
+CACHE_TYPES: tuple = ("response", "context")
+
+
+def collect_source_file_ids(documents: Optional[Iterable[Any]]) -> List[int]:
+    """Distinct file ids from document metadata (sorted, for stable entries)."""
+    return _normalize_file_ids(
+        (getattr(doc, "metadata", None) or {}).get("file_id") for doc in documents or []
+    )
+
+
+def chunk_score(metadata: Dict[str, Any]) -> Optional[float]:
+    """Retrieval/rerank score recorded in chunk metadata, if any."""
+    score = metadata.get("score") or metadata.get("similarity") or metadata.get("relevance")
+    try:
+        return float(score) if score is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _chunk_id(text: str, metadata: Dict[str, Any]) -> str:
+    """Stable id of a chunk version (same file, position and text → same id)."""
+    source = f"{metadata.get('file_id')}:{metadata.get('chunk_index')}:{text}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]
+
+
+def _normalize_file_ids(file_ids: Optional[Iterable[Any]]) -> List[int]:
+    normalized = set()
+    for file_id in file_ids or []:
+        try:
+            normalized.add(int(file_id))
+        except (TypeError, ValueError):
+            continue
+    return sorted(normalized)
+
 
 class SemanticCache:
     """
@@ -44,6 +109,7 @@ class SemanticCache:
         "min_security_level": int,  # Minimum security level required to access
         "is_department_only": bool,  # Whether this is department-restricted
         "department_id": int | None,  # Department ID for department-restricted content
+        "source_file_ids": [int],  # Files the cached context/response was built from
         "variations": [
             {"text": Any},  # Just the response/context text
             {"text": Any},
@@ -57,6 +123,9 @@ class SemanticCache:
         self.config = settings.cache_settings.get_semantic_cache_config()
         self.response_cache: Optional[RedisVLSemanticCache] = None
         self.context_cache: Optional[RedisVLSemanticCache] = None
+        self.embedding_batcher: Optional[EmbeddingBatcher] = None
+        # Own connection to the RedisVL server, for the file reverse index and chunk store
+        self.redis_client: Optional[aioredis.Redis] = None
         
         # Initialize if at least one tier is enabled
         if self.config["response"]["enabled"] or self.config["context"]["enabled"]:
@@ -73,8 +142,16 @@ class SemanticCache:
             
             # Get RedisVL vectorizer from factory (reuses existing embedding config by default)
             vectorizer = get_redisvl_vectorizer()
+            if embedding_batching_enabled():
+                if settings.REDISVL_USE_EXISTING_EMBEDDING:
+                    self.embedding_batcher = get_embedding_batcher()
+                else:
+                    self.embedding_batcher = create_embedding_batcher(
+                        lambda texts: vectorizer.embed_many(texts, batch_size=len(texts))
+                    )
             
             redis_url = settings.cache_settings.get_redis_url() or "redis://localhost:6379"
+            self.redis_client = aioredis.from_url(redis_url, decode_responses=True)
             
             # Initialize response cache
             if self.config["response"]["enabled"]:
@@ -144,6 +221,7 @@ class SemanticCache:
             # Check cache
             results = cache.check(
                 prompt=query,
+                vector=await self._query_vector(query),
                 return_fields=["response", "metadata"],
                 num_results=1
             )
@@ -160,7 +238,7 @@ class SemanticCache:
                 return None, None
             
             try:
-                cache_entry = json.loads(response_data)
+                cache_entry = get_cache_codec().decode_text(response_data)
             except Exception as e:
                 logger.error(f"Error parsing cache entry: {e}")
                 return None, None
@@ -227,7 +305,8 @@ class SemanticCache:
         entry: Any,
         min_security_level: int,
         is_department_only: bool = False,
-        department_id: Optional[int] = None
+        department_id: Optional[int] = None,
+        source_file_ids: Optional[Iterable[int]] = None
     ):
         """
         Store entry in semantic cache with security metadata.
@@ -239,6 +318,7 @@ class SemanticCache:
             min_security_level: Minimum security clearance required to access this entry
             is_department_only: Whether content is department-restricted
             department_id: Department ID for department-restricted content
+            source_file_ids: Files the entry was built from (for invalidation)
         """
         cache = self._get_cache(cache_type)
         if not cache:
@@ -247,6 +327,7 @@ class SemanticCache:
         try:
             encrypt_enabled = self.config[cache_type].get("encrypt", False)
             max_entries = self.config[cache_type].get("max_entries", 1)
+            file_ids = _normalize_file_ids(source_file_ids)
             
             # Encrypt if enabled (at root level)
             text = entry
@@ -257,8 +338,10 @@ class SemanticCache:
                 is_encrypted = True
             
             # Check if entry exists
+            vector = await self._query_vector(query)
             results = cache.check(
                 prompt=query,
+                vector=vector,
                 return_fields=["response"],
                 num_results=1
             )
@@ -266,7 +349,7 @@ class SemanticCache:
             if results and results[0].get("response"):
                 # Entry exists, add variation
                 try:
-                    cache_entry = json.loads(results[0]["response"])
+                    cache_entry = get_cache_codec().decode_text(results[0]["response"])
                     variations = cache_entry.get("variations", [])
                     
                     # Check if at max capacity
@@ -280,11 +363,16 @@ class SemanticCache:
                     # Update cache entry
                     cache_entry["variations"] = variations
                     cache_entry["is_encrypted"] = is_encrypted
+                    cache_entry["source_file_ids"] = _normalize_file_ids(
+                        cache_entry.get("source_file_ids", []) + file_ids
+                    )
                     
-                    cache.store(
+                    key = cache.store(
                         prompt=query,
-                        response=json.dumps(cache_entry)
+                        response=get_cache_codec().encode_text(cache_entry),
+                        vector=vector
                     )
+                    await self._index_sources(cache_type, key, cache_entry["source_file_ids"])
                     
                     logger.debug(
                         f"Added variation to {cache_type} cache (total={len(variations)}/{max_entries}) for query: '{query[:50]}...'"
@@ -299,13 +387,16 @@ class SemanticCache:
                     "min_security_level": min_security_level,
                     "is_department_only": is_department_only,
                     "department_id": department_id,
+                    "source_file_ids": file_ids,
                     "variations": [{"text": text}]
                 }
                 
-                cache.store(
+                key = cache.store(
                     prompt=query,
-                    response=json.dumps(cache_entry)
+                    response=get_cache_codec().encode_text(cache_entry),
+                    vector=vector
                 )
+                await self._index_sources(cache_type, key, file_ids)
                 
                 logger.debug(
                     f"Stored new {cache_type} cache entry for query: '{query[:50]}...' "
@@ -344,6 +435,158 @@ class SemanticCache:
         except Exception as e:
             logger.error(f"Error clearing semantic cache: {e}", exc_info=True)
     
+    async def invalidate_files(self, file_ids: Iterable[int]) -> int:
+        """
+        Evict the entries (both tiers) built from any of the given files.
+        
+        Used when files are re-ingested or deleted, so longer TTLs never
+        serve answers from outdated documents.
+        
+        Args:
+            file_ids: FileUpload ids whose cached entries are stale
+        
+        Returns:
+            Number of cache entries removed
+        """
+        file_ids = _normalize_file_ids(file_ids)
+        redis_client = self.redis_client
+        if not file_ids or redis_client is None:
+            return 0
+        
+        evicted = 0
+        try:
+            for cache_type in CACHE_TYPES:
+                if not self._get_cache(cache_type):
+                    continue
+                
+                index_keys = [self._file_index_key(cache_type, file_id) for file_id in file_ids]
+                entry_keys = await redis_client.sunion(index_keys)
+                if entry_keys:
+                    evicted += await redis_client.delete(*entry_keys)
+                await redis_client.delete(*index_keys)
+            
+            if evicted:
+                logger.info(f"Evicted {evicted} semantic cache entries for files {file_ids}")
+        except Exception as e:
+            logger.error(f"Error invalidating semantic cache for files {file_ids}: {e}", exc_info=True)
+        
+        return evicted
+    
+    async def store_chunks(self, documents: List[Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Save chunks in the shared chunk store and return references to them.
+        
+        Each chunk is written once per version however many context entries
+        use it; every write refreshes the TTL to the context tier TTL, so a
+        chunk outlives every entry that references it. Chunk keys are added
+        to the file's context index so invalidate_files() removes them too.
+        
+        Args:
+            documents: Retrieved context documents, in prompt order
+        
+        Returns:
+            [{"id": str, "score": float | None}, ...] or None if Redis is unavailable
+        """
+        redis_client = self.redis_client
+        if redis_client is None:
+            return None
+        
+        ttl = self.config["context"]["ttl_seconds"]
+        encrypt_enabled = self.config["context"].get("encrypt", False)
+        refs: List[Dict[str, Any]] = []
+        
+        pipe = redis_client.pipeline(transaction=False)
+        for doc in documents:
+            metadata = dict(getattr(doc, "metadata", None) or {})
+            chunk_id = _chunk_id(doc.page_content, metadata)
+            key = self._chunk_key(chunk_id)
+            
+            chunk = {"text": doc.page_content, "metadata": metadata}
+            if encrypt_enabled:
+                payload = self._encrypt_data(chunk, "context")
+            else:
+                payload = get_cache_codec().encode_text(chunk, default=str)
+            pipe.set(key, payload, ex=ttl)
+            
+            for file_id in _normalize_file_ids([metadata.get("file_id")]):
+                index_key = self._file_index_key("context", file_id)
+                pipe.sadd(index_key, key)
+                pipe.expire(index_key, ttl)
+            
+            refs.append({"id": chunk_id, "score": chunk_score(metadata)})
+        await pipe.execute()
+        
+        return refs
+    
+    async def resolve_chunks(self, refs: List[Dict[str, Any]]) -> Optional[List[Document]]:
+        """
+        Turn chunk references from a context entry back into documents.
+        
+        Returns:
+            Documents in reference order (score restored into metadata), or
+            None if any chunk is gone (e.g. its file was re-ingested), so the
+            caller treats the entry as a miss
+        """
+        redis_client = self.redis_client
+        if redis_client is None or not refs:
+            return None
+        
+        try:
+            payloads = await redis_client.mget([self._chunk_key(ref["id"]) for ref in refs])
+            documents: List[Document] = []
+            for ref, payload in zip(refs, payloads):
+                if payload is None:
+                    logger.debug(f"Chunk {ref['id']} no longer cached, treating context entry as miss")
+                    return None
+                
+                chunk = self._decrypt_data(payload, "context")
+                if not isinstance(chunk, dict):
+                    return None
+                
+                metadata = chunk.get("metadata") or {}
+                if ref.get("score") is not None:
+                    metadata["score"] = ref["score"]
+                documents.append(Document(page_content=chunk.get("text", ""), metadata=metadata))
+            
+            return documents
+        except Exception as e:
+            logger.error(f"Error resolving cached chunks: {e}", exc_info=True)
+            return None
+    
+    async def _query_vector(self, query: str) -> Optional[List[float]]:
+        """Query embedding from the batcher; None lets RedisVL vectorize the prompt itself."""
+        if self.embedding_batcher is None:
+            return None
+        try:
+            return await self.embedding_batcher.embed(query)
+        except Exception as e:
+            logger.warning(f"Batched query embedding failed, using the cache vectorizer: {e}")
+            return None
+    
+    def _chunk_key(self, chunk_id: str) -> str:
+        """Shared chunk store key."""
+        return f"{self.config['index_name']}:chunk:{chunk_id}"
+    
+    async def _index_sources(self, cache_type: CacheType, key: str, file_ids: List[int]) -> None:
+        """Add an entry key to the reverse index of each of its source files."""
+        redis_client = self.redis_client
+        if not key or not file_ids or redis_client is None:
+            return
+        
+        # Index sets live as long as the newest entry they point to; keys of
+        # entries that expired earlier are harmless (deleting them is a no-op)
+        ttl = self.config[cache_type]["ttl_seconds"]
+        pipe = redis_client.pipeline(transaction=False)
+        for file_id in file_ids:
+            index_key = self._file_index_key(cache_type, file_id)
+            pipe.sadd(index_key, key)
+            pipe.expire(index_key, ttl)
+        await pipe.execute()
+    
+    def _file_index_key(self, cache_type: CacheType, file_id: int) -> str:
+        """Redis set of entry keys built from one file."""
+        return f"{self.config['index_name']}:{cache_type}:file:{file_id}"
+    
     def _get_cache(self, cache_type: CacheType) -> Optional[RedisVLSemanticCache]:
         """Get the appropriate cache instance."""
         if cache_type == "response":
@@ -396,11 +639,10 @@ class SemanticCache:
             return False, entry.get("is_department_only", False)
     
     def _encrypt_data(self, data: Any, cache_type: CacheType) -> str:
-        """Encrypt data for caching."""
+        """Encrypt data for caching (compressed codec payload, so one base64 layer)."""
         try:
-            json_data = json.dumps(data) if not isinstance(data, str) else data
             purpose = f"semantic_cache_{cache_type}"
-            return encrypt(json_data, purpose=purpose, version=1)
+            return encrypt(get_cache_codec().encode(data, default=str), purpose=purpose, version=1)
         except Exception as e:
             logger.error(f"Encryption failed for {cache_type}: {e}")
             return json.dumps(data) if not isinstance(data, str) else data
@@ -410,15 +652,16 @@ class SemanticCache:
         try:
             if ":" in encrypted_data and encrypted_data.startswith("v"):
                 purpose = f"semantic_cache_{cache_type}"
-                decrypted = decrypt(encrypted_data, purpose=purpose)
+                decrypted = decrypt(encrypted_data, purpose=purpose, as_bytes=True)
                 try:
-                    return json.loads(decrypted)
+                    # Codec payload, or JSON from before the codec
+                    return get_cache_codec().decode(decrypted)
                 except:
-                    return decrypted
+                    return decrypted.decode()
             else:
                 # Unencrypted data
                 try:
-                    return json.loads(encrypted_data)
+                    return get_cache_codec().decode_text(encrypted_data)
                 except:
                     return encrypted_data
         except Exception as e:
@@ -427,6 +670,8 @@ class SemanticCache:
 
 # Singleton instance
 _semantic_cache: Optional[SemanticCache] = None
+# Background warm-up and first requests may ask for it at the same time
+_semantic_cache_lock = threading.Lock()
 _semantic_cache_supported: Optional[bool] = None
 _semantic_cache_enabled: Optional[bool] = False  # Global enabled status: config + support verified 
 
@@ -523,8 +768,22 @@ def get_semantic_cache() -> Optional[SemanticCache]:
     if not is_semantic_cache_enabled():
         return None
     
-    # Create instance if needed
+    # Create instance if needed (once, even if called from several threads)
     if _semantic_cache is None:
-        _semantic_cache = SemanticCache()
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticCache()
     
-    return _semantic_cache
\ No newline at end of file
+    return _semantic_cache
+
+
+async def invalidate_semantic_cache_for_files(file_ids: Iterable[int]) -> int:
+    """
+    Evict semantic cache entries built from the given files.
+    
+    No-op (returns 0) when the semantic cache is disabled.
+    """
+    cache = get_semantic_cache()
+    if cache is None:
+        return 0
+    return await cache.invalidate_files(file_ids)
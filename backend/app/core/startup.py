@@ -1,18 +1,23 @@
 """
 Application Startup Controller.
-Initializes critical components on server start in proper order:
+Initializes components on server start as a dependency graph:
 
-1. Database (first - everything depends on it)
-2. Job Queue (for processing)
-3. Embedding Provider (for vector operations)
-4. Vector Store (uses embedding provider)
-5. LLM Provider (for AI operations)
-6. Email Client (for notifications)
+1. Database and cache (concurrently), then settings from the DB
+2. Embeddings → vector store, LLM providers, email, event handlers (concurrently)
+3. Job queue (once the components its jobs use are ready)
+
+Optional components (reranker, classifier LLM, semantic cache) are warmed in
+the background after the server is up (STARTUP_BACKGROUND_WARMUP); until then
+they are created on first use. Blocking model loads run in worker threads.
+Readiness is tracked per component (see StartupGraph).
 
 Database seeding is NOT performed here - it's called via setup.py or CLI.
 See app/seeders/ for seeding operations.
 """
 
+from typing import Dict, List, Optional
+import asyncio
+
 from app.core import get_logger
 from app.core.cache import (
     initialize_cache,
@@ -31,9 +36,11 @@ from app.core.llm_factory import (
     get_classifier_llm
 )
 from app.core.vector_store_factory import get_vector_store, get_retriever
+from app.core.vector_snapshots import VectorSnapshotWatcher, get_snapshot_store, snapshots_enabled
 from app.core.semantic_cache import verify_semantic_cache_support, get_semantic_cache
 from app.core.database import DatabaseManager
 from app.core.settings_loader import load_settings_by_category
+from app.core.startup_graph import StartupGraph, StartupStep
 from app.config import (
     settings as settings_module,
     settings,
@@ -68,21 +75,24 @@ class StartupController:
         self.llm_provider = None
         self.fallback_llm_provider = None
         self.retriever = None
+        self.snapshot_watcher = None
         self.cache_manager = None
         self.internal_llm_provider = None
         self.classifier_llm_provider = None
+        self.startup_graph = StartupGraph()
+        self.warmup_task: Optional[asyncio.Task] = None
     
     async def initialize(self):
         """
-        Initialize all critical components in proper order.
+        Initialize components concurrently in dependency order.
         
-        Order matters:
-        1. Database (required by all other components)
-        2. Job Queue (for task processing)
-        3. Embedding Provider (for vector operations)
-        4. Vector Store (uses embeddings)
-        5. LLM Provider (optional AI operations)
-        6. Email Client (optional notifications)
+        1. Database and cache, then settings from the DB (everything reads them)
+        2. Embeddings (CRITICAL) → vector store; LLM providers; email; event handlers
+        3. Job queue, after the components its jobs use
+        4. Optional components (reranker, classifier LLM, semantic cache):
+           warmed in the background, or awaited here if STARTUP_BACKGROUND_WARMUP=false
+        
+        STARTUP_PARALLEL=false runs the same steps one after the other.
         
         This is called during FastAPI startup event.
         
@@ -94,66 +104,117 @@ class StartupController:
             return
         
         try:
-            # ========== STEP 1: Database (CRITICAL) ==========
-            await self._initialize_database()
-            
-            # ========== STEP 2: Cache (CRITICAL for settings) ==========
-            await self._initialize_cache()
-            
-            # ========== STEP 3: Load Settings from DB (CRITICAL) ==========
-            await self._load_db_settings()
+            parallel = settings.app_settings.STARTUP_PARALLEL
             
-            # ========== STEP 4: Embedding Provider (CRITICAL) ==========
-            await self._initialize_embeddings()
+            # ========== STAGE 1: Database, cache, DB settings (CRITICAL) ==========
+            await self.startup_graph.run([
+                StartupStep("database", self._initialize_database),
+                StartupStep("cache", self._initialize_cache),
+                StartupStep("settings", self._load_db_settings, depends_on=("database", "cache")),
+            ], parallel=parallel)
             
-            # ========== STEP 5: Vector Store (CRITICAL) ==========
-            await self._initialize_vector_store()
+            # Which components exist is decided by the settings loaded above
+            self._validate_decomposer_reranker_config()
+            background = settings.app_settings.STARTUP_BACKGROUND_WARMUP
             
-            # ========== STEP 6: LLM Provider (CRITICAL) ==========
-            await self._initialize_llm()
+            # ========== STAGE 2: Components ==========
+            await self.startup_graph.run(self._component_steps(), parallel=parallel)
             
-            # ========== STEP 6.1: Fallback LLM Provider (OPTIONAL) ==========
-            if settings.llm_settings.ENABLE_FALLBACK_LLM:
-                await self._initialize_fallback_llm()
+            # ========== STAGE 3: Optional components (warm-up) ==========
+            optional_steps = self._optional_steps(critical=not background)
+            if background:
+                self.warmup_task = asyncio.create_task(
+                    self._warm_up(optional_steps, parallel), name="startup-warmup"
+                )
             else:
-                logger.info("Fallback LLM: DISABLED")
+                await self.startup_graph.run(optional_steps, parallel=parallel)
 
-            # ========== STEP 7: Internal LLM Provider (optional) ==========
-            if settings.llm_settings.ENABLE_INTERNAL_LLM:
-                await self._initialize_internal_llm()
-
-            if settings.app_settings.ENABLE_RERANKER:
-                await self._initialize_reranker()
-            
-            # ========== STEP 8: Classifier/Decomposer LLM (optional) ==========
-            if settings.llm_settings.ENABLE_LLM_CLASSIFIER or settings.llm_settings.ENABLE_QUERY_DECOMPOSER:
-                await self._initialize_classifier_llm()
-            
-            # ========== STEP 9: Validate decomposer/reranker configuration ==========
-            self._validate_decomposer_reranker_config()
-            
-            
-            # ========== STEP 9: Email Client (OPTIONAL) ==========
+            self.initialized = True
+            logger.info("✓ Application initialization completed successfully")
+        
+        except Exception as e:
+            logger.error(f"✗ Application initialization failed: {e}", exc_info=True)
+            raise
+    
+    def _component_steps(self) -> List[StartupStep]:
+        """Components the API needs before serving requests."""
+        steps = [
+            StartupStep("embeddings", self._initialize_embeddings, depends_on=("settings",)),
+            StartupStep("vector_store", self._initialize_vector_store, depends_on=("embeddings",), critical=False),
+            StartupStep("llm", self._initialize_llm, depends_on=("settings",), critical=False),
+            StartupStep("email", self._initialize_email_client, depends_on=("settings",), critical=False),
+            StartupStep("event_handlers", self._initialize_event_handlers, depends_on=("settings",), critical=False),
+        ]
+        
+        if settings.llm_settings.ENABLE_FALLBACK_LLM:
+            steps.append(StartupStep("fallback_llm", self._initialize_fallback_llm, depends_on=("settings",)))
+        else:
+            logger.info("Fallback LLM: DISABLED")
+        
+        if settings.llm_settings.ENABLE_INTERNAL_LLM:
+            steps.append(
+                StartupStep("internal_llm", self._initialize_internal_llm, depends_on=("settings",), critical=False)
+            )
+        
+        # Jobs (ingestion, email) use these, so they are scheduled once they are ready
+        steps.append(StartupStep(
+            "jobs",
+            self._initialize_job_queue,
+            depends_on=("embeddings", "vector_store", "email", "event_handlers"),
+            critical=False,
+        ))
+        return steps
+    
+    def _optional_steps(self, critical: bool) -> List[StartupStep]:
+        """Components created on first use anyway; warming them only saves the first request's wait."""
+        steps = []
+        if settings.app_settings.ENABLE_RERANKER:
+            steps.append(StartupStep("reranker", self._initialize_reranker, depends_on=("settings",), critical=critical))
+        
+        if settings.llm_settings.ENABLE_LLM_CLASSIFIER or settings.llm_settings.ENABLE_QUERY_DECOMPOSER:
+            steps.append(StartupStep(
+                "classifier_llm", self._initialize_classifier_llm, depends_on=("settings",), critical=False
+            ))
+        
+        steps.append(StartupStep(
+            "semantic_cache", self._initialize_semantic_cache, depends_on=("cache", "embeddings"), critical=False
+        ))
+        return steps
+    
+    async def _warm_up(self, steps: List[StartupStep], parallel: bool):
+        """Initialize optional components while the API is already serving."""
+        try:
+            await self.startup_graph.run(steps, parallel=parallel)
+            logger.info("✓ Optional components warmed up")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠ Background warm-up failed: {e}")
+    
+    async def initialize_worker(self):
+        """
+        Initialize only what the standalone job worker (run_worker.py) needs.
+        
+        Database, cache, DB settings and email are set up eagerly. Embeddings,
+        vector store and LLMs are created lazily by the ingestion pipeline the
+        first time a job needs them, so short email jobs never pay for them.
+        """
+        if self.initialized:
+            logger.warning("StartupController already initialized")
+            return
+        
+        try:
+            await self._initialize_database()
+            await self._initialize_cache()
+            await self._load_db_settings()
             await self._initialize_email_client()
-            
-            # ========== STEP 10: Event Bus (OPTIONAL) ==========
-            # Initialize event handlers for background task processing
             init_event_handlers()
-
-            # ========== STEP 11: Semantic Cache (OPTIONAL) ==========
-            # Initialize semantic cache once at startup
-            await self._initialize_semantic_cache()
             
-            # ========== STEP 12: Job Queue (OPTIONAL, at end) ==========
-            # Jobs scheduled last to ensure all dependencies are ready
-            await self._initialize_job_queue()            
-            
-
             self.initialized = True
-            logger.info("✓ Application initialization completed successfully")
+            logger.info("✓ Job worker initialization completed successfully")
         
         except Exception as e:
-            logger.error(f"✗ Application initialization failed: {e}", exc_info=True)
+            logger.error(f"✗ Job worker initialization failed: {e}", exc_info=True)
             raise
     
     async def _initialize_database(self):
@@ -241,15 +302,19 @@ class StartupController:
             # Don't raise - email is optional, app should still start
             logger.warning("Email features will be unavailable")
     
+    async def _initialize_event_handlers(self):
+        """Register event handlers for background task processing."""
+        init_event_handlers()
+    
     async def _initialize_embeddings(self):
         """Initialize and warm up embedding provider."""
         try:
-            # Get embedding provider (creates instance if needed)
-            self.embedding_provider = get_embedding_provider()
+            # Get embedding provider (creates instance if needed; loads local models)
+            self.embedding_provider = await asyncio.to_thread(get_embedding_provider)
             
             # Test embedding generation to ensure it's working
             test_text = "Application startup test"
-            test_embedding = self.embedding_provider.embed_query(test_text)
+            test_embedding = await asyncio.to_thread(self.embedding_provider.embed_query, test_text)
             
             if not test_embedding or len(test_embedding) == 0:
                 raise RuntimeError("Embedding provider returned invalid result")
@@ -261,11 +326,21 @@ class StartupController:
     async def _initialize_vector_store(self):
         """Initialize vector store (optional - catches errors without blocking startup)."""
         try:
-            # Get vector store with embeddings
-            store = get_vector_store(
+            # Get vector store with embeddings (loads a local index from disk)
+            store = await asyncio.to_thread(
+                get_vector_store,
                 embeddings=self.embedding_provider,
                 provider=getattr(settings, "VECTOR_DB_PROVIDER", None)
             )
+            
+            # Pick up FAISS snapshots published by ingestion (any process) without a restart
+            if snapshots_enabled():
+                self.snapshot_watcher = VectorSnapshotWatcher(
+                    get_snapshot_store(),
+                    self.embedding_provider,
+                    poll_seconds=settings.VECTOR_SNAPSHOT_POLL_SECONDS,
+                )
+                await self.snapshot_watcher.start()
         
         except Exception as e:
             logger.warning(f"⚠ Vector store initialization skipped: {e}", exc_info=True)
@@ -274,7 +349,7 @@ class StartupController:
         """Initialize LLM provider (optional - catches errors without blocking startup)."""
         try:
             # Get LLM provider (creates instance if needed)
-            self.llm_provider = get_llm_provider()
+            self.llm_provider = await asyncio.to_thread(get_llm_provider)
         
         except Exception as e:
             logger.warning(f"⚠ LLM provider initialization skipped: {e}")
@@ -283,11 +358,11 @@ class StartupController:
         """Initialize and warm up fallback LLM provider."""
         try:
             # Get fallback LLM provider (creates instance if needed)
-            self.fallback_llm_provider = get_fallback_llm_provider()
+            self.fallback_llm_provider = await asyncio.to_thread(get_fallback_llm_provider)
             
             # Test fallback LLM invocation to ensure it's working
             test_prompt = "Hello"
-            test_response = self.fallback_llm_provider.invoke(test_prompt)
+            test_response = await asyncio.to_thread(self.fallback_llm_provider.invoke, test_prompt)
             
             if not test_response:
                 raise RuntimeError("Fallback LLM provider returned invalid result")
@@ -299,7 +374,7 @@ class StartupController:
     async def _initialize_internal_llm(self):
         """Initialize internal LLM provider (optional)."""
         try:
-            self.internal_llm_provider = get_internal_llm_provider()
+            self.internal_llm_provider = await asyncio.to_thread(get_internal_llm_provider)
 
         except Exception as e:
             logger.warning(f"⚠ Internal LLM initialization skipped: {e}")
@@ -307,7 +382,7 @@ class StartupController:
     async def _initialize_classifier_llm(self):
         """Initialize classifier/decomposer LLM provider (optional)."""
         try:
-            self.classifier_llm_provider = get_classifier_llm()
+            self.classifier_llm_provider = await asyncio.to_thread(get_classifier_llm)
 
         except Exception as e:
             logger.warning(f"⚠ Classifier/decomposer LLM initialization skipped: {e}")
@@ -316,8 +391,7 @@ class StartupController:
         """Initialize reranker if enabled."""
         try:
             if settings.app_settings.ENABLE_RERANKER:
-                
-                get_reranker()
+                await asyncio.to_thread(get_reranker)
         except Exception as e:
             logger.error(f"Failed to initialize reranker: {e}")
             raise
@@ -414,8 +488,8 @@ class StartupController:
                     logger.warning("⚠ Semantic Cache: DISABLED (not supported - RediSearch module required)")
                     return
             
-                # Initialize cache instance
-                cache = get_semantic_cache()
+                # Initialize cache instance (creates the RedisVL vectorizer)
+                cache = await asyncio.to_thread(get_semantic_cache)
             
                 if cache:
                     logger.info(
@@ -441,12 +515,21 @@ class StartupController:
         logger.info("Starting application shutdown...")
         
         try:
+            # Stop warming optional components (loads already in threads finish on their own)
+            if self.warmup_task and not self.warmup_task.done():
+                self.warmup_task.cancel()
+                await asyncio.gather(self.warmup_task, return_exceptions=True)
+            
             # Wait for pending event bus tasks
             logger.info("Waiting for pending event tasks...")
             
             event_bus = get_event_bus()
             await event_bus.wait_for_pending_tasks(timeout=5.0)
             
+            # Stop watching for vector index snapshots
+            if self.snapshot_watcher:
+                await self.snapshot_watcher.stop()
+            
             # Shutdown cache
             if self.cache_manager:
                 logger.info("Closing cache connections...")
@@ -458,6 +541,10 @@ class StartupController:
                 logger.info("Shutting down job manager...")
                 self.job_manager.shutdown(wait=True)
             
+            # Stop document parsing processes (started lazily by ingestion)
+            from app.services.vector_store.parsers import shutdown_parsing_pool
+            shutdown_parsing_pool()
+            
             # Close database connections
             if self.database_manager:
                 logger.info("Closing database connections...")
@@ -485,6 +572,10 @@ class StartupController:
     def is_ready(self) -> bool:
         """Check if application is ready to handle requests."""
         return self.initialized
+    
+    def component_status(self) -> Dict[str, str]:
+        """Readiness per startup component (optional ones may still be warming up)."""
+        return self.startup_graph.summary()
 
 
 # Global startup controller instance
@@ -0,0 +1,131 @@
+"""
+Startup Graph - Runs startup steps concurrently in dependency order.
+
+Each step names the steps it needs; a step starts as soon as those finished,
+so independent components (embeddings, LLMs, reranker...) load side by side
+instead of one after the other. Blocking model loads inside steps run in
+worker threads so the event loop keeps scheduling the others.
+
+Every step reports its state (pending → starting → ready | failed | skipped)
+with its duration, which the health endpoint exposes per component.
+"""
+
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import time
+
+from app.core import get_logger
+
+
+logger = get_logger(__name__)
+
+PENDING = "pending"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+SKIPPED = "skipped"  # A step it depends on failed
+
+
+@dataclass(frozen=True)
+class StartupStep:
+    """
+    One startup component.
+
+    Attributes:
+        name: Component name (reported in readiness)
+        run: Coroutine function initializing it
+        depends_on: Steps that must be ready first
+        critical: A failure aborts startup (otherwise it is only reported)
+    """
+    name: str
+    run: Callable[[], Awaitable[None]]
+    depends_on: Tuple[str, ...] = ()
+    critical: bool = True
+
+
+@dataclass
+class ComponentStatus:
+    """Readiness of one startup component."""
+    state: str = PENDING
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class StartupGraph:
+    """Startup steps and their readiness, shared by the foreground and background runs."""
+    status: Dict[str, ComponentStatus] = field(default_factory=dict)
+    _tasks: Dict[str, "asyncio.Task[bool]"] = field(default_factory=dict)
+
+    async def run(self, steps: Iterable[StartupStep], parallel: bool = True) -> None:
+        """
+        Run steps, each once its dependencies are ready.
+
+        Dependencies may be steps of an earlier run() on this graph (e.g.
+        background warm-up waiting for foreground components).
+
+        Args:
+            steps: Steps to run
+            parallel: Run independent steps concurrently; False runs them in the given order
+
+        Raises:
+            Exception: The error of the first critical step that failed
+        """
+        steps = list(steps)
+        for step in steps:
+            missing = [name for name in step.depends_on if name not in self._tasks and name not in {s.name for s in steps}]
+            if missing:
+                raise ValueError(f"Startup step '{step.name}' depends on unknown step(s): {', '.join(missing)}")
+            self.status[step.name] = ComponentStatus()
+
+        if not parallel:
+            for step in steps:
+                self._tasks[step.name] = asyncio.ensure_future(self._run_step(step))
+                await self._tasks[step.name]
+            return
+
+        for step in steps:
+            self._tasks[step.name] = asyncio.create_task(self._run_step(step), name=f"startup:{step.name}")
+        try:
+            await asyncio.gather(*(self._tasks[step.name] for step in steps))
+        except BaseException:
+            tasks = [self._tasks[step.name] for step in steps]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def summary(self) -> Dict[str, str]:
+        """State per component."""
+        return {name: status.state for name, status in self.status.items()}
+
+    def pending(self) -> List[str]:
+        """Components not finished yet."""
+        return [name for name, status in self.status.items() if status.state in (PENDING, STARTING)]
+
+    async def _run_step(self, step: StartupStep) -> bool:
+        """Run one step after its dependencies; True if it ended ready."""
+        status = self.status[step.name]
+        dependencies_ready = all([await self._tasks[name] for name in step.depends_on])
+        if not dependencies_ready:
+            status.state = SKIPPED
+            logger.warning(f"⚠ Startup: {step.name} skipped (a component it needs failed)")
+            return False
+
+        status.state = STARTING
+        started = time.perf_counter()
+        try:
+            await step.run()
+        except Exception as e:
+            status.state, status.error = FAILED, str(e)
+            status.seconds = time.perf_counter() - started
+            if step.critical:
+                raise
+            logger.warning(f"⚠ Startup: {step.name} failed: {e}")
+            return False
+
+        status.state = READY
+        status.seconds = time.perf_counter() - started
+        logger.info(f"✓ Startup: {step.name} ready ({status.seconds:.2f}s)")
+        return True
@@ -0,0 +1,266 @@
+"""
+Vector Snapshots - Versioned FAISS index snapshots shared between processes.
+
+Ingestion never changes the index the API is searching. It checks out a
+writable copy of the latest snapshot, adds its chunks, and publishes the
+result as a new version; API workers poll the manifest and swap the new
+version in (read-copy-update). Searches already running keep the store they
+started with, which is freed once the last of them finishes.
+
+Layout: {VECTOR_STORE_PERSIST_DIRECTORY}/{collection}.snapshots/
+    MANIFEST.json          {"version": 7, "path": "v00000007", "created_at": ...}
+    v00000006/, v00000007/ index.faiss + index.pkl (FAISS.save_local)
+
+A legacy index at {persist_dir}/{collection} seeds the first checkout.
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import asyncio
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from app.config.settings import settings
+from app.core import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers on one host are not serialized
+    fcntl = None
+
+
+logger = get_logger(__name__)
+
+MANIFEST_NAME = "MANIFEST.json"
+LOCK_NAME = ".writer.lock"
+VERSION_PREFIX = "v"
+
+
+def _version_dir_name(version: int) -> str:
+    return f"{VERSION_PREFIX}{version:08d}"
+
+
+def _new_faiss_store(embeddings: Embeddings) -> VectorStore:
+    """Empty FAISS store (FAISS can't be created without a first document)."""
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+    return FAISS.from_documents([Document(page_content="init", metadata={"init": True})], embeddings)
+
+
+class VectorSnapshotStore:
+    """
+    Publishes and loads FAISS snapshots under one directory.
+
+    All methods except writer() do blocking I/O; call them via asyncio.to_thread.
+    """
+
+    def __init__(self, root: str, legacy_path: Optional[str] = None, keep: int = 3, mmap: bool = True):
+        """
+        Args:
+            root: Snapshot directory
+            legacy_path: Pre-snapshot index (FAISS.save_local dir) used until v1 exists
+            keep: Versions kept on disk (older ones are deleted after a publish)
+            mmap: Memory-map served indexes instead of reading them into memory
+        """
+        self.root = Path(root)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.keep = max(keep, 1)
+        self.mmap = mmap
+
+    def manifest(self) -> Optional[Dict[str, Any]]:
+        """Current manifest, or None before the first publish."""
+        try:
+            return json.loads((self.root / MANIFEST_NAME).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Unreadable vector snapshot manifest in {self.root}: {e}")
+            return None
+
+    def current_version(self) -> int:
+        manifest = self.manifest()
+        return int(manifest["version"]) if manifest else 0
+
+    def load(self, embeddings: Embeddings, writable: bool = False) -> Tuple[Optional[VectorStore], int]:
+        """
+        Load the latest snapshot.
+
+        Args:
+            embeddings: Embeddings of the store
+            writable: Read fully into memory (for adding chunks) instead of memory-mapping
+
+        Returns:
+            (store, version), or (None, 0) if nothing was published yet
+        """
+        manifest = self.manifest()
+        if not manifest:
+            return None, 0
+        path = self.root / manifest["path"]
+        return self._load_dir(path, embeddings, mmap=self.mmap and not writable), int(manifest["version"])
+
+    def checkout(self, embeddings: Embeddings) -> Tuple[VectorStore, int]:
+        """Writable copy of the latest snapshot (or the legacy index, or an empty store)."""
+        store, version = self.load(embeddings, writable=True)
+        if store is not None:
+            return store, version
+        if self.legacy_path and (self.legacy_path / "index.faiss").exists():
+            logger.info(f"Seeding vector snapshots from legacy index {self.legacy_path}")
+            return self._load_dir(self.legacy_path, embeddings, mmap=False), 0
+        return _new_faiss_store(embeddings), 0
+
+    def publish(self, store: VectorStore) -> int:
+        """
+        Save a store as the next version and point the manifest at it.
+        Call while holding writer(). Returns the new version.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        version = self.current_version() + 1
+        name = _version_dir_name(version)
+
+        staging = Path(tempfile.mkdtemp(dir=self.root, prefix=f".{name}-"))
+        try:
+            store.save_local(str(staging))
+            # Left over by a publisher that died before writing the manifest
+            shutil.rmtree(self.root / name, ignore_errors=True)
+            os.replace(staging, self.root / name)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        # Manifest last: readers only ever see complete versions
+        manifest = {
+            "version": version,
+            "path": name,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix=".manifest-", suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(temp_path, self.root / MANIFEST_NAME)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+
+        self._prune(version)
+        logger.info(f"✓ Published vector snapshot {name}")
+        return version
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[None]:
+        """Exclusive checkout → publish section across processes on this host."""
+        if fcntl is None:
+            yield
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.root / LOCK_NAME, "a")
+        try:
+            await asyncio.to_thread(fcntl.flock, lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the file releases the lock
+            lock_file.close()
+
+    def _load_dir(self, path: Path, embeddings: Embeddings, mmap: bool) -> VectorStore:
+        from langchain_community.vectorstores import FAISS
+
+        if mmap:
+            try:
+                import faiss
+                index = faiss.read_index(str(path / "index.faiss"), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                with open(path / "index.pkl", "rb") as f:
+                    docstore, index_to_docstore_id = pickle.load(f)
+                return FAISS(embeddings, index, docstore, index_to_docstore_id)
+            except Exception as e:
+                logger.debug(f"Memory-mapped load of {path.name} not possible ({e}), reading into memory")
+        return FAISS.load_local(str(path), embeddings, allow_dangerous_deserialization=True)
+
+    def _prune(self, current: int) -> None:
+        # Processes still searching a deleted version keep their open/mapped files
+        oldest_kept = current - self.keep + 1
+        for path in self.root.glob(f"{VERSION_PREFIX}*"):
+            try:
+                version = int(path.name[len(VERSION_PREFIX):])
+            except ValueError:
+                continue
+            if version < oldest_kept:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+class VectorSnapshotWatcher:
+    """Polls the manifest and swaps newer snapshots into the served vector store."""
+
+    def __init__(self, snapshots: VectorSnapshotStore, embeddings: Embeddings, poll_seconds: float = 10.0):
+        self.snapshots = snapshots
+        self.embeddings = embeddings
+        self.poll_seconds = poll_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll(), name="vector-snapshot-watcher")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def check(self) -> bool:
+        """Swap in the latest snapshot if it is newer than the served one. Returns True if swapped."""
+        from app.core.vector_store_factory import get_vector_store_version, swap_vector_store
+
+        version = await asyncio.to_thread(self.snapshots.current_version)
+        if version <= get_vector_store_version():
+            return False
+
+        # Loading (the slow part) happens off the event loop, searches continue meanwhile
+        store, loaded_version = await asyncio.to_thread(self.snapshots.load, self.embeddings)
+        if store is None:
+            return False
+        return swap_vector_store(store, loaded_version)
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self.check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # e.g. the version was pruned while loading; the next poll retries
+                logger.warning(f"Vector snapshot reload failed: {e}")
+
+
+def snapshots_enabled(provider: Optional[str] = None) -> bool:
+    """Whether the FAISS index is served from versioned snapshots."""
+    provider = (provider or settings.VECTOR_DB_PROVIDER).lower()
+    return provider == "faiss" and settings.VECTOR_SNAPSHOTS_ENABLED
+
+
+# Singleton instance
+_snapshot_store: Optional[VectorSnapshotStore] = None
+
+
+def get_snapshot_store() -> VectorSnapshotStore:
+    """Get the snapshot store of the configured FAISS collection."""
+    global _snapshot_store
+    if _snapshot_store is None:
+        persist_directory = settings.VECTOR_STORE_PERSIST_DIRECTORY
+        collection_name = settings.VECTOR_STORE_COLLECTION_NAME
+        _snapshot_store = VectorSnapshotStore(
+            root=os.path.join(persist_directory, f"{collection_name}.snapshots"),
+            legacy_path=os.path.join(persist_directory, collection_name),
+            keep=settings.VECTOR_SNAPSHOT_KEEP,
+            mmap=settings.VECTOR_SNAPSHOT_MMAP,
+        )
+    return _snapshot_store
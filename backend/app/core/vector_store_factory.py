@@ -7,8 +7,14 @@ Hybrid Search Support (Dense + Sparse Vectors):
 - Qdrant: Native BM25 sparse vectors
 - Weaviate: Built-in BM25F (BM25 with field boosting)
 - Milvus: Native sparse vector support
+
+FAISS indexes are served from versioned snapshots (see vector_snapshots.py)
+and swapped in with swap_vector_store() when ingestion publishes a new one.
+Without snapshots, FAISS/Chroma are modified in place, so ingestion writes and
+searches of the shared store hold get_vector_store_lock().
 """
 
+import threading
 from typing import Optional
 from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStore
@@ -17,6 +23,7 @@ from langchain_core.retrievers import BaseRetriever
 from app.config.settings import settings
 from app.core.exceptions import VectorStoreError
 from app.core import get_logger
+from app.core.vector_snapshots import get_snapshot_store, snapshots_enabled
 
 
 logger = get_logger(__name__)
@@ -25,6 +32,13 @@ logger = get_logger(__name__)
 # Global instance (initialized in startup)
 _vector_store_instance: Optional[VectorStore] = None
 _retriever_instance: Optional[BaseRetriever] = None
+# Snapshot version of the served FAISS store (0 = not loaded from a snapshot)
+_vector_store_version: int = 0
+# Guards the shared in-process store against searches overlapping in-place writes
+_vector_store_lock = threading.Lock()
+
+# In-process indexes; ingestion adds to them in place unless snapshots are served
+IN_PROCESS_PROVIDERS = {"faiss", "chroma"}
 
 
 def _validate_hybrid_search_config(provider: str, config: dict) -> None:
@@ -53,10 +67,15 @@ def _validate_hybrid_search_config(provider: str, config: dict) -> None:
             f"✓ Hybrid search: ENABLED for {provider.upper()} "
             "(dense + sparse vectors)"
         )
+    elif provider in {"faiss", "chroma"}:
+        logger.info(
+            f"✓ Hybrid search: ENABLED for {provider.upper()} "
+            "(dense vectors + in-process BM25 index)"
+        )
     else:
         logger.warning(
             f"⚠ HYBRID SEARCH WARNING: {provider.upper()} does not support hybrid search natively. "
-            f"Hybrid search is only available for: {', '.join(sorted(hybrid_supported_providers))}. "
+            f"Hybrid search is only available for: {', '.join(sorted(hybrid_supported_providers | {'faiss', 'chroma'}))}. "
             f"Application will use standard vector search only. "
             f"To enable hybrid search, switch to one of the supported providers or set ENABLE_HYBRID_SEARCH=false"
         )
@@ -122,6 +141,8 @@ def _create_vector_store(
     Returns:
         VectorStore instance
     """
+    global _vector_store_version
+    
     # Get config from composed settings   
     config = settings.get_vector_db_config()
     provider = (provider or config["provider"]).lower()    
@@ -150,6 +171,18 @@ def _create_vector_store(
         persist_directory = config.get("persist_directory")
         index_path = os.path.join(persist_directory, config["collection_name"])
         
+        # Serve the latest published snapshot when there is one
+        if snapshots_enabled(provider) and not collection_name:
+            try:
+                store, version = get_snapshot_store().load(embeddings)
+            except Exception as e:
+                logger.warning(f"Failed to load vector snapshot, using legacy index: {e}")
+                store, version = None, 0
+            if store is not None:
+                _vector_store_version = version
+                logger.info(f"✓ Loaded FAISS snapshot v{version}")
+                return store
+        
         # Try to load existing index, otherwise create empty store
         if os.path.exists(index_path):
             try:
@@ -399,6 +432,10 @@ def get_retriever(
     Get retriever instance from vector store.
     Returns existing instance if initialized, otherwise creates new one.
     
+    The shared instance is never reconfigured: a different top_k gets its own
+    retriever over the same store, so concurrent callers can't change each
+    other's k.
+    
     Args:
         embeddings: Pre-initialized embeddings (optional, uses existing if available)
         provider: Vector store provider (optional, uses settings default)
@@ -411,9 +448,8 @@ def get_retriever(
     
     # Return existing instance if available
     if _retriever_instance is not None:
-        # Update search_kwargs if top_k provided
-        if top_k is not None:
-            _retriever_instance.search_kwargs = {"k": top_k}
+        if top_k is not None and _retriever_instance.search_kwargs.get("k") != top_k:
+            return _retriever_instance.vectorstore.as_retriever(search_kwargs={"k": top_k})
         return _retriever_instance
     
     # Create new instance
@@ -437,6 +473,56 @@ def get_retriever(
     return _retriever_instance
 
 
+def get_vector_store_lock(provider: Optional[str] = None) -> Optional[threading.Lock]:
+    """
+    Lock serializing writes to the shared store with searches of it.
+    
+    Only needed for in-process stores modified in place (FAISS/Chroma without
+    snapshots): inline ingestion adds to them from a job thread running its
+    own event loop, while request handlers search them from worker threads.
+    
+    Returns:
+        The lock, or None if the store is remote or served from snapshots
+    """
+    provider = (provider or settings.VECTOR_DB_PROVIDER).lower()
+    if provider not in IN_PROCESS_PROVIDERS or snapshots_enabled(provider):
+        return None
+    return _vector_store_lock
+
+
+def get_vector_store_version() -> int:
+    """Snapshot version of the served vector store (0 = not from a snapshot)."""
+    return _vector_store_version
+
+
+def swap_vector_store(vector_store: VectorStore, version: int) -> bool:
+    """
+    Serve a newer snapshot of the vector store (read-copy-update).
+    
+    The shared store and retriever are repointed in one step; searches that
+    already hold the previous store finish on it. Does nothing in processes
+    that don't serve a store yet (e.g. the job worker) or for older versions.
+    
+    Args:
+        vector_store: Store loaded from the snapshot
+        version: Its snapshot version
+    
+    Returns:
+        bool: True if the store was swapped in
+    """
+    global _vector_store_instance, _vector_store_version
+    
+    if _vector_store_instance is None or version <= _vector_store_version:
+        return False
+    
+    _vector_store_instance = vector_store
+    _vector_store_version = version
+    if _retriever_instance is not None:
+        _retriever_instance.vectorstore = vector_store
+    logger.info(f"✓ Swapped in vector store snapshot v{version}")
+    return True
+
+
 def save_vector_store(vector_store: VectorStore) -> bool:
     """
     Save vector store to disk (for FAISS).
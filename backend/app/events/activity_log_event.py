@@ -5,7 +5,7 @@ Handles activity logging events asynchronously to avoid blocking
 the main request flow.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from app.events.base import BaseEventHandler
 from app.core import get_logger
@@ -37,6 +37,9 @@ class ActivityLogEvent(BaseEventHandler):
     - ip_address: Optional[str]
     - user_agent: Optional[str]
     
+    Events are batched into one INSERT per flush interval and spilled to
+    disk (not dropped) when the queue is full, since these are audit records.
+    
     Usage from services:
         from app.core.events import get_event_bus
         
@@ -49,36 +52,71 @@ class ActivityLogEvent(BaseEventHandler):
         })
     """
     
+    max_concurrency = 2
+    batch_size = 200
+    durable = True
+    
     @property
     def event_type(self) -> str:
         return "activity_log"
     
+    @staticmethod
+    def _log_params(event_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract log_activity() arguments from an event payload (KeyError if incomplete)."""
+        # Extract required fields
+        log_params = {
+            "user_id": event_data["user_id"],
+            "incident_type": event_data["incident_type"],
+            "severity": event_data["severity"],
+            "description": event_data["description"],
+        }
+        
+        # Add optional fields if present
+        optional_fields = [
+            "details",
+            "user_clearance_level",
+            "required_clearance_level",
+            "access_granted",
+            "user_query",
+            "threat_type",
+            "ip_address",
+            "user_agent",
+        ]
+        
+        for field in optional_fields:
+            if field in event_data:
+                log_params[field] = event_data[field]
+        
+        return log_params
+    
+    async def handle_batch(self, events: List[Dict[str, Any]]) -> None:
+        """Persist a batch of activity logs in one transaction, falling back to one by one."""
+        entries = []
+        for event_data in events:
+            try:
+                entries.append(self._log_params(event_data))
+            except KeyError as e:
+                logger.error(f"Missing required field in activity_log event: {e}")
+        if not entries:
+            return
+        
+        try:
+            session_factory = get_async_session_factory()
+            async with session_factory() as session:
+                await activity_logger_service.log_activities(db=session, entries=entries)
+                await session.commit()
+            logger.debug(f"Activity logged: {len(entries)} entries")
+            return
+        except Exception as e:
+            logger.warning(f"Batch activity log of {len(entries)} entries failed, logging individually: {e}")
+        
+        for event_data in events:
+            await self(event_data)
+    
     async def handle(self, event_data: Dict[str, Any]) -> None:
         """Process activity log event."""
         try:
-            # Extract required fields
-            log_params = {
-                "user_id": event_data["user_id"],
-                "incident_type": event_data["incident_type"],
-                "severity": event_data["severity"],
-                "description": event_data["description"],
-            }
-            
-            # Add optional fields if present
-            optional_fields = [
-                "details",
-                "user_clearance_level",
-                "required_clearance_level",
-                "access_granted",
-                "user_query",
-                "threat_type",
-                "ip_address",
-                "user_agent",
-            ]
-            
-            for field in optional_fields:
-                if field in event_data:
-                    log_params[field] = event_data[field]
+            log_params = self._log_params(event_data)
             
             # Create new database session for background task
             # Use session factory directly (not the FastAPI dependency)
@@ -6,7 +6,7 @@ consistency and proper integration with the EventBus.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 from app.core import get_logger
 
@@ -24,6 +24,11 @@ class BaseEventHandler(ABC):
     3. Define event_type property
     4. Be self-contained and independent
     
+    Optionally, a handler can tune how the EventBus schedules it:
+    - max_concurrency: worker tasks for this handler (None = EVENT_WORKERS_PER_TYPE)
+    - batch_size: > 1 to receive up to this many events at once in handle_batch()
+    - durable: spill events to disk instead of dropping them when the queue is full
+    
     Example:
         class MyEventHandler(BaseEventHandler):
             @property
@@ -35,6 +40,10 @@ class BaseEventHandler(ABC):
                 pass
     """
     
+    max_concurrency: Optional[int] = None
+    batch_size: int = 1
+    durable: bool = False
+    
     @property
     @abstractmethod
     def event_type(self) -> str:
@@ -64,6 +73,19 @@ class BaseEventHandler(ABC):
                        Plus any custom fields passed during emission
         """
     
+    async def handle_batch(self, events: List[Dict[str, Any]]) -> None:
+        """
+        Process several events at once (used when batch_size > 1).
+        
+        Override to coalesce work, e.g. one multi-row INSERT per batch.
+        The default processes events one by one.
+        
+        Args:
+            events: Event payloads in emission order
+        """
+        for event_data in events:
+            await self(event_data)
+    
     async def __call__(self, event_data: Dict[str, Any]) -> None:
         """
         Make the handler callable so it can be used directly with EventBus.
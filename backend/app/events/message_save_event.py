@@ -6,7 +6,8 @@ in the main response pipeline. Messages are saved to cache synchronously
 and persisted to DB in the background.
 """
 
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 
 from app.events.base import BaseEventHandler
 from app.core import get_logger
@@ -32,6 +33,10 @@ class MessageSaveEvent(BaseEventHandler):
     - token_count: Optional[int] - estimated token count
     - meta: Optional[Dict] - message metadata (e.g., sources, intent)
     
+    Events are batched (one multi-row INSERT per flush interval) by a single
+    worker so messages of a conversation are persisted in order. The handler
+    is durable: events spill to disk instead of being dropped under load.
+    
     Usage:
         from app.core.events import get_event_bus
         
@@ -45,10 +50,68 @@ class MessageSaveEvent(BaseEventHandler):
         })
     """
     
+    max_concurrency = 1
+    batch_size = 100
+    durable = True
+    
     @property
     def event_type(self) -> str:
         return "save_message"
     
+    async def handle_batch(self, events: List[Dict[str, Any]]) -> None:
+        """Persist a batch of messages in one transaction, falling back to one by one."""
+        items = [item for item in (self._to_item(event) for event in events) if item]
+        if not items:
+            return
+        
+        result = {"success": False}
+        try:
+            async for session in get_session():
+                try:
+                    result = await ConversationService(session).add_messages(items)
+                finally:
+                    break
+        except Exception as e:
+            logger.error(f"Error saving message batch: {e}", exc_info=True)
+        
+        if result["success"]:
+            logger.info(f"Background save: {result['saved']} message(s), {result['skipped']} skipped")
+            return
+        
+        logger.warning(f"Batch save of {len(items)} message(s) failed, saving individually")
+        for event_data in events:
+            await self(event_data)
+    
+    @staticmethod
+    def _to_item(event_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Turn an event payload into an add_messages() item."""
+        try:
+            role = MessageRole[event_data["role"].upper()]
+        except KeyError as e:
+            logger.error(f"Invalid save_message event (missing field or bad role): {e}")
+            return None
+        
+        created_at = None
+        if event_data.get("_emitted_at"):
+            try:
+                created_at = datetime.fromisoformat(event_data["_emitted_at"])
+            except ValueError:
+                pass
+        
+        try:
+            return {
+                "conversation_id": event_data["conversation_id"],
+                "user_id": event_data["user_id"],
+                "role": role,
+                "content": event_data["content"],
+                "token_count": event_data.get("token_count"),
+                "meta": event_data.get("meta"),
+                "created_at": created_at,
+            }
+        except KeyError as e:
+            logger.error(f"Missing required field in save_message event: {e}")
+            return None
+    
     async def handle(self, event_data: Dict[str, Any]) -> None:
         """Process message save event using existing ConversationService."""
         try:
@@ -9,7 +9,7 @@ from typing import Dict, Any
 
 from app.events.base import BaseEventHandler
 from app.core import get_logger
-from app.core.semantic_cache import get_semantic_cache
+from app.core.semantic_cache import get_semantic_cache, collect_source_file_ids
 
 
 logger = get_logger(__name__)
@@ -20,7 +20,8 @@ class SemanticCacheEvent(BaseEventHandler):
     Semantic cache event handler.
     
     Processes cache storage requests in the background, including:
-    - Document serialization for context cache
+    - Document serialization for context cache (joined text, or chunk
+      references into the shared chunk store when CONTEXT_CACHE_STORE_CHUNK_REFS)
     - Response validation (generic negatives, length checks)
     - Uses complete pre-computed security metadata (no document iteration)
     
@@ -41,6 +42,8 @@ class SemanticCacheEvent(BaseEventHandler):
       - max_security_level: int - highest security level among documents
       - is_department_only: bool - whether security applies to department
       - department_id: Optional[int] - department ID when is_department_only is True
+    - source_file_ids: List[int] (optional) - files the answer was built from,
+      used to evict the entry when one of them changes
     
     Usage from services:
         from app.core.events import get_event_bus
@@ -101,40 +104,53 @@ class SemanticCacheEvent(BaseEventHandler):
         try:
             documents = event_data["documents"]
             
-            # Format context text from documents
-            context_text = "\n\n".join([
-                doc.page_content for doc in documents
-            ])
-            
             # Use pre-computed complete security metadata (no document iteration)
             # Ensure it's a dict, not None
             security_metadata = event_data.get("security_metadata", {}) or {}
             max_security_level = security_metadata.get("max_security_level", 1)
             is_department_only = security_metadata.get("is_department_only", False)
             department_id = security_metadata.get("department_id")
+            source_file_ids = collect_source_file_ids(documents)
             
-          
-            
-            # Build cache entry with formatted text
+            # Sources and security are kept so responses generated from a
+            # cache hit inherit them
             entry = {
-                "context_text": context_text,
-                "source_count": len(documents)
+                "source_count": len(documents),
+                "source_file_ids": source_file_ids,
+                "security_metadata": {
+                    "max_security_level": max_security_level,
+                    "is_department_only": is_department_only,
+                    "department_id": department_id
+                }
             }
             
-            # Store in cache
             cache = get_semantic_cache()
+            chunk_refs = None
+            if cache.config["context"].get("store_chunk_refs"):
+                # Chunk ids + scores; the text is stored once in the shared chunk store
+                chunk_refs = await cache.store_chunks(documents)
+            
+            if chunk_refs is not None:
+                entry["chunk_refs"] = chunk_refs
+            else:
+                entry["context_text"] = "\n\n".join([
+                    doc.page_content for doc in documents
+                ])
+            
+            # Store in cache
             await cache.set(
                 cache_type="context",
                 query=event_data["query"],
                 entry=entry,
                 min_security_level=max_security_level,
                 is_department_only=is_department_only,
-                department_id=department_id
+                department_id=department_id,
+                source_file_ids=source_file_ids
             )
             
             logger.debug(
                 f"Context cached (source_count={len(documents)}, "
-                f"text_length={len(context_text)}, query='{event_data['query'][:50]}...')"
+                f"chunk_refs={chunk_refs is not None}, query='{event_data['query'][:50]}...')"
             )
         
         except Exception as e:
@@ -178,7 +194,7 @@ class SemanticCacheEvent(BaseEventHandler):
                 return
             
             # Use pre-computed complete security metadata (no document iteration)
-            security_metadata = event_data.get("security_metadata", {})
+            security_metadata = event_data.get("security_metadata", {}) or {}
             max_security_level = security_metadata.get("max_security_level", 1)
             is_department_only = security_metadata.get("is_department_only", False)
             department_id = security_metadata.get("department_id")
@@ -196,7 +212,8 @@ class SemanticCacheEvent(BaseEventHandler):
                 entry=response_text,
                 min_security_level=max_security_level,
                 is_department_only=is_department_only,
-                department_id=department_id
+                department_id=department_id,
+                source_file_ids=event_data.get("source_file_ids")
             )
             
             logger.debug(
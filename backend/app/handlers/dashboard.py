@@ -41,21 +41,12 @@ async def handle_get_user_metrics(user_id: int, session: AsyncSession) -> Dict[s
     Returns:
         User dashboard metrics.
     """
-    cache = get_cache()
-    cache_key = f"dashboard:user:metrics:{user_id}"
-    
-    # Try cache first
-    cached = await cache.get(cache_key)
-    if cached:
-        return cached
-    
-    # Fetch from service
-    metrics = await DashboardService.get_user_metrics(session, user_id)
-    
     # Cache for TTL
-    await cache.set(cache_key, metrics, ttl=cache_settings.CACHE_TTL_STATS)
-    
-    return metrics
+    return await get_cache().get_or_compute(
+        f"dashboard:user:metrics:{user_id}",
+        lambda: DashboardService.get_user_metrics(session, user_id),
+        ttl=cache_settings.CACHE_TTL_STATS
+    )
 
 
 async def invalidate_dashboard_cache(user_id: int = None):
@@ -8,6 +8,7 @@ from app.schemas.file_upload import FileUploadCreate
 from app.models.user import User
 from app.config.cache_settings import cache_settings
 from app.core.cache import get_cache
+from app.services.stats_cache import FILE_STATS_TAG, file_stats_tags, user_stats_tag
 from app.core import get_logger
 
 
@@ -33,10 +34,8 @@ async def handle_upload_file(
         
         # Invalidate cache        
         cache = get_cache()
-        await cache.invalidate_pattern(f"stats:*:{user.id}")
-        await cache.invalidate_pattern("stats:files*")
-        await cache.delete("dashboard:admin:metrics")
-        await cache.delete(f"dashboard:user:metrics:{user.id}")
+        await cache.invalidate_tags([user_stats_tag(user.id), FILE_STATS_TAG])
+        await cache.delete_many(["dashboard:admin:metrics", f"dashboard:user:metrics:{user.id}"])
         
         logger.info(f"File uploaded by user {user.id}: {upload_request.file_name}")
         
@@ -189,10 +188,8 @@ async def handle_approve_file(
         # Invalidate cache
         cache = get_cache()
         file_upload = result["file_upload"]
-        await cache.invalidate_pattern(f"stats:*:{file_upload.uploaded_by_id}")
-        await cache.invalidate_pattern("stats:files*")
-        await cache.delete("dashboard:admin:metrics")
-        await cache.delete(f"dashboard:user:metrics:{file_upload.uploaded_by_id}")
+        await cache.invalidate_tags([user_stats_tag(file_upload.uploaded_by_id), FILE_STATS_TAG])
+        await cache.delete_many(["dashboard:admin:metrics", f"dashboard:user:metrics:{file_upload.uploaded_by_id}"])
         
         logger.warning(f"File {file_id} approved by admin {admin.id}")
         
@@ -234,10 +231,8 @@ async def handle_reject_file(
         
         # Invalidate cache
         cache = get_cache()
-        await cache.invalidate_pattern(f"stats:*:{file_upload.uploaded_by_id}")
-        await cache.invalidate_pattern("stats:files*")
-        await cache.delete("dashboard:admin:metrics")
-        await cache.delete(f"dashboard:user:metrics:{file_upload.uploaded_by_id}")
+        await cache.invalidate_tags([user_stats_tag(file_upload.uploaded_by_id), FILE_STATS_TAG])
+        await cache.delete_many(["dashboard:admin:metrics", f"dashboard:user:metrics:{file_upload.uploaded_by_id}"])
         
         logger.warning(f"File {file_id} rejected by admin {admin.id}: {reason}")
         
@@ -380,20 +375,17 @@ async def handle_list_user_files_by_status(
         return {"success": False, "error": str(e)}
 
 
-async def handle_get_file_content(
+async def handle_get_file_download(
     file_id: int,
     user: User,
     session: AsyncSession
 ) -> dict:
-    """Get file content for viewing (text, JSON, CSV, Excel, PDF only)."""
+    """Authorize and locate a file for viewing/downloading (content is streamed by the route)."""
     try:
         service = FileUploadService(session)
         is_admin = user.has_role("admin")
         
-        # Call service method (returns error for unsupported types like DOCX)
-        result = await service.get_file_content(file_id, user.id, is_admin)
-        
-        return result
+        return await service.get_file_for_download(file_id, user.id, is_admin)
     except Exception as e:
         logger.error(f"Get file content failed: {e}", exc_info=True)
         return {"success": False, "error": str(e)}
@@ -431,28 +423,20 @@ async def handle_get_file_counts(user: User, session: AsyncSession) -> dict:
     Uses service for business logic and cache for performance.
     """
     try:
-        cache = get_cache()
-        
-        # Determine cache key based on role
-        if user.has_role("admin"):
-            cache_key = "stats:file_counts"
-        else:
-            cache_key = f"stats:file_counts:{user.id}"
-        
-        # Try cache first
-        cached_counts = await cache.get(cache_key)
-        if cached_counts:
-            return {"success": True, "counts": cached_counts}
-        
-        # Cache miss - fetch from service
-        service = FileUploadService(session)
-        if user.has_role("admin"):
-            counts = await service.get_status_counts()
-        else:
-            counts = await service.get_user_status_counts(user.id)
-        
-        # Cache the results
-        await cache.set(cache_key, counts, ttl=cache_settings.CACHE_TTL_STATS)
+        is_admin = user.has_role("admin")
+        cache_key = "stats:file_counts" if is_admin else f"stats:file_counts:{user.id}"
+        
+        async def load() -> dict:
+            service = FileUploadService(session)
+            if is_admin:
+                return await service.get_status_counts()
+            return await service.get_user_status_counts(user.id)
+        
+        counts = await get_cache().get_or_compute(
+            cache_key, load,
+            ttl=cache_settings.CACHE_TTL_STATS,
+            tags=file_stats_tags(None if is_admin else user.id)
+        )
         
         return {"success": True, "counts": counts}
     except Exception as e:
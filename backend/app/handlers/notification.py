@@ -47,20 +47,12 @@ async def handle_get_unread_count(user: User, session: AsyncSession) -> dict:
     Cache is invalidated when notifications are marked as read or new ones are created.
     """
     try:
-        cache = get_cache()
-        cache_key = f"notif:unread_count:{user.id}"
-        
-        # Try cache first
-        cached_count = await cache.get(cache_key)
-        if cached_count is not None:
-            return {"success": True, "count": cached_count}
-        
-        # Fetch from service (queries database)
-        service = NotificationService(session)
-        count = await service.get_unread_count(user.id)
-        
-        # Cache the result
-        await cache.set(cache_key, count, ttl=cache_settings.CACHE_TTL_STATS)
+        # Fetch from service (queries database) on a cache miss
+        count = await get_cache().get_or_compute(
+            f"notif:unread_count:{user.id}",
+            lambda: NotificationService(session).get_unread_count(user.id),
+            ttl=cache_settings.CACHE_TTL_STATS
+        )
         
         return {"success": True, "count": count}
     except Exception as e:
@@ -2,6 +2,7 @@
 
 from app.jobs.job_manager import JobManager, get_job_manager
 from app.jobs.integration import JobQueueIntegration, get_job_integration
+from app.jobs.worker import JobWorker
 from app.jobs.bootstrap import init_jobs, get_job_health_summary, get_job_registry
 
 __all__ = [
@@ -9,6 +10,7 @@ __all__ = [
     "get_job_manager",
     "JobQueueIntegration",
     "get_job_integration",
+    "JobWorker",
     "init_jobs",
     "get_job_health_summary",
     "get_job_registry",
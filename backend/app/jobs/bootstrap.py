@@ -9,14 +9,17 @@ Features:
 - Automatic max_instances=1 enforcement
 - Startup health summary logging
 - Isolated job scheduling (errors don't block core initialization)
+- Leader election so only one replica runs each recurring job (JOB_LEADER_ELECTION)
 """
 
 from typing import Callable, List, Dict, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
+from app.config.settings import settings
 from app.core import get_logger
 from app.jobs import JobManager
+from app.jobs.leader import leader_only
 
 
 logger = get_logger(__name__)
@@ -236,8 +239,12 @@ async def init_jobs(job_manager: JobManager) -> JobRegistry:
     success_count = 0
     for job in enabled_jobs:
         try:
+            handler = job.handler
+            if settings.JOB_LEADER_ELECTION:
+                handler = leader_only(job.job_id, job.handler, job.interval_seconds)
+            
             scheduler_job_id = job_manager.add_recurring_job(
-                job.handler,
+                handler,
                 interval_seconds=job.interval_seconds,
                 job_id=job.job_id,
                 max_instances=job.max_instances
@@ -11,23 +11,42 @@ Flow:
 3. JobManager executes in background threads with isolated event loops
 4. Job status updates use sync database to avoid async conflicts
 5. Handlers run async but manage their own database sessions
+
+With JOB_EXECUTION_MODE=worker, steps 2-4 are skipped: jobs are only persisted
+and the standalone worker (app/jobs/worker.py, run_worker.py) claims and runs them.
+
+Multi-node safety (inline mode): each job is leased to the node that schedules
+it (JobService.claim), so replicas recovering pending jobs on startup never run
+the same job twice, and jobs abandoned by a crashed replica are requeued once
+their lease expires. The lease is extended while the handler runs (it may
+outlive JOB_TIMEOUT_SECONDS, which only stops waiting for it), and the outcome
+is only recorded while this node still holds it.
 """
 
 import json
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Callable
 import asyncio
 
+from sqlalchemy import update
+
 from app.models.job import Job, JobStatus, JobType
 from app.services.job_service import JobService
 from app.services.document_ingestion import DocumentIngestionService
 from app.services.email import get_email_service
 from app.jobs import get_job_manager
+from app.jobs.leader import get_node_id
 from app.core import get_logger
 from app.core.sync_db import get_sync_session
+from app.config.settings import settings
 
 
 logger = get_logger(__name__)
 
+# Inline lease = job timeout plus slack for status updates; extended every
+# JOB_HEARTBEAT_INTERVAL while the job runs
+INLINE_LEASE_GRACE_SECONDS = 60
+
 
 class JobQueueIntegration:
     """Bridge between persistent JobService and in-process JobManager."""
@@ -41,6 +60,8 @@ class JobQueueIntegration:
         """
         self.session_factory = session_factory
         self.job_manager = get_job_manager()
+        self.node_id = get_node_id()
+        self.inline_lease_seconds = settings.JOB_TIMEOUT_SECONDS + INLINE_LEASE_GRACE_SECONDS
     
     async def create_and_schedule(
         self,
@@ -77,8 +98,15 @@ class JobQueueIntegration:
                 payload=payload,
                 max_retries=max_retries
             )
+            if not self.uses_worker():
+                # Lease to this node so other replicas' recovery skips it
+                await job_service.claim(job.id, self.node_id, lease_seconds=self.inline_lease_seconds)
             await session.commit()
         
+        if self.uses_worker():
+            logger.info(f"Created job {job.id}: {job_type.value} (queued for worker)")
+            return job
+        
         # Schedule with JobManager for immediate execution
         job_id_str = job_id or f"{job_type.value}_{reference_id}_{job.id}"
         self.job_manager.add_immediate_job(
@@ -95,12 +123,26 @@ class JobQueueIntegration:
         """
         On app startup: recover pending jobs from DB and reschedule them.
         
+        Jobs whose lease expired (e.g. the replica running them crashed) are
+        requeued first. Pending jobs are then claimed for this node, so when
+        several replicas start together each job is scheduled exactly once.
+        
         Returns:
             Number of jobs recovered
         """
+        if self.uses_worker():
+            logger.info("Pending jobs are picked up by the job worker; nothing to schedule in-process")
+            return 0
+        
         async with self.session_factory() as session:
             job_service = JobService(session)
-            pending_jobs = await job_service.get_pending(limit=1000)
+            await job_service.requeue_expired()
+            pending_jobs = await job_service.claim_next(
+                self.node_id,
+                lease_seconds=self.inline_lease_seconds,
+                limit=1000
+            )
+            await session.commit()
             
             count = 0
             for job in pending_jobs:
@@ -120,10 +162,28 @@ class JobQueueIntegration:
                 
                 except Exception as e:
                     logger.error(f"Failed to schedule recovered job {job.id}: {e}")
+                    await job_service.release(job.id, self.node_id)
+                    await session.commit()
             
             logger.info(f"Recovered and scheduled {count} pending jobs")
             return count
     
+    @staticmethod
+    def uses_worker() -> bool:
+        """Whether jobs are executed by the standalone worker instead of in-process."""
+        return settings.JOB_EXECUTION_MODE == "worker"
+    
+    @staticmethod
+    def normalize_result(result_data):
+        """Ensure a handler result is JSON-serializable before it is stored."""
+        if not result_data:
+            return result_data
+        try:
+            return json.loads(json.dumps(result_data, default=str))
+        except Exception as serialize_err:
+            logger.warning(f"Could not serialize result: {serialize_err}, using string instead")
+            return {"status": "success", "message": str(result_data)}
+    
     def schedule_pending_jobs_sync(self) -> int:
         """
         Programmatically schedule all pending jobs (sync wrapper for manual triggers).
@@ -165,7 +225,7 @@ class JobQueueIntegration:
             
             # Execute in thread pool to isolate from main loop
             with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                executor.submit(_run_async).result(timeout=300)  # 5 min timeout
+                executor.submit(_run_async).result(timeout=settings.JOB_TIMEOUT_SECONDS)
         
         except Exception as e:
             logger.error(f"Error executing job {job_id}: {e}", exc_info=True)
@@ -191,6 +251,8 @@ class JobQueueIntegration:
         # Use SYNC session for job status tracking (avoids event loop conflicts)
         sync_session = get_sync_session()
         job = None
+        lease_lost = asyncio.Event()
+        heartbeat_task = None
         
         try:
             from sqlalchemy import select
@@ -201,6 +263,10 @@ class JobQueueIntegration:
                 logger.error(f"Job {job_id} not found in database")
                 return
             
+            if job.locked_by != self.node_id:
+                logger.warning(f"Skipping job {job_id}: leased to {job.locked_by}, not this node")
+                return
+            
             logger.info(f"Processing job {job_id}: type={job.job_type}, reference={job.reference_type}/{job.reference_id}, attempt={job.retry_count + 1}/{job.max_retries + 1}")
             
             # Mark as processing (sync update)
@@ -209,19 +275,20 @@ class JobQueueIntegration:
             
             # Execute handler (async - handler manages its own async sessions)
             logger.info(f"Executing job {job_id} handler: {handler.__name__}")
+            heartbeat_task = asyncio.create_task(self._heartbeat_loop(job_id, lease_lost))
             result_data = await handler(job)
             
             # Ensure result_data is JSON-serializable
-            if result_data:
-                try:
-                    result_data = json.loads(json.dumps(result_data, default=str))
-                except Exception as serialize_err:
-                    logger.warning(f"Could not serialize result: {serialize_err}, using string instead")
-                    result_data = {"status": "success", "message": str(result_data)}
+            result_data = self.normalize_result(result_data)
+            
+            if not self._still_owned(sync_session, job, lease_lost):
+                logger.warning(f"Skipping status update for job {job_id}: lease no longer held")
+                return
             
             # Mark completed (sync update)
             job.status = JobStatus.COMPLETED
             job.result = json.dumps(result_data) if result_data else None
+            self._clear_lease(job)
             sync_session.commit()
             
             logger.info(f"Job {job_id} completed successfully: {result_data}")
@@ -232,6 +299,10 @@ class JobQueueIntegration:
             # Mark failed with retry logic
             if job:
                 try:
+                    if not self._still_owned(sync_session, job, lease_lost):
+                        logger.warning(f"Skipping status update for job {job_id}: lease no longer held")
+                        return
+                    
                     if job.retry_count < job.max_retries:
                         # Retry: increment counter and set back to PENDING
                         job.retry_count += 1
@@ -244,17 +315,74 @@ class JobQueueIntegration:
                         job.error = f"Max retries exceeded. Last error: {str(e)}"
                         logger.error(f"Job {job_id} failed permanently (max retries exceeded)")
                     
+                    self._clear_lease(job)
                     sync_session.commit()
                 except Exception as update_error:
                     logger.error(f"Failed to update job {job_id} status: {update_error}")
         
         finally:
+            if heartbeat_task is not None:
+                heartbeat_task.cancel()
+            
             # Close sync session
             try:
                 sync_session.close()
             except Exception as close_err:
                 logger.warning(f"Error closing session for job {job_id}: {close_err}")
     
+    async def _heartbeat_loop(self, job_id: int, lease_lost: asyncio.Event) -> None:
+        """Extend this node's lease on a running job until cancelled (as JobWorker does)."""
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_INTERVAL)
+            try:
+                extended = await asyncio.to_thread(self._extend_lease, job_id)
+            except Exception as e:
+                # Keep trying; the lease only lapses after inline_lease_seconds
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+                continue
+            
+            if not extended:
+                logger.warning(f"Node {self.node_id} lost the lease on job {job_id}; its result will not be recorded")
+                lease_lost.set()
+                return
+    
+    def _extend_lease(self, job_id: int) -> bool:
+        """Compare-and-set lease extension (sync session). False if no longer owned."""
+        session = get_sync_session()
+        try:
+            now = datetime.now(timezone.utc)
+            result = session.execute(
+                update(Job)
+                .where(
+                    Job.id == job_id,
+                    Job.locked_by == self.node_id,
+                    Job.status == JobStatus.PROCESSING
+                )
+                .values(
+                    locked_until=now + timedelta(seconds=self.inline_lease_seconds),
+                    heartbeat_at=now,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return result.rowcount == 1
+        finally:
+            session.close()
+    
+    def _still_owned(self, sync_session, job: Job, lease_lost: asyncio.Event) -> bool:
+        """Whether this node still holds the job's lease (re-read from the database)."""
+        if lease_lost.is_set():
+            return False
+        sync_session.refresh(job)
+        return job.locked_by == self.node_id and job.status == JobStatus.PROCESSING
+    
+    @staticmethod
+    def _clear_lease(job: Job) -> None:
+        """Release the node lease once a job reaches a final or retry state."""
+        job.locked_by = None
+        job.locked_until = None
+        job.heartbeat_at = None
+    
     def _get_handler_for_job_type(self, job_type: JobType) -> Callable:
         """
         Get the handler function for a job type.
@@ -406,9 +534,16 @@ class JobQueueIntegration:
                 )
                 
                 # Delete cache keys synchronously
-                redis_client.delete(f"notif:unread_count:{user_id}")
-                redis_client.delete(f"dashboard:user:metrics:{user_id}")
-                redis_client.delete("dashboard:admin:metrics")
+                keys = [
+                    f"notif:unread_count:{user_id}",
+                    f"dashboard:user:metrics:{user_id}",
+                    "dashboard:admin:metrics",
+                ]
+                redis_client.delete(*keys)
+                
+                # Drop them from every process's L1 as well
+                from app.core.cache import invalidation_message, l1_invalidation_channel
+                redis_client.publish(l1_invalidation_channel(), invalidation_message(keys=keys))
                 
                 redis_client.close()
                 logger.info(f"Invalidated notification cache for user {user_id}")
@@ -0,0 +1,75 @@
+"""
+Multi-Node Coordination
+
+Every API replica runs its own scheduler, so without coordination each replica
+would fire every recurring job and recover every pending job. This module
+provides:
+- A stable node identifier (hostname:pid) used as the lease holder for jobs
+- Leader election for recurring jobs via named leases in the job_leases table
+
+Leadership is sticky: the node holding a job's lease renews it on every run,
+and another node only takes over once the lease has lapsed (holder stopped).
+"""
+
+import functools
+import os
+import socket
+from typing import Awaitable, Callable
+
+from app.core import get_logger
+from app.core.database import get_fresh_async_session_factory
+from app.services.job_service import JobService
+
+
+logger = get_logger(__name__)
+
+# Extra lease time beyond one interval so a slow run doesn't hand over leadership
+LEADER_LEASE_GRACE_SECONDS = 60
+
+_node_id: str = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def get_node_id() -> str:
+    """Identifier of this process, used as lease holder for jobs and leader leases."""
+    return _node_id
+
+
+def leader_only(
+    job_id: str,
+    handler: Callable[[], Awaitable],
+    interval_seconds: int,
+) -> Callable[[], Awaitable]:
+    """
+    Wrap a recurring job handler so it only runs on the elected node.
+    
+    Each run first acquires (or renews) the lease `recurring:<job_id>`. The
+    lease outlives one interval, so the current leader keeps it between runs
+    and other nodes skip until it expires.
+    
+    Args:
+        job_id: Recurring job identifier
+        handler: Async handler to guard
+        interval_seconds: Job interval (sizes the lease)
+    
+    Returns:
+        Async handler that is a no-op on non-leader nodes
+    """
+    lease_name = f"recurring:{job_id}"
+    lease_seconds = interval_seconds + min(interval_seconds, LEADER_LEASE_GRACE_SECONDS)
+    
+    @functools.wraps(handler)
+    async def wrapper():
+        session_factory = await get_fresh_async_session_factory()
+        async with session_factory() as session:
+            acquired = await JobService(session).try_acquire_lease(
+                lease_name, get_node_id(), ttl_seconds=lease_seconds
+            )
+            await session.commit()
+        
+        if not acquired:
+            logger.debug(f"Skipping {job_id}: another node holds the leader lease")
+            return None
+        
+        return await handler()
+    
+    return wrapper
@@ -0,0 +1,287 @@
+"""
+Job Worker Runtime
+
+Long-lived async worker that executes persisted jobs outside the API process.
+
+Unlike the inline path (JobManager threads with a fresh event loop, thread pool
+and database engine per job), the worker keeps one event loop and one database
+connection pool for its whole lifetime:
+- Claims PENDING jobs atomically from the jobs table (compare-and-set on status)
+- Bounds concurrency per job type (JOB_WORKER_CONCURRENCY)
+- Extends each job's lease with heartbeats while it runs (no fixed timeout)
+- Requeues jobs whose lease expired (crashed or stalled workers)
+
+Start it with `python run_worker.py` and set JOB_EXECUTION_MODE=worker on the
+API so jobs are only persisted there.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from app.config.settings import settings
+from app.core import get_logger
+from app.jobs.integration import JobQueueIntegration
+from app.jobs.leader import get_node_id
+from app.models.job import Job, JobType
+from app.services.job_service import JobService
+
+
+logger = get_logger(__name__)
+
+# Base delay before a failed job is retried (doubles with each attempt)
+RETRY_BACKOFF_BASE_SECONDS = 10
+
+
+class JobWorker:
+    """Claims jobs from the database and runs them on a single event loop."""
+
+    def __init__(
+        self,
+        session_factory,
+        worker_id: Optional[str] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        default_concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        visibility_timeout: Optional[int] = None,
+        heartbeat_interval: Optional[int] = None,
+        max_runtime_seconds: Optional[int] = None,
+        shutdown_grace_seconds: float = 30.0,
+    ):
+        """
+        Initialize worker.
+
+        Args:
+            session_factory: AsyncSession factory shared by all jobs in this worker
+            worker_id: Unique worker identifier (default: hostname:pid)
+            concurrency: Per job type limits (default: JOB_WORKER_CONCURRENCY)
+            default_concurrency: Limit for job types not in `concurrency`
+            poll_interval: Seconds between queue polls when idle
+            visibility_timeout: Lease length in seconds
+            heartbeat_interval: Seconds between lease extensions
+            max_runtime_seconds: Optional per-job ceiling (0/None = unlimited)
+            shutdown_grace_seconds: How long stop() waits for running jobs
+        """
+        self.session_factory = session_factory
+        self.worker_id = worker_id or get_node_id()
+        self.concurrency = (
+            concurrency if concurrency is not None else settings.get_job_worker_concurrency()
+        )
+        self.default_concurrency = default_concurrency or settings.JOB_WORKER_DEFAULT_CONCURRENCY
+        self.poll_interval = poll_interval or settings.JOB_WORKER_POLL_INTERVAL
+        self.visibility_timeout = visibility_timeout or settings.JOB_VISIBILITY_TIMEOUT
+        self.heartbeat_interval = heartbeat_interval or settings.JOB_HEARTBEAT_INTERVAL
+        self.max_runtime_seconds = (
+            max_runtime_seconds if max_runtime_seconds is not None
+            else settings.JOB_WORKER_MAX_RUNTIME_SECONDS
+        )
+        self.shutdown_grace_seconds = shutdown_grace_seconds
+
+        # Handlers are shared with the inline path
+        self.integration = JobQueueIntegration(session_factory)
+
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._lost_leases: set[int] = set()
+        self._stop_event = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    def limit_for(self, job_type: str) -> int:
+        """Concurrency limit for a job type."""
+        return self.concurrency.get(job_type, self.default_concurrency)
+
+    def stop(self) -> None:
+        """Ask the worker to stop claiming jobs and shut down."""
+        self._stop_event.set()
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        """Run the claim/execute loop until stop() is called."""
+        logger.info(
+            f"Job worker {self.worker_id} started "
+            f"(visibility_timeout={self.visibility_timeout}s, heartbeat={self.heartbeat_interval}s, "
+            f"concurrency={self.concurrency}, default={self.default_concurrency})"
+        )
+
+        await self.requeue_expired()
+        last_reap = time.monotonic()
+
+        while not self._stop_event.is_set():
+            try:
+                claimed = await self.claim_available()
+
+                # Reap expired leases a couple of times per visibility window
+                if time.monotonic() - last_reap >= self.visibility_timeout / 2:
+                    await self.requeue_expired()
+                    last_reap = time.monotonic()
+            except Exception as e:
+                logger.error(f"Job worker poll failed: {e}", exc_info=True)
+                claimed = 0
+
+            if claimed:
+                continue
+
+            # Idle (or at capacity): wait for a job to finish, a poll tick or stop()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        await self._drain()
+        logger.info(f"Job worker {self.worker_id} stopped")
+
+    async def claim_available(self) -> int:
+        """
+        Claim as many jobs as there are free slots, per job type.
+
+        Returns:
+            Number of jobs claimed and started
+        """
+        claimed_jobs: List[Job] = []
+
+        async with self.session_factory() as session:
+            job_service = JobService(session)
+            for job_type in JobType:
+                free_slots = self.limit_for(job_type.value) - self._in_flight[job_type.value]
+                if free_slots <= 0:
+                    continue
+                claimed_jobs.extend(await job_service.claim_next(
+                    worker_id=self.worker_id,
+                    job_types=[job_type],
+                    lease_seconds=self.visibility_timeout,
+                    limit=free_slots,
+                ))
+            await session.commit()
+
+        for job in claimed_jobs:
+            job_type = JobType(job.job_type).value
+            self._in_flight[job_type] += 1
+            self._tasks[job.id] = asyncio.create_task(
+                self._execute(job, job_type),
+                name=f"job-{job.id}"
+            )
+
+        if claimed_jobs:
+            logger.info(f"Worker {self.worker_id} claimed {len(claimed_jobs)} job(s)")
+        return len(claimed_jobs)
+
+    async def requeue_expired(self) -> int:
+        """Requeue jobs whose lease expired."""
+        try:
+            async with self.session_factory() as session:
+                count = await JobService(session).requeue_expired()
+                await session.commit()
+                return count
+        except Exception as e:
+            logger.error(f"Failed to requeue expired jobs: {e}", exc_info=True)
+            return 0
+
+    async def _execute(self, job: Job, job_type: str) -> None:
+        """Run a claimed job with heartbeats and record the outcome."""
+        heartbeat_task = asyncio.create_task(self._heartbeat_loop(job.id))
+        logger.info(
+            f"Processing job {job.id}: type={job_type}, "
+            f"reference={job.reference_type}/{job.reference_id}, "
+            f"attempt={job.retry_count + 1}/{job.max_retries + 1}"
+        )
+
+        try:
+            handler = self.integration._get_handler_for_job_type(JobType(job.job_type))
+            if self.max_runtime_seconds:
+                result_data = await asyncio.wait_for(handler(job), timeout=self.max_runtime_seconds)
+            else:
+                result_data = await handler(job)
+
+            await self._finish(job.id, result=JobQueueIntegration.normalize_result(result_data))
+
+        except asyncio.CancelledError:
+            # Worker shutting down: hand the job back without counting a retry
+            await self._release(job.id)
+            raise
+
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}", exc_info=True)
+            await self._finish(job.id, error=str(e))
+
+        finally:
+            heartbeat_task.cancel()
+            self._lost_leases.discard(job.id)
+            self._tasks.pop(job.id, None)
+            self._in_flight[job_type] -= 1
+            self._wakeup.set()
+
+    async def _heartbeat_loop(self, job_id: int) -> None:
+        """Extend the job lease until cancelled."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                async with self.session_factory() as session:
+                    extended = await JobService(session).heartbeat(
+                        job_id, self.worker_id, lease_seconds=self.visibility_timeout
+                    )
+                    await session.commit()
+
+                if not extended:
+                    logger.warning(
+                        f"Worker {self.worker_id} lost the lease on job {job_id}; "
+                        "its result will not be recorded"
+                    )
+                    self._lost_leases.add(job_id)
+                    return
+            except Exception as e:
+                # Keep trying; the lease only lapses after visibility_timeout
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+
+    async def _finish(self, job_id: int, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        """Record job outcome if this worker still owns the lease."""
+        try:
+            async with self.session_factory() as session:
+                job_service = JobService(session)
+                job = await job_service.get(job_id)
+
+                if job_id in self._lost_leases or not job or job.locked_by != self.worker_id:
+                    logger.warning(f"Skipping status update for job {job_id}: lease no longer held")
+                    return
+
+                if error is None:
+                    await job_service.mark_completed(job_id, result=result)
+                else:
+                    # Back off retries so a failing dependency (SMTP, vector DB) isn't hammered
+                    await job_service.mark_failed(
+                        job_id,
+                        error,
+                        retry_delay_seconds=RETRY_BACKOFF_BASE_SECONDS * (2 ** job.retry_count),
+                    )
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to update job {job_id} status: {e}", exc_info=True)
+
+    async def _release(self, job_id: int) -> None:
+        """Return a job to the queue on shutdown."""
+        try:
+            async with self.session_factory() as session:
+                released = await JobService(session).release(job_id, self.worker_id)
+                await session.commit()
+            if released:
+                logger.info(f"Released job {job_id} back to the queue")
+        except Exception as e:
+            logger.error(f"Failed to release job {job_id}: {e}")
+
+    async def _drain(self) -> None:
+        """Wait for running jobs, then cancel (and release) whatever is left."""
+        if not self._tasks:
+            return
+
+        running = list(self._tasks.values())
+        logger.info(
+            f"Waiting up to {self.shutdown_grace_seconds}s for {len(running)} running job(s)..."
+        )
+        done, pending = await asyncio.wait(running, timeout=self.shutdown_grace_seconds)
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(f"Cancelled {len(pending)} job(s) on shutdown; they were returned to the queue")
@@ -157,7 +157,8 @@ def create_app() -> FastAPI:
         startup_controller = get_startup_controller()
         return {
             "status": "healthy" if startup_controller.is_ready() else "starting",
-            "version": settings.app_settings.APP_VERSION
+            "version": settings.app_settings.APP_VERSION,
+            "components": startup_controller.component_status()
         }
     
     return app
@@ -1,6 +1,9 @@
 """Job model for tracking async tasks and background jobs."""
 
-from sqlalchemy import String, Text, Integer, Enum as SQLEnum
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, Text, Integer, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column
 from enum import Enum
 from app.models.base import Base
@@ -47,3 +50,22 @@ class Job(Base):
     # Retry tracking
     retry_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     max_retries: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    
+    # Worker leasing (set while a worker holds the job; expired leases are requeued)
+    locked_by: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index("ix_jobs_status_created", "status", "created_at"),
+    )
+
+
+class JobLease(Base):
+    """Named, expiring lease used to elect one node per recurring job."""
+    
+    __tablename__ = "job_leases"
+    
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(100), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -44,22 +44,20 @@ async def get_admin_metrics(
             detail="Only admins can access admin metrics"
         )
     
-    cache = get_cache()
-    cache_key = "dashboard:admin:metrics"
+    computed = False
     
-    # Try cache first
-    cached = await cache.get(cache_key)
-    if cached:
-        return {"status": "ok", "data": cached, "cached": True}
+    async def load():
+        nonlocal computed
+        computed = True
+        return await DashboardService.get_admin_metrics(session)
     
-    # Fetch from service
     try:
-        metrics = await DashboardService.get_admin_metrics(session)
-        
         # Cache for 1 minute
-        await cache.set(cache_key, metrics, ttl=cache_settings.CACHE_TTL_STATS)
+        metrics = await get_cache().get_or_compute(
+            "dashboard:admin:metrics", load, ttl=cache_settings.CACHE_TTL_STATS
+        )
         
-        return {"status": "ok", "data": metrics, "cached": False}
+        return {"status": "ok", "data": metrics, "cached": not computed}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
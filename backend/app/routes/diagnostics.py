@@ -32,6 +32,7 @@ async def run_diagnostics(
     - Database connection and query tests
     - Cache (Redis) operations tests
     - Vector store connectivity tests
+    - LLM queue wait times and circuit breaker state
     
     Requires a valid diagnostic key for security.
     
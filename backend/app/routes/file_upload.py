@@ -1,9 +1,10 @@
 """File upload endpoints."""
 
+import asyncio
 import json
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, status, Form
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, status, Form, Request, Response
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_session
@@ -29,10 +30,16 @@ from app.handlers.file_upload import (
     handle_delete_file,
     handle_list_admin_files,
     handle_list_user_files_by_status,
-    handle_get_file_content,
+    handle_get_file_download,
     handle_get_file_counts,
 )
-from app.services.file_upload import FileValidator, FileStorage, StructuredDataParser
+from app.services.file_upload import (
+    FileValidator,
+    FileStorage,
+    FileTooLargeError,
+    FileUploadService,
+    StructuredDataParser,
+)
 
 
 logger = get_logger(__name__)
@@ -52,8 +59,8 @@ async def upload_file(
     session: AsyncSession = Depends(get_session)
 ):
     """Upload file and create database record."""
-    # Use 'uploaded' category for user-uploaded files
-    storage = FileStorage(category="uploaded")
+    # Uploads are stored content-addressed (one blob per distinct SHA-256)
+    storage = FileStorage(category=FileStorage.BLOB_CATEGORY)
     
     try:
         if not file.filename:
@@ -62,9 +69,32 @@ async def upload_file(
                 detail="File name is required"
             )
         
-        # Read file content
-        content = await file.read()
-        file_size = len(content)
+        # Reject unsupported types and declared oversize uploads before reading
+        is_valid, error_msg, file_type = FileValidator.detect_file_type(
+            file.filename,
+            file.content_type
+        )
+        if is_valid and file.size is not None and file.size > FileValidator.MAX_FILE_SIZE:
+            is_valid, error_msg, file_type = FileValidator.validate_file(
+                file.filename, file.size, file.content_type
+            )
+        
+        if not is_valid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=error_msg
+            )
+        
+        # Stream to a temp file, hashing and enforcing the size limit as we go
+        try:
+            staged = await storage.stage_upload(file, max_size=FileValidator.MAX_FILE_SIZE)
+        except FileTooLargeError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        file_size = staged.size
+        file_hash = staged.file_hash
         
         # Validate file
         is_valid, error_msg, file_type = FileValidator.validate_file(
@@ -74,68 +104,82 @@ async def upload_file(
         )
         
         if not is_valid:
+            await storage.discard_upload(staged)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=error_msg
             )
         
-        # Save file to disk (returns relative path like "uploaded/filename.pdf")
-        file_path = await storage.save_file(file.filename, content)
-        
-        # Calculate file hash
-        file_hash = await FileStorage.calculate_hash(file_path)
+        # Move into the blob store; identical bytes already stored are reused
+        # (returns relative path like "blobs/ab/ab12....pdf")
+        try:
+            file_path, _ = await storage.commit_blob(staged, file_type)
+        except Exception:
+            await storage.discard_upload(staged)
+            raise
         
-        # Parse field_selection from query param
-        selected_fields = []
-        if field_selection:
-            try:
-                selected_fields = json.loads(field_selection)
-                if not isinstance(selected_fields, list):
+        try:
+            # Parse field_selection from query param
+            selected_fields = []
+            if field_selection:
+                try:
+                    selected_fields = json.loads(field_selection)
+                    if not isinstance(selected_fields, list):
+                        selected_fields = []
+                except json.JSONDecodeError:
+                    logger.warning(f"Invalid field_selection JSON: {field_selection}")
                     selected_fields = []
-            except json.JSONDecodeError:
-                logger.warning(f"Invalid field_selection JSON: {field_selection}")
-                selected_fields = []
         
-        # Extract fields from structured data if applicable
-        available_fields = []
-        if file_type in ("json", "csv", "xlsx", "xls"):
-            try:
-                available_fields = StructuredDataParser.extract_fields(file_path, file_type)
-                
-                # Validate selected fields exist in file
-                if selected_fields:
-                    selected_fields = StructuredDataParser.validate_field_selection(
-                        available_fields,
-                        selected_fields
+            # Extract fields from structured data if applicable
+            available_fields = []
+            if file_type in ("json", "csv", "xlsx", "xls"):
+                try:
+                    available_fields = await asyncio.to_thread(
+                        StructuredDataParser.extract_fields, file_path, file_type
                     )
-            except Exception as e:
-                logger.warning(f"Failed to extract fields from {file.filename}: {e}")
-                available_fields = []
+                
+                    # Validate selected fields exist in file
+                    if selected_fields:
+                        selected_fields = StructuredDataParser.validate_field_selection(
+                            available_fields,
+                            selected_fields
+                        )
+                except Exception as e:
+                    logger.warning(f"Failed to extract fields from {file.filename}: {e}")
+                    available_fields = []
         
-        # Create upload request
-        upload_request = FileUploadCreate(
-            file_name=file.filename,
-            file_type=file_type,
-            file_size=file_size,
-            uploaded_by_id=user.id,
-            file_purpose=file_purpose,
-            security_level=security_level,
-            is_department_only=is_department_only,
-            department_id=department_id,
-            field_selection=selected_fields if selected_fields else None,
-        )
+            # Create upload request
+            upload_request = FileUploadCreate(
+                file_name=file.filename,
+                file_type=file_type,
+                file_size=file_size,
+                uploaded_by_id=user.id,
+                file_purpose=file_purpose,
+                security_level=security_level,
+                is_department_only=is_department_only,
+                department_id=department_id,
+                field_selection=selected_fields if selected_fields else None,
+            )
         
-        # Call handler
-        result = await handle_upload_file(file_path, upload_request, user, session, file_hash)
+            # Call handler
+            result = await handle_upload_file(file_path, upload_request, user, session, file_hash)
         
-        if not result.get("success"):
-            await storage.delete_file(file_path)
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=result.get("error", "Upload failed")
-            )
+            if not result.get("success"):
+                # Only removed if no other upload shares the blob
+                await FileUploadService(session).release_blob(file_path, file_hash)
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=result.get("error", "Upload failed")
+                )
+        
+            # The row referencing the blob is committed; the staged copy can go
+            # (or restores the blob if a concurrent delete removed it meanwhile)
+            await storage.finalize_blob(staged, file_path)
         
-        return FileUploadResponse(**result["file"])
+            return FileUploadResponse(**result["file"])
+        finally:
+            # No-op once finalized
+            await storage.discard_upload(staged)
     
     except HTTPException:
         raise
@@ -232,20 +276,41 @@ async def get_file(
     return FileUploadDetailResponse(**result["file"])
 
 
-@router.get("/{file_id}/content")
-async def get_file_content(
+# Map file types to proper content types
+CONTENT_TYPE_MAP = {
+    "pdf": "application/pdf",
+    "txt": "text/plain",
+    "md": "text/markdown",
+    "markdown": "text/markdown",
+    "json": "application/json",
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "xls": "application/vnd.ms-excel",
+}
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison)."""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
+
+
+async def _serve_file(
     file_id: int,
-    user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
-):
+    request: Request,
+    user: User,
+    session: AsyncSession,
+    disposition: str
+) -> Response:
     """
-    Get file content for viewing in browser.
-    Returns binary blob with appropriate Content-Type header.
+    Stream a stored file from disk after the access check.
     
-    Supports: PDF, Excel, CSV, JSON, Markdown, TXT
-    For unsupported types: returns with application/octet-stream
+    FileResponse sends the file in chunks (or via the server's pathsend
+    extension) and answers Range / If-Range requests with 206. The ETag is
+    the stored content hash, so If-None-Match revalidation returns 304
+    without touching the file.
     """
-    result = await handle_get_file_content(file_id, user, session)
+    result = await handle_get_file_download(file_id, user, session)
     
     if not result.get("success"):
         status_code = status.HTTP_403_FORBIDDEN if "Access denied" in result.get("error", "") else status.HTTP_404_NOT_FOUND
@@ -254,34 +319,57 @@ async def get_file_content(
             detail=result.get("error", "Failed to retrieve file")
         )
     
-    file_content = result["content"]
-    filename = result["filename"]
-    file_type = result.get("file_type", "").lower()
-    
-    # Map file types to proper content types
-    content_type_map = {
-        "pdf": "application/pdf",
-        "txt": "text/plain",
-        "md": "text/markdown",
-        "markdown": "text/markdown",
-        "json": "application/json",
-        "csv": "text/csv",
-        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        "xls": "application/vnd.ms-excel",
+    file_type = (result.get("file_type") or "").lower()
+    etag = f'"{result["file_hash"]}"'
+    headers = {
+        "ETag": etag,
+        # Authenticated content: browser may cache, but must revalidate
+        "Cache-Control": "private, no-cache",
+        "X-File-Type": file_type,
     }
     
-    content_type = content_type_map.get(file_type, "application/octet-stream")
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     
-    return StreamingResponse(
-        iter([file_content]),
-        media_type=content_type,
-        headers={
-            "Content-Disposition": f"inline; filename={filename}",
-            "X-File-Type": file_type
-        }
+    return FileResponse(
+        result["path"],
+        media_type=CONTENT_TYPE_MAP.get(file_type, "application/octet-stream"),
+        filename=result["filename"],
+        content_disposition_type=disposition,
+        headers=headers,
     )
 
 
+@router.get("/{file_id}/content")
+async def get_file_content(
+    file_id: int,
+    request: Request,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Get file content for viewing in browser.
+    Returns binary blob with appropriate Content-Type header.
+    
+    Supports: PDF, Excel, CSV, JSON, Markdown, TXT
+    For unsupported types: returns with application/octet-stream
+    Supports HTTP Range requests and ETag revalidation (If-None-Match).
+    """
+    return await _serve_file(file_id, request, user, session, disposition="inline")
+
+
+@router.get("/{file_id}/download")
+async def download_file(
+    file_id: int,
+    request: Request,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """Download file as an attachment (same access rules and Range support as /content)."""
+    return await _serve_file(file_id, request, user, session, disposition="attachment")
+
+
 @router.get("/", response_model=FileUploadListResponse)
 async def list_my_files(
     limit: int = Query(50, ge=1, le=200),
@@ -13,8 +13,7 @@ from app.core.security import require_role
 from app.models.job import Job, JobStatus
 from app.models.user import User
 from app.schemas.common import MessageResponse
-from app.core.cache import get_cache
-from app.config.cache_settings import cache_settings
+from app.services.stats_cache import StatsCache
 
 router = APIRouter(prefix="/api/v1/admin/jobs", tags=["admin:jobs"])
 
@@ -29,30 +28,7 @@ async def get_job_status(
     
     Returns counts of jobs by status.
     """
-    
-    
-    
-    cache = get_cache()
-    cache_key = "stats:jobs"
-    
-    # Try cache first
-    cached = await cache.get(cache_key)
-    if cached:
-        return {"status": "ok", "data": cached}
-    
-    # Fetch from database
-    stats = {}
-    for status in JobStatus:
-        result = await session.execute(
-            select(func.count(Job.id)).where(Job.status == status)
-        )
-        stats[status.value] = result.scalar() or 0
-    
-    result = await session.execute(select(func.count(Job.id)))
-    stats["total"] = result.scalar() or 0
-    
-    # Cache for 1 minute
-    await cache.set(cache_key, stats, ttl=cache_settings.CACHE_TTL_STATS)
+    stats = await StatsCache.get_job_stats(session)
     
     return {
         "status": "ok",
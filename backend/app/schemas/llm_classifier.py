@@ -57,3 +57,49 @@ class QueryDecompositionResult(BaseModel):
                     "If decomposed=TRUE: Return 2-5 focused sub-queries. "
                     "Each query must be self-contained and searchable."
     )
+
+
+class QueryPlanResult(BaseModel):
+    """
+    Combined intent classification and query decomposition.
+    
+    Used with structured output when the planner replaces the separate
+    classifier and decomposer calls with a single one. Exposes the fields of
+    both LLMClassificationResult and QueryDecompositionResult.
+    """
+    requires_rag: bool = Field(
+        ...,
+        description=(
+            "TRUE if query asks for specific information, facts, policies, procedures, "
+            "people (who/what/when/where/why/how questions), or domain knowledge. "
+            "FALSE ONLY for simple greetings (hi/hello) or thanks (thank you/thanks). "
+            "When uncertain, ALWAYS set to TRUE."
+        )
+    )
+    confidence: float = Field(
+        ...,
+        ge=0.0,
+        le=1.0,
+        description="Confidence score from 0.0 to 1.0"
+    )
+    response: str = Field(
+        default="",
+        description=(
+            "Empty string if requires_rag is TRUE. "
+            "Brief friendly response (1-2 sentences) ONLY if requires_rag is FALSE."
+        )
+    )
+    decomposed: bool = Field(
+        default=False,
+        description="TRUE if query was decomposed into multiple sub-queries. "
+                    "FALSE if original query is simple/clear enough and returned as-is. "
+                    "Always FALSE if requires_rag is FALSE."
+    )
+    queries: List[str] = Field(
+        default_factory=list,
+        max_length=5,
+        description="List of search queries (empty if requires_rag is FALSE). "
+                    "If decomposed=FALSE: Return the original query (1 query). "
+                    "If decomposed=TRUE: Return 2-5 focused sub-queries. "
+                    "Each query must be self-contained and searchable."
+    )
@@ -7,7 +7,7 @@ Provides comprehensive audit trail with database persistence.
 
 import json
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, desc, func
@@ -88,6 +88,32 @@ async def log_activity(
     return activity_log
 
 
+async def log_activities(db: AsyncSession, entries: List[Dict[str, Any]]) -> List[ActivityLog]:
+    """
+    Log several activities with one flush (a multi-row INSERT).
+    
+    Args:
+        db: Database session
+        entries: Keyword arguments of log_activity() for each entry
+        
+    Returns:
+        List[ActivityLog]: Created log entries
+    """
+    activity_logs = []
+    for entry in entries:
+        details = entry.get("details")
+        activity_logs.append(ActivityLog(
+            **{**entry, "details": json.dumps(details) if details else None}
+        ))
+    
+    db.add_all(activity_logs)
+    await db.flush()
+    
+    logger.info(f"Activity logged: {len(activity_logs)} entries")
+    
+    return activity_logs
+
+
 async def get_activity_logs(
     db: AsyncSession,
     user_id: Optional[int] = None,
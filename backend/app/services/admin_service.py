@@ -5,6 +5,7 @@ Admin Service - Business logic for admin-specific operations.
 from typing import Dict
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config.settings import settings
 from app.core import get_logger
 from app.core.startup import get_startup_controller
 from app.models.job import JobType
@@ -66,19 +67,31 @@ class AdminService:
             if job_integration is None:
                 raise Exception("Job integration not initialized")
             
-            # Create and schedule batch ingestion job
-            job = await job_integration.create_and_schedule(
-                job_type=JobType.FILE_INGESTION,
-                reference_id=0,  # 0 indicates batch mode
-                reference_type="batch",
-                handler=job_integration._handle_file_ingestion,
-                payload={
+            # Create and schedule batch ingestion job(s). Files are claimed atomically,
+            # so extra jobs (run by other workers/replicas) split the backlog between them.
+            parallel_jobs = max(1, min(
+                settings.INGESTION_PARALLEL_BATCH_JOBS,
+                -(-pending_file_count // settings.INGESTION_SHARD_SIZE)
+            ))
+            jobs = []
+            for index in range(parallel_jobs):
+                payload = {
                     "batch_mode": True,
-                    "triggered_by_admin_id": admin_id,
                     "pending_file_count": pending_file_count
-                },
-                max_retries=1  # Batch jobs don't retry to avoid reprocessing
-            )
+                }
+                if index == 0:
+                    # Only the primary job notifies the admin
+                    payload["triggered_by_admin_id"] = admin_id
+                
+                jobs.append(await job_integration.create_and_schedule(
+                    job_type=JobType.FILE_INGESTION,
+                    reference_id=0,  # 0 indicates batch mode
+                    reference_type="batch",
+                    handler=job_integration._handle_file_ingestion,
+                    payload=payload,
+                    max_retries=1  # Batch jobs don't retry to avoid reprocessing
+                ))
+            job = jobs[0]
             
             # Create initial notification for admin
             notification_service = NotificationService(self.session)
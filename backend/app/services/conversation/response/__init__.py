@@ -7,12 +7,14 @@ This package contains modular components for conversation response generation:
 - error_handler: Handles error response generation
 - retrieval_coordinator: Coordinates multi-query retrieval with partial context tracking
 - pipeline: Orchestrates the response generation flow
+- coalescer: Shares one streamed generation between identical concurrent requests
 """
 
 from app.services.conversation.response.activity_logger import ConversationActivityLogger
 from app.services.conversation.response.intent_handler import IntentHandler
 from app.services.conversation.response.error_handler import ErrorResponseHandler
 from app.services.conversation.response.retrieval_coordinator import RetrievalCoordinator
+from app.services.conversation.response.coalescer import StreamCoalescer, get_stream_coalescer
 from app.services.conversation.response.pipeline import ResponsePipeline
 
 __all__ = [
@@ -20,5 +22,7 @@ __all__ = [
     "IntentHandler",
     "ErrorResponseHandler",
     "RetrievalCoordinator",
+    "StreamCoalescer",
+    "get_stream_coalescer",
     "ResponsePipeline"
 ]
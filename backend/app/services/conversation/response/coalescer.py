@@ -0,0 +1,149 @@
+"""
+Stream Coalescer
+
+Single-flight for streamed responses: identical concurrent requests share one
+LLM generation. The first request (leader) starts the generation as a task
+that buffers its events; every request, leader included, follows that buffer,
+so followers arriving late replay what was already generated. The generation
+is cancelled only when every follower has gone; a cancelled flight is closed
+at once, so later identical requests start a new generation instead of
+joining one that is going away.
+"""
+
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple
+import asyncio
+
+from app.core import get_logger
+
+logger = get_logger(__name__)
+
+INTERRUPTED_EVENT = {"type": "error", "content": "The response generation was interrupted. Please try again."}
+
+
+class StreamFlight:
+    """One shared generation and the events it produced so far."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.items: List[Dict[str, Any]] = []
+        self.done = False
+        self.completed = False  # Stream ran to its end (not cancelled/crashed)
+        self.failed = False  # An error event was published
+        self.llm_type: Optional[Any] = None  # LLM that generated the stream, set by the generation
+        self.followers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, item: Dict[str, Any]) -> None:
+        if item.get("type") == "error":
+            self.failed = True
+        self.items.append(item)
+        self._notify()
+
+    def close(self, completed: bool) -> None:
+        self.done = True
+        self.completed = completed
+        self._notify()
+
+    async def follow(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Replay buffered events, then yield new ones until the stream ends.
+        
+        A stream that ended early without an error event of its own (e.g.
+        cancelled at shutdown) ends with INTERRUPTED_EVENT.
+        """
+        self.followers += 1
+        try:
+            position = 0
+            while True:
+                while position < len(self.items):
+                    yield self.items[position]
+                    position += 1
+                if self.done:
+                    if not self.completed and not self.failed:
+                        yield INTERRUPTED_EVENT
+                    return
+                await self._changed.wait()
+        finally:
+            self.followers -= 1
+            if self.followers == 0 and not self.done and self.task:
+                logger.debug(f"All followers left, cancelling shared stream {self.key[:12]}")
+                # Closed right away so no new request joins it while it is cancelled
+                self.close(completed=False)
+                self.task.cancel()
+
+    def _notify(self) -> None:
+        # Wake current waiters; later waits use a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class StreamCoalescer:
+    """Registry of in-flight shared generations by coalescing key."""
+
+    def __init__(self):
+        self._flights: Dict[str, StreamFlight] = {}
+
+    def attach(
+        self,
+        key: str,
+        start: Callable[[StreamFlight], AsyncGenerator[Dict[str, Any], None]]
+    ) -> Tuple[StreamFlight, bool]:
+        """
+        Join the in-flight generation for key, or start it.
+
+        Args:
+            key: Coalescing key (identical requests share a key)
+            start: Creates the stream of the given flight; only called for the leader
+
+        Returns:
+            Tuple of (flight to follow, whether this request is the leader)
+        """
+        flight = self._flights.get(key)
+        if flight is not None and not flight.done:
+            return flight, False
+
+        flight = StreamFlight(key)
+        self._flights[key] = flight
+        flight.task = asyncio.create_task(self._pump(flight, start(flight)))
+        # Also runs for a task cancelled before it started (_pump never ran)
+        flight.task.add_done_callback(lambda _: self._forget(flight))
+        return flight, True
+
+    def in_flight(self) -> int:
+        """Number of shared generations currently running."""
+        return len(self._flights)
+
+    async def _pump(self, flight: StreamFlight, stream: AsyncGenerator[Dict[str, Any], None]) -> None:
+        completed = False
+        try:
+            async for item in stream:
+                flight.publish(item)
+            completed = True
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Shared stream failed: {e}", exc_info=True)
+            flight.publish({"type": "error", "content": "An error occurred while generating the response."})
+        finally:
+            if not flight.done:
+                flight.close(completed)
+            await stream.aclose()
+    
+    def _forget(self, flight: StreamFlight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        if not flight.done:
+            flight.close(completed=False)
+
+
+# Singleton instance
+_stream_coalescer: Optional[StreamCoalescer] = None
+
+
+def get_stream_coalescer() -> StreamCoalescer:
+    """Get the shared stream coalescer (per worker process)."""
+    global _stream_coalescer
+    if _stream_coalescer is None:
+        _stream_coalescer = StreamCoalescer()
+    return _stream_coalescer
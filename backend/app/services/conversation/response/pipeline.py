@@ -6,13 +6,19 @@ Handles retrieval, LLM routing, prompt construction, streaming, and fallback log
 Includes query decomposition for improved retrieval.
 """
 
-from typing import Dict, Any, AsyncGenerator, List, Optional, Tuple
+from typing import Dict, Any, AsyncGenerator, Callable, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import time
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
 from app.services.vector_store.retriever import RetrieverService
 from app.services.conversation.response.retrieval_coordinator import RetrievalCoordinator
-from app.services.llm import LLMRouter, LLMType
+from app.services.llm import LLMRouter, LLMType, get_llm_governor, get_llm_health_tracker
+from app.services.llm.planner import normalize_query
+from app.services.conversation.response.coalescer import StreamFlight, get_stream_coalescer
 from app.services.conversation.service import ConversationService
 from app.utils.llm_error_handler import LLMErrorHandler, ErrorShouldRetry
 from app.utils.text_processing import preprocess_query
@@ -20,7 +26,7 @@ from app.config.prompt_settings import get_prompt_settings
 from app.models.user_permission import PermissionLevel
 from app.config.settings import settings
 from app.core import get_logger
-from app.core.semantic_cache import get_semantic_cache
+from app.core.semantic_cache import get_semantic_cache, collect_source_file_ids
 from app.core.events import get_event_bus
 
 logger = get_logger(__name__)
@@ -69,23 +75,49 @@ class ResponsePipeline:
         }
 
     
+    def _from_decomposition(self, decomposition_result: Any) -> Dict[str, Any]:
+        """Build query info from a decomposer or planner result."""
+        all_queries = decomposition_result.queries
+        
+        logger.info(
+            f"Query decomposed: {len(all_queries)} queries "
+            f"(decomposed={decomposition_result.decomposed})"
+        )
+        
+        return {
+            "primary_query": all_queries[0],
+            "all_queries": all_queries,
+            "decomposition_result": decomposition_result,
+            "strategy": "decomposed" if decomposition_result.decomposed else "llm_optimized"
+        }
+    
     async def process_query(
         self,
-        user_query: str
+        user_query: str,
+        query_plan: Optional[Any] = None
     ) -> Dict[str, Any]:
         """
         Process and potentially decompose a query.
         
+        If a planner result with queries is given: Use its decomposition (no LLM call)
         If LLM decomposer is enabled: Use LLM to decompose query
         If decomposer is disabled: Use preprocessing for query optimization
         
+        Args:
+            user_query: Original user query
+            query_plan: QueryPlanResult from the combined planner (optional)
+        
         Returns:
             Dict with processed query info:
             - 'primary_query': Main query to use for retrieval
             - 'all_queries': List of all queries (decomposed or single optimized)
-            - 'decomposition_result': Full result (from decomposer or preprocessor)
+            - 'decomposition_result': Full result (from planner, decomposer or preprocessor)
             - 'strategy': Processing strategy used
         """
+        # Planner already decomposed the query in the classification call
+        if query_plan is not None and query_plan.queries:
+            return self._from_decomposition(query_plan)
+        
         # Check if decomposer is available and enabled in settings
         if not self.query_decomposer or not settings.llm_settings.ENABLE_QUERY_DECOMPOSER:
             # No decomposer - use preprocessing instead
@@ -97,20 +129,7 @@ class ResponsePipeline:
             decomposition_result = await self.query_decomposer.decompose(user_query)
             
             if decomposition_result and decomposition_result.queries:
-                all_queries = decomposition_result.queries
-                primary = all_queries[0]
-                
-                logger.info(
-                    f"Query decomposed: {len(all_queries)} queries "
-                    f"(decomposed={decomposition_result.decomposed})"
-                )
-                
-                return {
-                    "primary_query": primary,
-                    "all_queries": all_queries,
-                    "decomposition_result": decomposition_result,
-                    "strategy": "decomposed" if decomposition_result.decomposed else "llm_optimized"
-                }
+                return self._from_decomposition(decomposition_result)
             else:
                 # Decomposition failed - fallback to preprocessing
                 logger.warning("Query decomposition returned empty, falling back to preprocessing")
@@ -161,7 +180,8 @@ class ResponsePipeline:
         self,
         user_query: str,
         response_text: str,
-        security_metadata: Optional[Dict[str, Any]] = None
+        security_metadata: Optional[Dict[str, Any]] = None,
+        documents: Optional[List[Any]] = None
     ):
         """
         Cache the generated response with pre-computed security metadata.
@@ -170,7 +190,14 @@ class ResponsePipeline:
             user_query: Original user query
             response_text: Generated response to cache
             security_metadata: Pre-computed complete security metadata dict
+            documents: Context documents (None when the context came from cache;
+                       source files are then taken from security_metadata)
         """
+        if documents:
+            source_file_ids = collect_source_file_ids(documents)
+        else:
+            source_file_ids = (security_metadata or {}).get("source_file_ids", [])
+        
         # Emit cache event (non-blocking background processing)
         # Event handler will use pre-computed metadata directly
         try:
@@ -179,7 +206,8 @@ class ResponsePipeline:
                 "cache_type": "response",
                 "query": user_query,
                 "entry": response_text,
-                "security_metadata": security_metadata  # Pass complete metadata object
+                "security_metadata": security_metadata,  # Pass complete metadata object
+                "source_file_ids": source_file_ids
             })
         except Exception as e:
             logger.error(f"Failed to emit cache event: {e}", exc_info=True)
@@ -249,11 +277,14 @@ class ResponsePipeline:
         """
         Generate streaming RAG response with fallback on error.
         
-        If primary LLM fails with transient error, tries fallback LLM.
+        With ENABLE_QUERY_COALESCING, a request identical to one already
+        generating (same normalized query, context, conversation history and
+        LLM) follows that generation's token stream instead of calling the
+        LLM, and then saves the response to its own conversation.
         
         Args:
             llm: Primary LLM instance
-            llm_type: Primary LLM type
+            llm_type: Primary LLM type (FALLBACK when routed around an open circuit)
             user_query: User's question
             documents: Retrieved context documents
             conversation_id: Conversation ID
@@ -263,34 +294,178 @@ class ResponsePipeline:
         Yields:
             Stream chunks with tokens, metadata, or errors
         """
-        primary_exception = None
-        attempted_fallback = False
-        fallback_exception = None
+        history = None
+        if settings.llm_settings.ENABLE_QUERY_COALESCING:
+            # Part of the key: the answer depends on it, so requests only share
+            # a generation with conversations that have the same history
+            history = await self.conversation_service.get_conversation_history(conversation_id, user_id)
         
-        # Get conversation history
-        history = await self.conversation_service.get_conversation_history(conversation_id, user_id)
-        
-        try:
-            async for item in self._try_stream(
+        def start(flight: Optional[StreamFlight] = None) -> AsyncGenerator[Dict[str, Any], None]:
+            def on_generated(used_type: LLMType) -> None:
+                if flight is not None:
+                    flight.llm_type = used_type
+            
+            return self._stream_with_fallback(
                 llm=llm,
+                llm_type=llm_type,
                 user_query=user_query,
                 documents=documents,
                 cached_context_text=cached_context_text,
-                history=history,
                 conversation_id=conversation_id,
                 user_id=user_id,
                 partial_context=partial_context,
-                security_metadata=security_metadata
-            ):
+                security_metadata=security_metadata,
+                history=history,
+                on_generated=on_generated
+            )
+        
+        if not settings.llm_settings.ENABLE_QUERY_COALESCING:
+            async for item in start():
                 yield item
             return
         
+        key = self._coalescing_key(user_query, documents, cached_context_text, partial_context, history, llm_type)
+        flight, is_leader = get_stream_coalescer().attach(key, start)
+        
+        if is_leader:
+            async for item in flight.follow():
+                yield item
+            return
+        
+        logger.info(f"Coalesced with in-flight identical query for conversation {conversation_id}")
+        full_response = ""
+        failed = False
+        async for item in flight.follow():
+            if item.get("type") == "token":
+                full_response += item["content"]
+            elif item.get("type") == "error":
+                failed = True
+            elif item.get("type") != "queued":
+                continue  # Sources come from this request's own documents
+            yield item
+        
+        if failed or not flight.completed:
+            return
+        
+        sources = await self._save_streamed_response(
+            user_query=user_query,
+            full_response=full_response,
+            documents=documents,
+            conversation_id=conversation_id,
+            user_id=user_id,
+            is_fallback=flight.llm_type == LLMType.FALLBACK,
+            partial_context=partial_context
+        )
+        if sources:
+            yield {"type": "metadata", "sources": sources}
+    
+    def _coalescing_key(
+        self,
+        user_query: str,
+        documents: Optional[List[Any]],
+        cached_context_text: Optional[str],
+        partial_context: Optional[Dict[str, Any]],
+        history: List[Dict[str, str]],
+        llm_type: LLMType
+    ) -> str:
+        """
+        Key under which identical requests share one generation.
+        
+        The context and conversation history are part of the key, so a
+        follower only receives an answer built from exactly the documents its
+        own clearance retrieved, and never one shaped by another
+        conversation's messages.
+        """
+        context_text = cached_context_text or "\n\n".join(doc.page_content for doc in documents or [])
+        material = json.dumps(
+            [normalize_query(user_query), context_text, partial_context, history, llm_type.value],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+    
+    async def _stream_with_fallback(
+        self,
+        llm: Any,
+        llm_type: LLMType,
+        user_query: str,
+        documents: Optional[List[Any]],
+        cached_context_text: Optional[str],
+        conversation_id: str,
+        user_id: int,
+        partial_context: Optional[Dict[str, Any]] = None,
+        security_metadata: Optional[Dict[str, Any]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        on_generated: Optional[Callable[[LLMType], None]] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Stream a response from the selected LLM, falling back on error.
+        
+        If primary LLM fails with transient error, tries fallback LLM. With
+        LLM_HEDGE_AFTER_SECONDS set, the fallback is also started when the
+        primary has not produced a first token by then; whichever streams
+        first is used. Outcomes feed the shared LLM health tracker.
+        
+        history is the conversation history if already loaded (it is
+        fetched here otherwise). on_generated, if given, is called with the
+        type of the LLM whose response was streamed to the end.
+        """
+        primary_exception = None
+        attempted_fallback = False
+        fallback_exception = None
+        is_fallback = llm_type == LLMType.FALLBACK
+        
+        # Get conversation history
+        if history is None:
+            history = await self.conversation_service.get_conversation_history(conversation_id, user_id)
+        
+        def start_stream(stream_llm: Any, stream_type: LLMType) -> AsyncGenerator[Dict[str, Any], None]:
+            return self._governed_stream(self._track_stream(
+                self._try_stream(
+                    llm=stream_llm,
+                    user_query=user_query,
+                    documents=documents,
+                    cached_context_text=cached_context_text,
+                    history=history,
+                    conversation_id=conversation_id,
+                    user_id=user_id,
+                    is_fallback=stream_type == LLMType.FALLBACK,
+                    partial_context=partial_context,
+                    security_metadata=security_metadata
+                ),
+                stream_type
+            ), stream_type, user_id)
+        
+        hedge_after = settings.llm_settings.LLM_HEDGE_AFTER_SECONDS
+        hedge_state: Dict[str, Any] = {"fallback_started": False}
+        
+        try:
+            if hedge_after > 0 and not is_fallback and self.llm_router.is_fallback_configured():
+                stream = self._hedged_stream(
+                    start_stream(llm, llm_type),
+                    lambda: start_stream(self.llm_router.get_fallback_llm(), LLMType.FALLBACK),
+                    llm_type,
+                    hedge_after,
+                    hedge_state
+                )
+            else:
+                stream = start_stream(llm, llm_type)
+            
+            async for item in stream:
+                yield item
+            if on_generated:
+                on_generated(hedge_state.get("winner", llm_type))
+            return
+        
         except Exception as e:
             primary_exception = e
-            logger.error(f"Primary LLM error ({llm_type.value}): {e}", exc_info=True)
+            attempted_fallback = hedge_state["fallback_started"]
+            logger.error(f"{llm_type.value.capitalize()} LLM error: {e}", exc_info=True)
             
             # Check if fallback is enabled before attempting
-            if not self.llm_router.is_fallback_enabled():
+            if is_fallback or attempted_fallback:
+                logger.info("Fallback LLM already used, not retrying")
+            elif not self.llm_router.is_fallback_enabled():
                 logger.info("Fallback LLM not enabled, skipping retry")
             else:
                 # Determine if we should try fallback
@@ -307,19 +482,10 @@ class ResponsePipeline:
                         attempted_fallback = True
                         logger.info("Attempting fallback LLM")
                         try:
-                            async for item in self._try_stream(
-                                llm=fallback_llm,
-                                user_query=user_query,
-                                documents=documents,
-                                cached_context_text=cached_context_text,
-                                history=history,
-                                conversation_id=conversation_id,
-                                user_id=user_id,
-                                is_fallback=True,
-                                partial_context=partial_context,
-                                security_metadata=security_metadata
-                            ):
+                            async for item in start_stream(fallback_llm, LLMType.FALLBACK):
                                 yield item
+                            if on_generated:
+                                on_generated(LLMType.FALLBACK)
                             return
                         except Exception as fallback_err:
                             fallback_exception = fallback_err
@@ -335,6 +501,147 @@ class ResponsePipeline:
         logger.error(f"Response generation failed: {error_response['message']}")
         yield {"type": "error", "content": error_response["message"]}
     
+    async def _track_stream(
+        self,
+        stream: AsyncGenerator[Dict[str, Any], None],
+        llm_type: LLMType
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Pass a stream through, recording time to first token and the outcome.
+        
+        A stream closed early (lost a hedge race, client went away) records
+        nothing here.
+        """
+        health = get_llm_health_tracker()
+        started = time.monotonic()
+        first_token = True
+        try:
+            async for item in stream:
+                if first_token and item.get("type") == "token":
+                    health.record_first_token(llm_type, time.monotonic() - started)
+                    first_token = False
+                yield item
+        except Exception:
+            health.record_failure(llm_type)
+            raise
+        health.record_success(llm_type)
+    
+    async def _governed_stream(
+        self,
+        stream: AsyncGenerator[Dict[str, Any], None],
+        llm_type: LLMType,
+        user_id: int
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Run a stream once the LLM governor admits it.
+        
+        If the request has to wait, a "queued" event with the queue position
+        is sent first so the client can show it.
+        
+        Raises:
+            LLMTimeoutError: If not admitted within LLM_QUEUE_TIMEOUT_SECONDS
+        """
+        ticket = get_llm_governor().acquire(llm_type, user_id)
+        try:
+            if not ticket.granted:
+                yield {"type": "queued", "position": ticket.position}
+                waited = await ticket.wait()
+                logger.info(f"Request for {llm_type.value} LLM waited {waited:.2f}s in queue")
+            async for item in stream:
+                yield item
+        finally:
+            ticket.release()
+            await stream.aclose()
+    
+    async def _hedged_stream(
+        self,
+        primary: AsyncGenerator[Dict[str, Any], None],
+        start_fallback: Callable[[], AsyncGenerator[Dict[str, Any], None]],
+        llm_type: LLMType,
+        hedge_after: float,
+        state: Dict[str, Any]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Race the fallback against a primary stream that is slow to start.
+        
+        The primary gets hedge_after seconds to produce its first item; after
+        that the fallback is started too and the first stream to produce an
+        item wins. "queued" events are passed through and don't count. The
+        loser is closed before it persists anything. Sets
+        state["fallback_started"] so the caller doesn't retry the fallback,
+        and state["winner"] to the type of the LLM that won.
+        
+        Raises:
+            The last error if every started stream failed before its first item
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + hedge_after
+        contenders: Dict[asyncio.Future, Tuple[AsyncGenerator, LLMType]] = {
+            asyncio.ensure_future(primary.__anext__()): (primary, llm_type)
+        }
+        queued = set()
+        winner = None
+        last_error: Optional[BaseException] = None
+        
+        try:
+            while contenders and winner is None:
+                timeout = None if state["fallback_started"] else max(0.0, deadline - loop.time())
+                done, _ = await asyncio.wait(
+                    contenders.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.warning(
+                        f"No first token from {llm_type.value} LLM after {hedge_after}s, starting fallback LLM"
+                    )
+                    state["fallback_started"] = True
+                    fallback = start_fallback()
+                    contenders[asyncio.ensure_future(fallback.__anext__())] = (fallback, LLMType.FALLBACK)
+                    continue
+                
+                # Prefer the primary when both are ready at once
+                for task in sorted(done, key=lambda t: contenders[t][1] == LLMType.FALLBACK):
+                    stream, stream_type = contenders.pop(task)
+                    try:
+                        item = task.result()
+                    except StopAsyncIteration:
+                        winner = (stream, stream_type, None)
+                        break
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    
+                    if item.get("type") == "queued":
+                        queued.add(stream_type)
+                        contenders[asyncio.ensure_future(stream.__anext__())] = (stream, stream_type)
+                        yield item
+                        continue
+                    
+                    winner = (stream, stream_type, item)
+                    break
+        finally:
+            # Close the losers; a primary that was slow (not just queued here) counts as a failure
+            for task, (stream, stream_type) in contenders.items():
+                if not task.done():
+                    task.cancel()
+                    if stream_type == llm_type and stream_type not in queued:
+                        get_llm_health_tracker().record_failure(llm_type)
+                await asyncio.gather(task, return_exceptions=True)
+                await stream.aclose()
+        
+        if winner is None:
+            raise last_error
+        
+        stream, stream_type, first_item = winner
+        state["winner"] = stream_type
+        if stream_type == LLMType.FALLBACK:
+            logger.info("Fallback LLM produced the first token, using its response")
+        if first_item is None:
+            return
+        
+        yield first_item
+        async for item in stream:
+            yield item
+    
     async def generate_rag_response(
         self,
         llm: Any,
@@ -359,28 +666,42 @@ class ResponsePipeline:
         primary_exception = None
         attempted_fallback = False
         fallback_exception = None
+        is_fallback = llm_type == LLMType.FALLBACK
+        health = get_llm_health_tracker()
         
         # Get conversation history
         history = await self.conversation_service.get_conversation_history(conversation_id, user_id)
         
+        async def generate(generate_llm: Any, generate_type: LLMType) -> str:
+            async with get_llm_governor().acquire(generate_type, user_id):
+                try:
+                    response_text = await self._try_generate(
+                        llm=generate_llm,
+                        user_query=user_query,
+                        documents=documents,
+                        cached_context_text=cached_context_text,
+                        history=history,
+                        is_fallback=generate_type == LLMType.FALLBACK,
+                        partial_context=partial_context,
+                        security_metadata=security_metadata
+                    )
+                except Exception:
+                    health.record_failure(generate_type)
+                    raise
+            health.record_success(generate_type)
+            return response_text
+        
         try:
-            return await self._try_generate(
-                llm=llm,
-                user_query=user_query,
-                documents=documents,
-                cached_context_text=cached_context_text,
-                history=history,
-                is_fallback=False,
-                partial_context=partial_context,
-                security_metadata=security_metadata
-            )
+            return await generate(llm, llm_type)
         
         except Exception as e:
             primary_exception = e
-            logger.error(f"Primary LLM error ({llm_type.value}): {e}", exc_info=True)
+            logger.error(f"{llm_type.value.capitalize()} LLM error: {e}", exc_info=True)
             
             # Check if fallback is enabled before attempting
-            if not self.llm_router.is_fallback_enabled():
+            if is_fallback:
+                logger.info("Fallback LLM already used, not retrying")
+            elif not self.llm_router.is_fallback_enabled():
                 logger.info("Fallback LLM not enabled, skipping retry")
             else:
                 # Determine if we should try fallback
@@ -397,16 +718,7 @@ class ResponsePipeline:
                         attempted_fallback = True
                         logger.info("Attempting fallback LLM")
                         try:
-                            return await self._try_generate(
-                                llm=fallback_llm,
-                                user_query=user_query,
-                                documents=documents,
-                                cached_context_text=cached_context_text,
-                                history=history,
-                                is_fallback=True,
-                                partial_context=partial_context,
-                                security_metadata=security_metadata
-                            )
+                            return await generate(fallback_llm, LLMType.FALLBACK)
                         except Exception as fallback_err:
                             fallback_exception = fallback_err
                             logger.error(f"Fallback LLM also failed: {fallback_err}", exc_info=True)
@@ -447,7 +759,7 @@ class ResponsePipeline:
         elif documents:
             # Build context from documents and emit cache event
             context_text = "\n\n".join([f"{doc.page_content}" for doc in documents])
-            await self._emit_context_cache(user_query, documents)
+            await self._emit_context_cache(user_query, documents, security_metadata)
             logger.debug(f"Built context from {len(documents)} documents: {len(context_text)} chars")
         else:
             context_text = ""
@@ -485,7 +797,41 @@ class ResponsePipeline:
         
         logger.info(f"Streaming complete: '{full_response[:100]}...'")
         
-        # Build sources only if we have documents (not from cache)
+        # Cache the complete response after streaming
+        await self._cache_response(user_query, full_response, security_metadata, documents)
+        
+        sources = await self._save_streamed_response(
+            user_query=user_query,
+            full_response=full_response,
+            documents=documents,
+            conversation_id=conversation_id,
+            user_id=user_id,
+            is_fallback=is_fallback,
+            partial_context=partial_context
+        )
+        
+        if sources:
+            yield {"type": "metadata", "sources": sources}
+
+        logger.info(f"Streaming completed for conversation {conversation_id}")
+    
+    async def _save_streamed_response(
+        self,
+        user_query: str,
+        full_response: str,
+        documents: Optional[List[Any]],
+        conversation_id: str,
+        user_id: int,
+        is_fallback: bool,
+        partial_context: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Persist a streamed response with its metadata.
+        
+        Returns:
+            Sources payload (empty for text-only cache hits)
+        """
+        # Build sources only if we have documents (not for text-only cache hits)
         sources = self._build_sources_payload(documents) if documents else []
         
         # Build metadata
@@ -495,9 +841,6 @@ class ResponsePipeline:
         if partial_context:
             meta["partial_context"] = partial_context
         
-        # Cache the complete response after streaming
-        await self._cache_response(user_query, full_response, security_metadata)
-        
         # Save response (cache + persist)
         await self.conversation_service.save_assistant_response(
             conversation_id=conversation_id,
@@ -506,11 +849,7 @@ class ResponsePipeline:
             response_text=full_response,
             assistant_meta=meta if meta else None
         )
-        
-        if sources:
-            yield {"type": "metadata", "sources": sources}
-
-        logger.info(f"Streaming completed for conversation {conversation_id}")
+        return sources
     
     async def _try_generate(
         self,
@@ -568,7 +907,7 @@ class ResponsePipeline:
         logger.info(f"Generated response: '{response_text[:100]}...'")
         
         # Cache the response
-        await self._cache_response(user_query, response_text, security_metadata)
+        await self._cache_response(user_query, response_text, security_metadata, documents)
         
         return response_text
     
@@ -3,6 +3,7 @@ Conversation Response Generation Service
 
 Clean orchestration service that delegates to specialized components:
 - IntentHandler: Template responses for simple queries (hybrid heuristic + LLM)
+- QueryPlanner: Optional single LLM call for classification + decomposition
 - ResponsePipeline: RAG response generation with query decomposition
 - ErrorResponseHandler: Error response formatting
 - ConversationActivityLogger: Activity logging
@@ -24,6 +25,8 @@ from app.core.semantic_cache import get_semantic_cache, is_semantic_cache_enable
 from app.utils.intent_classifier import get_intent_classifier
 from app.services.llm.classifier import get_llm_intent_classifier
 from app.services.llm.decomposer import get_query_decomposer
+from app.services.llm.planner import get_query_planner
+from app.schemas.llm_classifier import QueryPlanResult
 from app.config.settings import settings
 from app.core import get_logger
 
@@ -54,6 +57,9 @@ class ConversationResponseService:
         # Initialize query decomposer if enabled
         query_decomposer = self._initialize_decomposer()
         
+        # Combined planner replaces both calls when classifier and decomposer are on
+        self.query_planner = self._initialize_planner(classifier_type, query_decomposer)
+        
         # Initialize specialized components
         self._initialize_components(
             retriever,
@@ -66,7 +72,8 @@ class ConversationResponseService:
         logger.debug(
             f"ConversationResponseService initialized "
             f"(classifier={classifier_type}, "
-            f"decomposer={'on' if query_decomposer else 'off'})"
+            f"decomposer={'on' if query_decomposer else 'off'}, "
+            f"planner={'on' if self.query_planner else 'off'})"
         )
     
     def _initialize_classifier(self) -> tuple[Optional[Any], str]:
@@ -115,6 +122,31 @@ class ConversationResponseService:
             logger.warning("Query decomposer initialization failed")
             return None
     
+    def _initialize_planner(self, classifier_type: str, query_decomposer: Any) -> Any:
+        """
+        Initialize the combined query planner if enabled.
+        
+        Only used when both the LLM classifier and the decomposer are active;
+        they stay in place as fallback if a planning call fails.
+        
+        Returns:
+            Query planner instance or None if disabled/failed
+        """
+        if not settings.llm_settings.ENABLE_QUERY_PLANNER:
+            return None
+        
+        if classifier_type != "llm" or not query_decomposer:
+            logger.warning("Query planner requires the LLM classifier and query decomposer, planner disabled")
+            return None
+        
+        query_planner = get_query_planner()
+        if query_planner and query_planner.llm:
+            logger.debug("Query planner enabled")
+            return query_planner
+        else:
+            logger.warning("Query planner initialization failed")
+            return None
+    
     def _initialize_components(
         self,
         retriever: Any,
@@ -209,7 +241,10 @@ class ConversationResponseService:
         response_text = classification_result.response
         
         # Build metadata
-        meta = {"classifier": self.intent_handler.classifier_type}
+        if isinstance(classification_result, QueryPlanResult):
+            meta = {"classifier": "planner"}
+        else:
+            meta = {"classifier": self.intent_handler.classifier_type}
         if hasattr(classification_result, 'intent') and classification_result.intent:
             meta["intent"] = classification_result.intent.value
         
@@ -238,7 +273,8 @@ class ConversationResponseService:
         """
         Retrieve context documents with security filtering.
         
-        Checks context cache first. If hit, returns pre-formatted context.
+        Checks context cache first. If hit, returns pre-formatted context
+        (plus the resolved documents when the entry holds chunk references).
         If miss, performs retrieval and emits to cache in background.
         
         Returns:
@@ -268,14 +304,34 @@ class ConversationResponseService:
                 )
                 return {"success": False, "error_response": error_response}
             
+            cached = None
             if cache_result:
+                cached = cache_result if isinstance(cache_result, dict) else {"context_text": cache_result}
+                if "chunk_refs" in cached:
+                    # Reference entry - resolve chunks (None if any was evicted)
+                    documents = await self.semantic_cache.resolve_chunks(cached["chunk_refs"])
+                    if documents is None:
+                        cached = None
+                    else:
+                        cached["documents"] = documents
+                        cached["context_text"] = "\n\n".join(doc.page_content for doc in documents)
+
+            if cached:
                 # Cache hit - return cached context
                 logger.info(f"Context cache HIT - using cached formatted context")
+                # Responses built on cached context keep its security level and sources
+                security_metadata = {
+                    **(cached.get("security_metadata") or {}),
+                    "source_file_ids": cached.get("source_file_ids", [])
+                }
                 return {
                     "success": True,
-                    "cached_context_text": cache_result.get("context_text") if isinstance(cache_result, dict) else cache_result,
-                    "max_doc_level": cache_result.get("min_security_level") if isinstance(cache_result, dict) else None,
-                    "source_count": cache_result.get("source_count", 0) if isinstance(cache_result, dict) else 0,
+                    # Documents only for reference entries (restores sources)
+                    "documents": cached.get("documents"),
+                    "cached_context_text": cached.get("context_text"),
+                    "max_doc_level": security_metadata.get("max_security_level"),
+                    "source_count": cached.get("source_count", 0),
+                    "security_metadata": security_metadata,
                     "from_cache": True
                 }
         
@@ -381,7 +437,7 @@ class ConversationResponseService:
                 security_metadata=security_metadata
             )
             
-            # Build sources only if we have documents (not from cache)
+            # Build sources only if we have documents (not for text-only cache hits)
             sources = self.pipeline._build_sources_payload(documents) if documents else []
             
             # Save response (cache + persist)
@@ -489,11 +545,15 @@ class ConversationResponseService:
         user_dept_clearance: Any,
         user_id: int,
         conversation_id: str,
-        stream: bool
+        stream: bool,
+        query_plan: Optional[QueryPlanResult] = None
     ) -> Dict[str, Any]:
         """
         Handle RAG pipeline: query processing, retrieval, and response generation.
         
+        A query plan from the combined planner supplies the decomposition, so
+        no second LLM call is made.
+        
         Returns:
             Response dict with success status and either generator or text
         """
@@ -541,7 +601,7 @@ class ConversationResponseService:
         
         # Cache miss or below max_entries - continue to pipeline
         # Step 1: Query Processing and Decomposition
-        query_info = await self.pipeline.process_query(user_query)
+        query_info = await self.pipeline.process_query(user_query, query_plan)
         
         all_queries = query_info.get("all_queries", [user_query])
         decomposition_strategy = query_info["strategy"]
@@ -593,7 +653,7 @@ class ConversationResponseService:
         
         Flow:
         1. Get user clearance info
-        2. Classify user intent (template vs RAG)
+        2. Classify user intent (template vs RAG), with the planner also decomposing
         3. Route to template handler or RAG pipeline
                     
         Returns:
@@ -613,8 +673,9 @@ class ConversationResponseService:
             user_department_id = user_info.get("department_id")
             user_dept_clearance = user_info.get("department_security_level")
             
-            # Step 1: Classify intent
-            classification_result = await self.get_classification_result(user_query)
+            # Step 1: Classify intent (planner: one call that also decomposes)
+            query_plan = await self.query_planner.plan(user_query) if self.query_planner else None
+            classification_result = query_plan or await self.get_classification_result(user_query)
             
             # Step 2: Route to appropriate handler
             if classification_result and not classification_result.requires_rag:
@@ -635,7 +696,8 @@ class ConversationResponseService:
                 user_dept_clearance=user_dept_clearance,
                 user_id=user_id,
                 conversation_id=conversation_id,
-                stream=stream
+                stream=stream,
+                query_plan=query_plan
             )
         
         except Exception as e:
@@ -2,7 +2,7 @@
 
 from typing import List, Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, update
 from datetime import datetime, timezone
 import uuid
 import json
@@ -15,7 +15,12 @@ from app.core import get_logger
 from app.core.events import get_event_bus
 from app.services.query_validator_service import get_query_validator
 from app.config.settings import settings
-from app.utils.encryption import encrypt_conversation_message, decrypt_conversation_message
+from app.utils.encryption import (
+    decrypt_conversation_blob,
+    decrypt_conversation_message,
+    encrypt_conversation_blob,
+)
+from app.core.cache_codec import get_cache_codec
 
 logger = get_logger(__name__)
 
@@ -381,15 +386,129 @@ class ConversationService:
                 "message": None
             }
 
-    def _decrypt_cached_history(self, cached_data: str) -> List[Dict[str, str]]:
+    async def add_messages(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Add several messages in one transaction.
+        
+        Used by the background save_message handler to persist a batch of
+        events with a single multi-row INSERT. Messages go through the ORM so
+        content encryption still applies.
+        
+        Args:
+            items: Dicts with conversation_id, user_id, role (MessageRole), content
+                   and optional token_count, meta, created_at (in chat order)
+        
+        Returns:
+            Dict with success flag and counts of saved and skipped messages
+        """
+        try:
+            accepted = []
+            for item in items:
+                # SECURITY: Validate user query for malicious patterns (only for USER role)
+                if item["role"] == MessageRole.USER:
+                    validator = get_query_validator()
+                    validation = await validator.validate_query(item["content"], item["user_id"])
+                    
+                    if not validation["valid"]:
+                        await self._emit_malicious_query_blocked_event(
+                            user_id=item["user_id"],
+                            conversation_id=item["conversation_id"],
+                            content=item["content"],
+                            threat_type=validation["threat_type"],
+                            confidence=validation["confidence"],
+                            reason=validation["reason"]
+                        )
+                        continue
+                accepted.append(item)
+            
+            # Verify conversations exist and belong to the users (one query)
+            conversation_ids = {item["conversation_id"] for item in accepted}
+            owners = {}
+            if conversation_ids:
+                result = await self.session.execute(
+                    select(Conversation.id, Conversation.user_id).where(
+                        and_(
+                            Conversation.id.in_(conversation_ids),
+                            Conversation.is_deleted == False
+                        )
+                    )
+                )
+                owners = dict(result.all())
+            
+            messages = []
+            counts: Dict[str, int] = {}
+            last_at: Dict[str, datetime] = {}
+            for item in accepted:
+                conversation_id = item["conversation_id"]
+                if owners.get(conversation_id) != item["user_id"]:
+                    logger.warning(f"Conversation {conversation_id} not found for user {item['user_id']}")
+                    continue
+                
+                created_at = item.get("created_at") or datetime.now(timezone.utc)
+                messages.append(Message(
+                    id=str(uuid.uuid4()),
+                    conversation_id=conversation_id,
+                    role=item["role"],
+                    content=item["content"],
+                    token_count=item.get("token_count"),
+                    meta=item.get("meta"),
+                    created_at=created_at,
+                ))
+                counts[conversation_id] = counts.get(conversation_id, 0) + 1
+                last_at[conversation_id] = max(last_at.get(conversation_id, created_at), created_at)
+            
+            if messages:
+                self.session.add_all(messages)
+                
+                # Update denormalized fields without loading the conversations
+                for conversation_id, count in counts.items():
+                    await self.session.execute(
+                        update(Conversation)
+                        .where(Conversation.id == conversation_id)
+                        .values(
+                            message_count=Conversation.message_count + count,
+                            last_message_at=last_at[conversation_id]
+                        )
+                    )
+                
+                await self.session.flush()
+                await self.session.commit()
+                logger.info(f"Added {len(messages)} message(s) to {len(counts)} conversation(s)")
+            
+            return {
+                "success": True,
+                "saved": len(messages),
+                "skipped": len(items) - len(messages)
+            }
+        except Exception as e:
+            await self.session.rollback()
+            logger.error(f"Error adding messages: {str(e)}", exc_info=True)
+            return {
+                "success": False,
+                "error": str(e),
+                "saved": 0,
+                "skipped": len(items)
+            }
+
+    def _decrypt_cached_history(self, cached_data: Any) -> List[Dict[str, str]]:
         """
         Helper to decrypt and parse cached conversation history.
         
-        Handles both encrypted and plaintext cache data for backward compatibility.
+        Current entries are the history list itself, or an encrypted binary
+        blob of its codec payload. Older entries are JSON strings, plain or
+        encrypted ("v1:..."); both are still read.
         Returns empty list if decryption/parsing fails.
         """
         if not cached_data:
             return []
+        if isinstance(cached_data, list):
+            return cached_data
+        if isinstance(cached_data, bytes):
+            try:
+                return get_cache_codec().decode(decrypt_conversation_blob(cached_data))
+            except Exception as exc:
+                logger.warning(f"Failed to decrypt history cache: {exc}")
+                return []
         
         # If encryption is enabled, try decrypt first
         if settings.cache_settings.ENABLE_CACHE_HISTORY_ENCRYPTION:
@@ -418,34 +537,36 @@ class ConversationService:
     
     async def get_conversation_history(self, conversation_id: str, user_id: int) -> List[Dict[str, str]]:
         """Return the cached conversation history or fetch the recent conversation context."""
+        async def load() -> Any:
+            # Use configurable history turns from settings (defaults to 3 turns = 6 messages)
+            history_turns = settings.CONVERSATION_HISTORY_TURNS
+            last_n = history_turns * 2  # Each turn has user + assistant messages
+            
+            context_result = await self.get_conversation_context(conversation_id, user_id, last_n=last_n)
+            if not context_result.get("success"):
+                return None
+
+            history = [
+                {"role": entry["role"].lower(), "content": entry["content"]}
+                for entry in context_result.get("context", [])
+            ]
+            return self._serialize_history(history) if history else None
+
         cache_key = f"conversation:history:{conversation_id}"
+        ttl = settings.cache_settings.CACHE_TTL_HISTORY
         try:
-            cached_data = await self.cache.get(cache_key)
-            if cached_data:
-                history = self._decrypt_cached_history(cached_data)
-                if history:
-                    return history
+            cached_data = await self.cache.get_or_compute(cache_key, load, ttl=ttl)
+            history = self._decrypt_cached_history(cached_data) if cached_data else []
+            if cached_data and not history:
+                # Unreadable entry (e.g. encryption key changed): replace it
+                await self.cache.delete(cache_key)
+                cached_data = await self.cache.get_or_compute(cache_key, load, ttl=ttl)
+                history = self._decrypt_cached_history(cached_data) if cached_data else []
+            return history
         except Exception as exc:
-            logger.warning(f"Failed to read history cache: {exc}")
-
-        # Use configurable history turns from settings (defaults to 3 turns = 6 messages)
-        history_turns = settings.CONVERSATION_HISTORY_TURNS
-        last_n = history_turns * 2  # Each turn has user + assistant messages
-        
-        context_result = await self.get_conversation_context(conversation_id, user_id, last_n=last_n)
-        if not context_result.get("success"):
+            logger.warning(f"Failed to load conversation history: {exc}")
             return []
 
-        history = [
-            {"role": entry["role"].lower(), "content": entry["content"]}
-            for entry in context_result.get("context", [])
-        ]
-
-        if history:
-            await self._cache_history(conversation_id, history)
-
-        return history
-
     async def cache_conversation_exchange(
         self,
         conversation_id: str,
@@ -544,13 +665,7 @@ class ConversationService:
         """
         try:
             cache_key = f"conversation:history:{conversation_id}"
-            history_json = json.dumps(history)
-            
-            # Encrypt if enabled
-            if settings.cache_settings.ENABLE_CACHE_HISTORY_ENCRYPTION:
-                cached_data = encrypt_conversation_message(history_json)
-            else:
-                cached_data = history_json
+            cached_data = self._serialize_history(history)
             
             # Use configurable TTL from settings (defaults to 1 hour)
             ttl = settings.cache_settings.CACHE_TTL_HISTORY
@@ -559,6 +674,16 @@ class ConversationService:
         except Exception as exc:
             logger.error(f"Failed to cache history for {conversation_id}: {exc}")
 
+    def _serialize_history(self, history: List[Dict[str, str]]) -> Any:
+        """
+        History as cached: the list itself (the cache encodes and compresses it),
+        or with ENABLE_CACHE_HISTORY_ENCRYPTION its compressed codec payload,
+        encrypted into binary (no base64 or JSON wrapping around the ciphertext).
+        """
+        if settings.cache_settings.ENABLE_CACHE_HISTORY_ENCRYPTION:
+            return encrypt_conversation_blob(get_cache_codec().encode(history))
+        return history
+
     async def save_conversation_exchange(
         self,
         conversation_id: str,
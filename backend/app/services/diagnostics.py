@@ -30,6 +30,7 @@ class DiagnosticsService:
             self._test_database_connection,
             self._test_cache_operations,
             self._test_vector_store_connection,
+            self._test_llm_capacity,
         ]
         
     async def run_all_diagnostics(self) -> Dict[str, Any]:
@@ -177,7 +178,9 @@ class DiagnosticsService:
             await cache.set(test_key, test_value, ttl=10)  # 10 second TTL
             set_duration = int((datetime.now(timezone.utc) - set_start).total_seconds() * 1000)
             
-            # Test GET operation
+            # Test GET operation (bypassing the L1 so the backend is measured)
+            if cache.l1:
+                cache.l1.invalidate(keys=[test_key])
             get_start = datetime.now(timezone.utc)
             retrieved_value = await cache.get(test_key)
             get_duration = int((datetime.now(timezone.utc) - get_start).total_seconds() * 1000)
@@ -199,7 +202,8 @@ class DiagnosticsService:
                         "value_match": True,
                         "set_time_ms": set_duration,
                         "get_time_ms": get_duration,
-                        "total_time_ms": total_duration
+                        "total_time_ms": total_duration,
+                        "l1": cache.stats()
                     },
                     "timestamp": start_time.isoformat()
                 }
@@ -326,6 +330,40 @@ class DiagnosticsService:
                 "message": f"Connection test failed: {str(e)}",
                 "timestamp": start_time.isoformat()
             }
+    
+    async def _test_llm_capacity(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Report LLM queueing (governor) and circuit breaker state of this worker.
+        
+        Fails while any LLM circuit is open.
+        
+        Args:
+            context: Shared context between tests
+            
+        Returns:
+            Test result dictionary
+        """
+        test_name = "llm_capacity"
+        start_time = datetime.now(timezone.utc)
+        
+        from app.services.llm import get_llm_governor, get_llm_health_tracker
+        
+        health = get_llm_health_tracker().snapshot()
+        open_circuits = [name for name, h in health.items() if h["state"] == "open"]
+        
+        return {
+            "test": test_name,
+            "status": "fail" if open_circuits else "pass",
+            "message": (
+                f"LLM circuit open: {', '.join(open_circuits)}" if open_circuits
+                else "All LLM circuits closed"
+            ),
+            "details": {
+                "queues": get_llm_governor().snapshot(),
+                "health": health
+            },
+            "timestamp": start_time.isoformat()
+        }
 
 
 # Singleton instance
@@ -121,11 +121,15 @@ class DocumentIngestionService:
         Ingest all pending approved files in a batch.
         
         Uses DocumentStorageService.ingest_pending_files() which:
-        1. Loads all APPROVED files
+        1. Claims up to INGESTION_SHARD_SIZE APPROVED files (→ PROCESSING)
         2. Chunks them
         3. Stores in vector DB
         4. Updates file statuses
         
+        Shards are processed until no claimable files remain. Because files are
+        claimed atomically, several batch jobs (on one or more nodes) can run
+        at once and split the backlog between them.
+        
         Args:
             batch_size: Chunks per batch to vector store (default: from settings.CHUNK_INGESTION_BATCH_SIZE)
             
@@ -150,17 +154,35 @@ class DocumentIngestionService:
                 # Create storage service with fresh session
                 storage_service = DocumentStorageService(session)
                 
-                # Use DocumentStorageService to process all approved files
-                result = await storage_service.ingest_pending_files(batch_size=batch_size)
+                # Process approved files shard by shard until none are left to claim
+                files_processed = 0
+                total_files = 0
+                chunks_created = 0
+                errors: Dict[int, str] = {}
+                while True:
+                    result = await storage_service.ingest_pending_files(
+                        batch_size=batch_size,
+                        max_files=settings.INGESTION_SHARD_SIZE
+                    )
+                    if not result.get("claimed_files"):
+                        break
+                    
+                    files_processed += result.get("successfully_stored", 0)
+                    total_files += result.get("total_files", 0)
+                    chunks_created += result.get("chunks_generated", 0)
+                    errors.update(result.get("errors") or {})
                 
-                logger.info(f"Batch ingestion complete: {result}")
+                logger.info(
+                    f"Batch ingestion complete: {files_processed}/{total_files} files, "
+                    f"{chunks_created} chunks, {len(errors)} errors"
+                )
                 return {
                     "status": "success",
-                    "files_processed": result.get("successfully_stored", 0),
-                    "total_files": result.get("total_files", 0),
-                    "chunks_created": result.get("chunks_generated", 0),
-                    "errors": result.get("errors", []),
-                    "message": f"Processed {result.get('successfully_stored', 0)} files"
+                    "files_processed": files_processed,
+                    "total_files": total_files,
+                    "chunks_created": chunks_created,
+                    "errors": errors,
+                    "message": f"Processed {files_processed} files"
                 }
             finally:
                 # Close session in same event loop
@@ -11,7 +11,7 @@ Services:
 from .service import FileUploadService
 from .validator import FileValidator, SUPPORTED_FORMATS
 from .parser import StructuredDataParser
-from .storage import FileStorage
+from .storage import FileStorage, StagedFile, FileTooLargeError
 
 
 __all__ = [
@@ -20,4 +20,6 @@ __all__ = [
     "SUPPORTED_FORMATS",
     "StructuredDataParser",
     "FileStorage",
+    "StagedFile",
+    "FileTooLargeError",
 ]
@@ -3,6 +3,8 @@ File Upload Service - Manages file upload lifecycle and database operations.
 Core service for tracking uploads, approvals, and processing status.
 """
 
+import asyncio
+import os
 import uuid
 import json
 from typing import Optional, List, Dict, Tuple
@@ -12,7 +14,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.file_upload import FileUpload, FileStatus, SecurityLevel
 from app.models.job import JobType
 from app.schemas.file_upload import FileUploadCreate
+from app.services.file_upload.storage import FileStorage
+from app.services.vector_store.artifacts import get_artifact_store
+from app.services.vector_store.sparse_index import remove_files_from_sparse_index
 from app.core import get_logger
+from app.core.semantic_cache import invalidate_semantic_cache_for_files
 from app.core.startup import get_startup_controller
 
 
@@ -139,6 +145,48 @@ class FileUploadService:
         )
         return result.scalar_one_or_none()
     
+    async def count_references(self, file_hash: str) -> int:
+        """Count non-deleted uploads sharing this content (blob reference count)."""
+        result = await self.session.execute(
+            select(func.count(FileUpload.id))
+            .where(FileUpload.file_hash == file_hash, FileUpload.status != FileStatus.DELETED)
+        )
+        return result.scalar_one()
+    
+    async def release_blob(self, file_path: str, file_hash: str) -> bool:
+        """
+        Delete stored content once no upload references it any more.
+        
+        Blobs (content-addressed) are shared, so they are only removed with
+        the last reference, together with the reusable ingestion artifacts of
+        that content. Legacy per-upload files are removed directly.
+        
+        Commits the session first: the reference check then reads a fresh
+        snapshot (also under REPEATABLE READ) and runs under the blob lock,
+        so an upload committing a new reference can't slip in between.
+        
+        Args:
+            file_path: Stored relative path of the released upload
+            file_hash: Content hash of the released upload
+        
+        Returns:
+            True if the file was deleted from disk
+        """
+        storage = FileStorage()
+        if not FileStorage.is_blob_path(file_path):
+            return await storage.delete_file(file_path)
+        
+        await self.session.commit()
+        async with storage.blob_lock(file_hash):
+            if await self.count_references(file_hash) > 0:
+                logger.info(f"Blob {file_hash[:8]}... still referenced, keeping it")
+                return False
+            
+            artifacts_removed = await asyncio.to_thread(get_artifact_store().delete, file_hash)
+            if artifacts_removed:
+                logger.info(f"Removed {artifacts_removed} ingestion artifact(s) of blob {file_hash[:8]}...")
+            return await storage.delete_file(file_path)
+    
     async def approve(
         self,
         file_id: int,
@@ -525,15 +573,17 @@ class FileUploadService:
         
         return uploader_map
     
-    async def get_file_content(
+    async def get_file_for_download(
         self,
         file_id: int,
         user_id: int,
         is_admin: bool
     ) -> dict:
         """
-        Retrieve file content for viewing.
-        Returns raw file content. Frontend decides how to display it.
+        Authorize access to a stored file and locate it on disk.
+        
+        Only the columns needed for the check are loaded and the file itself
+        is never read, so the route can stream it (with Range support).
         
         Args:
             file_id: File upload ID
@@ -541,12 +591,18 @@ class FileUploadService:
             is_admin: Whether user is admin
         
         Returns:
-            Dict with success status, content, filename, file_type
+            Dict with success status, path, size, filename, file_type, file_hash
         """
-        import os
-        
-        # Get file record
-        file_record = await self.get_file(file_id)
+        result = await self.session.execute(
+            select(
+                FileUpload.uploaded_by_id,
+                FileUpload.file_path,
+                FileUpload.file_name,
+                FileUpload.file_type,
+                FileUpload.file_hash,
+            ).where(FileUpload.id == file_id)
+        )
+        file_record = result.one_or_none()
         if not file_record:
             return {"success": False, "error": "File not found"}
         
@@ -555,27 +611,22 @@ class FileUploadService:
         if not (is_owner or is_admin):
             return {"success": False, "error": "Access denied"}
         
+        base_dir = os.getenv("FILES_DIR", "data/files")
+        full_path = os.path.join(base_dir, file_record.file_path)
         try:
-            # Resolve file path
-            base_dir = os.getenv("FILES_DIR", "data/files")
-            full_path = os.path.join(base_dir, file_record.file_path)
-            
-            # Read and return file content
-            with open(full_path, "rb") as f:
-                file_content = f.read()
-            
-            return {
-                "success": True,
-                "content": file_content,
-                "filename": file_record.file_name,
-                "file_type": file_record.file_type
-            }
+            stat_result = await asyncio.to_thread(os.stat, full_path)
         except FileNotFoundError:
             logger.error(f"File not found on disk: {full_path}")
             return {"success": False, "error": "File not found on disk"}
-        except Exception as e:
-            logger.error(f"Get file content failed: {e}", exc_info=True)
-            return {"success": False, "error": str(e)}
+        
+        return {
+            "success": True,
+            "path": full_path,
+            "size": stat_result.st_size,
+            "filename": file_record.file_name,
+            "file_type": file_record.file_type,
+            "file_hash": file_record.file_hash,
+        }
     
     async def delete_file_secure(
         self,
@@ -594,8 +645,6 @@ class FileUploadService:
         Returns:
             Dict with success status and message/error
         """
-        from app.storage.file_storage import FileStorage
-        
         # Get file record
         file_record = await self.get_file(file_id)
         if not file_record:
@@ -606,13 +655,18 @@ class FileUploadService:
             return {"success": False, "error": "Permission denied"}
         
         try:
-            # Delete physical file from disk
-            storage = FileStorage()
-            await storage.delete_file(file_record.file_path)
-            
             # Mark as deleted in database
             await self.delete(file_id)
             
+            # Delete physical file from disk (shared blobs only with the last reference)
+            await self.release_blob(file_record.file_path, file_record.file_hash)
+            
+            # Evict cached answers built from this file
+            await invalidate_semantic_cache_for_files([file_id])
+            
+            # Keep its chunks out of keyword (BM25) matches
+            await remove_files_from_sparse_index([file_id])
+            
             logger.info(f"File {file_id} deleted by user {user_id}")
             
             return {
@@ -2,28 +2,113 @@
 File Storage Service - Handles file disk I/O and cleanup.
 Manages file saving, hashing, and deletion from disk.
 Uses unified structure: data/files/{category}/
+
+Uploads are streamed: content is read in chunks, hashed and size-checked
+while it is written to a temp file (in a worker thread), then moved into
+place with an atomic rename.
+
+Uploaded content is stored once per SHA-256 under data/files/blobs/ab/{hash}.{ext}
+(content-addressed). FileUpload rows sharing a hash share the blob; it is
+deleted when the last non-deleted row referencing it goes away.
+
+Placing a blob for a new upload and deleting an unreferenced one are
+serialized per hash (blob_lock). The staged copy of an upload is kept until
+its FileUpload row is committed (finalize_blob), so a blob deleted in between
+is restored from it.
 """
 
+import asyncio
 import os
 import hashlib
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional, Protocol, Tuple
 
 from app.core import get_logger
 
+try:
+    import fcntl
+except ImportError:  # Windows: blob commits and deletes are not serialized
+    fcntl = None
+
 
 logger = get_logger(__name__)
 
 
+# Read/hash block size for uploads and hashing
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class FileTooLargeError(ValueError):
+    """Raised when a streamed upload exceeds the size limit."""
+
+
+class AsyncReadable(Protocol):
+    """Anything with an async read(size) (e.g. fastapi.UploadFile)."""
+    
+    async def read(self, size: int = -1) -> bytes:
+        ...
+
+
+@dataclass
+class StagedFile:
+    """An upload written to a temp file, not yet moved into place."""
+    temp_path: str
+    size: int
+    file_hash: str
+
+
+def _write_chunk(f, sha256, chunk: bytes) -> None:
+    """Hash and write one chunk (runs in a worker thread; hashlib releases the GIL)."""
+    sha256.update(chunk)
+    f.write(chunk)
+
+
+def _finish_write(f) -> None:
+    """Flush a staged file to disk before it is renamed."""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    """Give target the content of source (hard link, or copy where links aren't supported)."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp_path = f"{target}.{os.getpid()}.part"
+    try:
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            shutil.copyfile(source, temp_path)
+        os.replace(temp_path, target)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def _hash_file(full_path: str) -> str:
+    """SHA-256 of a file, read in CHUNK_SIZE blocks."""
+    sha256 = hashlib.sha256()
+    with open(full_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
 class FileStorage:
     """Manages file storage operations on disk with category-based subdirectories.
     
     Unified structure: data/files/{category}/
-    Categories: uploaded, knowledge_base, processing, archive
+    Categories: uploaded, knowledge_base, processing, archive, blobs
     """
     
     # Valid storage categories
-    CATEGORIES = {"uploaded", "knowledge_base", "processing", "archive"}
+    CATEGORIES = {"uploaded", "knowledge_base", "processing", "archive", "blobs"}
+    
+    # Content-addressed storage category
+    BLOB_CATEGORY = "blobs"
     
     def __init__(self, base_dir: Optional[str] = None, category: str = "uploaded"):
         """
@@ -46,6 +131,23 @@ class FileStorage:
         os.makedirs(self.storage_dir, exist_ok=True)
         logger.info(f"File storage initialized: {self.storage_dir}")
     
+    def _target_path(self, filename: str) -> str:
+        """Full path for filename in this category (raises on directory traversal)."""
+        file_path = os.path.join(self.storage_dir, filename)
+        
+        # Prevent directory traversal
+        real_path = Path(file_path).resolve()
+        storage_dir_path = Path(self.storage_dir).resolve()
+        if not str(real_path).startswith(str(storage_dir_path)):
+            raise ValueError(f"Invalid file path: {filename}")
+        
+        return file_path
+    
+    def _new_temp_file(self):
+        """Open a hidden temp file in the storage dir (same filesystem for atomic rename)."""
+        fd, temp_path = tempfile.mkstemp(dir=self.storage_dir, prefix=".upload-", suffix=".part")
+        return os.fdopen(fd, "wb"), temp_path
+    
     async def save_file(self, filename: str, content: bytes) -> str:
         """
         Save file to disk in the category subdirectory.
@@ -58,16 +160,20 @@ class FileStorage:
             Relative path from data/files/ (e.g., "uploaded/filename.pdf")
         """
         try:
-            file_path = os.path.join(self.storage_dir, filename)
+            file_path = self._target_path(filename)
             
-            # Prevent directory traversal
-            real_path = Path(file_path).resolve()
-            storage_dir_path = Path(self.storage_dir).resolve()
-            if not str(real_path).startswith(str(storage_dir_path)):
-                raise ValueError(f"Invalid file path: {filename}")
+            def write() -> None:
+                f, temp_path = self._new_temp_file()
+                try:
+                    with f:
+                        f.write(content)
+                        _finish_write(f)
+                    os.replace(temp_path, file_path)
+                except BaseException:
+                    Path(temp_path).unlink(missing_ok=True)
+                    raise
             
-            with open(file_path, "wb") as f:
-                f.write(content)
+            await asyncio.to_thread(write)
             
             # Return relative path from base files directory
             rel_path = os.path.join(self.category, filename)
@@ -78,6 +184,139 @@ class FileStorage:
             logger.error(f"Failed to save file {filename}: {e}")
             raise
     
+    async def stage_upload(
+        self,
+        source: AsyncReadable,
+        max_size: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE
+    ) -> StagedFile:
+        """
+        Stream an upload into a temp file, hashing and size-checking as it goes.
+        
+        Only one chunk is held in memory at a time. The temp file is removed
+        if the upload fails or exceeds max_size.
+        
+        Args:
+            source: Async readable (e.g. UploadFile)
+            max_size: Abort once more than this many bytes were read
+            chunk_size: Bytes per read
+        
+        Returns:
+            StagedFile to pass to commit_upload() or discard_upload()
+        
+        Raises:
+            FileTooLargeError: If the upload exceeds max_size
+        """
+        f, temp_path = await asyncio.to_thread(self._new_temp_file)
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            with f:
+                while True:
+                    chunk = await source.read(chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise FileTooLargeError(f"File exceeds {max_size / 1024 / 1024:.0f}MB limit")
+                    await asyncio.to_thread(_write_chunk, f, sha256, chunk)
+                await asyncio.to_thread(_finish_write, f)
+        except BaseException:
+            await asyncio.to_thread(Path(temp_path).unlink, missing_ok=True)
+            raise
+        
+        return StagedFile(temp_path=temp_path, size=size, file_hash=sha256.hexdigest())
+    
+    @classmethod
+    def blob_rel_path(cls, file_hash: str, file_type: str) -> str:
+        """Relative blob path for content with this hash (e.g. "blobs/ab/ab12....pdf")."""
+        return os.path.join(cls.BLOB_CATEGORY, file_hash[:2], f"{file_hash}.{file_type}")
+    
+    @classmethod
+    def is_blob_path(cls, rel_file_path: str) -> bool:
+        """Whether a stored path points into the content-addressed blob store."""
+        return Path(rel_file_path).parts[:1] == (cls.BLOB_CATEGORY,)
+    
+    @asynccontextmanager
+    async def blob_lock(self, file_hash: str) -> AsyncIterator[None]:
+        """
+        Exclusive section for one blob across processes on this host.
+        
+        Held while placing or restoring a blob and while checking references
+        before deleting it. Hashes share 256 lock files (by hash prefix).
+        """
+        if fcntl is None:
+            yield
+            return
+        lock_dir = os.path.join(self.base_dir, self.BLOB_CATEGORY, ".locks")
+        await asyncio.to_thread(os.makedirs, lock_dir, exist_ok=True)
+        lock_file = open(os.path.join(lock_dir, f"{file_hash[:2]}.lock"), "a")
+        try:
+            await asyncio.to_thread(fcntl.flock, lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the file releases the lock
+            lock_file.close()
+    
+    async def commit_blob(self, staged: StagedFile, file_type: str) -> Tuple[str, bool]:
+        """
+        Place a staged upload into the content-addressed blob store.
+        
+        If a blob with the same hash already exists, it is reused. The staged
+        copy is kept either way: call finalize_blob() once the FileUpload row
+        referencing the blob is committed (or discard_upload() if it never is).
+        
+        Args:
+            staged: Result of stage_upload()
+            file_type: Validated file type, kept as extension for parsers
+        
+        Returns:
+            Tuple of (relative blob path, whether an existing blob was reused)
+        """
+        rel_path = self.blob_rel_path(staged.file_hash, file_type)
+        full_path = os.path.join(self.base_dir, rel_path)
+        
+        def place() -> bool:
+            if os.path.exists(full_path):
+                return True
+            _link_or_copy(staged.temp_path, full_path)
+            return False
+        
+        async with self.blob_lock(staged.file_hash):
+            reused = await asyncio.to_thread(place)
+        
+        logger.info(
+            f"Saved file: {rel_path} ({staged.size} bytes"
+            f"{', existing blob reused' if reused else ''})"
+        )
+        return rel_path, reused
+    
+    async def finalize_blob(self, staged: StagedFile, rel_path: str) -> None:
+        """
+        Drop the staged copy once the upload's row is committed.
+        
+        If the blob was deleted meanwhile (its last other reference released
+        before this row was visible), it is restored from the staged copy.
+        """
+        full_path = os.path.join(self.base_dir, rel_path)
+        
+        def finish() -> bool:
+            if os.path.exists(full_path):
+                Path(staged.temp_path).unlink(missing_ok=True)
+                return False
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(staged.temp_path, full_path)
+            return True
+        
+        async with self.blob_lock(staged.file_hash):
+            restored = await asyncio.to_thread(finish)
+        if restored:
+            logger.warning(f"Blob {rel_path} was deleted concurrently; restored from upload")
+    
+    async def discard_upload(self, staged: StagedFile) -> None:
+        """Remove a staged upload that will not be committed."""
+        await asyncio.to_thread(Path(staged.temp_path).unlink, missing_ok=True)
+    
     async def delete_file(self, rel_file_path: str) -> bool:
         """
         Delete file from disk.
@@ -125,7 +364,6 @@ class FileStorage:
         Returns:
             Hexadecimal hash string
         """
-        sha256 = hashlib.sha256()
         try:
             # If relative path, construct full path
             if not os.path.isabs(file_path):
@@ -133,10 +371,7 @@ class FileStorage:
             else:
                 full_path = file_path
             
-            with open(full_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    sha256.update(chunk)
-            return sha256.hexdigest()
+            return await asyncio.to_thread(_hash_file, full_path)
         
         except Exception as e:
             logger.error(f"Failed to calculate hash for {file_path}: {e}")
@@ -122,6 +122,18 @@ class FileValidator:
         if file_size > FileValidator.MAX_FILE_SIZE:
             return False, f"File exceeds {FileValidator.MAX_FILE_SIZE / 1024 / 1024:.0f}MB limit", ""
         
+        return FileValidator.detect_file_type(filename, mime_type)
+    
+    @staticmethod
+    def detect_file_type(filename: str, mime_type: str = "") -> Tuple[bool, str, str]:
+        """
+        Validate file type only (no size check).
+        
+        Lets uploads be rejected before their content is read.
+        
+        Returns:
+            Tuple[bool, str, str] - (is_valid, error_message, file_type)
+        """
         # Try MIME type first (primary validation)
         is_mime_valid, file_type = FileValidator.is_mime_type_supported(mime_type)
         if is_mime_valid:
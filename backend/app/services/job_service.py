@@ -1,12 +1,15 @@
 """Job service for managing async jobs and background processing."""
 
 import json
-from typing import Optional, List
-from sqlalchemy import select
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Sequence
+from sqlalchemy import select, update, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.job import Job, JobStatus, JobType
+from app.models.job import Job, JobLease, JobStatus, JobType
 from app.core import get_logger
+from app.utils.query_helpers import with_skip_locked
 
 
 logger = get_logger(__name__)
@@ -95,14 +98,31 @@ class JobService:
         job.status = JobStatus.COMPLETED
         if result:
             job.result = json.dumps(result)
+        job.locked_by = None
+        job.locked_until = None
+        job.heartbeat_at = None
         
         await self.session.flush()
         
         logger.info(f"Job {job_id} completed")
         return job
     
-    async def mark_failed(self, job_id: int, error: str, retry: bool = True) -> Job:
-        """Mark job as failed. If retryable, increment retry count; otherwise mark as failed."""
+    async def mark_failed(
+        self,
+        job_id: int,
+        error: str,
+        retry: bool = True,
+        retry_delay_seconds: int = 0
+    ) -> Job:
+        """
+        Mark job as failed. If retryable, increment retry count; otherwise mark as failed.
+        
+        Args:
+            job_id: Job ID
+            error: Error message
+            retry: Whether the job may be retried
+            retry_delay_seconds: Delay before a retried job can be claimed again
+        """
         job = await self.get(job_id)
         if not job:
             raise ValueError(f"Job not found: {job_id}")
@@ -117,9 +137,249 @@ class JobService:
             job.error = error
             logger.error(f"Job {job_id} failed (max retries reached): {error}")
         
+        # Release any worker lease; a delayed retry keeps locked_until as a "not before" marker
+        job.locked_by = None
+        job.heartbeat_at = None
+        if job.status == JobStatus.PENDING and retry_delay_seconds > 0:
+            job.locked_until = datetime.now(timezone.utc) + timedelta(seconds=retry_delay_seconds)
+        else:
+            job.locked_until = None
+        
         await self.session.flush()
         return job
     
+    # ========================================================================
+    # Worker leasing
+    # ========================================================================
+    
+    async def claim_next(
+        self,
+        worker_id: str,
+        job_types: Optional[Sequence[JobType]] = None,
+        lease_seconds: int = 300,
+        limit: int = 1
+    ) -> List[Job]:
+        """
+        Atomically claim pending jobs for a worker.
+        
+        Each candidate is claimed with a compare-and-set UPDATE on its status,
+        so concurrent workers never claim the same job. On PostgreSQL/MySQL
+        the candidate select also uses FOR UPDATE SKIP LOCKED, so nodes
+        polling at the same time pick disjoint rows instead of racing for
+        the oldest ones. Candidates lost to another worker are simply
+        skipped. Caller must commit.
+        
+        Args:
+            worker_id: Identifier of the claiming worker
+            job_types: Restrict to these job types (all types if None)
+            lease_seconds: Lease length; the worker must heartbeat before it expires
+            limit: Maximum number of jobs to claim
+        
+        Returns:
+            Claimed jobs (status PROCESSING, leased to worker_id)
+        """
+        if limit < 1:
+            return []
+        
+        now = datetime.now(timezone.utc)
+        query = select(Job.id).where(
+            Job.status == JobStatus.PENDING,
+            or_(Job.locked_until.is_(None), Job.locked_until <= now)
+        )
+        if job_types:
+            query = query.where(Job.job_type.in_(list(job_types)))
+        query = query.order_by(Job.created_at.asc(), Job.id.asc()).limit(limit)
+        query = with_skip_locked(query, self.session)
+        
+        result = await self.session.execute(query)
+        candidate_ids = list(result.scalars().all())
+        
+        claimed_ids = [
+            candidate_id for candidate_id in candidate_ids
+            if await self.claim(candidate_id, worker_id, lease_seconds=lease_seconds)
+        ]
+        
+        if not claimed_ids:
+            return []
+        
+        result = await self.session.execute(
+            select(Job)
+            .where(Job.id.in_(claimed_ids))
+            .order_by(Job.created_at.asc(), Job.id.asc())
+            .execution_options(populate_existing=True)
+        )
+        return list(result.scalars().all())
+    
+    async def claim(self, job_id: int, worker_id: str, lease_seconds: int = 300) -> bool:
+        """
+        Claim a single pending job (compare-and-set on status).
+        
+        Caller must commit.
+        
+        Args:
+            job_id: Job to claim
+            worker_id: Identifier of the claiming worker or node
+            lease_seconds: Lease length
+        
+        Returns:
+            True if this call claimed the job, False if it was not PENDING
+        """
+        now = datetime.now(timezone.utc)
+        result = await self.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.PENDING)
+            .values(
+                status=JobStatus.PROCESSING,
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+    
+    async def heartbeat(self, job_id: int, worker_id: str, lease_seconds: int = 300) -> bool:
+        """
+        Extend a job lease held by a worker. Caller must commit.
+        
+        Returns:
+            True if the lease was extended, False if the worker no longer owns the job
+        """
+        now = datetime.now(timezone.utc)
+        result = await self.session.execute(
+            update(Job)
+            .where(
+                Job.id == job_id,
+                Job.locked_by == worker_id,
+                Job.status == JobStatus.PROCESSING
+            )
+            .values(
+                locked_until=now + timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+    
+    async def release(self, job_id: int, worker_id: str) -> bool:
+        """
+        Hand a leased job back to the queue without counting a retry (worker shutdown).
+        Caller must commit.
+        
+        Returns:
+            True if the job was released, False if the worker no longer owns it
+        """
+        result = await self.session.execute(
+            update(Job)
+            .where(
+                Job.id == job_id,
+                Job.locked_by == worker_id,
+                Job.status == JobStatus.PROCESSING
+            )
+            .values(
+                status=JobStatus.PENDING,
+                locked_by=None,
+                locked_until=None,
+                heartbeat_at=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+    
+    async def requeue_expired(self) -> int:
+        """
+        Requeue PROCESSING jobs whose lease has expired (crashed or stalled worker).
+        
+        Jobs with retries left go back to PENDING with retry_count incremented;
+        the rest are marked FAILED. Caller must commit.
+        
+        Returns:
+            Number of jobs requeued or failed
+        """
+        now = datetime.now(timezone.utc)
+        expired = (
+            Job.status == JobStatus.PROCESSING,
+            Job.locked_until.is_not(None),
+            Job.locked_until < now,
+        )
+        
+        requeued = await self.session.execute(
+            update(Job)
+            .where(*expired, Job.retry_count < Job.max_retries)
+            .values(
+                status=JobStatus.PENDING,
+                retry_count=Job.retry_count + 1,
+                error="Lease expired (worker stopped heartbeating)",
+                locked_by=None,
+                locked_until=None,
+                heartbeat_at=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        failed = await self.session.execute(
+            update(Job)
+            .where(*expired, Job.retry_count >= Job.max_retries)
+            .values(
+                status=JobStatus.FAILED,
+                error="Max retries exceeded. Last error: lease expired (worker stopped heartbeating)",
+                locked_by=None,
+                locked_until=None,
+                heartbeat_at=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        
+        count = requeued.rowcount + failed.rowcount
+        if count > 0:
+            logger.warning(
+                f"Requeued {requeued.rowcount} and failed {failed.rowcount} job(s) with expired leases"
+            )
+        return count
+    
+    # ========================================================================
+    # Named leases (leader election)
+    # ========================================================================
+    
+    async def try_acquire_lease(self, name: str, holder: str, ttl_seconds: int) -> bool:
+        """
+        Acquire or renew a named lease.
+        
+        Succeeds when the lease is free, expired, or already held by `holder`
+        (renewal extends it). Used so only one node runs each recurring job.
+        Caller must commit.
+        
+        Args:
+            name: Lease name (e.g. "recurring:<job_id>")
+            holder: Node identifier requesting the lease
+            ttl_seconds: Lease length from now
+        
+        Returns:
+            True if `holder` now holds the lease
+        """
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        
+        result = await self.session.execute(
+            update(JobLease)
+            .where(
+                JobLease.name == name,
+                or_(JobLease.holder == holder, JobLease.expires_at < now)
+            )
+            .values(holder=holder, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            return True
+        
+        # First use of this lease, or held by another node (insert conflicts)
+        try:
+            async with self.session.begin_nested():
+                self.session.add(JobLease(name=name, holder=holder, expires_at=expires_at))
+            return True
+        except IntegrityError:
+            return False
+    
     async def delete(self, job_id: int) -> None:
         """Delete job."""
         job = await self.get(job_id)
@@ -133,8 +393,6 @@ class JobService:
     
     async def cleanup_completed(self, days: int = 7) -> int:
         """Delete completed jobs older than specified days."""
-        from datetime import datetime, timedelta, timezone
-        
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
         
         result = await self.session.execute(
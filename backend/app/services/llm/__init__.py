@@ -1,12 +1,17 @@
 """
 LLM Services Package
 
-Provides LLM routing, intent classification, and query decomposition services.
+Provides LLM routing, intent classification, query decomposition and
+combined query planning services, plus per-LLM health tracking and
+concurrency governance.
 """
 
+from app.services.llm.governor import LLMGovernor, get_llm_governor
+from app.services.llm.health import LLMHealthTracker, get_llm_health_tracker
 from app.services.llm.router import LLMRouter, LLMType, get_llm_router
 from app.services.llm.classifier import LLMIntentClassifier, get_llm_intent_classifier
 from app.services.llm.decomposer import QueryDecomposer, get_query_decomposer
+from app.services.llm.planner import QueryPlanner, get_query_planner
 
 __all__ = [
     "LLMRouter",
@@ -15,5 +20,11 @@ __all__ = [
     "LLMIntentClassifier",
     "get_llm_intent_classifier",
     "QueryDecomposer",
-    "get_query_decomposer"
+    "get_query_decomposer",
+    "QueryPlanner",
+    "get_query_planner",
+    "LLMHealthTracker",
+    "get_llm_health_tracker",
+    "LLMGovernor",
+    "get_llm_governor"
 ]
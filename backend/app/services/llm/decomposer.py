@@ -10,6 +10,7 @@ from app.core import get_logger
 from app.core.llm_factory import get_classifier_llm
 from app.schemas.llm_classifier import QueryDecompositionResult
 from app.config.settings import settings
+from app.services.llm.governor import CLASSIFIER, get_llm_governor
 
 logger = get_logger(__name__)
 
@@ -51,7 +52,8 @@ class QueryDecomposer:
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": query.strip()}
             ]
-            result = await self.structured_llm.ainvoke(messages)
+            async with get_llm_governor().acquire(CLASSIFIER):
+                result = await self.structured_llm.ainvoke(messages)
             
             # If structured output returned the model directly, use it
             if isinstance(result, QueryDecompositionResult):
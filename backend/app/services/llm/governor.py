@@ -0,0 +1,317 @@
+"""
+LLM Concurrency Governor
+
+Admission control for LLM calls, per LLM (primary/internal/fallback/classifier):
+- Max in-flight requests
+- Token bucket for requests per minute (burst = max in-flight)
+- Weighted fair queuing across users: a user with many queued requests
+  doesn't hold back a user with one (start-time fair queuing)
+- Queue wait time statistics (count, EWMA, max) for diagnostics
+
+Requests that can't start immediately wait in the queue; callers streaming a
+response can tell the client they are queued before waiting.
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import time
+
+from app.config.settings import settings
+from app.core import get_logger
+from app.core.exceptions import LLMTimeoutError
+
+logger = get_logger(__name__)
+
+CLASSIFIER = "classifier"
+
+
+def _key(llm_type) -> str:
+    """LLMType or plain string → name used for limits and stats."""
+    return getattr(llm_type, "value", llm_type)
+
+
+@dataclass
+class QueueStats:
+    """Queue wait statistics of one LLM."""
+    admitted: int = 0
+    queued: int = 0
+    timed_out: int = 0
+    wait_ewma_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+
+class LLMTicket:
+    """
+    A request's place at an LLM: granted immediately or waiting in the queue.
+
+    Use as an async context manager, or call wait()/release() directly when
+    the caller needs to act between enqueueing and waiting.
+    """
+
+    def __init__(self, gate: "_LLMGate", user_key: Any, tag: float):
+        self._gate = gate
+        self.user_key = user_key
+        self.tag = tag
+        self.enqueued_at = gate.clock()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.granted = False
+        self.released = False
+
+    @property
+    def position(self) -> int:
+        """1-based position in the queue (0 once granted)."""
+        return self._gate.queue_position(self)
+
+    async def wait(self) -> float:
+        """
+        Wait until the request may start.
+
+        Returns:
+            Seconds spent in the queue
+
+        Raises:
+            LLMTimeoutError: If not admitted within the queue timeout
+        """
+        if not self.granted:
+            try:
+                await asyncio.wait_for(asyncio.shield(self.future), timeout=self._gate.queue_timeout)
+            except asyncio.TimeoutError:
+                self._gate.stats.timed_out += 1
+                self.release()
+                raise LLMTimeoutError(
+                    provider=self._gate.name,
+                    timeout=self._gate.queue_timeout,
+                    details={"reason": "queued"}
+                )
+        return self._gate.clock() - self.enqueued_at
+
+    def release(self) -> None:
+        """Give the slot back (or leave the queue). Safe to call twice."""
+        if not self.released:
+            self.released = True
+            self._gate.release(self)
+
+    async def __aenter__(self) -> "LLMTicket":
+        try:
+            await self.wait()
+        except BaseException:
+            self.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+class _LLMGate:
+    """In-flight limit, token bucket and fair queue of one LLM."""
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        requests_per_minute: int,
+        queue_timeout: float,
+        alpha: float,
+        clock: Callable[[], float]
+    ):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.rate = requests_per_minute / 60.0 if requests_per_minute > 0 else None
+        self.capacity = float(self.max_in_flight)
+        self.queue_timeout = queue_timeout
+        self.alpha = alpha
+        self.clock = clock
+
+        self.in_flight = 0
+        self.tokens = self.capacity
+        self.refilled_at = clock()
+        self.virtual_time = 0.0
+        self.user_finish: Dict[Any, float] = {}
+        self.waiting: List[tuple] = []
+        self.stats = QueueStats()
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def enqueue(self, user_key: Any, weight: float) -> LLMTicket:
+        # Start-time fair queuing: a request starts (in virtual time) where
+        # the user's previous one finished, and each one advances the user by
+        # 1/weight, so backlogged users are served in turn by weight
+        start = max(self.virtual_time, self.user_finish.get(user_key, 0.0))
+        self.user_finish[user_key] = start + 1.0 / max(weight, 0.01)
+        ticket = LLMTicket(self, user_key, start)
+
+        if not self.waiting and self._try_admit():
+            self._grant(ticket)
+        else:
+            heapq.heappush(self.waiting, (start, next(self._seq), ticket))
+            self.stats.queued += 1
+            self._dispatch()
+        return ticket
+
+    def release(self, ticket: LLMTicket) -> None:
+        if ticket.granted:
+            self.in_flight -= 1
+        elif not ticket.future.done():
+            ticket.future.cancel()
+        self._dispatch()
+
+        if not self.waiting:
+            # Forget users that are no longer ahead of virtual time
+            self.user_finish = {k: v for k, v in self.user_finish.items() if v > self.virtual_time}
+
+    def queue_position(self, ticket: LLMTicket) -> int:
+        if ticket.granted:
+            return 0
+        return sum(1 for _, _, other in self.waiting if not other.released and other.tag <= ticket.tag)
+
+    def _try_admit(self) -> bool:
+        if self.in_flight >= self.max_in_flight:
+            return False
+        if self.rate is None:
+            return True
+
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def _grant(self, ticket: LLMTicket) -> None:
+        self.in_flight += 1
+        self.virtual_time = max(self.virtual_time, ticket.tag)
+        ticket.granted = True
+        ticket.future.set_result(True)
+
+        wait = self.clock() - ticket.enqueued_at
+        self.stats.admitted += 1
+        self.stats.wait_ewma_seconds = self.alpha * wait + (1 - self.alpha) * self.stats.wait_ewma_seconds
+        self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, wait)
+
+    def _dispatch(self) -> None:
+        while self.waiting:
+            ticket = self.waiting[0][2]
+            if ticket.released or ticket.future.done():
+                heapq.heappop(self.waiting)
+                continue
+            if not self._try_admit():
+                break
+            heapq.heappop(self.waiting)
+            self._grant(ticket)
+
+        # Out of tokens with free slots: check again when the next token is due
+        if self.waiting and self.in_flight < self.max_in_flight and self.rate and self._timer is None:
+            delay = max(0.0, (1.0 - self.tokens) / self.rate)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+
+class LLMGovernor:
+    """Admission controller shared by all LLM calls of this worker."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        limits: Optional[Dict[str, Dict[str, int]]] = None,
+        queue_timeout: float = 60.0,
+        alpha: float = 0.2,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            enabled: When False every request is admitted immediately
+            limits: {llm name: {"max_in_flight": n, "requests_per_minute": n (0 = unlimited)}}
+            queue_timeout: Seconds a request may wait before LLMTimeoutError
+            alpha: EWMA weight of the newest queue wait
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.enabled = enabled
+        self.limits = limits or {}
+        self.queue_timeout = queue_timeout
+        self.alpha = alpha
+        self._clock = clock
+        self._gates: Dict[str, _LLMGate] = {}
+
+    def acquire(self, llm_type, user_id: Any = None, weight: float = 1.0) -> LLMTicket:
+        """
+        Enqueue a request for an LLM.
+
+        Args:
+            llm_type: LLMType or "classifier"
+            user_id: Requesting user (None = shared system queue)
+            weight: Relative share of the user (higher = served more often)
+
+        Returns:
+            Ticket; check .granted, then wait()/release() or use `async with`
+        """
+        return self._gate(llm_type).enqueue(user_id, weight)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """In-flight, queue length and wait statistics per LLM."""
+        return {
+            name: {
+                "in_flight": gate.in_flight,
+                "max_in_flight": gate.max_in_flight,
+                "waiting": sum(1 for _, _, t in gate.waiting if not t.released),
+                **asdict(gate.stats),
+            }
+            for name, gate in self._gates.items()
+        }
+
+    def _gate(self, llm_type) -> _LLMGate:
+        name = _key(llm_type)
+        if name not in self._gates:
+            limits = self.limits.get(name, {})
+            unlimited = not self.enabled
+            self._gates[name] = _LLMGate(
+                name=name,
+                max_in_flight=10 ** 9 if unlimited else limits.get("max_in_flight", 8),
+                requests_per_minute=0 if unlimited else limits.get("requests_per_minute", 0),
+                queue_timeout=self.queue_timeout,
+                alpha=self.alpha,
+                clock=self._clock,
+            )
+        return self._gates[name]
+
+
+# Singleton instance
+_governor: Optional[LLMGovernor] = None
+
+
+def get_llm_governor() -> LLMGovernor:
+    """Get the shared LLM governor (configured from LLM settings)."""
+    global _governor
+    if _governor is None:
+        llm_settings = settings.llm_settings
+        _governor = LLMGovernor(
+            enabled=llm_settings.LLM_GOVERNOR_ENABLED,
+            limits={
+                "primary": {
+                    "max_in_flight": llm_settings.LLM_MAX_IN_FLIGHT,
+                    "requests_per_minute": llm_settings.LLM_REQUESTS_PER_MINUTE,
+                },
+                "internal": {
+                    "max_in_flight": llm_settings.INTERNAL_LLM_MAX_IN_FLIGHT,
+                    "requests_per_minute": llm_settings.INTERNAL_LLM_REQUESTS_PER_MINUTE,
+                },
+                "fallback": {
+                    "max_in_flight": llm_settings.FALLBACK_LLM_MAX_IN_FLIGHT,
+                    "requests_per_minute": llm_settings.FALLBACK_LLM_REQUESTS_PER_MINUTE,
+                },
+                CLASSIFIER: {
+                    "max_in_flight": llm_settings.CLASSIFIER_LLM_MAX_IN_FLIGHT,
+                    "requests_per_minute": llm_settings.CLASSIFIER_LLM_REQUESTS_PER_MINUTE,
+                },
+            },
+            queue_timeout=llm_settings.LLM_QUEUE_TIMEOUT_SECONDS,
+            alpha=llm_settings.LLM_HEALTH_EWMA_ALPHA,
+        )
+    return _governor
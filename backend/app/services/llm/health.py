@@ -0,0 +1,167 @@
+"""
+LLM Health Tracking
+
+Per-LLM (primary/internal/fallback) health shared across requests:
+- Error rate as an EWMA of request outcomes
+- Time-to-first-token EWMA for streamed responses
+- Circuit breaker: after repeated failures the circuit opens and the router
+  sends requests straight to the fallback LLM; after a cool-down one probe
+  request is let through (half-open) and its outcome closes or re-opens it
+"""
+
+from dataclasses import dataclass, asdict
+from enum import Enum
+from typing import Callable, Dict, Optional
+import time
+
+from app.config.settings import settings
+from app.core import get_logger
+
+logger = get_logger(__name__)
+
+
+def _key(llm_type) -> str:
+    """LLMType or plain string → name used for tracking and logs."""
+    return getattr(llm_type, "value", llm_type)
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states."""
+    CLOSED = "closed"        # Healthy, requests flow normally
+    OPEN = "open"            # Failing, route to fallback
+    HALF_OPEN = "half_open"  # Cool-down over, one probe request in flight
+
+
+@dataclass
+class ProviderHealth:
+    """Rolling health of one LLM."""
+    error_rate: float = 0.0
+    ttft_ewma: Optional[float] = None
+    samples: int = 0
+    consecutive_failures: int = 0
+    state: CircuitState = CircuitState.CLOSED
+    changed_at: float = 0.0
+
+
+class LLMHealthTracker:
+    """Tracks LLM outcomes and decides whether requests may use an LLM."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        failure_threshold: int = 3,
+        error_rate_threshold: float = 0.5,
+        min_samples: int = 10,
+        open_seconds: float = 30.0,
+        alpha: float = 0.2,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.enabled = enabled
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.open_seconds = open_seconds
+        self.alpha = alpha
+        self._clock = clock
+        self._health: Dict[str, ProviderHealth] = {}
+
+    def get_health(self, llm_type: str) -> ProviderHealth:
+        """Health record of an LLM (created on first use)."""
+        key = _key(llm_type)
+        if key not in self._health:
+            self._health[key] = ProviderHealth()
+        return self._health[key]
+
+    def allow_request(self, llm_type: str) -> bool:
+        """
+        Whether a request may be sent to this LLM now.
+
+        An open circuit admits one probe once the cool-down has passed;
+        further requests are refused until the probe reports back (or another
+        cool-down passes, in case the probe never finished).
+        """
+        if not self.enabled:
+            return True
+
+        health = self.get_health(llm_type)
+        if health.state == CircuitState.CLOSED:
+            return True
+
+        now = self._clock()
+        if now - health.changed_at < self.open_seconds:
+            return False
+
+        health.state = CircuitState.HALF_OPEN
+        health.changed_at = now
+        logger.info(f"{_key(llm_type)} LLM circuit half-open, sending probe request")
+        return True
+
+    def record_success(self, llm_type: str) -> None:
+        """Record a completed request."""
+        health = self.get_health(llm_type)
+        self._update_error_rate(health, 0.0)
+        health.consecutive_failures = 0
+
+        if health.state != CircuitState.CLOSED:
+            health.state = CircuitState.CLOSED
+            health.changed_at = self._clock()
+            logger.info(f"{_key(llm_type)} LLM recovered, circuit closed")
+
+    def record_failure(self, llm_type: str) -> None:
+        """Record a failed (or hedged-out) request; may open the circuit."""
+        health = self.get_health(llm_type)
+        self._update_error_rate(health, 1.0)
+        health.consecutive_failures += 1
+
+        if not self.enabled or health.state == CircuitState.OPEN:
+            return
+
+        tripped = (
+            health.state == CircuitState.HALF_OPEN
+            or health.consecutive_failures >= self.failure_threshold
+            or (health.samples >= self.min_samples and health.error_rate >= self.error_rate_threshold)
+        )
+        if tripped:
+            health.state = CircuitState.OPEN
+            health.changed_at = self._clock()
+            logger.warning(
+                f"{_key(llm_type)} LLM circuit OPEN "
+                f"(consecutive_failures={health.consecutive_failures}, error_rate={health.error_rate:.2f}), "
+                f"routing to fallback for {self.open_seconds}s"
+            )
+
+    def record_first_token(self, llm_type: str, seconds: float) -> None:
+        """Record time to first token of a streamed response."""
+        health = self.get_health(llm_type)
+        if health.ttft_ewma is None:
+            health.ttft_ewma = seconds
+        else:
+            health.ttft_ewma = self.alpha * seconds + (1 - self.alpha) * health.ttft_ewma
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Health of all tracked LLMs (for logging/diagnostics)."""
+        return {name: asdict(health) for name, health in self._health.items()}
+
+    def _update_error_rate(self, health: ProviderHealth, outcome: float) -> None:
+        health.samples += 1
+        health.error_rate = self.alpha * outcome + (1 - self.alpha) * health.error_rate
+
+
+# Singleton instance
+_health_tracker: Optional[LLMHealthTracker] = None
+
+
+def get_llm_health_tracker() -> LLMHealthTracker:
+    """Get the shared LLM health tracker (configured from LLM settings)."""
+    global _health_tracker
+    if _health_tracker is None:
+        llm_settings = settings.llm_settings
+        _health_tracker = LLMHealthTracker(
+            enabled=llm_settings.LLM_CIRCUIT_BREAKER_ENABLED,
+            failure_threshold=llm_settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            error_rate_threshold=llm_settings.LLM_CIRCUIT_ERROR_RATE_THRESHOLD,
+            min_samples=llm_settings.LLM_CIRCUIT_MIN_SAMPLES,
+            open_seconds=llm_settings.LLM_CIRCUIT_OPEN_SECONDS,
+            alpha=llm_settings.LLM_HEALTH_EWMA_ALPHA,
+        )
+    return _health_tracker
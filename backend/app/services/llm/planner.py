@@ -0,0 +1,125 @@
+"""
+Query Planner
+
+Uses one structured-output call to classify intent and decompose the query,
+replacing the separate classifier and decomposer round trips. Plans are
+cached by normalized query.
+"""
+
+from typing import Optional
+import hashlib
+
+from app.core import get_logger
+from app.core.cache import get_cache
+from app.core.llm_factory import get_classifier_llm
+from app.schemas.llm_classifier import QueryPlanResult
+from app.config.settings import settings
+from app.services.llm.governor import CLASSIFIER, get_llm_governor
+
+logger = get_logger(__name__)
+
+MAX_QUERIES = 5
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query (plan cache key)."""
+    return " ".join(query.lower().split())
+
+
+class QueryPlanner:
+    """Combined classifier + decomposer with structured output."""
+
+    def __init__(self):
+        """Initialize with pre-initialized LLM from startup."""
+        self.llm = get_classifier_llm()
+        if not self.llm:
+            logger.warning("Planner LLM not available - planning disabled")
+            return
+
+        # Use structured output with the schema
+        try:
+            self.structured_llm = self.llm.with_structured_output(QueryPlanResult)
+        except Exception as e:
+            logger.warning(f"Structured output not supported, falling back to JSON mode: {e}")
+            self.structured_llm = self.llm
+
+    async def plan(self, query: str) -> Optional[QueryPlanResult]:
+        """
+        Classify and decompose a query in a single LLM call.
+
+        Args:
+            query: User query to plan
+
+        Returns:
+            Plan with requires_rag, template response and search queries,
+            or None on failure (caller falls back to classifier/decomposer)
+        """
+        if not self.llm or not query or not query.strip():
+            return None
+
+        cache_key = self._cache_key(query)
+        cached = await self._get_cached(cache_key)
+        if cached:
+            logger.debug(f"Query plan cache HIT for query: '{query[:50]}...'")
+            return cached
+
+        try:
+            system_prompt = settings.prompt_settings.PLANNER_SYSTEM_PROMPT
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": query.strip()}
+            ]
+            async with get_llm_governor().acquire(CLASSIFIER):
+                result = await self.structured_llm.ainvoke(messages)
+
+            # Fallback: parse from dict if needed
+            if isinstance(result, dict):
+                result = QueryPlanResult(**result)
+
+            if not isinstance(result, QueryPlanResult):
+                logger.warning(f"Unexpected planner response type: {type(result)}")
+                return None
+
+            result.queries = result.queries[:MAX_QUERIES]
+            logger.debug(
+                f"Query plan: requires_rag={result.requires_rag}, decomposed={result.decomposed}, "
+                f"{len(result.queries)} queries: {result.queries}"
+            )
+
+            await self._set_cached(cache_key, result)
+            return result
+
+        except Exception as e:
+            logger.error(f"Query planning failed: {e}", exc_info=True)
+            return None
+
+    def _cache_key(self, query: str) -> str:
+        digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()[:32]
+        return f"query_plan:{digest}"
+
+    async def _get_cached(self, key: str) -> Optional[QueryPlanResult]:
+        try:
+            data = await get_cache().get(key)
+            return QueryPlanResult(**data) if data else None
+        except Exception as e:
+            logger.debug(f"Query plan cache unavailable: {e}")
+            return None
+
+    async def _set_cached(self, key: str, result: QueryPlanResult) -> None:
+        try:
+            await get_cache().set(key, result.model_dump(), ttl=settings.cache_settings.CACHE_TTL_QUERY_PLAN)
+        except Exception as e:
+            logger.debug(f"Failed to cache query plan: {e}")
+
+
+# Factory function
+_planner_instance = None
+
+def get_query_planner() -> Optional[QueryPlanner]:
+    """Get or create query planner instance."""
+    global _planner_instance
+
+    if _planner_instance is None:
+        _planner_instance = QueryPlanner()
+
+    return _planner_instance
@@ -5,7 +5,8 @@ Returns either the primary or internal LLM instance based on the highest
 document security level and the internal LLM configuration.
 
 Also tracks which LLM is being used (primary/internal) and provides
-fallback LLM access for error recovery.
+fallback LLM access for error recovery. While the selected LLM's circuit
+breaker is open (see health.py), requests go straight to the fallback LLM.
 """
 
 import logging
@@ -18,6 +19,7 @@ from app.core.llm_factory import (
     get_llm_provider,
     get_fallback_llm_provider
 )
+from app.services.llm.health import get_llm_health_tracker
 from app.config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -75,11 +77,27 @@ class LLMRouter:
 
     def select_llm(self, max_security_level: Optional[int]) -> Tuple[BaseLanguageModel, LLMType]:
         """
-        Select appropriate LLM based on document security level.
+        Select appropriate LLM based on document security level and health.
         
         Returns:
             Tuple of (LLM instance, LLMType to track which was selected)
         """
+        llm, llm_type = self._select_by_security_level(max_security_level)
+        
+        if get_llm_health_tracker().allow_request(llm_type):
+            return llm, llm_type
+        
+        fallback_llm = self._get_fallback_llm()
+        if fallback_llm is None:
+            logger.warning("%s LLM circuit is open but no fallback is configured; using it anyway", llm_type.value)
+            return llm, llm_type
+        
+        logger.info("%s LLM circuit is open; routing to fallback LLM", llm_type.value)
+        self._last_selected_type = LLMType.FALLBACK
+        return fallback_llm, LLMType.FALLBACK
+
+    def _select_by_security_level(self, max_security_level: Optional[int]) -> Tuple[BaseLanguageModel, LLMType]:
+        """Pick primary or internal LLM from the highest document security level."""
         # Settings inherits from LLMSettings, so attributes are directly on settings
         if not settings.ENABLE_INTERNAL_LLM:
             logger.info("Internal LLM disabled; using primary LLM")
@@ -1,8 +1,11 @@
 """
 Statistics with simple caching - fetch from DB, cache result, invalidate on changes.
+
+Reads go through Cache.get_or_compute, so an expiring key is recomputed by one
+request instead of every concurrent one.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 
@@ -15,6 +18,19 @@ from app.config.cache_settings import cache_settings
 
 logger = get_logger(__name__)
 
+# Cache tags: file stats of all users, and all stats of one user
+FILE_STATS_TAG = "stats:files"
+
+
+def user_stats_tag(user_id: int) -> str:
+    """Tag of the stats cached for one user."""
+    return f"stats:user:{user_id}"
+
+
+def file_stats_tags(user_id: Optional[int] = None) -> List[str]:
+    """Tags for a file stats entry (global, or one user's)."""
+    return [FILE_STATS_TAG, user_stats_tag(user_id)] if user_id else [FILE_STATS_TAG]
+
 
 class StatsCache:
     """Simple statistics caching."""
@@ -24,28 +40,20 @@ class StatsCache:
         """
         Get job statistics. Cached after first access.
         """
-        cache_key = "stats:jobs"
-        cache = get_cache()
-        
-        # Try cache first
-        cached = await cache.get(cache_key)
-        if cached:
-            return cached
-        
-        # Fetch from database
-        stats = {}
-        for status in JobStatus:
-            result = await session.execute(
-                select(func.count(Job.id)).where(Job.status == status)
-            )
-            stats[status.value] = result.scalar() or 0
-        
-        result = await session.execute(select(func.count(Job.id)))
-        stats["total"] = result.scalar() or 0
+        async def load() -> Dict[str, Any]:
+            stats = {}
+            for status in JobStatus:
+                result = await session.execute(
+                    select(func.count(Job.id)).where(Job.status == status)
+                )
+                stats[status.value] = result.scalar() or 0
+            
+            result = await session.execute(select(func.count(Job.id)))
+            stats["total"] = result.scalar() or 0
+            return stats
         
         # Cache for 1 minute
-        await cache.set(cache_key, stats, ttl=cache_settings.CACHE_TTL_STATS)
-        return stats
+        return await get_cache().get_or_compute("stats:jobs", load, ttl=cache_settings.CACHE_TTL_STATS)
     
     @staticmethod
     async def get_file_stats(session: AsyncSession, user_id: Optional[int] = None) -> Dict[str, Any]:
@@ -54,31 +62,27 @@ class StatsCache:
         If user_id provided, returns stats for that user only.
         """
         cache_key = f"stats:files:{user_id}" if user_id else "stats:files"
-        cache = get_cache()
-        
-        # Try cache first
-        cached = await cache.get(cache_key)
-        if cached:
-            return cached
-        
-        # Build query
-        query = select(func.count(FileUpload.id))
-        if user_id:
-            query = query.where(FileUpload.uploaded_by_id == user_id)
-        
-        # Fetch from database
-        stats = {}
-        for status in FileStatus:
-            status_query = query.where(FileUpload.status == status)
-            result = await session.execute(status_query)
-            stats[status.value] = result.scalar() or 0
         
-        result = await session.execute(query)
-        stats["total"] = result.scalar() or 0
+        async def load() -> Dict[str, Any]:
+            # Build query
+            query = select(func.count(FileUpload.id))
+            if user_id:
+                query = query.where(FileUpload.uploaded_by_id == user_id)
+            
+            stats = {}
+            for status in FileStatus:
+                status_query = query.where(FileUpload.status == status)
+                result = await session.execute(status_query)
+                stats[status.value] = result.scalar() or 0
+            
+            result = await session.execute(query)
+            stats["total"] = result.scalar() or 0
+            return stats
         
         # Cache for 1 minute
-        await cache.set(cache_key, stats, ttl=cache_settings.CACHE_TTL_STATS)
-        return stats
+        return await get_cache().get_or_compute(
+            cache_key, load, ttl=cache_settings.CACHE_TTL_STATS, tags=file_stats_tags(user_id)
+        )
     
     @staticmethod
     async def get_file_status_counts(session: AsyncSession, user_id: Optional[int] = None) -> Dict[str, int]:
@@ -86,25 +90,20 @@ class StatsCache:
         Get file counts by status. Cached after first access.
         """
         cache_key = f"stats:file_counts:{user_id}" if user_id else "stats:file_counts"
-        cache = get_cache()
-        
-        # Try cache first
-        cached = await cache.get(cache_key)
-        if cached:
-            return cached
-        
-        # Build query
-        query = select(FileUpload.status, func.count(FileUpload.id)).group_by(FileUpload.status)
-        if user_id:
-            query = query.where(FileUpload.uploaded_by_id == user_id)
         
-        # Fetch from database
-        result = await session.execute(query)
-        counts = {status.value: count for status, count in result.all()}
+        async def load() -> Dict[str, int]:
+            # Build query
+            query = select(FileUpload.status, func.count(FileUpload.id)).group_by(FileUpload.status)
+            if user_id:
+                query = query.where(FileUpload.uploaded_by_id == user_id)
+            
+            result = await session.execute(query)
+            return {status.value: count for status, count in result.all()}
         
         # Cache for 1 minute
-        await cache.set(cache_key, counts, ttl=cache_settings.CACHE_TTL_STATS)
-        return counts
+        return await get_cache().get_or_compute(
+            cache_key, load, ttl=cache_settings.CACHE_TTL_STATS, tags=file_stats_tags(user_id)
+        )
     
     @staticmethod
     async def invalidate_job_stats():
@@ -122,10 +121,9 @@ class StatsCache:
         cache = get_cache()
         if user_id:
             # Clear specific user's cache
-            await cache.invalidate_pattern(f"stats:*:{user_id}")
+            await cache.invalidate_tags([user_stats_tag(user_id)])
             logger.debug(f"Invalidated file stats cache for user {user_id}")
         else:
-            # Clear global file stats
-            await cache.invalidate_pattern("stats:files*")
-            await cache.invalidate_pattern("stats:file_counts*")
+            # Clear global file stats (every user's included)
+            await cache.invalidate_tags([FILE_STATS_TAG])
             logger.debug("Invalidated global file stats cache")
@@ -3,9 +3,12 @@ Vector store service with LangChain patterns.
 
 Architecture:
     loader.py   → Load documents from pending/
+    parsers.py  → Parse files in a process pool (one worker per core)
+    artifacts.py → Reusable chunks/embeddings per content hash (identical files)
     chunker.py  → Chunk using LangChain splitters
     factory.py  → Get/create vector store with embeddings
     storage.py  → Orchestrate: load → chunk → store
+    sparse_index.py → In-process BM25 index for FAISS/Chroma hybrid search
     retriever.py → Search and retrieve documents
     reranker.py → Rerank retrieved documents for improved relevance
 
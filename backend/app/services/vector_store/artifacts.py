@@ -0,0 +1,181 @@
+"""
+Ingestion Artifacts - Parsed chunks and embeddings reused across identical files.
+
+Artifacts are keyed by the file's content hash plus a variant of everything
+that changes chunking or embedding (file type, field selection, chunk
+settings, embedding model). A re-upload of the same bytes under a different
+department or security level skips parsing and, where the vector store
+accepts precomputed vectors, embedding too; only the ACL metadata differs.
+
+Layout (next to the blob store): data/files/derived/ab/{hash}-{variant}.json
+plus {hash}-{variant}.f32 with the float32 vectors.
+"""
+
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import os
+import tempfile
+
+from langchain_core.documents import Document
+
+from app.config.settings import settings
+from app.core import get_logger
+
+
+logger = get_logger(__name__)
+
+# Metadata added per ingestion run by the chunker (never part of an artifact)
+RUN_METADATA_KEYS = {"chunk_index", "chunk_timestamp"}
+
+ARTIFACT_FORMAT_VERSION = 1
+
+
+def artifact_variant(file_type: str, field_selection: Optional[List[str]]) -> str:
+    """Short key for the settings that affect chunk text and vectors."""
+    embedding_config = settings.get_embedding_config()
+    parts = {
+        "v": ARTIFACT_FORMAT_VERSION,
+        "file_type": (file_type or "").lower(),
+        "fields": field_selection or None,
+        "chunk_size": settings.CHUNK_SIZE,
+        "chunk_overlap": settings.CHUNK_OVERLAP,
+        "embedding": [
+            embedding_config.get("provider"),
+            embedding_config.get("model"),
+            embedding_config.get("dimensions"),
+        ],
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write via temp file + rename so readers never see partial artifacts."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".artifact-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+class IngestionArtifactStore:
+    """
+    Disk store for chunk text/metadata and embeddings per (content hash, variant).
+
+    All methods do blocking file I/O; call them via asyncio.to_thread.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None):
+        base_path = base_dir or os.getenv("FILES_DIR", "data/files")
+        self.root = Path(base_path) / "derived"
+
+    def _paths(self, file_hash: str, variant: str) -> Tuple[Path, Path]:
+        stem = self.root / file_hash[:2] / f"{file_hash}-{variant}"
+        return stem.with_suffix(".json"), stem.with_suffix(".f32")
+
+    def load(
+        self,
+        file_hash: str,
+        variant: str
+    ) -> Optional[Tuple[List[Document], Optional[List[List[float]]]]]:
+        """
+        Load cached chunks (file-level metadata stripped) and their vectors.
+
+        Returns:
+            (chunks, vectors or None) or None if there is no usable artifact
+        """
+        meta_path, vectors_path = self._paths(file_hash, variant)
+        if not meta_path.exists():
+            return None
+
+        try:
+            payload = json.loads(meta_path.read_text(encoding="utf-8"))
+            chunks = [
+                Document(page_content=c["text"], metadata=c.get("metadata") or {})
+                for c in payload["chunks"]
+            ]
+
+            vectors = None
+            dim = payload.get("dim")
+            if dim and vectors_path.exists():
+                flat = array("f")
+                flat.frombytes(vectors_path.read_bytes())
+                if len(flat) == dim * len(chunks):
+                    vectors = [flat[i * dim:(i + 1) * dim].tolist() for i in range(len(chunks))]
+            return chunks, vectors
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable ingestion artifact {meta_path.name}: {e}")
+            return None
+
+    def save(
+        self,
+        file_hash: str,
+        variant: str,
+        chunks: Iterable[Document],
+        file_meta_keys: Iterable[str],
+        vectors: Optional[List[List[float]]] = None
+    ) -> None:
+        """
+        Save chunks (without file-level/ACL metadata) and optional vectors.
+
+        Args:
+            file_hash: SHA-256 of the source file
+            variant: artifact_variant() of the file
+            chunks: Chunks of this one file, in order
+            file_meta_keys: Metadata keys that belong to the file record, not the content
+            vectors: Embeddings aligned with chunks (None if not captured)
+        """
+        strip = set(file_meta_keys) | RUN_METADATA_KEYS
+        records: List[Dict[str, Any]] = [
+            {
+                "text": chunk.page_content,
+                "metadata": {k: v for k, v in chunk.metadata.items() if k not in strip},
+            }
+            for chunk in chunks
+        ]
+        if not records:
+            return
+
+        meta_path, vectors_path = self._paths(file_hash, variant)
+        dim = None
+        if vectors and len(vectors) == len(records):
+            dim = len(vectors[0])
+            flat = array("f")
+            for vector in vectors:
+                flat.extend(vector)
+            _atomic_write(vectors_path, flat.tobytes())
+
+        # Metadata last: load() only trusts vectors announced here
+        _atomic_write(
+            meta_path,
+            json.dumps({"chunks": records, "dim": dim}, default=str).encode("utf-8")
+        )
+        logger.debug(f"Saved ingestion artifact {meta_path.name} ({len(records)} chunks)")
+
+    def delete(self, file_hash: str) -> int:
+        """Delete all artifacts of a content hash (every variant)."""
+        removed = 0
+        directory = self.root / file_hash[:2]
+        if not directory.exists():
+            return 0
+        for path in directory.glob(f"{file_hash}-*"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+
+_artifact_store: Optional[IngestionArtifactStore] = None
+
+
+def get_artifact_store() -> IngestionArtifactStore:
+    """Get the shared artifact store (under FILES_DIR)."""
+    global _artifact_store
+    if _artifact_store is None:
+        _artifact_store = IngestionArtifactStore()
+    return _artifact_store
@@ -1,9 +1,14 @@
 """
 Document Chunker - Chunks documents using LangChain splitters.
 Receives documents from DocumentLoader with enriched metadata.
+
+PDFs, spreadsheets and CSV/JSON files arrive already chunked: the parsing
+worker streams pages/rows into chunk_pdf_pages/chunk_sheet_rows/chunk_records.
+Structured rows are packed several per chunk up to chunk_size; only rows
+larger than a chunk go through the text splitter.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from datetime import datetime, timezone
 import re
 
@@ -67,6 +72,15 @@ class DocumentChunker:
                 file_type = (file_data.get("file_type") or "").lower()
                 content = file_data.get("content")
                 
+                # Streamed in the parsing worker; only file metadata is missing
+                if file_data.get("chunks") is not None:
+                    meta = file_data.get("meta", {})
+                    all_docs.extend(
+                        Document(page_content=chunk.page_content, metadata={**meta, **chunk.metadata})
+                        for chunk in file_data["chunks"]
+                    )
+                    continue
+                
                 if content is None:
                     logger.warning(f"Skipping {file_data.get('file_name')}: no content")
                     continue
@@ -197,6 +211,129 @@ class DocumentChunker:
             doc = Document(page_content=content, metadata=meta)
             return self.text_splitter.split_documents([doc])
     
+    def chunk_pdf_pages(self, pages: Iterable[Tuple[int, str]]) -> List[Document]:
+        """
+        Chunk PDF pages as they are extracted.
+        
+        Pages are consumed one at a time, so memory holds one page plus the
+        finished chunks, never the whole document text. Chunks don't span
+        pages; the current section heading carries over from earlier pages.
+        
+        Args:
+            pages: (page_number, text) pairs, 1-based
+        
+        Returns:
+            Chunks with "page" (and "section" when detected) metadata
+        """
+        chunks: List[Document] = []
+        current_heading = ""
+        page_count = 0
+        
+        for page_number, text in pages:
+            page_count += 1
+            if not text or not text.strip():
+                continue
+            
+            for section_heading, section_content in self._detect_sections(text) or [("", text)]:
+                if section_heading:
+                    current_heading = section_heading
+                
+                # Include heading in content for better semantic matching
+                full_section = f"{section_heading}\n\n{section_content}" if section_heading else section_content
+                if not full_section.strip():
+                    continue
+                
+                section_meta = {"page": page_number}
+                if current_heading:
+                    section_meta["section"] = current_heading
+                
+                chunks.extend(
+                    Document(page_content=piece, metadata=dict(section_meta))
+                    for piece in self.text_splitter.split_text(full_section)
+                )
+        
+        logger.info(f"PDF: Split {page_count} pages into {len(chunks)} chunks")
+        return chunks
+    
+    def chunk_sheet_rows(self, rows: Iterable[Tuple[str, str]]) -> List[Document]:
+        """
+        Chunk spreadsheet rows as they are read.
+        
+        Args:
+            rows: (sheet_name, record text) pairs in sheet order
+        
+        Returns:
+            Chunks with "sheet" metadata, prefixed with the sheet name
+        """
+        chunks = self._pack_records(rows, group_key="sheet")
+        logger.info(f"Spreadsheet: Packed rows into {len(chunks)} chunks")
+        return chunks
+    
+    def chunk_records(self, records: Iterable[str]) -> List[Document]:
+        """
+        Chunk structured records (CSV rows, JSON objects) as they are read.
+        
+        Args:
+            records: Record strings ("column: value" lines)
+        
+        Returns:
+            Chunks packing as many whole records as fit in chunk_size
+        """
+        chunks = self._pack_records(((None, record) for record in records))
+        logger.info(f"Structured data: Packed records into {len(chunks)} chunks")
+        return chunks
+    
+    def _pack_records(
+        self,
+        records: Iterable[Tuple[Optional[str], str]],
+        group_key: Optional[str] = None
+    ) -> List[Document]:
+        """
+        Pack consecutive records into chunks of up to chunk_size.
+        
+        Records are never split unless a single record is larger than a
+        chunk, and never mixed across groups (sheets). Only the records of
+        the chunk being built are held in memory.
+        
+        Args:
+            records: (group, record) pairs; group is None for ungrouped data
+            group_key: Metadata key for the group name (e.g. "sheet")
+        
+        Returns:
+            Chunks, prefixed and tagged with their group when grouped
+        """
+        chunks: List[Document] = []
+        block: List[str] = []
+        block_len = 0
+        block_group = None
+        separator = "\n\n"
+        
+        def make_chunk(group: Optional[str], text: str) -> Document:
+            if group is None:
+                return Document(page_content=text, metadata={})
+            return Document(page_content=f"Sheet: {group}\n{text}", metadata={group_key: group})
+        
+        for group, record in records:
+            oversized = len(record) > self.chunk_size
+            if block and (
+                oversized or group != block_group
+                or block_len + len(separator) + len(record) > self.chunk_size
+            ):
+                chunks.append(make_chunk(block_group, separator.join(block)))
+                block, block_len = [], 0
+            block_group = group
+            
+            if oversized:
+                chunks.extend(make_chunk(group, piece) for piece in self.text_splitter.split_text(record))
+                continue
+            
+            block_len += len(record) + (len(separator) if block else 0)
+            block.append(record)
+        
+        if block:
+            chunks.append(make_chunk(block_group, separator.join(block)))
+        return chunks
+    
     def _chunk_word(self, file_data: Dict[str, Any]) -> List[Document]:
         """
         Chunk Word document content with heading detection.
@@ -303,7 +440,7 @@ class DocumentChunker:
 
     def _chunk_structured(self, file_data: Dict[str, Any]) -> List[Document]:
         """
-        Chunk structured data (JSON, CSV, Excel).
+        Chunk structured data (JSON, CSV, Excel) already loaded in memory.
         Uses field_selection if present, else flattens data.
         """
         content = file_data.get("content")
@@ -313,54 +450,52 @@ class DocumentChunker:
             return []
 
         meta = file_data.get("meta", {})
-        records: List[Dict[str, Any]] = []
+        records = self.iter_structured_records(content, file_data.get("field_selection"))
+        chunks = [
+            Document(page_content=chunk.page_content, metadata={**meta, **chunk.metadata})
+            for chunk in self.chunk_records(records)
+        ]
+        logger.info(f"File {file_name}: Chunked into {len(chunks)} final chunks")
+        return chunks
 
-        # Normalize to list of dicts
+    def iter_structured_records(
+        self,
+        content: Any,
+        field_selection: Optional[List[str]] = None
+    ) -> Iterator[str]:
+        """
+        Yield record strings from parsed JSON/CSV content.
+        
+        Args:
+            content: List of dicts, list of primitives, a dict, or a scalar
+            field_selection: Flattened keys to keep, in order (None = all)
+        
+        Yields:
+            "key: value" record strings (empty records are skipped)
+        """
+        # Normalize to an iterable of dicts
         if isinstance(content, list):
-            if not content:
-                return []
-            # Check if first item is a dict (CSV/JSON data)
-            if isinstance(content[0], dict):
+            if content and isinstance(content[0], dict):
                 records = content
             else:
                 # List of primitives
-                records = [{"value": v} for v in content]
+                records = ({"value": v} for v in content)
         elif isinstance(content, dict):
             records = [content]
         else:
             records = [{"value": str(content)}]
 
-        # Get field selection from loader (if specified)
-        field_selection = file_data.get("field_selection")
-
-        # Process records
-        doc_strings: List[str] = []
         for rec in records:
             # Flatten nested structures
             item = self._flatten_dict(rec)
             
             # Apply field selection if present
             if field_selection:
-                item = {k: item.get(k) for k in field_selection if k in item}
+                item = {k: item[k] for k in field_selection if k in item}
             
-            # Convert to string
             doc_str = self._stringify_record(item)
             if doc_str and doc_str.strip():
-                doc_strings.append(doc_str)
-
-        logger.info(f"File {file_name}: Generated {len(doc_strings)} doc strings from {len(records)} records")
-
-        # Create documents and split
-        docs = [
-            Document(page_content=s, metadata=meta)
-            for s in doc_strings
-            if isinstance(s, str) and s.strip()
-        ]
-        
-        result = self.text_splitter.split_documents(docs)
-        logger.info(f"File {file_name}: Chunked into {len(result)} final chunks")
-        
-        return result
+                yield doc_str
 
     def _flatten_dict(self, d: Dict[str, Any], parent_key: str = "", sep: str = ".") -> Dict[str, Any]:
         """Recursively flatten nested dicts/lists."""
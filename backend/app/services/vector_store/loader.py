@@ -1,24 +1,36 @@
 """
 Document Loader - Loads documents from FileUpload model with metadata enrichment.
+
+File parsing runs in a process pool (see parsers.py) so a batch uses every core.
+Files whose bytes were ingested before (same content hash) reuse the stored
+chunks instead of being parsed again (see artifacts.py).
 """
 
 from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+import asyncio
 import json
-import csv
 import os
-import docx
-import openpyxl
+from sqlalchemy import update, or_, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.config.settings import settings
 from app.core import get_logger
 from app.models.file_upload import FileUpload, FileStatus
 from app.models.department import Department
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.document_loaders import UnstructuredWordDocumentLoader
-from langchain_community.document_loaders import UnstructuredExcelLoader
-
+from app.services.vector_store.artifacts import (
+    IngestionArtifactStore,
+    artifact_variant,
+    get_artifact_store,
+)
+from app.services.vector_store.parsers import (
+    STREAMING_FILE_TYPES,
+    ParsingPool,
+    get_parsing_pool,
+)
+from app.utils.query_helpers import with_skip_locked
 
 
 logger = get_logger(__name__)
@@ -27,71 +39,247 @@ logger = get_logger(__name__)
 class DocumentLoader:
     """Loads documents from FileUpload model with enriched metadata."""
     
-    def __init__(self, session: AsyncSession):
-        """Initialize loader with database session."""
+    def __init__(
+        self,
+        session: AsyncSession,
+        parsing_pool: Optional[ParsingPool] = None,
+        artifact_store: Optional[IngestionArtifactStore] = None
+    ):
+        """
+        Initialize loader.
+        
+        Args:
+            session: AsyncSession for database operations
+            parsing_pool: Process pool for file parsing (default: shared pool)
+            artifact_store: Store of reusable chunks per content hash (default: shared store)
+        """
         self.session = session
+        self.parsing_pool = parsing_pool or get_parsing_pool()
+        self.artifact_store = artifact_store or get_artifact_store()
     
-    async def load_pending_files(self, file_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    async def load_pending_files(
+        self,
+        file_ids: Optional[List[int]] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Load pending approved files from database with enriched metadata.
+        Claim pending approved files and load them with enriched metadata.
         
         Args:
             file_ids: Optional list of specific file IDs to load. If provided:
                      - If contains IDs: Load only those specific files
                      - If None: Load all approved files not yet processed
+            limit: Maximum number of files to claim (None = no limit)
         
         Returns:
             List of documents with content and metadata
         """
-        # Build query based on file_ids parameter
-        if file_ids and len(file_ids) > 0:
-            # Load specific files by ID
-            stmt = select(FileUpload).where(FileUpload.id.in_(file_ids)).order_by(FileUpload.created_at)
-        else:
-            # Load all pending approved files (not yet processed)
-            stmt = select(FileUpload).where(
-                (FileUpload.status == FileStatus.APPROVED) &
-                (FileUpload.is_processed.is_(False))
-            ).order_by(FileUpload.created_at)
+        claimed_ids = await self.claim_pending_files(file_ids=file_ids, limit=limit)
+        return await self.load_files(claimed_ids)
+    
+    async def claim_pending_files(
+        self,
+        file_ids: Optional[List[int]] = None,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        """
+        Atomically move approved files to PROCESSING for this ingestion run.
+        
+        Each file is claimed with a compare-and-set UPDATE on its status (plus
+        FOR UPDATE SKIP LOCKED on PostgreSQL/MySQL), so concurrent batch jobs on
+        different nodes ingest disjoint sets of files. Files left in PROCESSING
+        longer than FILE_INGESTION_LEASE_SECONDS (crashed node) are claimable
+        again. Commits the claim so other nodes see it immediately.
+        
+        Args:
+            file_ids: Restrict to these files (all pending files if None/empty)
+            limit: Maximum number of files to claim (None = no limit)
+        
+        Returns:
+            IDs of files claimed by this call
+        """
+        now = datetime.now(timezone.utc)
+        stale_before = now - timedelta(seconds=settings.FILE_INGESTION_LEASE_SECONDS)
+        claimable = or_(
+            and_(FileUpload.status == FileStatus.APPROVED, FileUpload.is_processed.is_(False)),
+            and_(FileUpload.status == FileStatus.PROCESSING, FileUpload.processing_started_at < stale_before),
+        )
+        
+        stmt = select(FileUpload.id).where(claimable)
+        if file_ids:
+            stmt = stmt.where(FileUpload.id.in_(file_ids))
+        stmt = stmt.order_by(FileUpload.created_at, FileUpload.id)
+        if limit:
+            stmt = stmt.limit(limit)
+        stmt = with_skip_locked(stmt, self.session)
+        
+        result = await self.session.execute(stmt)
+        candidate_ids = list(result.scalars().all())
+        
+        claimed_ids = []
+        for candidate_id in candidate_ids:
+            claim = await self.session.execute(
+                update(FileUpload)
+                .where(FileUpload.id == candidate_id, claimable)
+                .values(status=FileStatus.PROCESSING, processing_started_at=now, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if claim.rowcount == 1:
+                claimed_ids.append(candidate_id)
+        
+        await self.session.commit()
+        
+        if candidate_ids and len(claimed_ids) < len(candidate_ids):
+            logger.info(
+                f"Claimed {len(claimed_ids)}/{len(candidate_ids)} files "
+                "(others were taken by a concurrent ingestion run)"
+            )
+        return claimed_ids
+    
+    async def load_files(self, file_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Load specific files (already claimed) with enriched metadata.
+        
+        Args:
+            file_ids: File IDs to load
+        
+        Returns:
+            List of documents with content and metadata (files that fail to
+            load are logged and omitted)
+        """
+        if not file_ids:
+            return []
         
+        stmt = (
+            select(FileUpload)
+            .where(FileUpload.id.in_(file_ids))
+            .order_by(FileUpload.created_at)
+            .execution_options(populate_existing=True)
+        )
         result = await self.session.execute(stmt)
         file_uploads = result.scalars().all()
         
+        # Department names for all files in one query instead of one per file
+        department_ids = {f.department_id for f in file_uploads if f.department_id}
+        department_names: Dict[int, str] = {}
+        if department_ids:
+            dept_result = await self.session.execute(
+                select(Department.id, Department.name).where(Department.id.in_(department_ids))
+            )
+            department_names = dict(dept_result.all())
+        
+        # Identical bytes with the same parse settings are parsed at most once
+        variants = {
+            f.id: artifact_variant(f.file_type, self._parse_field_selection(f))
+            for f in file_uploads
+        }
+        reused = await self._load_artifacts(file_uploads, variants)
+        
+        # Parse the remaining files concurrently; the pool bounds how many run at once.
+        # PDFs/spreadsheets/CSV/JSON come back as chunks streamed inside the worker.
+        parse_groups: Dict[Any, List[FileUpload]] = {}
+        for f in file_uploads:
+            if f.id not in reused:
+                key = (f.file_hash, variants[f.id]) if f.file_hash else ("file", f.id)
+                parse_groups.setdefault(key, []).append(f)
+        
+        leaders = [group[0] for group in parse_groups.values()]
+        parsed = await asyncio.gather(
+            *(
+                self.parsing_pool.parse_chunks(
+                    self._resolve_path(f), f.file_type, self._parse_field_selection(f)
+                )
+                if self._is_streamed(f) else
+                self.parsing_pool.parse(self._resolve_path(f), f.file_type)
+                for f in leaders
+            ),
+            return_exceptions=True
+        )
+        contents: Dict[int, Any] = {}
+        for group, content in zip(parse_groups.values(), parsed):
+            for f in group:
+                contents[f.id] = content
+        
         documents = []
         for file_upload in file_uploads:
+            dept_name = department_names.get(file_upload.department_id)
+            
+            if file_upload.id in reused:
+                chunks, vectors = reused[file_upload.id]
+                document = self._build_document(file_upload, None, dept_name)
+                document["content"] = None
+                document["chunks"] = chunks
+                document["embeddings"] = vectors
+                document["reused"] = True
+                document["artifact_variant"] = variants[file_upload.id]
+                documents.append(document)
+                logger.info(f"✓ Loaded: {file_upload.file_name} (reused {len(chunks)} chunks of identical file)")
+                continue
+            
+            content = contents[file_upload.id]
+            if isinstance(content, BaseException):
+                logger.error(f"✗ Failed to load {file_upload.file_name}: {content}")
+                continue
             try:
-                # Load and enrich document
-                doc = await self._load_and_enrich(file_upload)
-                documents.append(doc)
+                document = self._build_document(file_upload, content, dept_name)
+                document["artifact_variant"] = variants[file_upload.id]
+                documents.append(document)
                 logger.info(f"✓ Loaded: {file_upload.file_name}")
             except Exception as e:
                 logger.error(f"✗ Failed to load {file_upload.file_name}: {e}")
         
         return documents
     
-    async def _load_and_enrich(self, file_upload: FileUpload) -> Dict[str, Any]:
-        """Load file and enrich with metadata from model."""
-        # Resolve relative path to full path
+    async def _load_artifacts(
+        self,
+        file_uploads: List[FileUpload],
+        variants: Dict[int, str]
+    ) -> Dict[int, Any]:
+        """Stored chunks/vectors for files whose content was ingested before, by file ID."""
+        if not settings.INGESTION_REUSE_ARTIFACTS:
+            return {}
+        
+        reused = {}
+        for f in file_uploads:
+            if not f.file_hash:
+                continue
+            artifact = await asyncio.to_thread(self.artifact_store.load, f.file_hash, variants[f.id])
+            if artifact and artifact[0]:
+                reused[f.id] = artifact
+        return reused
+    
+    @staticmethod
+    def _is_streamed(file_upload: FileUpload) -> bool:
+        """Whether the file is extracted page/row-wise and chunked in the worker."""
+        return (file_upload.file_type or "").lower() in STREAMING_FILE_TYPES
+    
+    @staticmethod
+    def _parse_field_selection(file_upload: FileUpload) -> Optional[List[str]]:
+        """Parse field_selection JSON string to list."""
+        if not file_upload.field_selection:
+            return None
+        try:
+            return json.loads(file_upload.field_selection)
+        except json.JSONDecodeError:
+            logger.warning(f"Failed to parse field_selection for file {file_upload.id}: {file_upload.field_selection}")
+            return None
+    
+    @staticmethod
+    def _resolve_path(file_upload: FileUpload) -> Path:
+        """Resolve a stored (possibly relative) file path to a full path."""
         rel_path = file_upload.file_path
         if not os.path.isabs(rel_path):
             base_dir = os.getenv("FILES_DIR", "data/files")
-            full_path = os.path.join(base_dir, rel_path)
-        else:
-            full_path = rel_path
-        
-        file_path = Path(full_path)
-        
-        # Load file content
-        content = self._load_file_content(file_path, file_upload.file_type)
-        
-        # Get department name if applicable
-        dept_name = None
-        if file_upload.department_id:
-            stmt = select(Department).where(Department.id == file_upload.department_id)
-            result = await self.session.execute(stmt)
-            dept = result.scalar_one_or_none()
-            dept_name = dept.name if dept else None
-        
+            return Path(os.path.join(base_dir, rel_path))
+        return Path(rel_path)
+    
+    def _build_document(
+        self,
+        file_upload: FileUpload,
+        content: Any,
+        dept_name: Optional[str]
+    ) -> Dict[str, Any]:
+        """Enrich parsed content with metadata from the model."""
         # Build enriched metadata
         meta = {
             "upload_token": file_upload.upload_token,
@@ -106,120 +294,19 @@ class DocumentLoader:
             "file_size_bytes": file_upload.file_size,
         }
         
-        # Parse field_selection JSON string to list
-        field_selection_parsed = None
-        if file_upload.field_selection:
-            try:
-                field_selection_parsed = json.loads(file_upload.field_selection)
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse field_selection for file {file_upload.id}: {file_upload.field_selection}")
+        field_selection_parsed = self._parse_field_selection(file_upload)
         
-        return {
+        document = {
             "file_id": file_upload.id,
             "file_name": file_upload.file_name,
             "file_type": file_upload.file_type,
+            "file_hash": file_upload.file_hash,
             "content": content,            
             "field_selection": field_selection_parsed,
             "meta": meta,
         }
-    
-    def _load_pdf_content(self, file_path: Path) -> str:
-        """Load PDF file content."""
-        try:            
-            loader = PyPDFLoader(str(file_path))
-            docs = loader.load()
-            return "\n\n".join([d.page_content for d in docs])
-        except ImportError as e:
-            logger.error(f"PDF loader not available. Install with: pip install pypdf")
-            raise
-        except Exception as e:
-            logger.error(f"Failed to load PDF: {e}")
-            raise
-    
-    def _load_docx_content(self, file_path: Path) -> str:
-        """Load Word document content."""
-        try:
-            # Try python-docx first (lightweight, requires python-docx package)
-            
-            doc = docx.Document(str(file_path))
-            paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
-            return "\n\n".join(paragraphs)
-        except ImportError:
-            # Fallback to UnstructuredWordDocumentLoader if python-docx not available
-            try:                
-                loader = UnstructuredWordDocumentLoader(str(file_path))
-                docs = loader.load()
-                return "\n\n".join([d.page_content for d in docs])
-            except ImportError:
-                logger.error(f"DOCX loader not available. Install with: pip install python-docx")
-                raise
-        except Exception as e:
-            logger.error(f"Failed to load DOCX: {e}")
-            raise
-    
-    def _load_excel_content(self, file_path: Path) -> str:
-        """Load Excel file content."""
-        try:
-            # Try openpyxl first (lightweight, requires openpyxl package)            
-            wb = openpyxl.load_workbook(str(file_path), read_only=True, data_only=True)
-            content_parts = []
-            for sheet_name in wb.sheetnames:
-                sheet = wb[sheet_name]
-                content_parts.append(f"Sheet: {sheet_name}\n")
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = "\t".join([str(cell) if cell is not None else "" for cell in row])
-                    if row_text.strip():
-                        content_parts.append(row_text)
-            wb.close()
-            return "\n".join(content_parts)
-        except ImportError:
-            # Fallback to UnstructuredExcelLoader
-            try:                
-                loader = UnstructuredExcelLoader(str(file_path))
-                docs = loader.load()
-                return "\n\n".join([d.page_content for d in docs])
-            except ImportError:
-                logger.error(f"Excel loader not available. Install with: pip install openpyxl")
-                raise
-        except Exception as e:
-            logger.error(f"Failed to load Excel: {e}")
-            raise
-    
-    def _load_file_content(self, file_path: Path, file_type: str) -> Any:
-        """Load file content based on type."""
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
-        
-        file_type_lower = file_type.lower()
-        
-        # Text-based files
-        if file_type_lower in ['txt', 'md', 'markdown']:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        
-        # JSON files
-        elif file_type_lower == 'json':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        
-        # CSV files
-        elif file_type_lower == 'csv':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                return list(reader)
-        
-        # PDF files
-        elif file_type_lower == 'pdf':
-            return self._load_pdf_content(file_path)
-        
-        # Word documents
-        elif file_type_lower in ['doc', 'docx']:
-            return self._load_docx_content(file_path)
-        
-        # Excel files
-        elif file_type_lower in ['xlsx', 'xls']:
-            return self._load_excel_content(file_path)
-        
-        else:
-            raise ValueError(f"Unsupported file type: {file_type_lower}")
-
+        if self._is_streamed(file_upload):
+            # Already chunked (with page/sheet metadata) by the parsing worker
+            document["content"] = None
+            document["chunks"] = content
+        return document
@@ -0,0 +1,559 @@
+"""
+Document Parsers - CPU-bound file parsing run in a process pool.
+
+Parsing PDFs, Word documents and spreadsheets is pure CPU work. Running it
+inline in the async loader keeps one core busy while the rest sit idle, so
+DocumentLoader fans files out to a process pool sized to the machine:
+- One worker process per core (INGESTION_PARSE_WORKERS, 0 = auto)
+- Per-file timeout (INGESTION_PARSE_TIMEOUT_SECONDS), counted from when a worker
+  takes the file; only the worker of a hung file is killed
+- Per-worker address space limit (INGESTION_PARSE_MAX_MEMORY_MB, POSIX only)
+
+PDFs, spreadsheets and CSV/JSON data are streamed page by page / row by row
+straight into DocumentChunker inside the worker (parse_and_chunk), so a
+2,000-page manual or a 1M-row export never exists as one giant string; only
+finished chunks, tagged with their page number or sheet name, are sent back.
+Structured rows are projected to `field_selection` columns as they are read.
+
+Parse functions are module-level so they can be pickled to worker processes.
+"""
+
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import threading
+from itertools import islice
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence, Set, Tuple
+
+import docx
+import openpyxl
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.document_loaders import UnstructuredWordDocumentLoader
+from langchain_community.document_loaders import UnstructuredExcelLoader
+from langchain_core.documents import Document
+
+from app.config.settings import settings
+from app.core import get_logger
+
+
+logger = get_logger(__name__)
+
+# File types extracted incrementally and chunked inside the worker process
+STREAMING_FILE_TYPES = {"pdf", "xlsx", "xls", "csv", "json"}
+
+# Rows read per batch from CSV files
+CSV_BATCH_ROWS = 5000
+
+# Sent by a worker process once it is ready for files
+WORKER_READY = "ready"
+
+
+# ============================================================================
+# Parsers (run inside worker processes)
+# ============================================================================
+
+def parse_pdf(file_path: Path) -> str:
+    """Load PDF file content."""
+    try:
+        loader = PyPDFLoader(str(file_path))
+        docs = loader.load()
+        return "\n\n".join([d.page_content for d in docs])
+    except ImportError:
+        logger.error("PDF loader not available. Install with: pip install pypdf")
+        raise
+    except Exception as e:
+        logger.error(f"Failed to load PDF: {e}")
+        raise
+
+
+def parse_docx(file_path: Path) -> str:
+    """Load Word document content."""
+    try:
+        # Try python-docx first (lightweight, requires python-docx package)
+        doc = docx.Document(str(file_path))
+        paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
+        return "\n\n".join(paragraphs)
+    except ImportError:
+        # Fallback to UnstructuredWordDocumentLoader if python-docx not available
+        try:
+            loader = UnstructuredWordDocumentLoader(str(file_path))
+            docs = loader.load()
+            return "\n\n".join([d.page_content for d in docs])
+        except ImportError:
+            logger.error("DOCX loader not available. Install with: pip install python-docx")
+            raise
+    except Exception as e:
+        logger.error(f"Failed to load DOCX: {e}")
+        raise
+
+
+def parse_excel(file_path: Path) -> str:
+    """Load Excel file content."""
+    try:
+        # Try openpyxl first (lightweight, requires openpyxl package)
+        wb = openpyxl.load_workbook(str(file_path), read_only=True, data_only=True)
+        content_parts = []
+        for sheet_name in wb.sheetnames:
+            sheet = wb[sheet_name]
+            content_parts.append(f"Sheet: {sheet_name}\n")
+            for row in sheet.iter_rows(values_only=True):
+                row_text = "\t".join([str(cell) if cell is not None else "" for cell in row])
+                if row_text.strip():
+                    content_parts.append(row_text)
+        wb.close()
+        return "\n".join(content_parts)
+    except ImportError:
+        # Fallback to UnstructuredExcelLoader
+        try:
+            loader = UnstructuredExcelLoader(str(file_path))
+            docs = loader.load()
+            return "\n\n".join([d.page_content for d in docs])
+        except ImportError:
+            logger.error("Excel loader not available. Install with: pip install openpyxl")
+            raise
+    except Exception as e:
+        logger.error(f"Failed to load Excel: {e}")
+        raise
+
+
+def iter_pdf_pages(file_path: Path) -> Iterator[Tuple[int, str]]:
+    """
+    Yield PDF pages one at a time.
+
+    Yields:
+        (page_number, text) with 1-based page numbers
+    """
+    try:
+        for page in PyPDFLoader(str(file_path)).lazy_load():
+            yield page.metadata.get("page", 0) + 1, page.page_content
+    except ImportError:
+        logger.error("PDF loader not available. Install with: pip install pypdf")
+        raise
+
+
+def project_columns(header: Sequence[Any], field_selection: Optional[List[str]] = None) -> List[Tuple[int, str]]:
+    """
+    Resolve a header row to the (index, name) pairs to keep.
+
+    Args:
+        header: Column names in file order
+        field_selection: Columns to keep, in the requested order (None = all)
+
+    Returns:
+        (column index, column name) pairs
+    """
+    names = [str(h) if h is not None else "" for h in header]
+    if not field_selection:
+        return [(i, name) for i, name in enumerate(names) if name]
+    index_by_name = {name: i for i, name in enumerate(names)}
+    return [(index_by_name[name], name) for name in field_selection if name in index_by_name]
+
+
+def format_row(row: Sequence[Any], columns: List[Tuple[int, str]]) -> str:
+    """Render the projected cells of a row as "column: value" lines, skipping blanks."""
+    width = len(row)
+    return "\n".join(
+        f"{name}: {row[i]}"
+        for i, name in columns
+        if i < width and row[i] is not None and row[i] != ""
+    )
+
+
+def iter_csv_records(file_path: Path, field_selection: Optional[List[str]] = None) -> Iterator[str]:
+    """
+    Yield CSV rows as "column: value" records, reading in batches.
+
+    Rows are plain lists projected by column index (no dict per row), so
+    memory holds one batch regardless of file size.
+    """
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = project_columns(header, field_selection)
+        if not columns:
+            return
+
+        while True:
+            batch = list(islice(reader, CSV_BATCH_ROWS))
+            if not batch:
+                break
+            for row in batch:
+                record = format_row(row, columns)
+                if record:
+                    yield record
+
+
+def iter_excel_rows(file_path: Path, field_selection: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Yield spreadsheet rows one at a time (read-only workbook).
+
+    The first non-empty row of each sheet is its header; later rows are
+    rendered as "column: value" records over the projected columns.
+
+    Yields:
+        (sheet_name, record text)
+    """
+    wb = openpyxl.load_workbook(str(file_path), read_only=True, data_only=True)
+    try:
+        for sheet_name in wb.sheetnames:
+            columns = None
+            for row in wb[sheet_name].iter_rows(values_only=True):
+                if not any(cell is not None and str(cell).strip() for cell in row):
+                    continue
+                if columns is None:
+                    columns = project_columns(row, field_selection)
+                    continue
+                record = format_row(row, columns)
+                if record:
+                    yield sheet_name, record
+    finally:
+        wb.close()
+
+
+_worker_chunker = None
+
+
+def parse_and_chunk(
+    file_path: Path,
+    file_type: str,
+    field_selection: Optional[List[str]] = None
+) -> List[Document]:
+    """
+    Stream a PDF, spreadsheet or structured file into the chunker.
+
+    Args:
+        file_path: Absolute path to the file
+        file_type: One of STREAMING_FILE_TYPES
+        field_selection: Columns/fields to keep for structured files (None = all)
+
+    Returns:
+        Chunks with page/sheet metadata (file metadata is added by the caller)
+    """
+    # Imported here: the chunker is only needed inside worker processes
+    from app.services.vector_store.chunker import DocumentChunker
+
+    global _worker_chunker
+    if _worker_chunker is None:
+        _worker_chunker = DocumentChunker()
+
+    if not file_path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    file_type_lower = file_type.lower()
+    if file_type_lower == "pdf":
+        return _worker_chunker.chunk_pdf_pages(iter_pdf_pages(file_path))
+    elif file_type_lower in ("xlsx", "xls"):
+        return _worker_chunker.chunk_sheet_rows(iter_excel_rows(file_path, field_selection))
+    elif file_type_lower == "csv":
+        return _worker_chunker.chunk_records(iter_csv_records(file_path, field_selection))
+    elif file_type_lower == "json":
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+        return _worker_chunker.chunk_records(
+            _worker_chunker.iter_structured_records(content, field_selection)
+        )
+    else:
+        raise ValueError(f"Streaming extraction not supported for: {file_type_lower}")
+
+
+def parse_file(file_path: Path, file_type: str) -> Any:
+    """
+    Load file content based on type.
+
+    Args:
+        file_path: Absolute path to the file
+        file_type: File extension (pdf, docx, xlsx, csv, json, txt, ...)
+
+    Returns:
+        str for text-like documents, list/dict for JSON, list of rows for CSV
+    """
+    if not file_path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    file_type_lower = file_type.lower()
+
+    # Text-based files
+    if file_type_lower in ['txt', 'md', 'markdown']:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    # JSON files
+    elif file_type_lower == 'json':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    # CSV files
+    elif file_type_lower == 'csv':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            return list(reader)
+
+    # PDF files
+    elif file_type_lower == 'pdf':
+        return parse_pdf(file_path)
+
+    # Word documents
+    elif file_type_lower in ['doc', 'docx']:
+        return parse_docx(file_path)
+
+    # Excel files
+    elif file_type_lower in ['xlsx', 'xls']:
+        return parse_excel(file_path)
+
+    else:
+        raise ValueError(f"Unsupported file type: {file_type_lower}")
+
+
+def _init_parse_worker(max_memory_mb: int) -> None:
+    """Worker process setup: cap the worker's address space."""
+    if max_memory_mb <= 0:
+        return
+    try:
+        import resource
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        # Windows has no `resource`; some containers refuse lower limits
+        logger.debug(f"Could not apply parse worker memory limit: {e}")
+
+
+def _parse_worker_main(conn, max_memory_mb: int) -> None:
+    """Worker process loop: run (func, args) tasks from the pipe until closed."""
+    _init_parse_worker(max_memory_mb)
+    # Parser imports are done by now; parse timeouts start from here
+    conn.send(WORKER_READY)
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        func, args = task
+        try:
+            result = (True, func(*args))
+        except BaseException as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            # Result or exception that can't be pickled
+            conn.send((False, RuntimeError(f"Parse result could not be sent back: {e!r}")))
+
+
+# ============================================================================
+# Process pool
+# ============================================================================
+
+class _ParseWorker:
+    """One worker process, running one file at a time."""
+
+    # How long a new worker may take to start (spawn + imports), apart from parse timeouts
+    START_TIMEOUT_SECONDS = 120
+
+    def __init__(self, max_memory_mb: int):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_parse_worker_main, args=(child_conn, max_memory_mb), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def call(self, func, args: tuple, timeout: float) -> Tuple[bool, Any]:
+        """
+        Run func(*args) in the worker (blocking).
+
+        Raises:
+            TimeoutError: No result within timeout (counted from when the worker got the task)
+            BrokenProcessPool: The worker died (crash, memory limit, killed)
+        """
+        try:
+            if not self.ready:
+                if not self.conn.poll(self.START_TIMEOUT_SECONDS):
+                    raise BrokenProcessPool(f"Parse worker did not start within {self.START_TIMEOUT_SECONDS}s")
+                self.conn.recv()
+                self.ready = True
+            self.conn.send((func, args))
+            finished = self.conn.poll(timeout)
+            if finished:
+                return self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise BrokenProcessPool(f"Parse worker exited unexpectedly (exit code {self.process.exitcode})") from e
+        raise TimeoutError
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.conn.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.conn.close()
+        self.process.join(timeout=1)
+
+
+class ParsingPool:
+    """Worker processes that parse files off the event loop, one core per worker."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        max_memory_mb: Optional[int] = None,
+    ):
+        """
+        Initialize pool settings (processes start on first use).
+
+        Args:
+            max_workers: Worker processes (default: INGESTION_PARSE_WORKERS, 0 = CPU count)
+            timeout_seconds: Per-file parse timeout (default: INGESTION_PARSE_TIMEOUT_SECONDS)
+            max_memory_mb: Per-worker memory cap (default: INGESTION_PARSE_MAX_MEMORY_MB, 0 = none)
+        """
+        workers = max_workers if max_workers is not None else settings.INGESTION_PARSE_WORKERS
+        self.max_workers = workers or os.cpu_count() or 1
+        self.timeout_seconds = timeout_seconds or settings.INGESTION_PARSE_TIMEOUT_SECONDS
+        self.max_memory_mb = (
+            max_memory_mb if max_memory_mb is not None else settings.INGESTION_PARSE_MAX_MEMORY_MB
+        )
+        self._idle: List[_ParseWorker] = []
+        self._busy: Set[_ParseWorker] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        """Semaphore bounding running parses (one per worker), per event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._slots = loop, asyncio.Semaphore(self.max_workers)
+        return self._slots
+
+    def _checkout(self) -> _ParseWorker:
+        """An idle worker, or a new one (spawned workers don't inherit the API's threads or memory)."""
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    self._busy.add(worker)
+                    return worker
+        worker = _ParseWorker(self.max_memory_mb)
+        with self._lock:
+            if not self._busy and not self._idle:
+                logger.info(
+                    f"Started parsing pool: up to {self.max_workers} worker(s), "
+                    f"timeout={self.timeout_seconds}s, memory_limit={self.max_memory_mb or 'none'}MB"
+                )
+            self._busy.add(worker)
+        return worker
+
+    def _checkin(self, worker: _ParseWorker, healthy: bool) -> None:
+        with self._lock:
+            self._busy.discard(worker)
+            if healthy:
+                self._idle.append(worker)
+        if not healthy:
+            worker.kill()
+
+    async def parse(self, file_path: Path, file_type: str) -> Any:
+        """
+        Parse a file in a worker process.
+
+        Args:
+            file_path: Absolute path to the file
+            file_type: File extension
+
+        Returns:
+            Parsed content (see parse_file)
+
+        Raises:
+            TimeoutError: Parsing took longer than the per-file timeout
+            Exception: Whatever the parser raised (bad file, MemoryError, ...)
+        """
+        return await self._run(parse_file, file_path, file_type)
+
+    async def parse_chunks(
+        self,
+        file_path: Path,
+        file_type: str,
+        field_selection: Optional[List[str]] = None
+    ) -> List[Document]:
+        """
+        Stream a file into the chunker in a worker process.
+
+        Args:
+            file_path: Absolute path to the file
+            file_type: One of STREAMING_FILE_TYPES
+            field_selection: Columns/fields to keep for structured files
+
+        Returns:
+            Chunks with page/sheet metadata (see parse_and_chunk)
+        """
+        return await self._run(parse_and_chunk, file_path, file_type, field_selection)
+
+    async def _run(self, func, file_path: Path, *args) -> Any:
+        """
+        Run a parse function in a worker with timeout and crash isolation.
+
+        Files wait for a free worker first; the timeout only counts the time a
+        worker spends on the file. A hung or crashed worker is killed alone,
+        other files keep parsing.
+        """
+        async with self._get_slots():
+            worker = self._checkout()
+            healthy = False
+            try:
+                ok, value = await asyncio.to_thread(
+                    worker.call, func, (file_path, *args), self.timeout_seconds
+                )
+                healthy = True
+            except TimeoutError:
+                raise TimeoutError(f"Parsing {file_path.name} exceeded {self.timeout_seconds}s")
+            finally:
+                # Also reached on cancellation: the worker may still be busy, so it goes
+                self._checkin(worker, healthy)
+
+        if not ok:
+            raise value
+        return value
+
+    def shutdown(self) -> None:
+        """Stop worker processes."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            busy, self._busy = list(self._busy), set()
+        for worker in idle:
+            worker.stop()
+        for worker in busy:
+            worker.kill()
+
+
+_parsing_pool: Optional[ParsingPool] = None
+
+
+def get_parsing_pool() -> ParsingPool:
+    """Get the shared parsing pool instance."""
+    global _parsing_pool
+    if _parsing_pool is None:
+        _parsing_pool = ParsingPool()
+    return _parsing_pool
+
+
+def shutdown_parsing_pool() -> None:
+    """Stop the shared parsing pool if it was started."""
+    global _parsing_pool
+    if _parsing_pool is not None:
+        _parsing_pool.shutdown()
+        _parsing_pool = None
@@ -2,21 +2,95 @@
 Retriever service for querying the vector store.
 Handles adaptive document retrieval with quality-based top-k adjustment and reranking.
 Includes semantic caching with vector similarity.
+
+Per-request search parameters travel in an immutable SearchSpec; the service
+and the shared LangChain retriever hold no per-request state, so concurrent
+retrievals with different parameters are safe.
+
+FAISS/Chroma searches take the query vector from the shared embedding batcher,
+so concurrent requests are embedded together.
+
+Blocking searches run in worker threads. In-process indexes that ingestion
+modifies in place (FAISS/Chroma without snapshots) are searched under the
+shared vector store lock, which ingestion holds while adding to them.
 """
 
-from typing import List, Optional, Dict, Any, Tuple
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, Mapping, Set, Tuple
+import asyncio
+import copy
+
 from langchain_core.documents import Document
 
-from app.core.vector_store_factory import get_retriever
+from app.core.embedding_batcher import get_embedding_batcher
+from app.core.vector_store_factory import get_retriever, get_vector_store_lock
 from app.core import get_logger
 from app.core.semantic_cache import get_semantic_cache
 from app.config.settings import settings
 from app.models.user_permission import PermissionLevel
 from app.services.vector_store.reranker import get_reranker_service
+from app.services.vector_store.sparse_index import (
+    LOCAL_HYBRID_PROVIDERS,
+    document_key,
+    get_sparse_index,
+    local_hybrid_enabled,
+    reciprocal_rank_fusion,
+)
 
 
 logger = get_logger(__name__)
 
+# Search-by-vector methods returning (document, score) like similarity_search_with_score
+VECTOR_SEARCH_METHODS = (
+    "similarity_search_with_score_by_vector",  # FAISS
+    "similarity_search_by_vector_with_relevance_scores",  # Chroma
+)
+
+
+@dataclass(frozen=True)
+class SearchSpec:
+    """
+    Search parameters of one retrieval, fixed when the request starts.
+    
+    Attributes:
+        k: Documents returned after reranking/threshold filtering
+        fetch_k: Candidates fetched from the vector store
+        score_threshold: Minimum similarity score of a candidate
+        filter: Vector store metadata filter (read-only)
+    """
+    k: int
+    fetch_k: int
+    score_threshold: float
+    filter: Optional[Mapping[str, Any]] = None
+    
+    def __post_init__(self):
+        if self.filter is not None:
+            object.__setattr__(self, "filter", MappingProxyType(copy.deepcopy(dict(self.filter))))
+    
+    @classmethod
+    def from_settings(
+        cls,
+        app_settings: Any,
+        top_k: Optional[int] = None,
+        filter: Optional[Mapping[str, Any]] = None
+    ) -> "SearchSpec":
+        """Spec from the current TOP_K/MAX_K/RETRIEVAL_SCORE_THRESHOLD, optionally overriding k."""
+        k = top_k or app_settings.TOP_K
+        return cls(
+            k=k,
+            fetch_k=max(app_settings.MAX_K, k),
+            score_threshold=app_settings.RETRIEVAL_SCORE_THRESHOLD,
+            filter=filter,
+        )
+    
+    def search_kwargs(self) -> Dict[str, Any]:
+        """Fresh keyword arguments for a vector store search call."""
+        kwargs: Dict[str, Any] = {"k": self.fetch_k}
+        if self.filter is not None:
+            kwargs["filter"] = copy.deepcopy(dict(self.filter))
+        return kwargs
+
 
 class RetrieverService:
     """
@@ -24,6 +98,7 @@ class RetrieverService:
     
     Provides query methods with optional filtering and processing.
     Can be extended with features like hybrid search, re-ranking, etc.
+    Stateless per request: search parameters are passed as a SearchSpec.
     """
     
     def __init__(self):
@@ -34,6 +109,13 @@ class RetrieverService:
         if self.settings.app_settings.ENABLE_RERANKER:
             self.reranker = get_reranker_service()
         self.semantic_cache = get_semantic_cache()
+        # FAISS/Chroma hybrid search: BM25 index built at ingestion
+        self.sparse_index = get_sparse_index() if local_hybrid_enabled() else None
+        provider = self.settings.VECTOR_DB_PROVIDER.lower()
+        # Stores searching dense vectors only; others embed the text themselves (e.g. native hybrid)
+        self.embedding_batcher = get_embedding_batcher() if provider in LOCAL_HYBRID_PROVIDERS else None
+        # Held while searching a store that ingestion modifies in place (None otherwise)
+        self.search_lock = get_vector_store_lock(provider)
     
     def _get_document_security_level(self, doc_security_level: Any) -> int:
         """
@@ -208,17 +290,66 @@ class RetrieverService:
         
         return filtered_docs, security_metadata, list(blocked_departments) if blocked_departments else None
     
-    def _get_high_quality_docs(
+    def _fuse_with_sparse(
         self,
+        query_text: str,
         results: List[Tuple[Document, float]],
-        score_threshold: float
+        max_k: int
+    ) -> Tuple[List[Tuple[Document, Optional[float]]], Set[str]]:
+        """
+        Fuse dense results with BM25 results from the local sparse index (RRF).
+        
+        Args:
+            query_text: Query to search the sparse index with
+            results: (document, score) tuples from the vector store
+            max_k: Number of fused candidates to keep
+        
+        Returns:
+            Tuple of (fused (document, dense score or None) tuples, keys of
+            keyword hits strong enough to count as relevant on their own)
+        """
+        hits = self.sparse_index.search(query_text, max_k)
+        if not hits:
+            return results, set()
+        
+        candidates: Dict[str, Tuple[Document, Optional[float]]] = {}
+        dense_ranking = []
+        for doc, score in results:
+            key = document_key(doc)
+            candidates.setdefault(key, (doc, score))
+            dense_ranking.append(key)
+        sparse_ranking = []
+        for hit in hits:
+            key = document_key(hit.document)
+            candidates.setdefault(key, (hit.document, None))
+            sparse_ranking.append(key)
+        
+        min_coverage = self.settings.SPARSE_MATCH_MIN_COVERAGE
+        lexical_matches = {
+            key for key, hit in zip(sparse_ranking, hits) if hit.coverage >= min_coverage
+        }
+        fused = reciprocal_rank_fusion([dense_ranking, sparse_ranking], k=self.settings.SPARSE_RRF_K)
+        
+        logger.debug(
+            f"Hybrid fusion: {len(results)} dense + {len(hits)} sparse → {len(fused)} candidates "
+            f"({len(lexical_matches)} keyword matches)"
+        )
+        return [candidates[key] for key in fused[:max_k]], lexical_matches
+    
+    def _get_high_quality_docs(
+        self,
+        results: List[Tuple[Document, Optional[float]]],
+        score_threshold: float,
+        lexical_matches: Optional[Set[str]] = None
     ) -> List[Document]:
         """
         Extract documents that meet the quality threshold from similarity results.
         
         Args:
             results: List of (document, score) tuples from vector store
+                     (score None for keyword-only hits of a hybrid search)
             score_threshold: Minimum similarity score required
+            lexical_matches: Keys of keyword hits that pass regardless of score
             
         Returns:
             List of documents that passed the threshold
@@ -227,12 +358,14 @@ class RetrieverService:
         filtered_out_count = 0
         
         for doc, score in results:
-            if score >= score_threshold:
+            if score is not None and score >= score_threshold:
+                high_quality_docs.append(doc)
+            elif lexical_matches and document_key(doc) in lexical_matches:
                 high_quality_docs.append(doc)
             else:
                 filtered_out_count += 1
                 logger.debug(
-                    f"Filtered out: score={score:.4f} < threshold={score_threshold} "
+                    f"Filtered out: score={score} < threshold={score_threshold} "
                     f"(source={doc.metadata.get('source', 'unknown')})"
                 )
         
@@ -295,9 +428,10 @@ class RetrieverService:
     
     def _select_relevant_documents(
         self,
-        results: List[Tuple[Document, float]],
+        results: List[Tuple[Document, Optional[float]]],
         query_text: str,
-        top_k: int
+        spec: SearchSpec,
+        lexical_matches: Optional[Set[str]] = None
     ) -> List[Document]:
         """
         Select relevant documents using quality threshold and optional reranking.
@@ -306,11 +440,13 @@ class RetrieverService:
         - All documents must meet their respective threshold
         - Similarity threshold: when no reranking or initial filtering
         - Reranker threshold: when reranking is applied
+        - Strong keyword matches (FAISS/Chroma hybrid) count as meeting the similarity threshold
         
         Returns:
             List of relevant documents
         """
-        score_threshold = self.settings.app_settings.RETRIEVAL_SCORE_THRESHOLD
+        top_k = spec.k
+        score_threshold = spec.score_threshold
         reranker_threshold = self.settings.app_settings.RERANKER_SCORE_THRESHOLD
         reranker_enabled = self.reranker and self.settings.app_settings.ENABLE_RERANKER
         
@@ -322,7 +458,7 @@ class RetrieverService:
         )
         
         # Check for high-quality results from similarity
-        high_quality_docs = self._get_high_quality_docs(results, score_threshold)
+        high_quality_docs = self._get_high_quality_docs(results, score_threshold, lexical_matches)
         logger.debug(f"High-quality docs (threshold={score_threshold}): {len(high_quality_docs)}/{len(results)}")
         
         # Decide on retrieval strategy
@@ -408,7 +544,8 @@ class RetrieverService:
         user_department_id: Optional[int] = None,
         user_department_security_level: Optional[int] = None,
         user_id: Optional[int] = None,
-        skip_security_filter: bool = False
+        skip_security_filter: bool = False,
+        spec: Optional[SearchSpec] = None
     ) -> Dict[str, Any]:
         """
         Adaptive document retrieval with quality-based top-k adjustment.
@@ -419,6 +556,10 @@ class RetrieverService:
         3. Rerank candidates if reranker is enabled
         4. Filter by threshold to get relevant documents
         5. Return top_k final results
+        
+        Args:
+            top_k: Overrides TOP_K (ignored when spec is given)
+            spec: Full search parameters (default: from settings and top_k)
             
         Returns:
             Dict with success, context (documents), count, error, message
@@ -426,10 +567,14 @@ class RetrieverService:
         # Context caching moved to pipeline level (after formatting)
         # Retriever now focuses solely on document retrieval
         
+        # Settings are read once; the request keeps them even if they change meanwhile
+        if spec is None:
+            spec = SearchSpec.from_settings(self.settings.app_settings, top_k)
+        
         # Perform retrieval
         retrieval_result = await self._perform_retrieval(
             query_text,
-            top_k,
+            spec,
             user_security_level,
             user_department_id,
             user_department_security_level,
@@ -442,7 +587,7 @@ class RetrieverService:
     async def _perform_retrieval(
         self,
         query_text: str,
-        top_k: Optional[int],
+        spec: SearchSpec,
         user_security_level: Optional[int],
         user_department_id: Optional[int],
         user_department_security_level: Optional[int],
@@ -467,6 +612,7 @@ class RetrieverService:
         - Qdrant: Uses RetrievalMode.HYBRID with BM25 sparse embeddings (FastEmbed)
         - Weaviate: Native BM25F via alpha parameter (no special config needed)
         - Milvus: Uses BM25BuiltInFunction with separate dense/sparse vectors
+        - FAISS/Chroma: In-process BM25 index (built at ingestion) fused here
         - Results are fused using RRF (Reciprocal Rank Fusion) by default
         
         Args:
@@ -474,17 +620,22 @@ class RetrieverService:
         """
         try:
             # Step 1: Retrieve candidates from vector store
-            top_k = top_k or self.settings.app_settings.TOP_K
-            max_k = self.settings.app_settings.MAX_K
+            # One reference for the whole request, even if a new snapshot is swapped in meanwhile
             vector_store = self.retriever.vectorstore
             
-            logger.info(f"Retrieving candidates: max_k={max_k}, top_k={top_k}")
+            logger.info(f"Retrieving candidates: max_k={spec.fetch_k}, top_k={spec.k}")
             
             try:
-                results = vector_store.similarity_search_with_score(query_text, k=max_k)
+                results = await self._search_with_scores(vector_store, query_text, spec)
             except (AttributeError, NotImplementedError):
                 logger.warning("Vector store doesn't support scores, falling back")
-                return await self._fallback_query(query_text, max_k, top_k, user_security_level, user_department_id, user_department_security_level)
+                return await self._fallback_query(
+                    query_text, vector_store, spec, user_security_level, user_department_id, user_department_security_level
+                )
+            
+            lexical_matches: Set[str] = set()
+            if self.sparse_index is not None:
+                results, lexical_matches = self._fuse_with_sparse(query_text, results, spec.fetch_k)
             
             if not results:
                 logger.warning("No documents retrieved from vector store")
@@ -492,11 +643,11 @@ class RetrieverService:
                     query_text=query_text,
                     user_id=user_id,
                     reason="no_documents",
-                    details={"k": max_k}
+                    details={"k": spec.fetch_k}
                 )
             
             # Step 2: Select relevant documents (quality check + optional reranking)
-            relevant_docs = self._select_relevant_documents(results, query_text, top_k)
+            relevant_docs = self._select_relevant_documents(results, query_text, spec, lexical_matches)
             
             # Step 3: Check if any relevant documents found
             if not relevant_docs:
@@ -540,18 +691,56 @@ class RetrieverService:
                 "count": 0
             }
     
+    async def _search_with_scores(
+        self,
+        vector_store: Any,
+        query_text: str,
+        spec: SearchSpec
+    ) -> List[Tuple[Document, float]]:
+        """Similarity search with scores, by the batched query vector when the store supports it."""
+        search_by_vector = None
+        if self.embedding_batcher is not None:
+            search_by_vector = next(
+                (getattr(vector_store, name) for name in VECTOR_SEARCH_METHODS if hasattr(vector_store, name)),
+                None
+            )
+        
+        if search_by_vector is None:
+            return await self._run_search(
+                vector_store.similarity_search_with_score, query_text, **spec.search_kwargs()
+            )
+        embedding = await self.embedding_batcher.embed(query_text)
+        return await self._run_search(search_by_vector, embedding, **spec.search_kwargs())
+    
+    async def _run_search(self, search: Any, *args, **kwargs) -> Any:
+        """
+        Run a blocking vector store search in a worker thread, so concurrent
+        requests don't queue behind it.
+        
+        Under the search lock if ingestion modifies the store in place, so the
+        search never overlaps a write (possibly from an inline job thread).
+        """
+        if self.search_lock is None:
+            return await asyncio.to_thread(search, *args, **kwargs)
+        
+        def _locked_search():
+            with self.search_lock:
+                return search(*args, **kwargs)
+        
+        return await asyncio.to_thread(_locked_search)
+    
     async def _fallback_query(
         self,
         query_text: str,
-        k: int,
-        top_k: int,
+        vector_store: Any,
+        spec: SearchSpec,
         user_security_level: Optional[int],
         user_department_id: Optional[int],
         user_department_security_level: Optional[int] = None
     ) -> Dict[str, Any]:
         """Fallback when vector store doesn't support scores."""
-        self.retriever.search_kwargs = {"k": k}
-        docs = self.retriever.invoke(query_text)
+        top_k = spec.k
+        docs = await self._run_search(vector_store.similarity_search, query_text, **spec.search_kwargs())
         
         if user_security_level is None:
             # No security filtering needed for public data
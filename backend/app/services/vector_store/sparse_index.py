@@ -0,0 +1,434 @@
+"""
+Sparse Index - In-process BM25 inverted index for FAISS/Chroma hybrid search.
+
+Qdrant, Weaviate and Milvus keep sparse vectors themselves; the local
+providers only hold dense vectors. This index is built next to the dense one
+at ingestion time so exact-term queries (policy codes, SKUs, ticket numbers)
+find their chunks without a cross-encoder pass.
+
+Postings are compact per-term arrays of document slots and term frequencies
+(uint32). Documents are added incrementally (a chunk replaces the one with the
+same file_id/chunk_index) and removed by file; removed slots are skipped at
+query time and dropped on the next compaction or save.
+
+Every process (API workers, job workers) holds its own copy of the shared
+file. Writers change it inside update(), which holds a file lock, reloads
+newer saves first and saves before releasing, so no process writes back
+chunks another one removed.
+
+Layout: {VECTOR_STORE_PERSIST_DIRECTORY}/{collection}.bm25.json
+"""
+
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import asyncio
+import base64
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import threading
+
+from langchain_core.documents import Document
+
+from app.config.settings import settings
+from app.core import get_logger
+from app.services.vector_store.artifacts import _atomic_write
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers on one host are not serialized
+    fcntl = None
+
+
+logger = get_logger(__name__)
+
+SPARSE_INDEX_FORMAT_VERSION = 1
+
+# Providers without native sparse vectors that use this index for hybrid search
+LOCAL_HYBRID_PROVIDERS = {"faiss", "chroma"}
+
+# Words, numbers and joined codes such as "POL-2024-17" or "v2.3.1"
+_TOKEN_PATTERN = re.compile(r"[^\W_]+(?:[-_./:#][^\W_]+)*")
+_CODE_SEPARATORS = re.compile(r"[-_./:#]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase terms of a text. Joined codes are kept whole and also split into
+    their parts, so "POL-2024-17" matches both itself and "pol 2024".
+    """
+    terms: List[str] = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        terms.append(token)
+        if _CODE_SEPARATORS.search(token):
+            terms.extend(part for part in _CODE_SEPARATORS.split(token) if part)
+    return terms
+
+
+def document_key(doc: Document) -> str:
+    """Identity of a chunk across the dense and sparse indexes."""
+    file_id = doc.metadata.get("file_id")
+    if file_id is not None:
+        return f"{file_id}:{doc.metadata.get('chunk_index')}"
+    return "text:" + hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> List[Hashable]:
+    """
+    Merge rankings with Reciprocal Rank Fusion: sum of 1 / (k + rank).
+
+    Args:
+        rankings: Ranked lists of ids (best first)
+        k: Damping constant; higher flattens the advantage of top ranks
+
+    Returns:
+        All ids, best fused score first
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def _pack(values: array) -> str:
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def _unpack(data: str) -> array:
+    values = array("I")
+    values.frombytes(base64.b64decode(data))
+    return values
+
+
+@dataclass
+class SparseHit:
+    """One BM25 result."""
+    document: Document
+    score: float
+    coverage: float  # Share of the query's IDF weight found in the document (0..1)
+
+
+class SparseIndex:
+    """
+    BM25 inverted index over chunk text, safe to share between threads.
+
+    add_documents()/remove_files() change the in-memory index; save() persists
+    it. A process that didn't write the file picks up newer saves on search.
+    Changes to a shared file go through update().
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            path: JSON file the index is loaded from and saved to (None = memory only)
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._loaded_mtime: Optional[float] = None
+        self._reset()
+        if self.path and self.path.exists():
+            self.load()
+
+    def _reset(self) -> None:
+        # Per slot; a removed chunk keeps its slot (key None) until compaction
+        self._keys: List[Optional[str]] = []
+        self._texts: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._lengths = array("I")
+        # term -> (slots, term frequencies), slots ascending
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._df: Dict[str, int] = {}
+        self._slots: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add_documents(self, documents: Iterable[Document]) -> int:
+        """Index chunks; a chunk with a known key replaces the old one. Returns count added."""
+        added = 0
+        with self._lock:
+            for doc in documents:
+                key = document_key(doc)
+                if key in self._slots:
+                    self._remove_slot(self._slots[key])
+
+                slot = len(self._keys)
+                terms = tokenize(doc.page_content)
+                frequencies: Dict[str, int] = {}
+                for term in terms:
+                    frequencies[term] = frequencies.get(term, 0) + 1
+                for term, tf in frequencies.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = (array("I"), array("I"))
+                    postings[0].append(slot)
+                    postings[1].append(tf)
+                    self._df[term] = self._df.get(term, 0) + 1
+
+                self._keys.append(key)
+                self._texts.append(doc.page_content)
+                self._metadata.append(dict(doc.metadata))
+                self._lengths.append(len(terms))
+                self._slots[key] = slot
+                self._total_length += len(terms)
+                added += 1
+            self._maybe_compact()
+        return added
+
+    def remove_files(self, file_ids: Iterable[int]) -> int:
+        """Drop every chunk of the given files. Returns count removed."""
+        wanted = {str(fid) for fid in file_ids}
+        with self._lock:
+            slots = [slot for key, slot in self._slots.items() if key.split(":", 1)[0] in wanted]
+            for slot in slots:
+                self._remove_slot(slot)
+            self._maybe_compact()
+        return len(slots)
+
+    def search(self, query: str, k: int) -> List[SparseHit]:
+        """Top-k chunks by BM25 score for a query."""
+        self._reload_if_changed()
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            count = len(self._slots)
+            if not terms or not count:
+                return []
+            avg_length = max(self._total_length / count, 1.0)
+
+            idf = {term: self._idf(self._df.get(term, 0), count) for term in terms}
+            # Unknown words are mostly phrasing ("what", "say"), but an unknown
+            # code means the asked-for item isn't indexed, so it lowers coverage
+            total_idf = sum(
+                weight for term, weight in idf.items()
+                if term in self._df or any(ch.isdigit() for ch in term)
+            )
+            scores: Dict[int, float] = {}
+            matched_idf: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                weight = idf[term]
+                for slot, tf in zip(*postings):
+                    if self._keys[slot] is None:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[slot] / avg_length)
+                    scores[slot] = scores.get(slot, 0.0) + weight * tf * (self.k1 + 1) / (tf + norm)
+                    matched_idf[slot] = matched_idf.get(slot, 0.0) + weight
+
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [
+                SparseHit(
+                    document=Document(page_content=self._texts[slot], metadata=dict(self._metadata[slot])),
+                    score=score,
+                    coverage=matched_idf[slot] / total_idf if total_idf else 0.0,
+                )
+                for slot, score in best
+            ]
+
+    @contextmanager
+    def update(self) -> Iterator["SparseIndex"]:
+        """
+        Change the index and save it, exclusively across processes on this host.
+        
+        Newer saves of other processes are loaded first, so changes apply to
+        the latest index; the index is saved when the block exits. Blocking:
+        call from a worker thread.
+        """
+        with self._file_lock(), self._lock:
+            self._reload_if_changed()
+            yield self
+            self.save()
+
+    def save(self) -> bool:
+        """
+        Compact and write the index to its file (atomic). Returns True if written.
+        
+        Overwrites the file as is; with other writers, use update().
+        """
+        if self.path is None:
+            return False
+        with self._lock:
+            self._compact()
+            payload = {
+                "version": SPARSE_INDEX_FORMAT_VERSION,
+                "docs": [
+                    {"key": key, "text": text, "metadata": metadata}
+                    for key, text, metadata in zip(self._keys, self._texts, self._metadata)
+                ],
+                "lengths": _pack(self._lengths),
+                "postings": {
+                    term: [_pack(slots), _pack(frequencies)]
+                    for term, (slots, frequencies) in self._postings.items()
+                },
+            }
+            try:
+                _atomic_write(self.path, json.dumps(payload, default=str).encode("utf-8"))
+                self._loaded_mtime = self.path.stat().st_mtime
+                return True
+            except Exception as e:
+                logger.error(f"Failed to save sparse index {self.path}: {e}")
+                return False
+
+    def load(self) -> bool:
+        """Replace the in-memory index with the saved one. Returns True if loaded."""
+        if self.path is None or not self.path.exists():
+            return False
+        with self._lock:
+            try:
+                mtime = self.path.stat().st_mtime
+                payload = json.loads(self.path.read_text(encoding="utf-8"))
+                if payload.get("version") != SPARSE_INDEX_FORMAT_VERSION:
+                    raise ValueError(f"unsupported format version {payload.get('version')}")
+
+                self._reset()
+                for slot, doc in enumerate(payload["docs"]):
+                    self._keys.append(doc["key"])
+                    self._texts.append(doc["text"])
+                    self._metadata.append(doc.get("metadata") or {})
+                    self._slots[doc["key"]] = slot
+                self._lengths = _unpack(payload["lengths"])
+                self._total_length = sum(self._lengths)
+                for term, (slots, frequencies) in payload["postings"].items():
+                    self._postings[term] = (_unpack(slots), _unpack(frequencies))
+                    self._df[term] = len(self._postings[term][0])
+                self._loaded_mtime = mtime
+                logger.info(f"Loaded sparse index: {len(self)} chunks, {len(self._postings)} terms")
+                return True
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable sparse index {self.path}: {e}")
+                self._reset()
+                return False
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if self.path is None or fcntl is None:
+            yield
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path.with_name(self.path.name + ".lock"), "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the file releases the lock
+            lock_file.close()
+
+    def _reload_if_changed(self) -> None:
+        if self.path is None:
+            return
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+        if self._loaded_mtime is None or mtime > self._loaded_mtime:
+            self.load()
+
+    def _idf(self, df: int, count: int) -> float:
+        return math.log(1.0 + (count - df + 0.5) / (df + 0.5))
+
+    def _remove_slot(self, slot: int) -> None:
+        key = self._keys[slot]
+        if key is None:
+            return
+        for term in set(tokenize(self._texts[slot])):
+            remaining = self._df.get(term, 0) - 1
+            if remaining > 0:
+                self._df[term] = remaining
+            else:
+                self._df.pop(term, None)
+        self._total_length -= self._lengths[slot]
+        self._keys[slot] = None
+        self._texts[slot] = ""
+        self._metadata[slot] = {}
+        del self._slots[key]
+
+    def _maybe_compact(self) -> None:
+        # Removed slots still cost a skip per posting; rebuild once they dominate
+        if len(self._keys) - len(self._slots) > max(len(self._slots), 1000):
+            self._compact()
+
+    def _compact(self) -> None:
+        if len(self._keys) == len(self._slots):
+            return
+        remap: Dict[int, int] = {}
+        keys: List[Optional[str]] = []
+        texts: List[str] = []
+        metadata: List[Dict[str, Any]] = []
+        lengths = array("I")
+        for slot, key in enumerate(self._keys):
+            if key is None:
+                continue
+            remap[slot] = len(keys)
+            keys.append(key)
+            texts.append(self._texts[slot])
+            metadata.append(self._metadata[slot])
+            lengths.append(self._lengths[slot])
+
+        postings: Dict[str, Tuple[array, array]] = {}
+        for term, (slots, frequencies) in self._postings.items():
+            new_slots, new_frequencies = array("I"), array("I")
+            for slot, tf in zip(slots, frequencies):
+                if slot in remap:
+                    new_slots.append(remap[slot])
+                    new_frequencies.append(tf)
+            if new_slots:
+                postings[term] = (new_slots, new_frequencies)
+
+        self._keys, self._texts, self._metadata, self._lengths = keys, texts, metadata, lengths
+        self._postings = postings
+        self._slots = {key: slot for slot, key in enumerate(keys)}
+
+
+# Singleton instance
+_sparse_index: Optional[SparseIndex] = None
+
+
+def local_hybrid_enabled() -> bool:
+    """Whether hybrid search runs on this in-process index (FAISS/Chroma)."""
+    return (
+        settings.ENABLE_HYBRID_SEARCH
+        and settings.VECTOR_DB_PROVIDER.lower() in LOCAL_HYBRID_PROVIDERS
+    )
+
+
+def get_sparse_index() -> SparseIndex:
+    """Get the shared sparse index, stored next to the local vector store."""
+    global _sparse_index
+    if _sparse_index is None:
+        path = os.path.join(
+            settings.VECTOR_STORE_PERSIST_DIRECTORY,
+            f"{settings.VECTOR_STORE_COLLECTION_NAME}.bm25.json",
+        )
+        _sparse_index = SparseIndex(path)
+    return _sparse_index
+
+
+async def remove_files_from_sparse_index(file_ids: Iterable[int]) -> int:
+    """
+    Drop the chunks of the given files from the shared sparse index and save it.
+    
+    No-op (returns 0) when hybrid search doesn't use the in-process index.
+    """
+    if not local_hybrid_enabled():
+        return 0
+    file_ids = list(file_ids)
+
+    def remove() -> int:
+        with get_sparse_index().update() as index:
+            return index.remove_files(file_ids)
+
+    return await asyncio.to_thread(remove)
@@ -1,11 +1,14 @@
 """
 Document Storage Service - Orchestrates load → chunk → store pipeline.
 Manages ingestion from FileUpload model through vector store.
-Supports hybrid search (dense + sparse vectors) for compatible providers.
+Supports hybrid search (dense + sparse vectors): natively for compatible
+providers, through the in-process BM25 index for FAISS/Chroma.
 """
 
-from typing import List, Dict, Any, Tuple
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timezone
+import asyncio
 
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
@@ -14,9 +17,13 @@ from sqlalchemy.future import select
 
 from app.services.vector_store.loader import DocumentLoader
 from app.services.vector_store.chunker import DocumentChunker
+from app.services.vector_store.artifacts import get_artifact_store
+from app.services.vector_store.sparse_index import LOCAL_HYBRID_PROVIDERS, get_sparse_index
 from app.core.vector_store_factory import get_vector_store
 from app.core.embedding_factory import get_embedding_provider
-from app.core.vector_store_factory import save_vector_store
+from app.core.vector_store_factory import get_vector_store_lock, save_vector_store, swap_vector_store
+from app.core.vector_snapshots import get_snapshot_store, snapshots_enabled
+from app.core.semantic_cache import invalidate_semantic_cache_for_files
 from app.models.file_upload import FileUpload, FileStatus
 from app.config.settings import settings
 from app.core import get_logger
@@ -33,10 +40,14 @@ class DocumentStorageService:
     Orchestrates load → chunk → store pipeline with optional hybrid search.
     
     Flow:
-    1. Load approved files from FileUpload model
+    1. Claim (APPROVED → PROCESSING) and load files from FileUpload model
     2. Chunk documents using DocumentChunker
     3. Store chunks in vector DB with batching (dense vectors only or hybrid if supported)
     4. Update file statuses (PROCESSED or FAILED)
+    5. Save chunks/vectors of newly parsed files for reuse by identical uploads
+    
+    With FAISS snapshots, step 3 adds to a writable copy of the latest snapshot
+    and publishes it as a new version; the served index is never modified.
     """
     
     def __init__(self, session: AsyncSession, embeddings: Embeddings = None):
@@ -51,44 +62,79 @@ class DocumentStorageService:
         self.embeddings = embeddings or get_embedding_provider()
         self.loader = DocumentLoader(session)
         self.chunker = DocumentChunker()
-        self.vector_store = get_vector_store(
+        self.artifact_store = get_artifact_store()
+        # Snapshot mode checks out a writable copy per run instead of the shared store
+        self.snapshots = get_snapshot_store() if snapshots_enabled() else None
+        self.vector_store = None if self.snapshots else get_vector_store(
             embeddings=self.embeddings,
             provider=settings.VECTOR_DB_PROVIDER,
         )
+        # Shared FAISS/Chroma store modified in place: searches wait for our writes
+        self.store_lock = get_vector_store_lock()
         
         # Check if hybrid search is enabled and provider supports it
-        # Note: Providers like Qdrant, Weaviate, and Milvus handle sparse vectors natively
+        # Note: Providers like Qdrant, Weaviate, and Milvus handle sparse vectors natively;
+        # FAISS and Chroma get a BM25 index built alongside the dense one
         self.hybrid_search_enabled = settings.ENABLE_HYBRID_SEARCH
         self.provider = settings.VECTOR_DB_PROVIDER.lower()
         self.supports_hybrid = self.provider in HYBRID_SEARCH_SUPPORTED_PROVIDERS
+        self.sparse_index = (
+            get_sparse_index()
+            if self.hybrid_search_enabled and self.provider in LOCAL_HYBRID_PROVIDERS
+            else None
+        )
         
         # Only log warning if there's a configuration mismatch
-        if self.hybrid_search_enabled and not self.supports_hybrid:
+        if self.hybrid_search_enabled and not self.supports_hybrid and self.sparse_index is None:
             logger.warning(
                 f"Hybrid search requested but {self.provider.upper()} doesn't support it. "
                 f"Only dense vector search will be used. "
-                f"Supported providers: {', '.join(sorted(HYBRID_SEARCH_SUPPORTED_PROVIDERS))}"
+                f"Supported providers: {', '.join(sorted(HYBRID_SEARCH_SUPPORTED_PROVIDERS | LOCAL_HYBRID_PROVIDERS))}"
             )
     
-    async def ingest_pending_files(self, batch_size: int = 1000, file_ids: List[int] = None) -> Dict[str, Any]:
+    async def ingest_pending_files(
+        self,
+        batch_size: int = 1000,
+        file_ids: List[int] = None,
+        max_files: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Load, chunk, and store pending approved files or specific files.
         
+        Files are claimed before loading, so concurrent runs on other nodes
+        never ingest the same file twice.
+        
         Args:
             batch_size: Chunks per batch to vector store (default: 100, overridable via settings.CHUNK_INGESTION_BATCH_SIZE)
             file_ids: Optional list of specific file IDs to ingest.
                      If provided, only those files are processed.
                      If None, all approved unprocessed files are ingested.
+            max_files: Maximum number of files to claim in this run (None = all)
         
         Returns:
-            Dict with counts: total_files, successfully_stored, chunks_generated, errors
+            Dict with counts: claimed_files, total_files, successfully_stored, chunks_generated, errors
         """
 
-        # Step 1: Load files from database
-        # Pass file_ids to loader - if provided, only those are loaded
-        files = await self.loader.load_pending_files(file_ids=file_ids)
+        # Step 1: Claim and load files from database
+        # Pass file_ids to loader - if provided, only those are claimed
+        claimed_ids = await self.loader.claim_pending_files(file_ids=file_ids, limit=max_files)
+        if not claimed_ids:
+            return {"claimed_files": 0, "total_files": 0, "successfully_stored": 0, "chunks_generated": 0, "errors": []}
+        
+        files = await self.loader.load_files(claimed_ids)
+        
+        # Claimed files that could not be read would otherwise stay in PROCESSING
+        loaded_ids = {f["file_id"] for f in files}
+        unloaded = [
+            {"file_id": fid, "file_name": f"file {fid}"}
+            for fid in claimed_ids if fid not in loaded_ids
+        ]
+        if unloaded:
+            await self._update_file_statuses(
+                unloaded, set(), {f["file_id"]: "Failed to load file content" for f in unloaded}, {}
+            )
         if not files:
-            return {"total_files": 0, "successfully_stored": 0, "chunks_generated": 0, "errors": []}
+            return {"claimed_files": len(claimed_ids), "total_files": 0, "successfully_stored": 0, "chunks_generated": 0, "errors": []}
         
         # Step 2: Chunk files
         chunks = self.chunker.chunk_loaded_files(files)
@@ -101,36 +147,113 @@ class DocumentStorageService:
             chunk_counts[fid] = chunk_counts.get(fid, 0) + 1
         if not chunks:
             logger.warning("No chunks generated from files")
-            return {"total_files": len(files), "successfully_stored": 0, "chunks_generated": 0, "errors": []}
+            await self._update_file_statuses(
+                files, set(), {f["file_id"]: "No chunks generated" for f in files}, {}
+            )
+            return {"claimed_files": len(claimed_ids), "total_files": len(files), "successfully_stored": 0, "chunks_generated": 0, "errors": []}
         
         logger.info(f"Generated {len(chunks)} chunks from {len(files)} files")
         
+        # Vectors of reused chunks, keyed by (file_id, chunk_index); the chunker keeps
+        # pre-chunked files in order, so chunk_index matches the artifact position
+        vectors: Dict[Tuple[int, int], List[float]] = {}
+        for file_data in files:
+            for i, vector in enumerate(file_data.get("embeddings") or []):
+                vectors[(file_data["file_id"], i)] = vector
+        
         # Step 3: Store chunks in vector DB
-        file_ids_result, errors = await self._store_and_track(chunks, batch_size)
+        if self.snapshots is not None:
+            file_ids_result, errors = await self._store_in_snapshot(chunks, batch_size, vectors)
+        else:
+            file_ids_result, errors = await self._store_and_track(chunks, batch_size, vectors)
+        for file_data in files:
+            if file_data["file_id"] not in chunk_counts:
+                errors[file_data["file_id"]] = "No chunks generated"
         
         # Step 4: Update file statuses
         await self._update_file_statuses(files, file_ids_result, errors, chunk_counts)
         
+        # Step 5: Drop cached answers built from earlier versions of these files
+        await invalidate_semantic_cache_for_files(file_ids_result)
+        
+        # Step 6: Keep parsed chunks (and vectors) for identical uploads
+        await self._save_artifacts(files, chunks, vectors, file_ids_result, errors)
+        
         successfully_stored = len([fid for fid in file_ids_result if fid not in errors])
         logger.info(f"Ingestion complete: {successfully_stored}/{len(files)} files processed")
         
         return {
+            "claimed_files": len(claimed_ids),
             "total_files": len(files),
             "successfully_stored": successfully_stored,
             "chunks_generated": len(chunks),
             "errors": errors,
         }
     
-    async def _store_and_track(self, chunks: List[Document], batch_size: int) -> Tuple[set, Dict]:
+    async def _store_in_snapshot(
+        self,
+        chunks: List[Document],
+        batch_size: int,
+        vectors: Dict[Tuple[int, int], List[float]]
+    ) -> Tuple[set, Dict]:
+        """
+        Store chunks in a writable copy of the latest FAISS snapshot and publish it.
+        
+        Runs checkout → store → publish under the snapshot writer lock, so
+        concurrent ingestion runs never publish over each other's chunks.
+        If publishing fails, every file of the run is reported as failed.
+        """
+        async with self.snapshots.writer():
+            self.vector_store, base_version = await asyncio.to_thread(self.snapshots.checkout, self.embeddings)
+            successful_file_ids, error_file_ids = await self._store_and_track(chunks, batch_size, vectors)
+            if not successful_file_ids:
+                return successful_file_ids, error_file_ids
+            
+            try:
+                version = await asyncio.to_thread(self.snapshots.publish, self.vector_store)
+            except Exception as e:
+                logger.error(f"✗ Failed publishing vector snapshot (base v{base_version}): {e}")
+                for file_id in successful_file_ids:
+                    error_file_ids[file_id] = f"Failed to publish vector index: {e}"
+                return set(), error_file_ids
+        
+        # Serve it right away if this process serves searches; others pick it up by polling
+        swap_vector_store(self.vector_store, version)
+        return successful_file_ids, error_file_ids
+    
+    async def _store_and_track(
+        self,
+        chunks: List[Document],
+        batch_size: int,
+        vectors: Optional[Dict[Tuple[int, int], List[float]]] = None
+    ) -> Tuple[set, Dict]:
         """
         Store chunks in vector DB with batching and track results.
-        Includes hybrid search support for compatible providers.        
+        Includes hybrid search support for compatible providers; for FAISS/Chroma
+        the BM25 index is updated after the last batch: chunks of earlier
+        versions of the files are replaced by the stored ones.
+        
+        When the vector store accepts precomputed vectors (add_embeddings, e.g.
+        FAISS), known vectors are reused and new ones are computed here and
+        added to `vectors` so they can be saved for identical files.
+        
+        Args:
+            chunks: Chunks to store
+            batch_size: Chunks per vector store call
+            vectors: Known vectors by (file_id, chunk_index); filled with new ones
         
         Returns:
             Tuple of (set of successful file_ids, dict of error file_ids)
         """
         successful_file_ids = set()
         error_file_ids = {}
+        if vectors is None:
+            vectors = {}
+        # Hybrid stores compute their own sparse vectors, so always hand them documents
+        accepts_vectors = (
+            hasattr(self.vector_store, "add_embeddings")
+            and not (self.hybrid_search_enabled and self.supports_hybrid)
+        )
         
         # Group chunks by file_id
         chunks_by_file: Dict[int, List[Document]] = {}
@@ -142,6 +265,7 @@ class DocumentStorageService:
         
         # Store in batches and track success/failure per file
         all_file_chunks = []
+        stored_chunks: List[Document] = []
         for file_id, file_chunks in chunks_by_file.items():
             all_file_chunks.extend(file_chunks)
         
@@ -150,10 +274,16 @@ class DocumentStorageService:
             batch_num = (i // batch_size) + 1
             
             try:
-                self.vector_store.add_documents(batch)
-                
-                # Persist to disk if using FAISS or other local providers                
-                save_vector_store(self.vector_store)
+                with self.store_lock or nullcontext():
+                    if accepts_vectors:
+                        reused = self._add_with_vectors(batch, vectors)
+                    else:
+                        reused = 0
+                        self.vector_store.add_documents(batch)
+                    
+                    # Persist to disk if using FAISS or other local providers
+                    save_vector_store(self.vector_store)
+                stored_chunks.extend(batch)
                 
                 # Mark files in this batch as successful
                 for chunk in batch:
@@ -161,8 +291,10 @@ class DocumentStorageService:
                     if file_id:
                         successful_file_ids.add(file_id)
                 
-                search_type = "(hybrid search)" if (self.hybrid_search_enabled and self.supports_hybrid) else ""
-                logger.info(f"✓ Stored batch {batch_num}: {len(batch)} chunks {search_type}")
+                hybrid = self.hybrid_search_enabled and (self.supports_hybrid or self.sparse_index is not None)
+                search_type = "(hybrid search)" if hybrid else ""
+                reuse_note = f", {reused} reused embeddings" if reused else ""
+                logger.info(f"✓ Stored batch {batch_num}: {len(batch)} chunks{reuse_note} {search_type}")
             except Exception as e:
                 logger.error(f"✗ Failed storing batch {batch_num}: {e}")
                 
@@ -172,8 +304,79 @@ class DocumentStorageService:
                     if file_id:
                         error_file_ids[file_id] = str(e)
         
+        if self.sparse_index is not None:
+            file_ids = [fid for fid in chunks_by_file if fid is not None]
+            await asyncio.to_thread(self._update_sparse_index, file_ids, stored_chunks)
+        
         return successful_file_ids, error_file_ids
     
+    def _update_sparse_index(self, file_ids: List[int], stored_chunks: List[Document]) -> None:
+        """Replace the BM25 chunks of re-ingested files (a new version may have fewer)."""
+        with self.sparse_index.update() as index:
+            index.remove_files(file_ids)
+            index.add_documents(stored_chunks)
+    
+    def _add_with_vectors(
+        self,
+        batch: List[Document],
+        vectors: Dict[Tuple[int, int], List[float]]
+    ) -> int:
+        """Add a batch with precomputed vectors, embedding only unknown chunks. Returns reused count."""
+        keys = [(c.metadata.get("file_id"), c.metadata.get("chunk_index")) for c in batch]
+        missing = [i for i, key in enumerate(keys) if key not in vectors]
+        
+        if missing:
+            embedded = self.embeddings.embed_documents([batch[i].page_content for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[keys[i]] = vector
+        
+        self.vector_store.add_embeddings(
+            text_embeddings=[(c.page_content, vectors[key]) for c, key in zip(batch, keys)],
+            metadatas=[c.metadata for c in batch],
+        )
+        return len(batch) - len(missing)
+    
+    async def _save_artifacts(
+        self,
+        files: List[Dict[str, Any]],
+        chunks: List[Document],
+        vectors: Dict[Tuple[int, int], List[float]],
+        successful_file_ids: set,
+        error_file_ids: Dict[int, str]
+    ) -> None:
+        """Save chunks (and vectors, if computed) of newly parsed, successfully stored files."""
+        if not settings.INGESTION_REUSE_ARTIFACTS:
+            return
+        
+        chunks_by_file: Dict[int, List[Document]] = {}
+        for chunk in chunks:
+            chunks_by_file.setdefault(chunk.metadata.get("file_id"), []).append(chunk)
+        
+        for file_data in files:
+            file_id = file_data["file_id"]
+            if (
+                file_data.get("reused")
+                or not file_data.get("file_hash")
+                or file_id not in successful_file_ids
+                or file_id in error_file_ids
+                or file_id not in chunks_by_file
+            ):
+                continue
+            
+            file_chunks = chunks_by_file[file_id]
+            file_vectors = [vectors.get((file_id, c.metadata.get("chunk_index"))) for c in file_chunks]
+            try:
+                await asyncio.to_thread(
+                    self.artifact_store.save,
+                    file_data["file_hash"],
+                    file_data["artifact_variant"],
+                    file_chunks,
+                    file_data.get("meta", {}).keys(),
+                    file_vectors if all(v is not None for v in file_vectors) else None,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to save ingestion artifact for {file_data.get('file_name')}: {e}")
+    
     async def _update_file_statuses(
         self,
         files: List[Dict[str, Any]],
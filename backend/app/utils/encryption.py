@@ -6,6 +6,7 @@ Architecture:
 - HKDF derives purpose-specific keys (settings, conversations, etc.)
 - Versioning built into derivation context (v1, v2, etc.)
 - Encrypted data prefixed with version (e.g., "v1:gAAAAAB...")
+- Binary form for byte stores: version byte + raw Fernet token (no base64)
 
 This allows:
 - One key to manage (operational simplicity)
@@ -17,7 +18,7 @@ Based on cryptographic best practices from Signal Protocol and TLS 1.3.
 """
 
 import base64
-from typing import Tuple
+from typing import Tuple, Union
 from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
@@ -80,7 +81,7 @@ def derive_key(purpose: str, version: int = 1) -> bytes:
     return base64.urlsafe_b64encode(derived)
 
 
-def encrypt(plaintext: str, purpose: str, version: int = 1) -> str:
+def encrypt(plaintext: Union[str, bytes], purpose: str, version: int = 1) -> str:
     """
     Encrypt plaintext using purpose-specific derived key.
     
@@ -88,7 +89,7 @@ def encrypt(plaintext: str, purpose: str, version: int = 1) -> str:
     This makes the data self-describing - we know which key to use.
     
     Args:
-        plaintext: Text to encrypt
+        plaintext: Text (or bytes) to encrypt
         purpose: Purpose context (e.g., "conversations", "settings")
         version: Key version to use (default: 1)
     
@@ -113,7 +114,7 @@ def encrypt(plaintext: str, purpose: str, version: int = 1) -> str:
         cipher = Fernet(key)
         
         # Encrypt (Fernet handles encoding internally)
-        ciphertext = cipher.encrypt(plaintext.encode())
+        ciphertext = cipher.encrypt(plaintext.encode() if isinstance(plaintext, str) else plaintext)
         
         # Return with version prefix
         versioned_ciphertext = f"v{version}:{ciphertext.decode()}"
@@ -128,7 +129,7 @@ def encrypt(plaintext: str, purpose: str, version: int = 1) -> str:
         raise EncryptionError(error_msg) from e
 
 
-def decrypt(versioned_ciphertext: str, purpose: str) -> str:
+def decrypt(versioned_ciphertext: str, purpose: str, as_bytes: bool = False) -> Union[str, bytes]:
     """
     Decrypt versioned ciphertext using appropriate derived key.
     
@@ -138,6 +139,7 @@ def decrypt(versioned_ciphertext: str, purpose: str) -> str:
     Args:
         versioned_ciphertext: Encrypted string with version prefix "v1:..."
         purpose: Purpose context (must match encryption purpose)
+        as_bytes: Return the plaintext as bytes (for binary plaintext)
     
     Returns:
         Decrypted plaintext
@@ -165,7 +167,7 @@ def decrypt(versioned_ciphertext: str, purpose: str) -> str:
         # Decrypt
         plaintext = cipher.decrypt(ciphertext.encode())
         
-        return plaintext.decode()
+        return plaintext if as_bytes else plaintext.decode()
         
     except InvalidToken as e:
         error_msg = f"Invalid token for purpose '{purpose}' (wrong key or corrupted data): {str(e)}"
@@ -184,6 +186,30 @@ def decrypt(versioned_ciphertext: str, purpose: str) -> str:
         raise DecryptionError(error_msg) from e
 
 
+def encrypt_binary(data: bytes, purpose: str, version: int = 1) -> bytes:
+    """
+    Encrypt bytes into a compact binary form for byte stores (e.g. the cache).
+    
+    Same cipher and keys as encrypt(), without the base64 text encoding:
+    one version byte followed by the raw Fernet token.
+    """
+    _, token = parse_versioned_data(encrypt(data, purpose, version))
+    return bytes([version]) + base64.urlsafe_b64decode(token)
+
+
+def decrypt_binary(blob: bytes, purpose: str) -> bytes:
+    """
+    Decrypt encrypt_binary() output.
+    
+    Raises:
+        DecryptionError: If decryption fails or the blob is malformed
+    """
+    if len(blob) < 2:
+        raise DecryptionError("Encrypted blob too short")
+    token = base64.urlsafe_b64encode(blob[1:]).decode()
+    return decrypt(f"v{blob[0]}:{token}", purpose, as_bytes=True)
+
+
 def parse_versioned_data(versioned_data: str) -> Tuple[int, str]:
     """
     Parse version prefix from encrypted data.
@@ -238,6 +264,16 @@ def decrypt_conversation_message(encrypted_message: str) -> str:
     return decrypt(encrypted_message, purpose="conversations")
 
 
+def encrypt_conversation_blob(data: bytes, version: int = 1) -> bytes:
+    """Encrypt conversation data in binary form (see encrypt_binary)."""
+    return encrypt_binary(data, purpose="conversations", version=version)
+
+
+def decrypt_conversation_blob(blob: bytes) -> bytes:
+    """Decrypt encrypt_conversation_blob() output."""
+    return decrypt_binary(blob, purpose="conversations")
+
+
 def encrypt_settings_value(value: str, version: int = 1) -> str:
     """Encrypt a settings value."""
     return encrypt(value, purpose="settings", version=version)
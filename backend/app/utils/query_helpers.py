@@ -158,3 +158,33 @@ def with_conversation_relations(query: Any) -> Any:
     return query.options(
         joinedload(Conversation.user).joinedload(User.profile)
     )
+
+
+# Dialects that support SELECT ... FOR UPDATE SKIP LOCKED
+SKIP_LOCKED_DIALECTS = {"postgresql", "mysql", "mariadb"}
+
+
+def with_skip_locked(query: Any, session: Any) -> Any:
+    """
+    Lock selected rows with FOR UPDATE SKIP LOCKED where supported.
+    
+    Lets several nodes pick work from the same table without blocking on
+    (or double-claiming) each other's candidate rows. On dialects without
+    row locking (SQLite) the query is returned unchanged and callers rely
+    on their compare-and-set UPDATE instead.
+    
+    Args:
+        query: SQLAlchemy select of claim candidates
+        session: Session the query will run on (used to detect the dialect)
+        
+    Returns:
+        Query with row locking applied when the dialect supports it
+        
+    Example:
+        query = select(Job.id).where(Job.status == JobStatus.PENDING).limit(10)
+        query = with_skip_locked(query, session)
+    """
+    
+    if session.get_bind().dialect.name in SKIP_LOCKED_DIALECTS:
+        return query.with_for_update(skip_locked=True)
+    return query
@@ -11,6 +11,7 @@ Cache is automatically synchronized with access token expiry.
 """
 
 from typing import Optional, Dict, Any, Tuple
+import json
 from datetime import timedelta
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -70,31 +71,16 @@ class UserClearanceCache:
             Dict with user_id, security_level (str), department_id, department_name
             None if user not found
         """
-        # Try cache first
-        cached = await self._get_from_cache(user_id)
-        if cached:
-            logger.debug(f"Cache hit for user_id={user_id}")
-            return cached
+        async def load() -> Optional[str]:
+            logger.info(f"Cache miss for user_id={user_id}, fetching from database")
+            clearance = await self._fetch_from_db(user_id)
+            # Same representation as set_clearance()
+            return json.dumps(clearance) if clearance else None
         
-        # Cache miss - fetch from DB
-        logger.info(f"Cache miss for user_id={user_id}, fetching from database")
-        clearance = await self._fetch_from_db(user_id)
-        
-        if clearance:
-            # Cache it
-            await self.set_clearance(
-                user_id=clearance["user_id"],
-                security_level=clearance["security_level"],
-                department_id=clearance["department_id"],
-                department_name=clearance["department_name"],
-                department_security_level=clearance.get("department_security_level"),
-                is_admin=clearance.get("is_admin", False),
-                is_department_manager=clearance.get("is_department_manager", False),
-                org_clearance_value=clearance.get("org_clearance_value", 1),
-                dept_clearance_value=clearance.get("dept_clearance_value")
-            )
-        
-        return clearance
+        # Single-flight with early refresh, so a hot user's entry expiring
+        # doesn't send every concurrent request to the database
+        cached = await self.cache.get_or_compute(self._get_cache_key(user_id), load, ttl=self.ttl)
+        return json.loads(cached) if cached else None
     
     async def set_clearance(
         self,
@@ -125,8 +111,6 @@ class UserClearanceCache:
             org_clearance_value: Numeric value of org clearance
             dept_clearance_value: Numeric value of dept clearance
         """
-        import json
-        
         cache_key = self._get_cache_key(user_id)
         data = {
             "user_id": user_id,
@@ -161,18 +145,6 @@ class UserClearanceCache:
         await self.cache.delete(cache_key)
         logger.info(f"Invalidated clearance cache for user_id={user_id}")
     
-    async def _get_from_cache(self, user_id: int) -> Optional[Dict[str, Any]]:
-        """Get clearance from cache."""
-        import json
-        
-        cache_key = self._get_cache_key(user_id)
-        cached_data = await self.cache.get(cache_key)
-        
-        if cached_data:
-            return json.loads(cached_data)
-        
-        return None
-    
     async def _fetch_from_db(self, user_id: int) -> Optional[Dict[str, Any]]:
         """
         Fetch user clearance from database.
@@ -0,0 +1,37 @@
+"""add_job_leasing_columns
+
+Revision ID: 022
+Revises: 021
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '022'
+down_revision: Union[str, None] = '021'
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Lease columns used by the standalone job worker
+    op.add_column('jobs', sa.Column('locked_by', sa.String(100), nullable=True))
+    op.add_column('jobs', sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    
+    # Speeds up claiming (pending jobs by age) and expired lease scans
+    op.create_index('ix_jobs_locked_until', 'jobs', ['locked_until'])
+    op.create_index('ix_jobs_status_created', 'jobs', ['status', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_status_created', table_name='jobs')
+    op.drop_index('ix_jobs_locked_until', table_name='jobs')
+    op.drop_column('jobs', 'heartbeat_at')
+    op.drop_column('jobs', 'locked_until')
+    op.drop_column('jobs', 'locked_by')
@@ -0,0 +1,34 @@
+"""add_job_leases_table
+
+Revision ID: 023
+Revises: 022
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '023'
+down_revision: Union[str, None] = '022'
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Named leases so only one API replica runs each recurring job
+    op.create_table(
+        'job_leases',
+        sa.Column('name', sa.String(100), primary_key=True),
+        sa.Column('holder', sa.String(100), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_leases')
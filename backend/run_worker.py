@@ -0,0 +1,64 @@
+"""Standalone background job worker.
+
+Claims persisted jobs from the database and runs them on a single long-lived
+event loop with a shared database connection pool. Set JOB_EXECUTION_MODE=worker
+on the API so it only queues jobs, then run one or more workers:
+
+Usage:
+    python run_worker.py                 # Run until SIGINT/SIGTERM
+    python run_worker.py --worker-id w1  # Use an explicit worker identifier
+"""
+
+import argparse
+import asyncio
+import signal
+import sys
+
+# Setup path for imports
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core import get_logger
+from app.core.startup import get_startup_controller
+from app.jobs.worker import JobWorker
+
+logger = get_logger(__name__)
+
+
+async def main(worker_id: str = None) -> int:
+    """Initialize worker dependencies and run until stopped."""
+    startup_controller = get_startup_controller()
+    await startup_controller.initialize_worker()
+
+    worker = JobWorker(
+        startup_controller.async_session_factory,
+        worker_id=worker_id,
+    )
+
+    # Graceful shutdown on SIGINT/SIGTERM (signal handlers are unavailable on Windows)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    try:
+        await worker.run()
+        return 0
+    except Exception as e:
+        logger.error(f"Job worker crashed: {e}", exc_info=True)
+        return 1
+    finally:
+        await startup_controller.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the background job worker")
+    parser.add_argument("--worker-id", default=None, help="Unique worker identifier (default: hostname:pid)")
+    args = parser.parse_args()
+
+    try:
+        sys.exit(asyncio.run(main(worker_id=args.worker_id)))
+    except KeyboardInterrupt:
+        sys.exit(0)
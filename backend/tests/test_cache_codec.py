@@ -0,0 +1,58 @@
+"""
+Tests for the cache payload codec and the encrypted binary history format.
+"""
+
+import json
+
+import pytest
+
+from app.core.cache import Cache, MemoryBackend
+from app.core.cache_codec import TEXT_PREFIX, CacheCodec
+
+
+@pytest.fixture
+def codec():
+    return CacheCodec(serializer="orjson", compression="zstd", min_compress_bytes=64)
+
+
+class TestCacheCodec:
+    """Round trips, compression threshold and legacy JSON."""
+
+    def test_round_trip_values(self, codec):
+        for value in ({"a": [1, 2.5, None, True]}, "text", 3, [], b"\x00raw"):
+            assert codec.decode(codec.encode(value)) == value
+
+    def test_large_payloads_are_compressed(self, codec):
+        history = [{"role": "user", "content": "How do I reset my password? " * 20}] * 6
+
+        data = codec.encode(history)
+
+        assert len(data) < len(json.dumps(history)) / 4
+        assert codec.decode(data) == history
+
+    def test_reads_legacy_json_and_other_codecs(self, codec):
+        assert codec.decode('{"count": 3}') == {"count": 3}
+
+        # Written with another configuration: the header says how to decode
+        other = CacheCodec(serializer="json", compression="zlib", min_compress_bytes=1)
+        assert codec.decode(other.encode({"x": "y" * 100})) == {"x": "y" * 100}
+
+    def test_text_form(self, codec):
+        small, large = {"k": 1}, {"text": "chunk " * 200}
+
+        assert json.loads(codec.encode_text(small)) == small
+        assert codec.encode_text(large).startswith(TEXT_PREFIX)
+        assert codec.decode_text(codec.encode_text(large)) == large
+        assert codec.decode_text('{"legacy": true}') == {"legacy": True}
+
+    @pytest.mark.asyncio
+    async def test_cache_stores_binary_and_reads_legacy(self, codec):
+        backend = MemoryBackend()
+        cache = Cache(backend, codec=codec)
+
+        await cache.set("k", {"a": 1})
+        assert isinstance(await backend.get("k"), bytes)
+        assert await cache.get("k") == {"a": 1}
+
+        await backend.set("old", '["json", "text"]')
+        assert await cache.get("old") == ["json", "text"]
@@ -0,0 +1,102 @@
+"""
+Tests for Cache.get_or_compute: single-flight, stale-while-revalidate and
+early refresh (memory backend).
+"""
+
+import asyncio
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import Cache, MemoryBackend
+
+
+class Loader:
+    """Counting async loader with an optional delay and failure."""
+
+    def __init__(self, value="v", delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("db down")
+        return self.value
+
+
+class FakeTime:
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        monkeypatch.setattr(cache_module.time, "time", lambda: self.now)
+
+
+class TestGetOrCompute:
+    """Stampede protection of computed entries."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self):
+        cache = Cache(MemoryBackend())
+        loader = Loader(delay=0.05)
+
+        results = await asyncio.gather(*(cache.get_or_compute("k", loader, ttl=60) for _ in range(10)))
+
+        assert results == ["v"] * 10
+        assert loader.calls == 1
+        assert await cache.get("k") == "v"
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_when_refresh_fails(self, monkeypatch):
+        clock = FakeTime(monkeypatch)
+        cache = Cache(MemoryBackend(), stale_ttl=30, early_refresh_beta=0)
+        loader = Loader("old")
+        await cache.get_or_compute("k", loader, ttl=10)
+
+        clock.now += 15  # Past expiry, within the stale window
+        loader.fail = True
+        assert await cache.get_or_compute("k", loader, ttl=10) == "old"
+        assert await cache.get("k") is None  # Plain reads don't see stale values
+
+        loader.fail = False
+        loader.value = "new"
+        assert await cache.get_or_compute("k", loader, ttl=10) == "new"
+
+    @pytest.mark.asyncio
+    async def test_early_refresh_near_expiry(self, monkeypatch):
+        clock = FakeTime(monkeypatch)
+        monkeypatch.setattr(cache_module.random, "random", lambda: 0.5)
+        cache = Cache(MemoryBackend(), early_refresh_beta=1.0)
+        loader = Loader(delay=0.01)
+        await cache.get_or_compute("k", loader, ttl=60)
+
+        assert await cache.get_or_compute("k", loader, ttl=60) == "v"
+        assert loader.calls == 1
+
+        clock.now += 59.9999  # Far closer to expiry than the loader's duration
+        await cache.get_or_compute("k", loader, ttl=60)
+        assert loader.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_none_is_not_cached(self):
+        cache = Cache(MemoryBackend())
+        loader = Loader(value=None)
+
+        assert await cache.get_or_compute("k", loader, ttl=60) is None
+        assert await cache.get_or_compute("k", loader, ttl=60) is None
+        assert loader.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_bytes_value_stored_without_envelope(self):
+        backend = MemoryBackend()
+        cache = Cache(backend)
+        payload = bytes(range(122))
+
+        assert await cache.get_or_compute("k", Loader(payload), ttl=60) == payload
+        assert await cache.get("k") == payload
+        assert await cache.get_or_compute("k", Loader(b"other"), ttl=60) == payload
+
+        stored = await backend.get("k")
+        assert len(stored) < len(payload) + 32  # codec and entry headers only, no base64
@@ -4,18 +4,26 @@ Tests for conversation history caching with optional encryption.
 Tests two caching strategies:
 1. Plaintext cache with configurable TTL (fast, brief exposure)
 2. Encrypted cache with configurable TTL (slow, secure at rest)
+
+The cache encodes plaintext history itself; encrypted history is the codec
+payload encrypted into binary form.
 """
 
 import pytest
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.utils.encryption import encrypt_conversation_message, decrypt_conversation_message
+from app.core.cache_codec import get_cache_codec
+from app.utils.encryption import (
+    decrypt_conversation_blob,
+    decrypt_conversation_message,
+    encrypt_conversation_message,
+)
 
 
 @pytest.mark.asyncio
 async def test_cache_history_plaintext_mode():
-    """When encryption disabled, history should be cached as plaintext JSON."""
+    """When encryption disabled, history should be cached as the plain list."""
     from app.services.conversation.service import ConversationService
     
     mock_session = AsyncMock()
@@ -47,9 +55,8 @@ async def test_cache_history_plaintext_mode():
             # Extract the cached data
             cached_data = call_args[0][1]
             
-            # Should be plaintext JSON
-            cached_dict = json.loads(cached_data)
-            assert cached_dict == history
+            # Should be the plaintext history
+            assert cached_data == history
             
             # Verify TTL was passed
             assert call_args[1]['ttl'] == 3600
@@ -89,12 +96,12 @@ async def test_cache_history_encrypted_mode():
             # Extract the cached data
             cached_data = call_args[0][1]
             
-            # Should be encrypted (starts with v1:)
-            assert cached_data.startswith("v1:")
+            # Should be an encrypted binary blob
+            assert isinstance(cached_data, bytes)
+            assert b"Hello" not in cached_data
             
             # Decrypt and verify
-            decrypted_json = decrypt_conversation_message(cached_data)
-            cached_dict = json.loads(decrypted_json)
+            cached_dict = get_cache_codec().decode(decrypt_conversation_blob(cached_data))
             assert cached_dict == history
             
             # Verify TTL was passed
@@ -168,11 +175,10 @@ async def test_cache_exchange_with_encryption():
             cached_data = call_args[0][1]
             
             # Should be encrypted
-            assert cached_data.startswith("v1:")
+            assert isinstance(cached_data, bytes)
             
             # Decrypt and verify
-            decrypted_json = decrypt_conversation_message(cached_data)
-            cached_dict = json.loads(decrypted_json)
+            cached_dict = get_cache_codec().decode(decrypt_conversation_blob(cached_data))
             assert len(cached_dict) == 2
             assert cached_dict[0]["content"] == user_msg
             assert cached_dict[1]["content"] == assistant_msg
@@ -199,3 +205,14 @@ def test_encryption_decryption_roundtrip():
     
     # Verify roundtrip
     assert decrypted_history == history
+
+
+def test_legacy_encrypted_history_is_still_read():
+    """Entries cached as encrypted JSON strings before the codec still decrypt."""
+    from app.services.conversation.service import ConversationService
+    
+    history = [{"role": "user", "content": "Hello"}]
+    legacy = encrypt_conversation_message(json.dumps(history))
+    
+    service = ConversationService.__new__(ConversationService)
+    assert service._decrypt_cached_history(legacy) == history
@@ -0,0 +1,61 @@
+"""
+Tests for tag-based invalidation and batched operations of the cache
+(memory backend, with an L1 in front).
+"""
+
+import pytest
+
+from app.core.cache import Cache, L1Cache, MemoryBackend
+
+
+@pytest.fixture
+def cache():
+    return Cache(MemoryBackend(), l1=L1Cache(channel="test:invalidate"))
+
+
+class TestCacheTags:
+    """Tags, get_many/set_many/delete_many."""
+
+    @pytest.mark.asyncio
+    async def test_invalidate_tags_deletes_only_tagged_keys(self, cache):
+        await cache.set("stats:files:1", {"total": 1}, ttl=60, tags=["stats:files", "stats:user:1"])
+        await cache.set("stats:files:2", {"total": 2}, ttl=60, tags=["stats:files", "stats:user:2"])
+        await cache.set("stats:jobs", {"total": 3}, ttl=60)
+
+        assert await cache.invalidate_tags(["stats:user:1"]) == 1
+        assert await cache.get("stats:files:1") is None
+        assert await cache.get("stats:files:2") == {"total": 2}
+
+        await cache.invalidate_tags(["stats:files"])
+        assert await cache.get("stats:files:2") is None
+        assert await cache.get("stats:jobs") == {"total": 3}
+
+    @pytest.mark.asyncio
+    async def test_batched_operations(self, cache):
+        await cache.set_many({"a": 1, "b": [2]}, ttl=60)
+
+        assert await cache.get_many(["a", "b", "missing"]) == {"a": 1, "b": [2]}
+        assert await cache.delete_many(["a", "missing"]) == 1
+        assert await cache.get_many(["a", "b"]) == {"b": [2]}
+
+    @pytest.mark.asyncio
+    async def test_invalidation_drops_l1_copies(self, cache):
+        await cache.set("k", "v", tags=["t"])
+        assert cache.codec.decode(cache.l1.get("k")) == "v"
+
+        await cache.invalidate_tags(["t"])
+        assert cache.l1.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_tag_sets_shrink_as_keys_go(self):
+        backend = MemoryBackend(max_entries=2)
+        cache = Cache(backend)
+
+        for i in range(10):
+            await cache.set(f"stats:user:{i}", i, tags=["stats", f"stats:user:{i}"])
+        await cache.delete("stats:user:9")
+        await cache.set("stats:user:8", "updated")  # Overwriting keeps its tags
+
+        assert backend._tags == {"stats": {"stats:user:8"}, "stats:user:8": {"stats:user:8"}}
+        assert await cache.invalidate_tags(["stats:user:8"]) == 1
+        assert backend._tags == {} and backend._key_tags == {}
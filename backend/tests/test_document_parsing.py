@@ -0,0 +1,233 @@
+"""
+Tests for the document parsing process pool and DocumentLoader.load_files.
+
+Parsing runs in real spawned worker processes; the database is a temporary
+SQLite file with only the tables the loader touches.
+"""
+
+import asyncio
+import time
+from pathlib import Path
+
+import openpyxl
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from langchain_core.documents import Document
+
+from app.models import Base, Department, FileUpload, FileStatus
+from app.services.vector_store.artifacts import IngestionArtifactStore, artifact_variant
+from app.services.vector_store.chunker import DocumentChunker
+from app.services.vector_store.loader import DocumentLoader
+from app.services.vector_store.parsers import ParsingPool
+
+
+def slow_parse(file_path: Path, seconds: float) -> str:
+    """Parse function that takes a while (module-level so workers can unpickle it)."""
+    time.sleep(seconds)
+    return file_path.name
+
+
+@pytest.fixture(scope="module")
+def parsing_pool():
+    """Small parsing pool shared by the tests in this module."""
+    pool = ParsingPool(max_workers=2, timeout_seconds=60, max_memory_mb=0)
+    yield pool
+    pool.shutdown()
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """Temporary SQLite database with departments and file uploads."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'files.db'}", poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all, tables=[Department.__table__, FileUpload.__table__]
+        )
+
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    await engine.dispose()
+
+
+class TestParsingPool:
+    """Parsing in worker processes."""
+
+    @pytest.mark.asyncio
+    async def test_parses_text_and_csv(self, parsing_pool, tmp_path):
+        """Content comes back from the worker process intact."""
+        text_file = tmp_path / "notes.txt"
+        text_file.write_text("hello world", encoding="utf-8")
+        csv_file = tmp_path / "rows.csv"
+        csv_file.write_text("name,age\nada,36\n", encoding="utf-8")
+
+        assert await parsing_pool.parse(text_file, "txt") == "hello world"
+        assert await parsing_pool.parse(csv_file, "csv") == [{"name": "ada", "age": "36"}]
+
+    @pytest.mark.asyncio
+    async def test_parser_errors_propagate(self, parsing_pool, tmp_path):
+        """Exceptions raised in the worker surface to the caller."""
+        with pytest.raises(FileNotFoundError):
+            await parsing_pool.parse(tmp_path / "missing.txt", "txt")
+
+    @pytest.mark.asyncio
+    async def test_timeout_only_affects_the_hung_file(self, tmp_path):
+        """Queued files don't use up their timeout waiting; a hung file doesn't break others."""
+        pool = ParsingPool(max_workers=1, timeout_seconds=3, max_memory_mb=0)
+        try:
+            # Workers start on first use; keep spawn time out of the timed parses
+            await pool._run(slow_parse, tmp_path / "warmup", 0)
+
+            results = await asyncio.gather(
+                pool._run(slow_parse, tmp_path / "hung", 30),
+                pool._run(slow_parse, tmp_path / "queued", 0.1),
+                return_exceptions=True,
+            )
+
+            assert isinstance(results[0], TimeoutError)
+            assert results[1] == "queued"  # waited ~3s for the worker, still parsed
+        finally:
+            pool.shutdown()
+
+
+class TestStreamingChunking:
+    """Page and row streaming into the chunker."""
+
+    def test_pdf_pages_keep_page_numbers_and_sections(self):
+        """Chunks carry their page; a section heading carries across pages."""
+        chunker = DocumentChunker(chunk_size=200, chunk_overlap=20)
+        pages = iter([
+            (1, "INTRODUCTION\nThis manual covers the pump."),
+            (2, "More detail about the pump."),
+        ])
+
+        chunks = chunker.chunk_pdf_pages(pages)
+
+        assert [c.metadata["page"] for c in chunks] == [1, 2]
+        assert all(c.metadata["section"] == "INTRODUCTION" for c in chunks)
+        assert chunks[0].page_content.startswith("INTRODUCTION")
+
+    def test_sheet_rows_pack_per_sheet(self):
+        """Rows are packed up to chunk_size and never mix sheets."""
+        chunker = DocumentChunker(chunk_size=20, chunk_overlap=5)
+        rows = [("Q1", "a\t1"), ("Q1", "b\t2"), ("Q1", "c\t3"), ("Q2", "d\t4"), ("Q2", "x" * 30)]
+
+        chunks = chunker.chunk_sheet_rows(iter(rows))
+
+        assert chunks[0].page_content == "Sheet: Q1\na\t1\n\nb\t2\n\nc\t3"
+        assert chunks[1].page_content == "Sheet: Q2\nd\t4"
+        assert [c.metadata["sheet"] for c in chunks] == ["Q1", "Q2", "Q2", "Q2"]  # long row split in two
+
+    @pytest.mark.asyncio
+    async def test_excel_is_chunked_in_worker(self, parsing_pool, tmp_path):
+        """Spreadsheets come back from the pool as sheet-tagged chunks."""
+        path = tmp_path / "report.xlsx"
+        wb = openpyxl.Workbook()
+        wb.active.title = "Revenue"
+        wb.active.append(["region", "total"])
+        wb.active.append(["emea", 42])
+        wb.create_sheet("Costs").append(["rent", 7])
+        wb.save(path)
+
+        chunks = await parsing_pool.parse_chunks(path, "xlsx")
+
+        assert [c.metadata["sheet"] for c in chunks] == ["Revenue"]
+        assert chunks[0].page_content == "Sheet: Revenue\nregion: emea\ntotal: 42"
+
+    def test_records_are_packed_not_split(self):
+        """Small records share a chunk; only oversized records are split."""
+        chunker = DocumentChunker(chunk_size=40, chunk_overlap=5)
+        records = ["id: 1\nname: a", "id: 2\nname: b", "id: 3\nname: c", "notes: " + "y" * 60]
+
+        chunks = chunker.chunk_records(iter(records))
+
+        assert chunks[0].page_content == "id: 1\nname: a\n\nid: 2\nname: b"
+        assert chunks[1].page_content == "id: 3\nname: c"
+        assert len(chunks) > 3
+
+    @pytest.mark.asyncio
+    async def test_csv_projects_selected_columns(self, parsing_pool, tmp_path):
+        """field_selection keeps only the requested columns, in order."""
+        path = tmp_path / "people.csv"
+        path.write_text("name,age,email\nada,36,a@x.io\nalan,41,\n", encoding="utf-8")
+
+        chunks = await parsing_pool.parse_chunks(path, "csv", ["email", "name"])
+
+        assert len(chunks) == 1
+        assert chunks[0].page_content == "email: a@x.io\nname: ada\n\nname: alan"
+
+
+class TestLoadFiles:
+    """Loader fan-out and department prefetch."""
+
+    @pytest.mark.asyncio
+    async def test_load_files_enriches_and_skips_failures(self, parsing_pool, session_factory, tmp_path):
+        """Parsed files get department names; unreadable files are omitted."""
+        (tmp_path / "a.txt").write_text("alpha", encoding="utf-8")
+
+        async with session_factory() as session:
+            dept = Department(name="Finance", code="FIN")
+            session.add(dept)
+            await session.flush()
+            files = [
+                FileUpload(
+                    upload_token=f"token-{name}",
+                    file_name=name,
+                    file_type="txt",
+                    file_size=5,
+                    file_path=str(tmp_path / name),
+                    file_hash=f"hash-{name}",
+                    department_id=dept.id,
+                    status=FileStatus.PROCESSING,
+                )
+                for name in ("a.txt", "missing.txt")
+            ]
+            session.add_all(files)
+            await session.commit()
+
+            documents = await DocumentLoader(
+                session,
+                parsing_pool=parsing_pool,
+                artifact_store=IngestionArtifactStore(str(tmp_path)),
+            ).load_files([f.id for f in files])
+
+        assert len(documents) == 1
+        assert documents[0]["content"] == "alpha"
+        assert documents[0]["meta"]["department"] == "Finance"
+
+    @pytest.mark.asyncio
+    async def test_identical_file_reuses_artifact(self, parsing_pool, session_factory, tmp_path):
+        """A file whose bytes were ingested before gets stored chunks and vectors, not a re-parse."""
+        store = IngestionArtifactStore(str(tmp_path))
+        store.save(
+            "abc123",
+            artifact_variant("txt", None),
+            [Document(page_content="cached text", metadata={"file_id": 1, "department": "HR", "chunk_index": 0})],
+            file_meta_keys={"file_id", "department"},
+            vectors=[[0.25, 0.5]],
+        )
+
+        async with session_factory() as session:
+            upload = FileUpload(
+                upload_token="token-copy",
+                file_name="copy.txt",
+                file_type="txt",
+                file_size=5,
+                file_path=str(tmp_path / "not-on-disk.txt"),
+                file_hash="abc123",
+                status=FileStatus.PROCESSING,
+            )
+            session.add(upload)
+            await session.commit()
+
+            documents = await DocumentLoader(
+                session, parsing_pool=parsing_pool, artifact_store=store
+            ).load_files([upload.id])
+
+        assert len(documents) == 1
+        assert documents[0]["reused"] is True
+        assert documents[0]["embeddings"] == [[0.25, 0.5]]
+        assert [c.page_content for c in documents[0]["chunks"]] == ["cached text"]
+        assert documents[0]["chunks"][0].metadata == {}
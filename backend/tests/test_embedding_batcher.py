@@ -0,0 +1,96 @@
+"""
+Tests for the query embedding batcher: concurrent queries share one batched
+embedding call and every caller gets its own vector back.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+from app.core.embedding_batcher import EmbeddingBatcher
+from app.services.vector_store.retriever import RetrieverService, SearchSpec
+
+
+class RecordingEmbedder:
+    """Embeds a text as [length, index]; records every batched call."""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("provider down")
+        return [[float(len(text)), float(i)] for i, text in enumerate(texts)]
+
+
+class TestEmbeddingBatcher:
+    """Batching, deduplication and error fan-out."""
+
+    async def test_concurrent_queries_share_one_call(self):
+        embedder = RecordingEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_batch_size=64, max_wait_ms=20)
+
+        texts = [f"query {i:02d}" for i in range(40)] + ["query 00"]
+        vectors = await asyncio.gather(*(batcher.embed(text) for text in texts))
+
+        assert len(embedder.calls) == 1
+        assert len(embedder.calls[0]) == 40  # duplicate text embedded once
+        assert vectors[0] == vectors[-1]
+        assert [v[1] for v in vectors[:40]] == [float(embedder.calls[0].index(t)) for t in texts[:40]]
+
+        # Recently embedded queries are answered without a new call
+        assert await batcher.embed("query 07") == vectors[7]
+        assert len(embedder.calls) == 1
+
+    async def test_full_batch_is_sent_without_waiting(self):
+        embedder = RecordingEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_batch_size=4, max_wait_ms=10_000, cache_size=0)
+
+        await asyncio.wait_for(asyncio.gather(*(batcher.embed(f"q{i}") for i in range(8))), timeout=2)
+
+        assert [len(call) for call in embedder.calls] == [4, 4]
+
+    async def test_failure_reaches_every_caller(self):
+        batcher = EmbeddingBatcher(RecordingEmbedder(fail=True), max_wait_ms=1)
+
+        results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+class VectorStore:
+    """FAISS-like store searching by vector."""
+
+    def __init__(self):
+        self.vectors = []
+
+    def similarity_search_with_score(self, query, k, **kwargs):
+        raise AssertionError("text search should not be used")
+
+    def similarity_search_with_score_by_vector(self, embedding, k, **kwargs):
+        self.vectors.append(embedding)
+        return [(Document(page_content="doc", metadata={}), 0.9)]
+
+
+@pytest.mark.asyncio
+async def test_retriever_searches_by_batched_vector():
+    embedder = RecordingEmbedder()
+    store = VectorStore()
+    service = RetrieverService.__new__(RetrieverService)
+    service.embedding_batcher = EmbeddingBatcher(embedder, max_wait_ms=20)
+    service.search_lock = None
+    spec = SearchSpec(k=1, fetch_k=1, score_threshold=0.5)
+
+    results = await asyncio.gather(
+        *(service._search_with_scores(store, f"question {i}", spec) for i in range(10))
+    )
+
+    assert len(embedder.calls) == 1
+    assert len(store.vectors) == 10
+    assert all(r[0][0].page_content == "doc" for r in results)
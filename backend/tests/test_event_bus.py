@@ -0,0 +1,133 @@
+"""
+Tests for the bounded, batching EventBus.
+
+Each test uses a fresh bus (the singleton is reset) with small queues so
+backpressure and spilling can be exercised without real handlers.
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from app.config.settings import settings
+from app.core.events import EventBus, EventSpillFile
+from app.events.base import BaseEventHandler
+
+
+@pytest_asyncio.fixture
+async def bus(tmp_path, monkeypatch):
+    """Fresh EventBus with a temporary spill file and fast batching."""
+    monkeypatch.setattr(settings, "EVENT_SPILL_PATH", str(tmp_path / "spill.jsonl"))
+    monkeypatch.setattr(settings, "EVENT_BATCH_FLUSH_INTERVAL", 0.01)
+    monkeypatch.setattr(settings, "EVENT_BACKPRESSURE_TIMEOUT", 0.01)
+    monkeypatch.setattr(settings, "EVENT_SPILL_REPLAY_INTERVAL", 3600)
+    monkeypatch.setattr(EventBus, "_instance", None)
+
+    event_bus = EventBus()
+    yield event_bus
+
+    await event_bus.wait_for_pending_tasks(timeout=1.0)
+
+
+class RecordingHandler(BaseEventHandler):
+    """Records handled events and batch sizes."""
+
+    def __init__(self, batch_size=1, max_concurrency=None, durable=False, delay=0.0):
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.durable = durable
+        self.delay = delay
+        self.handled = []
+        self.batches = []
+        self.running = 0
+        self.peak = 0
+
+    @property
+    def event_type(self) -> str:
+        return "test_event"
+
+    async def handle(self, event_data):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delay)
+        self.handled.append(event_data["n"])
+        self.running -= 1
+
+    async def handle_batch(self, events):
+        self.batches.append(len(events))
+        await super().handle_batch(events)
+
+
+class TestEventBus:
+    """Worker pools, batching and spill behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, bus):
+        """No more handler calls run at once than the handler allows."""
+        handler = RecordingHandler(max_concurrency=2, delay=0.01)
+        bus.subscribe("test_event", handler)
+
+        for n in range(10):
+            await bus.emit("test_event", {"n": n})
+        await bus.wait_for_pending_tasks(timeout=2.0)
+
+        assert sorted(handler.handled) == list(range(10))
+        assert handler.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_events_are_batched_in_order(self, bus):
+        """Batching handlers receive several events per call, in emission order."""
+        handler = RecordingHandler(batch_size=50, max_concurrency=1)
+        bus.subscribe("test_event", handler)
+
+        for n in range(20):
+            await bus.emit("test_event", {"n": n})
+        await bus.wait_for_pending_tasks(timeout=2.0)
+
+        assert handler.handled == list(range(20))
+        assert len(handler.batches) < 20
+
+    @pytest.mark.asyncio
+    async def test_full_queue_spills_durable_events(self, bus, monkeypatch):
+        """Durable events that don't fit are written to disk and replayed later."""
+        monkeypatch.setattr(settings, "EVENT_QUEUE_MAX_SIZE", 1)
+        gate = asyncio.Event()
+        handler = RecordingHandler(max_concurrency=1, durable=True)
+
+        async def blocked_handle(event_data):
+            await gate.wait()
+            handler.handled.append(event_data["n"])
+
+        handler.handle = blocked_handle
+        bus.subscribe("test_event", handler)
+
+        for n in range(4):
+            await bus.emit("test_event", {"n": n})
+        await asyncio.sleep(0)
+
+        assert bus._spill.has_pending()
+
+        gate.set()
+        await bus.wait_for_pending_tasks(timeout=2.0)
+        assert await bus.replay_spilled() > 0
+        await bus.wait_for_pending_tasks(timeout=2.0)
+
+        assert sorted(handler.handled) == [0, 1, 2, 3]
+        assert not bus._spill.has_pending()
+
+
+def test_spill_file_is_replayed_by_one_process(tmp_path):
+    """Workers sharing the spill file never replay (or delete) each other's events."""
+    path = str(tmp_path / "spill.jsonl")
+    first, second = EventSpillFile(path), EventSpillFile(path)  # Two workers
+    first.append("test_event", "h", {"n": 1})
+
+    assert [e["data"] for e in first.take()] == [{"n": 1}]
+    assert second.take() == []  # First is replaying
+    second.append("test_event", "h", {"n": 2})
+    first.commit()
+
+    assert [e["data"] for e in second.take()] == [{"n": 2}]
+    second.commit()
+    assert not first.has_pending()
@@ -0,0 +1,111 @@
+"""
+Tests for streamed file viewing/downloading (Range requests and ETags).
+
+The files router runs in a bare FastAPI app with the auth and session
+dependencies overridden; the database is a temporary SQLite file.
+"""
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.database import get_session
+from app.core.security import get_current_user
+from app.models import Base, FileUpload, FileStatus
+from app.routes.file_upload import router
+
+
+class FakeUser:
+    def __init__(self, user_id: int, admin: bool = False):
+        self.id = user_id
+        self.admin = admin
+
+    def has_role(self, role: str) -> bool:
+        return self.admin and role == "admin"
+
+
+@pytest_asyncio.fixture
+async def client(tmp_path, monkeypatch):
+    """Client for the files router with one stored PDF owned by user 1."""
+    monkeypatch.setenv("FILES_DIR", str(tmp_path))
+    (tmp_path / "blobs").mkdir()
+    (tmp_path / "blobs" / "report.pdf").write_bytes(b"0123456789" * 100)
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'files.db'}", poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[FileUpload.__table__])
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with factory() as session:
+        session.add(FileUpload(
+            upload_token="token",
+            file_name="Q3 report.pdf",
+            file_type="pdf",
+            file_size=1000,
+            file_path="blobs/report.pdf",
+            file_hash="feedface",
+            uploaded_by_id=1,
+            status=FileStatus.PENDING,
+        ))
+        await session.commit()
+
+    async def session_override():
+        async with factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_session] = session_override
+    current_user = {"user": FakeUser(1)}
+    app.dependency_overrides[get_current_user] = lambda: current_user["user"]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        http.current_user = current_user
+        yield http
+
+    await engine.dispose()
+
+
+class TestFileDownload:
+    """/files/{id}/content and /files/{id}/download."""
+
+    @pytest.mark.asyncio
+    async def test_full_content_with_etag(self, client):
+        """The whole file is served inline with the content hash as ETag."""
+        response = await client.get("/api/v1/files/1/content")
+
+        assert response.status_code == 200
+        assert response.content == b"0123456789" * 100
+        assert response.headers["etag"] == '"feedface"'
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-disposition"].startswith("inline;")
+
+    @pytest.mark.asyncio
+    async def test_range_request(self, client):
+        """A byte range comes back as 206 with only the requested bytes."""
+        response = await client.get("/api/v1/files/1/download", headers={"Range": "bytes=10-19"})
+
+        assert response.status_code == 206
+        assert response.content == b"0123456789"
+        assert response.headers["content-range"] == "bytes 10-19/1000"
+        assert response.headers["content-disposition"].startswith("attachment;")
+
+    @pytest.mark.asyncio
+    async def test_if_none_match_returns_304(self, client):
+        """Revalidation with the current ETag skips the body."""
+        response = await client.get("/api/v1/files/1/content", headers={"If-None-Match": 'W/"feedface"'})
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    @pytest.mark.asyncio
+    async def test_other_users_are_denied(self, client):
+        """Only the owner or an admin may read the file."""
+        client.current_user["user"] = FakeUser(2)
+        assert (await client.get("/api/v1/files/1/content")).status_code == 403
+
+        client.current_user["user"] = FakeUser(2, admin=True)
+        assert (await client.get("/api/v1/files/1/content")).status_code == 200
@@ -0,0 +1,114 @@
+"""
+Tests for streamed uploads and the content-addressed blob store in FileStorage.
+
+Uploads are fed through an in-memory async reader; files land in a
+temporary storage directory.
+"""
+
+import hashlib
+import io
+import os
+
+import pytest
+
+from app.services.file_upload import FileStorage, FileTooLargeError
+
+
+class FakeUpload:
+    """Minimal async reader standing in for fastapi.UploadFile."""
+
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+        self.reads = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads += 1
+        return self._buffer.read(size)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return FileStorage(base_dir=str(tmp_path), category="blobs")
+
+
+class TestStreamedUpload:
+    """stage_upload / commit_blob / finalize_blob / discard_upload."""
+
+    @pytest.mark.asyncio
+    async def test_stage_and_commit(self, storage, tmp_path):
+        """Content is hashed while streaming and renamed into place."""
+        data = os.urandom(300_000)
+        upload = FakeUpload(data)
+
+        staged = await storage.stage_upload(upload, max_size=1_000_000, chunk_size=64 * 1024)
+        rel_path, reused = await storage.commit_blob(staged, "pdf")
+
+        digest = hashlib.sha256(data).hexdigest()
+        assert upload.reads > 1
+        assert staged.size == len(data)
+        assert staged.file_hash == digest
+        assert rel_path == os.path.join("blobs", digest[:2], f"{digest}.pdf")
+        assert reused is False
+        assert FileStorage.is_blob_path(rel_path)
+        assert (tmp_path / rel_path).read_bytes() == data
+        assert await FileStorage.calculate_hash(rel_path, base_dir=str(tmp_path)) == staged.file_hash
+
+        # Staged copy is kept until the upload's row exists
+        assert os.path.exists(staged.temp_path)
+        await storage.finalize_blob(staged, rel_path)
+        assert not os.path.exists(staged.temp_path)
+        assert (tmp_path / rel_path).read_bytes() == data
+
+    @pytest.mark.asyncio
+    async def test_oversized_upload_aborts_early(self, storage, tmp_path):
+        """Reading stops once the limit is crossed and no file is left behind."""
+        upload = FakeUpload(b"x" * 1000)
+
+        with pytest.raises(FileTooLargeError):
+            await storage.stage_upload(upload, max_size=100, chunk_size=64)
+
+        assert upload.reads == 2
+        assert [name for name in os.listdir(tmp_path / "blobs") if not name.startswith(".locks")] == []
+
+    @pytest.mark.asyncio
+    async def test_identical_content_is_stored_once(self, storage, tmp_path):
+        """A second upload of the same bytes reuses the existing blob."""
+        first_staged = await storage.stage_upload(FakeUpload(b"same"))
+        first, _ = await storage.commit_blob(first_staged, "txt")
+        await storage.finalize_blob(first_staged, first)
+        staged = await storage.stage_upload(FakeUpload(b"same"))
+
+        second, reused = await storage.commit_blob(staged, "txt")
+        await storage.finalize_blob(staged, second)
+
+        assert second == first
+        assert reused is True
+        assert not os.path.exists(staged.temp_path)
+        assert (tmp_path / first).read_bytes() == b"same"
+
+    @pytest.mark.asyncio
+    async def test_blob_deleted_before_row_commit_is_restored(self, storage, tmp_path):
+        """A concurrent delete of the last other reference can't leave the new upload without content."""
+        existing = await storage.stage_upload(FakeUpload(b"shared"))
+        rel_path, _ = await storage.commit_blob(existing, "txt")
+        await storage.finalize_blob(existing, rel_path)
+
+        staged = await storage.stage_upload(FakeUpload(b"shared"))
+        _, reused = await storage.commit_blob(staged, "txt")
+        # The other upload is deleted and, seeing no committed reference yet, removes the blob
+        async with storage.blob_lock(staged.file_hash):
+            await storage.delete_file(rel_path)
+        await storage.finalize_blob(staged, rel_path)
+
+        assert reused is True
+        assert (tmp_path / rel_path).read_bytes() == b"shared"
+        assert not os.path.exists(staged.temp_path)
+
+    @pytest.mark.asyncio
+    async def test_discard_removes_temp_file(self, storage):
+        """Rejected uploads leave nothing behind."""
+        staged = await storage.stage_upload(FakeUpload(b"data"))
+
+        await storage.discard_upload(staged)
+
+        assert not os.path.exists(staged.temp_path)
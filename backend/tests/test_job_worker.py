@@ -0,0 +1,341 @@
+"""
+Tests for the standalone job worker, database job leasing and multi-node claiming.
+
+Uses a temporary SQLite database so claiming, heartbeats and lease expiry
+run against real SQL (compare-and-set UPDATEs).
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.models import Base, FileUpload, FileStatus
+from app.models.job import Job, JobLease, JobStatus, JobType
+from app.services.job_service import JobService
+from app.services.vector_store.loader import DocumentLoader
+from app.jobs.worker import JobWorker
+from app.jobs import integration
+from app.config.settings import settings
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """
+    File-backed SQLite session factory with the job and file upload tables.
+    
+    Each session gets its own connection (like separate nodes), so one
+    session's rollback cannot undo another session's claim.
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}",
+        poolclass=NullPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[Job.__table__, JobLease.__table__, FileUpload.__table__])
+
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    await engine.dispose()
+
+
+async def _create_jobs(session_factory, job_type: JobType, count: int, max_retries: int = 3) -> list[int]:
+    async with session_factory() as session:
+        service = JobService(session)
+        ids = []
+        for i in range(count):
+            job = await service.create(
+                job_type=job_type,
+                reference_id=i + 1,
+                reference_type="test",
+                max_retries=max_retries,
+            )
+            ids.append(job.id)
+        await session.commit()
+        return ids
+
+
+@pytest.fixture
+def inline_integration(tmp_path, session_factory, monkeypatch):
+    """JobQueueIntegration for node-a whose sync sessions use the test database."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", poolclass=NullPool)
+    monkeypatch.setattr(integration, "get_sync_session", sessionmaker(engine))
+    monkeypatch.setattr(integration, "get_job_manager", lambda: None)
+    monkeypatch.setattr(settings, "JOB_HEARTBEAT_INTERVAL", 0.05)
+
+    queue = integration.JobQueueIntegration(session_factory)
+    queue.node_id = "node-a"
+    yield queue
+
+    engine.dispose()
+
+
+class TestJobLeasing:
+    """Database-level claim, heartbeat and requeue behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_claim_is_exclusive(self, session_factory):
+        """Two workers never claim the same job."""
+        await _create_jobs(session_factory, JobType.CLEANUP, 3)
+
+        async with session_factory() as session:
+            first = await JobService(session).claim_next("worker-a", limit=2)
+            await session.commit()
+        async with session_factory() as session:
+            second = await JobService(session).claim_next("worker-b", limit=5)
+            await session.commit()
+
+        assert len(first) == 2
+        assert len(second) == 1
+        assert {j.id for j in first}.isdisjoint({j.id for j in second})
+        assert all(j.status == JobStatus.PROCESSING for j in first + second)
+        assert all(j.locked_by == "worker-a" for j in first)
+
+    @pytest.mark.asyncio
+    async def test_claim_filters_by_job_type(self, session_factory):
+        """Only jobs of the requested types are claimed."""
+        await _create_jobs(session_factory, JobType.CLEANUP, 1)
+        email_ids = await _create_jobs(session_factory, JobType.PASSWORD_RESET_EMAIL, 1)
+
+        async with session_factory() as session:
+            claimed = await JobService(session).claim_next(
+                "worker-a", job_types=[JobType.PASSWORD_RESET_EMAIL], limit=5
+            )
+            await session.commit()
+
+        assert [j.id for j in claimed] == email_ids
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_requires_ownership(self, session_factory):
+        """Only the lease holder can extend a lease."""
+        await _create_jobs(session_factory, JobType.CLEANUP, 1)
+        async with session_factory() as session:
+            service = JobService(session)
+            job = (await service.claim_next("worker-a"))[0]
+            await session.commit()
+
+            assert await service.heartbeat(job.id, "worker-a", lease_seconds=60) is True
+            assert await service.heartbeat(job.id, "worker-b", lease_seconds=60) is False
+
+    @pytest.mark.asyncio
+    async def test_requeue_expired_leases(self, session_factory):
+        """Expired leases go back to PENDING, or FAILED once retries are exhausted."""
+        retry_id = (await _create_jobs(session_factory, JobType.CLEANUP, 1, max_retries=3))[0]
+        exhausted_id = (await _create_jobs(session_factory, JobType.CLEANUP, 1, max_retries=0))[0]
+
+        async with session_factory() as session:
+            service = JobService(session)
+            await service.claim_next("worker-a", limit=2)
+            await session.execute(
+                update(Job).values(locked_until=datetime.now(timezone.utc) - timedelta(seconds=5))
+            )
+            count = await service.requeue_expired()
+            await session.commit()
+
+            retried = await service.get(retry_id)
+            exhausted = await service.get(exhausted_id)
+            await session.refresh(retried)
+            await session.refresh(exhausted)
+
+        assert count == 2
+        assert retried.status == JobStatus.PENDING
+        assert retried.retry_count == 1
+        assert retried.locked_by is None
+        assert exhausted.status == JobStatus.FAILED
+
+    @pytest.mark.asyncio
+    async def test_delayed_retry_is_not_claimable_yet(self, session_factory):
+        """A retry with a backoff delay is skipped until the delay passes."""
+        await _create_jobs(session_factory, JobType.CLEANUP, 1)
+        async with session_factory() as session:
+            service = JobService(session)
+            job = (await service.claim_next("worker-a"))[0]
+            await service.mark_failed(job.id, "boom", retry_delay_seconds=60)
+            await session.commit()
+
+            assert await service.claim_next("worker-a") == []
+
+
+class TestMultiNode:
+    """Leader leases and file claiming shared by several nodes."""
+
+    @pytest.mark.asyncio
+    async def test_leader_lease_is_sticky_until_expiry(self, session_factory):
+        """Only the holder can renew a lease; others take over once it expires."""
+        async with session_factory() as session:
+            service = JobService(session)
+            assert await service.try_acquire_lease("recurring:test", "node-a", ttl_seconds=60) is True
+            assert await service.try_acquire_lease("recurring:test", "node-b", ttl_seconds=60) is False
+            assert await service.try_acquire_lease("recurring:test", "node-a", ttl_seconds=60) is True
+
+            await session.execute(
+                update(JobLease).values(expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+            )
+            assert await service.try_acquire_lease("recurring:test", "node-b", ttl_seconds=60) is True
+            await session.commit()
+
+            lease = await session.get(JobLease, "recurring:test")
+            await session.refresh(lease)
+        assert lease.holder == "node-b"
+
+    @pytest.mark.asyncio
+    async def test_file_claims_are_disjoint(self, session_factory):
+        """Concurrent ingestion runs never claim the same file."""
+        async with session_factory() as session:
+            for i in range(5):
+                session.add(FileUpload(
+                    upload_token=f"token-{i}",
+                    file_name=f"doc-{i}.txt",
+                    file_type="txt",
+                    file_size=10,
+                    file_path=f"doc-{i}.txt",
+                    file_hash=f"hash-{i}",
+                    status=FileStatus.APPROVED,
+                ))
+            await session.commit()
+
+        async with session_factory() as session:
+            first = await DocumentLoader(session).claim_pending_files(limit=3)
+        async with session_factory() as session:
+            second = await DocumentLoader(session).claim_pending_files(limit=3)
+        async with session_factory() as session:
+            third = await DocumentLoader(session).claim_pending_files()
+            files = (await session.execute(select(FileUpload))).scalars().all()
+
+        assert len(first) == 3
+        assert len(second) == 2
+        assert third == []
+        assert set(first).isdisjoint(second)
+        assert all(f.status == FileStatus.PROCESSING and f.processing_started_at for f in files)
+
+    @pytest.mark.asyncio
+    async def test_inline_job_heartbeats_its_lease(self, session_factory, inline_integration):
+        """A long-running inline job keeps extending its lease until it finishes."""
+        job_id = (await _create_jobs(session_factory, JobType.CLEANUP, 1))[0]
+        async with session_factory() as session:
+            assert await JobService(session).claim(job_id, "node-a", lease_seconds=1) is True
+            await session.commit()
+
+        heartbeats = []
+
+        async def handler(job):
+            for _ in range(3):
+                await asyncio.sleep(0.06)
+                async with session_factory() as session:
+                    heartbeats.append((await session.get(Job, job.id)).heartbeat_at)
+            return {"ok": True}
+
+        await inline_integration._job_wrapper(job_id, handler)
+
+        async with session_factory() as session:
+            job = await session.get(Job, job_id)
+        assert len(set(heartbeats)) > 1
+        assert job.status == JobStatus.COMPLETED
+        assert job.locked_by is None
+
+    @pytest.mark.asyncio
+    async def test_inline_job_does_not_overwrite_a_lost_lease(self, session_factory, inline_integration):
+        """Once another node owns the job, the stale run's outcome is dropped."""
+        job_id = (await _create_jobs(session_factory, JobType.CLEANUP, 1))[0]
+        async with session_factory() as session:
+            assert await JobService(session).claim(job_id, "node-a", lease_seconds=1) is True
+            await session.commit()
+
+        async def handler(job):
+            # Lease expired and node-b took the job over while this run was stuck
+            async with session_factory() as session:
+                await session.execute(update(Job).where(Job.id == job.id).values(locked_by="node-b"))
+                await session.commit()
+            await asyncio.sleep(0.1)
+            raise RuntimeError("too late")
+
+        await inline_integration._job_wrapper(job_id, handler)
+
+        async with session_factory() as session:
+            job = await session.get(Job, job_id)
+        assert job.status == JobStatus.PROCESSING
+        assert job.locked_by == "node-b"
+        assert job.retry_count == 0
+
+
+class TestJobWorker:
+    """End-to-end worker loop with stubbed handlers."""
+
+    @pytest.mark.asyncio
+    async def test_worker_runs_jobs_within_concurrency_limit(self, session_factory):
+        """Worker completes all jobs and never exceeds the per-type limit."""
+        job_ids = await _create_jobs(session_factory, JobType.CLEANUP, 5)
+
+        running = 0
+        peak = 0
+
+        async def handler(job):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return {"status": "cleaned", "id": job.id}
+
+        worker = JobWorker(
+            session_factory,
+            worker_id="test-worker",
+            concurrency={"cleanup": 2},
+            default_concurrency=1,
+            poll_interval=0.01,
+            visibility_timeout=30,
+            heartbeat_interval=10,
+            max_runtime_seconds=0,
+        )
+        worker.integration._get_handler_for_job_type = lambda job_type: handler
+
+        async def stop_when_done():
+            while True:
+                async with session_factory() as session:
+                    jobs = [await JobService(session).get(job_id) for job_id in job_ids]
+                if all(j.status == JobStatus.COMPLETED for j in jobs):
+                    worker.stop()
+                    return
+                await asyncio.sleep(0.02)
+
+        await asyncio.wait_for(asyncio.gather(worker.run(), stop_when_done()), timeout=5)
+
+        assert peak == 2
+        async with session_factory() as session:
+            job = await JobService(session).get(job_ids[0])
+        assert job.locked_by is None
+        assert '"status": "cleaned"' in job.result
+
+    @pytest.mark.asyncio
+    async def test_worker_failure_schedules_retry(self, session_factory):
+        """A failing handler puts the job back to PENDING with a backoff."""
+        job_id = (await _create_jobs(session_factory, JobType.CLEANUP, 1))[0]
+
+        async def handler(job):
+            raise RuntimeError("smtp down")
+
+        worker = JobWorker(
+            session_factory,
+            worker_id="test-worker",
+            concurrency={},
+            default_concurrency=1,
+            poll_interval=0.01,
+            visibility_timeout=30,
+            heartbeat_interval=10,
+        )
+        worker.integration._get_handler_for_job_type = lambda job_type: handler
+
+        await worker.claim_available()
+        await asyncio.gather(*list(worker._tasks.values()))
+
+        async with session_factory() as session:
+            job = await JobService(session).get(job_id)
+        assert job.status == JobStatus.PENDING
+        assert job.retry_count == 1
+        assert job.locked_until is not None
+        assert "smtp down" in job.error
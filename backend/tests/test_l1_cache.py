@@ -0,0 +1,129 @@
+"""
+Tests for the bounded LRU store and the L1 cache in front of a backend.
+
+The L2 is a MemoryBackend that counts reads; pub/sub is a recording stub.
+"""
+
+import pytest
+
+from app.core.cache import Cache, L1Cache, LRUStore, MemoryBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingBackend(MemoryBackend):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    async def get(self, key):
+        self.reads += 1
+        return await super().get(key)
+
+
+class RecordingRedis:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+class TestLRUStore:
+    """Eviction by size and entry count, TTL expiry."""
+
+    def test_evicts_least_recently_used_over_byte_cap(self):
+        store = LRUStore(max_entries=100, max_bytes=25)
+        store.set("a", "x" * 9)
+        store.set("b", "x" * 9)
+        store.get("a")
+        store.set("c", "x" * 9)
+
+        assert store.get("b") is None
+        assert store.get("a") is not None
+        assert store.size_bytes <= 25
+        assert store.evictions == 1
+
+    def test_entry_expires(self):
+        clock = FakeClock()
+        store = LRUStore(clock=clock)
+        store.set("k", "v", ttl=10)
+
+        clock.now = 9
+        assert store.get("k") == "v"
+        clock.now = 10
+        assert store.get("k") is None
+        assert len(store) == 0
+
+    def test_delete_matching_glob(self):
+        store = LRUStore()
+        for key in ("stats:files:1", "stats:jobs:1", "stats:files:2", "other"):
+            store.set(key, "v")
+
+        assert store.delete_matching("stats:*:1") == 2
+        assert store.get("stats:files:2") == "v"
+
+
+@pytest.fixture
+def cache():
+    backend = CountingBackend()
+    redis = RecordingRedis()
+    l1 = L1Cache(channel="test:invalidate")
+    l1.redis = redis
+    return Cache(backend, l1), backend, redis
+
+
+class TestL1Cache:
+    """Hot reads served from L1; writes and invalidations stay coherent."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_reads_hit_l1(self, cache):
+        cache, backend, _ = cache
+        await backend.set("user_clearance:1", '{"level": 3}')
+
+        for _ in range(3):
+            assert await cache.get("user_clearance:1") == {"level": 3}
+
+        assert backend.reads == 1
+        assert cache.stats()["by_prefix"]["user_clearance"] == {"l1_hits": 2, "l2_hits": 1, "misses": 0}
+
+    @pytest.mark.asyncio
+    async def test_writes_publish_invalidation(self, cache):
+        cache, backend, redis = cache
+        await cache.set("notif:unread_count:1", 4)
+        await cache.delete("notif:unread_count:1")
+
+        assert await cache.get("notif:unread_count:1") is None
+        assert [channel for channel, _ in redis.published] == ["test:invalidate"] * 2
+
+    @pytest.mark.asyncio
+    async def test_remote_invalidation_drops_entry(self, cache):
+        """Another process's message evicts the key; our own messages are ignored."""
+        cache, backend, redis = cache
+        await cache.set("conversation:history:c1", ["hi"])
+        own_message = redis.published[-1][1]
+
+        cache.l1.handle_message(own_message)
+        assert cache.l1.store.get("conversation:history:c1") is not None
+
+        other = L1Cache(channel="test:invalidate")
+        cache.l1.handle_message(own_message.replace(cache.l1.origin, other.origin))
+        assert cache.l1.store.get("conversation:history:c1") is None
+
+    @pytest.mark.asyncio
+    async def test_read_racing_invalidation_is_not_kept(self, cache):
+        """A value read from L2 while an invalidation arrives isn't cached in L1."""
+        cache, backend, _ = cache
+        await backend.set("k", '"old"')
+        generation = cache.l1.generation
+        cache.l1.invalidate(keys=["k"])
+
+        cache.l1.fill("k", '"old"', generation=generation)
+
+        assert cache.l1.store.get("k") is None
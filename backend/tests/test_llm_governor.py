@@ -0,0 +1,79 @@
+"""
+Tests for the LLM concurrency governor: in-flight limit, fair queuing across
+users, token bucket and queue timeout.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.exceptions import LLMTimeoutError
+from app.services.llm.governor import LLMGovernor
+
+
+def make_governor(max_in_flight=1, requests_per_minute=0, queue_timeout=5.0):
+    return LLMGovernor(
+        limits={"primary": {"max_in_flight": max_in_flight, "requests_per_minute": requests_per_minute}},
+        queue_timeout=queue_timeout,
+    )
+
+
+class TestLLMGovernor:
+    """Admission order and limits."""
+
+    @pytest.mark.asyncio
+    async def test_in_flight_limit_queues_and_releases(self):
+        governor = make_governor(max_in_flight=1)
+
+        first = governor.acquire("primary", user_id=1)
+        second = governor.acquire("primary", user_id=2)
+
+        assert first.granted
+        assert not second.granted
+        assert second.position == 1
+
+        first.release()
+        await second.wait()
+        assert second.granted
+        assert governor.snapshot()["primary"]["queued"] == 1
+
+    @pytest.mark.asyncio
+    async def test_users_are_served_fairly(self):
+        """A user's burst doesn't hold back another user's single request."""
+        governor = make_governor(max_in_flight=1)
+        running = governor.acquire("primary", user_id="heavy")
+        burst = [governor.acquire("primary", user_id="heavy") for _ in range(3)]
+        light = governor.acquire("primary", user_id="light")
+
+        order = []
+        for _ in range(4):
+            running.release()
+            running = next(t for t in burst + [light] if t.granted and t not in order)
+            order.append(running)
+
+        assert order.index(light) <= 1
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        governor = make_governor(max_in_flight=1, queue_timeout=0.05)
+        governor.acquire("primary", user_id=1)
+
+        with pytest.raises(LLMTimeoutError):
+            async with governor.acquire("primary", user_id=2):
+                pass
+
+        assert governor.snapshot()["primary"]["timed_out"] == 1
+        assert governor.snapshot()["primary"]["waiting"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_admits_when_token_refills(self):
+        """With the bucket empty, a free slot still waits for the next token."""
+        governor = make_governor(max_in_flight=1, requests_per_minute=600)  # One token per 0.1s
+
+        first = governor.acquire("primary", user_id=1)
+        first.release()
+        second = governor.acquire("primary", user_id=1)
+
+        assert not second.granted
+        waited = await asyncio.wait_for(second.wait(), timeout=1.0)
+        assert waited >= 0.05
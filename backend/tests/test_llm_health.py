@@ -0,0 +1,99 @@
+"""
+Tests for LLM health tracking, the circuit breaker and hedged streaming.
+
+The tracker runs on a fake clock; streams are small async generators with
+controllable delays.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.conversation.response.pipeline import ResponsePipeline
+from app.services.llm import LLMType
+from app.services.llm import health as health_module
+from app.services.llm.health import CircuitState, LLMHealthTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def tracker(clock, monkeypatch):
+    instance = LLMHealthTracker(failure_threshold=3, open_seconds=30, clock=clock)
+    monkeypatch.setattr(health_module, "_health_tracker", instance)
+    return instance
+
+
+class TestCircuitBreaker:
+    """CLOSED → OPEN → HALF_OPEN → CLOSED/OPEN transitions."""
+
+    def test_opens_after_consecutive_failures(self, tracker):
+        for _ in range(3):
+            assert tracker.allow_request(LLMType.PRIMARY)
+            tracker.record_failure(LLMType.PRIMARY)
+
+        assert tracker.get_health(LLMType.PRIMARY).state == CircuitState.OPEN
+        assert not tracker.allow_request(LLMType.PRIMARY)
+        assert tracker.allow_request(LLMType.FALLBACK)
+
+    def test_probe_after_cool_down(self, tracker, clock):
+        """One probe goes through after the cool-down; success closes, failure re-opens."""
+        for _ in range(3):
+            tracker.record_failure(LLMType.PRIMARY)
+
+        clock.now += 31
+        assert tracker.allow_request(LLMType.PRIMARY)
+        assert not tracker.allow_request(LLMType.PRIMARY)
+
+        tracker.record_failure(LLMType.PRIMARY)
+        assert tracker.get_health(LLMType.PRIMARY).state == CircuitState.OPEN
+
+        clock.now += 31
+        assert tracker.allow_request(LLMType.PRIMARY)
+        tracker.record_success(LLMType.PRIMARY)
+        assert tracker.get_health(LLMType.PRIMARY).state == CircuitState.CLOSED
+        assert tracker.allow_request(LLMType.PRIMARY)
+
+
+async def token_stream(tokens, delay=0.0):
+    if delay:
+        await asyncio.sleep(delay)
+    for token in tokens:
+        yield {"type": "token", "content": token}
+
+
+class TestHedgedStream:
+    """The fallback is raced against a primary that is slow to start."""
+
+    async def collect(self, primary, fallback, hedge_after):
+        pipeline = ResponsePipeline.__new__(ResponsePipeline)
+        state = {"fallback_started": False}
+        stream = pipeline._hedged_stream(primary, lambda: fallback, LLMType.PRIMARY, hedge_after, state)
+        return [item["content"] async for item in stream], state
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self, tracker):
+        items, state = await self.collect(token_stream(["a", "b"]), token_stream(["x"]), 0.5)
+
+        assert items == ["a", "b"]
+        assert not state["fallback_started"]
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_loses_to_fallback(self, tracker):
+        """Fallback tokens are used and the hedged-out primary counts as a failure."""
+        items, state = await self.collect(token_stream(["a"], delay=1.0), token_stream(["x", "y"]), 0.05)
+
+        assert items == ["x", "y"]
+        assert state["fallback_started"]
+        assert tracker.get_health(LLMType.PRIMARY).consecutive_failures == 1
@@ -0,0 +1,41 @@
+"""
+Tests for length-bucketed batching of the ONNX inference runtime.
+"""
+
+from app.core.onnx_inference import bucket_length, pad_batch, plan_batches
+
+
+class TestOnnxBatching:
+    """Buckets, batch planning and padding."""
+
+    def test_bucket_length(self):
+        assert bucket_length(3, 512) == 16
+        assert bucket_length(17, 512) == 32
+        assert bucket_length(300, 512) == 512
+        assert bucket_length(600, 512) == 512
+
+    def test_batches_group_similar_lengths_within_budget(self):
+        lengths = [10, 200, 12, 190, 15, 8]
+
+        batches = plan_batches(lengths, max_length=512, max_batch_size=8, max_batch_tokens=512)
+
+        assert batches == [([1, 3], 256), ([4, 2, 0, 5], 16)]
+        assert sorted(i for positions, _ in batches for i in positions) == list(range(len(lengths)))
+
+    def test_batch_size_cap(self):
+        batches = plan_batches([5] * 5, max_length=512, max_batch_size=2, max_batch_tokens=10_000)
+
+        assert [len(positions) for positions, _ in batches] == [2, 2, 1]
+
+    def test_pad_batch(self):
+        batch = pad_batch(
+            [
+                {"input_ids": [101, 7, 102], "attention_mask": [1, 1, 1]},
+                {"input_ids": [101, 102], "attention_mask": [1, 1]},
+            ],
+            length=4,
+            pad_id=9,
+        )
+
+        assert batch["input_ids"].tolist() == [[101, 7, 102, 9], [101, 102, 9, 9]]
+        assert batch["attention_mask"].tolist() == [[1, 1, 1, 0], [1, 1, 0, 0]]
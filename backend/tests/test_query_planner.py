@@ -0,0 +1,76 @@
+"""
+Tests for the combined query planner (classification + decomposition).
+
+The structured LLM is a stand-in that counts calls; plans are cached in an
+in-memory cache backend.
+"""
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import Cache, MemoryBackend
+from app.schemas.llm_classifier import QueryPlanResult
+from app.services.conversation.response.pipeline import ResponsePipeline
+from app.services.llm.planner import QueryPlanner, normalize_query
+
+
+class FakeStructuredLLM:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return self.result
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(cache_module, "_cache_instance", Cache(MemoryBackend()))
+
+
+def make_planner(result):
+    planner = QueryPlanner.__new__(QueryPlanner)
+    planner.llm = object()
+    planner.structured_llm = FakeStructuredLLM(result)
+    return planner
+
+
+class TestQueryPlanner:
+    """One call per normalized query; plan feeds the pipeline directly."""
+
+    def test_normalize_query(self):
+        assert normalize_query("  What IS the\tleave policy? ") == "what is the leave policy?"
+
+    @pytest.mark.asyncio
+    async def test_plan_is_cached_by_normalized_query(self, memory_cache):
+        """Differently spaced/cased repeats reuse the first plan."""
+        planner = make_planner({
+            "requires_rag": True,
+            "confidence": 0.9,
+            "decomposed": True,
+            "queries": ["What are company values?", "Who is the CEO?"],
+        })
+
+        first = await planner.plan("Company values and CEO")
+        second = await planner.plan("  company VALUES and ceo ")
+
+        assert planner.structured_llm.calls == 1
+        assert first.queries == second.queries == ["What are company values?", "Who is the CEO?"]
+
+    @pytest.mark.asyncio
+    async def test_pipeline_uses_plan_without_decomposer(self):
+        """process_query takes the planner's queries instead of calling the decomposer."""
+        class FailingDecomposer:
+            async def decompose(self, query):
+                raise AssertionError("decomposer must not be called")
+
+        pipeline = ResponsePipeline.__new__(ResponsePipeline)
+        pipeline.query_decomposer = FailingDecomposer()
+        plan = QueryPlanResult(requires_rag=True, confidence=0.8, decomposed=False, queries=["leave policy"])
+
+        query_info = await pipeline.process_query("what's the leave policy", plan)
+
+        assert query_info["all_queries"] == ["leave policy"]
+        assert query_info["strategy"] == "llm_optimized"
+        assert query_info["decomposition_result"] is plan
@@ -0,0 +1,98 @@
+"""
+Tests for per-request SearchSpec: immutable parameters and concurrent
+retrievals with different k that don't affect each other.
+"""
+
+import asyncio
+import dataclasses
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.vector_store.retriever import RetrieverService, SearchSpec
+
+
+APP_SETTINGS = SimpleNamespace(
+    TOP_K=2,
+    MAX_K=5,
+    RETRIEVAL_SCORE_THRESHOLD=0.5,
+    RERANKER_SCORE_THRESHOLD=0.5,
+    ENABLE_RERANKER=False,
+)
+
+
+class SlowStore:
+    """Vector store whose (blocking) search takes a while and records its k."""
+
+    def __init__(self):
+        self.calls = []
+
+    def similarity_search_with_score(self, query, k, **kwargs):
+        self.calls.append((query, k, kwargs))
+        time.sleep(0.2)
+        return [(Document(page_content=f"{query} {i}", metadata={}), 0.9) for i in range(k)]
+
+
+def make_service(store, search_lock=None):
+    service = RetrieverService.__new__(RetrieverService)
+    service.retriever = SimpleNamespace(vectorstore=store)
+    service.settings = SimpleNamespace(app_settings=APP_SETTINGS)
+    service.reranker = None
+    service.sparse_index = None
+    service.embedding_batcher = None
+    service.search_lock = search_lock
+    return service
+
+
+class TestSearchSpec:
+    """Spec construction and per-request isolation."""
+
+    def test_spec_is_immutable(self):
+        spec = SearchSpec.from_settings(APP_SETTINGS, top_k=3, filter={"department_id": {"$eq": 1}})
+
+        assert (spec.k, spec.fetch_k) == (3, 5)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            spec.k = 10
+        with pytest.raises(TypeError):
+            spec.filter["department_id"] = 2
+
+        kwargs = spec.search_kwargs()
+        kwargs["filter"]["department_id"]["$eq"] = 2
+        assert spec.filter["department_id"] == {"$eq": 1}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_keep_their_own_k(self):
+        store = SlowStore()
+        service = make_service(store)
+
+        start = time.monotonic()
+        small, large = await asyncio.gather(
+            service.query("a", top_k=1, skip_security_filter=True),
+            service.query("b", spec=SearchSpec(k=4, fetch_k=8, score_threshold=0.5), skip_security_filter=True),
+        )
+
+        assert small["count"] == 1
+        assert large["count"] == 4
+        assert sorted((query, k) for query, k, _ in store.calls) == [("a", 5), ("b", 8)]
+        # Searches ran side by side in worker threads, not one after the other
+        assert time.monotonic() - start < 0.35
+
+    @pytest.mark.asyncio
+    async def test_in_place_index_search_waits_for_writes(self):
+        """A store ingestion modifies in place is not searched while a write holds the lock."""
+        store = SlowStore()
+        lock = threading.Lock()
+        service = make_service(store, search_lock=lock)
+
+        with lock:
+            # e.g. an inline ingestion job adding documents from its own thread
+            search = asyncio.create_task(service.query("a", top_k=1, skip_security_filter=True))
+            await asyncio.sleep(0.1)
+            assert store.calls == []
+
+        result = await search
+        assert result["count"] == 1
+        assert not lock.locked()
@@ -0,0 +1,169 @@
+"""
+Tests for source-file tagging, targeted eviction and chunk references in
+SemanticCache.
+
+RedisVL and Redis are replaced by small in-memory stand-ins sharing one
+keyspace, so the reverse index and the cache entries can be inspected.
+"""
+
+import json
+
+import pytest
+
+from langchain_core.documents import Document
+
+from app.core.semantic_cache import SemanticCache, collect_source_file_ids
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def sadd(self, key, *members):
+        self.calls.append(("sadd", key, members))
+
+    def expire(self, key, ttl):
+        self.calls.append(("expire", key, ttl))
+
+    def set(self, key, value, ex=None):
+        self.calls.append(("set", key, (value, ex)))
+
+    async def execute(self):
+        for name, key, arg in self.calls:
+            if name == "sadd":
+                self.redis.data.setdefault(key, set()).update(arg)
+            elif name == "set":
+                self.redis.data[key], self.redis.ttls[key] = arg
+            else:
+                self.redis.ttls[key] = arg
+
+
+class FakeRedis:
+    """The few async Redis commands SemanticCache uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    async def sunion(self, keys):
+        return set().union(*(self.data.get(k, set()) for k in keys))
+
+    async def delete(self, *keys):
+        return sum(1 for k in keys if self.data.pop(k, None) is not None)
+
+
+class FakeVLCache:
+    """Exact-match stand-in for redisvl's SemanticCache."""
+
+    def __init__(self, name, redis):
+        self.name = name
+        self.redis = redis
+
+    def check(self, prompt, vector=None, return_fields=None, num_results=1):
+        entry = self.redis.data.get(f"{self.name}:{prompt}")
+        return [{"response": entry}] if entry else []
+
+    def store(self, prompt, response, vector=None):
+        key = f"{self.name}:{prompt}"
+        self.redis.data[key] = response
+        return key
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def cache(redis):
+    """SemanticCache wired to the fakes (single variation, no encryption)."""
+    instance = SemanticCache.__new__(SemanticCache)
+    tier = {"enabled": True, "ttl_seconds": 600, "max_entries": 1, "encrypt": False}
+    instance.config = {"index_name": "semantic_cache", "response": dict(tier), "context": dict(tier)}
+    instance.response_cache = FakeVLCache("rag_response_cache", redis)
+    instance.context_cache = FakeVLCache("rag_context_cache", redis)
+    instance.embedding_batcher = None
+    instance.redis_client = redis
+    return instance
+
+
+class TestSourceTracking:
+    """source_file_ids on entries and the file → keys index."""
+
+    def test_collect_source_file_ids(self):
+        """Ids come from chunk metadata, deduplicated and sorted."""
+        documents = [
+            Document(page_content="a", metadata={"file_id": 7}),
+            Document(page_content="b", metadata={"file_id": "3"}),
+            Document(page_content="c", metadata={"file_id": 7}),
+            Document(page_content="d", metadata={}),
+        ]
+
+        assert collect_source_file_ids(documents) == [3, 7]
+
+    @pytest.mark.asyncio
+    async def test_set_tags_entry_and_indexes_it(self, cache, redis):
+        """The stored entry lists its files and each file's set points back to it."""
+        await cache.set("response", "q", "answer text", 1, source_file_ids=[5, 2])
+
+        entry = json.loads(redis.data["rag_response_cache:q"])
+        assert entry["source_file_ids"] == [2, 5]
+        assert redis.data["semantic_cache:response:file:2"] == {"rag_response_cache:q"}
+        assert redis.ttls["semantic_cache:response:file:5"] == 600
+
+    @pytest.mark.asyncio
+    async def test_invalidate_evicts_only_affected_entries(self, cache, redis):
+        """Entries from other files survive; both tiers are covered."""
+        await cache.set("response", "about pumps", "pumps answer", 1, source_file_ids=[1])
+        await cache.set("context", "about pumps", {"context_text": "pump docs"}, 1, source_file_ids=[1, 2])
+        await cache.set("response", "about valves", "valves answer", 1, source_file_ids=[2])
+
+        evicted = await cache.invalidate_files([1])
+
+        assert evicted == 2
+        assert "rag_response_cache:about pumps" not in redis.data
+        assert "rag_context_cache:about pumps" not in redis.data
+        assert "rag_response_cache:about valves" in redis.data
+        assert "semantic_cache:response:file:1" not in redis.data
+
+
+class TestChunkReferences:
+    """Shared chunk store for reference-mode context entries."""
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_stored_once_and_resolved(self, cache, redis):
+        """Two entries sharing a chunk store its text once; refs resolve with scores."""
+        shared = Document(page_content="pump manual", metadata={"file_id": 1, "chunk_index": 0, "score": 0.9})
+        other = Document(page_content="valve manual", metadata={"file_id": 2, "chunk_index": 0})
+
+        first = await cache.store_chunks([shared, other])
+        second = await cache.store_chunks([shared])
+
+        assert second[0]["id"] == first[0]["id"]
+        assert first[0]["score"] == 0.9
+        assert len([k for k in redis.data if ":chunk:" in k]) == 2
+
+        documents = await cache.resolve_chunks(first)
+        assert [d.page_content for d in documents] == ["pump manual", "valve manual"]
+        assert documents[0].metadata["file_id"] == 1
+        assert documents[0].metadata["score"] == 0.9
+
+    @pytest.mark.asyncio
+    async def test_invalidated_chunks_make_entry_a_miss(self, cache, redis):
+        """Evicting a file removes its chunks; entries referencing them no longer resolve."""
+        refs = await cache.store_chunks([
+            Document(page_content="pump manual", metadata={"file_id": 1, "chunk_index": 0}),
+            Document(page_content="valve manual", metadata={"file_id": 2, "chunk_index": 0}),
+        ])
+
+        await cache.invalidate_files([1])
+
+        assert await cache.resolve_chunks(refs) is None
+        assert await cache.resolve_chunks(refs[1:]) is not None
@@ -0,0 +1,140 @@
+"""
+Tests for the in-process BM25 sparse index and its fusion with dense results.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.vector_store import sparse_index as sparse_index_module
+from app.services.vector_store import storage as storage_module
+from app.services.vector_store.retriever import RetrieverService
+from app.services.vector_store.sparse_index import (
+    SparseIndex,
+    reciprocal_rank_fusion,
+    remove_files_from_sparse_index,
+    tokenize,
+)
+from app.services.vector_store.storage import DocumentStorageService
+
+
+def chunk(file_id, index, text):
+    return Document(page_content=text, metadata={"file_id": file_id, "chunk_index": index})
+
+
+def make_index(path=None):
+    index = SparseIndex(path)
+    index.add_documents([
+        chunk(1, 0, "Travel policy POL-2024-17 covers hotel and flight bookings."),
+        chunk(1, 1, "Meals during travel are reimbursed up to a daily limit."),
+        chunk(2, 0, "Warehouse stock for SKU 88-1042 is counted every week."),
+        chunk(3, 0, "The leave policy describes annual and sick leave."),
+    ])
+    return index
+
+
+class TestSparseIndex:
+    """BM25 scoring, incremental updates and persistence."""
+
+    def test_tokenize_keeps_codes_and_parts(self):
+        assert tokenize("See POL-2024-17.") == ["see", "pol-2024-17", "pol", "2024", "17"]
+
+    def test_exact_code_ranks_first_with_full_coverage(self):
+        hits = make_index().search("what does pol-2024-17 say", k=3)
+
+        assert hits[0].document.metadata == {"file_id": 1, "chunk_index": 0}
+        assert hits[0].coverage > 0.8
+
+    def test_unknown_code_lowers_coverage(self):
+        hits = make_index().search("stock for sku 77-5", k=1)
+
+        assert hits[0].document.metadata["file_id"] == 2
+        assert hits[0].coverage < 0.8
+
+    def test_replace_and_remove(self):
+        index = make_index()
+        index.add_documents([chunk(2, 0, "Stock of SKU 99-7 moved to the new warehouse.")])
+
+        assert len(index) == 4
+        assert not index.search("88-1042", k=5)
+        assert index.search("99-7", k=5)[0].document.metadata["file_id"] == 2
+
+        assert index.remove_files([1]) == 2
+        assert not index.search("travel", k=5)
+        assert len(index) == 2
+
+    def test_save_and_load(self, tmp_path):
+        path = tmp_path / "docs.bm25.json"
+        index = make_index(str(path))
+        index.remove_files([3])
+        assert index.save()
+
+        reloaded = SparseIndex(str(path))
+        assert len(reloaded) == 3
+        assert reloaded.search("sku 88-1042", k=1)[0].document.metadata["file_id"] == 2
+        assert not reloaded.search("leave", k=5)
+
+
+class TestIngestionUpdates:
+    """Re-ingested and deleted files don't leave chunks behind."""
+
+    @pytest.mark.asyncio
+    async def test_reingest_drops_chunks_of_the_old_version(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(storage_module, "save_vector_store", lambda store: None)
+        service = DocumentStorageService.__new__(DocumentStorageService)
+        service.vector_store = SimpleNamespace(add_documents=lambda batch: None)
+        service.store_lock = None
+        service.hybrid_search_enabled = True
+        service.supports_hybrid = False
+        service.sparse_index = make_index(str(tmp_path / "docs.bm25.json"))
+
+        # File 1 now has a single chunk (it had two)
+        stored, errors = await service._store_and_track([chunk(1, 0, "Travel is booked via the portal.")], 10)
+
+        assert stored == {1} and not errors
+        assert not service.sparse_index.search("meals reimbursed", k=5)
+        assert len(SparseIndex(str(tmp_path / "docs.bm25.json"))) == 3
+
+    @pytest.mark.asyncio
+    async def test_deleted_file_is_removed_and_saved(self, monkeypatch, tmp_path):
+        index = make_index(str(tmp_path / "docs.bm25.json"))
+        monkeypatch.setattr(sparse_index_module, "local_hybrid_enabled", lambda: True)
+        monkeypatch.setattr(sparse_index_module, "get_sparse_index", lambda: index)
+
+        assert await remove_files_from_sparse_index([2]) == 1
+        assert not SparseIndex(str(tmp_path / "docs.bm25.json")).search("sku 88-1042", k=5)
+
+
+    def test_stale_process_does_not_write_back_removed_chunks(self, tmp_path):
+        path = str(tmp_path / "docs.bm25.json")
+        assert make_index(path).save()
+        api, worker = SparseIndex(path), SparseIndex(path)  # Two processes' copies
+
+        with api.update() as index:
+            index.remove_files([2])
+        with worker.update() as index:
+            index.add_documents([chunk(4, 0, "Parking permits are renewed in January.")])
+
+        reloaded = SparseIndex(path)
+        assert not reloaded.search("sku 88-1042", k=5)
+        assert reloaded.search("parking permits", k=1)[0].document.metadata["file_id"] == 4
+
+
+class TestHybridFusion:
+    """RRF fusion in the retriever."""
+
+    def test_reciprocal_rank_fusion(self):
+        assert reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)[:2] == ["a", "c"]
+
+    def test_keyword_hit_passes_threshold_without_dense_score(self):
+        retriever = RetrieverService.__new__(RetrieverService)
+        retriever.settings = type("S", (), {"SPARSE_RRF_K": 60, "SPARSE_MATCH_MIN_COVERAGE": 0.8})()
+        retriever.sparse_index = make_index()
+        dense = [(chunk(3, 0, "The leave policy describes annual and sick leave."), 0.3)]
+
+        fused, matches = retriever._fuse_with_sparse("POL-2024-17", dense, max_k=5)
+        relevant = retriever._get_high_quality_docs(fused, 0.5, matches)
+
+        assert [doc.metadata["file_id"] for doc in relevant] == [1]
+        assert len(fused) == 2
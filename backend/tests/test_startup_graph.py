@@ -0,0 +1,118 @@
+"""
+Tests for the startup dependency graph: independent steps run concurrently,
+dependents wait, and failures are reported per component.
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import reranker_factory
+from app.core.startup_graph import FAILED, READY, SKIPPED, StartupGraph, StartupStep
+
+
+def blocking_step(log, name, seconds=0.2):
+    """Step doing a blocking load in a worker thread, as the startup steps do."""
+    async def run():
+        log.append(f"{name}:start")
+        await asyncio.to_thread(time.sleep, seconds)
+        log.append(f"{name}:end")
+    return run
+
+
+def failing_step():
+    async def run():
+        raise RuntimeError("model not found")
+    return run
+
+
+class TestStartupGraph:
+    """Ordering, concurrency and readiness."""
+
+    async def test_independent_steps_run_concurrently(self):
+        log = []
+        graph = StartupGraph()
+
+        started = time.perf_counter()
+        await graph.run([
+            StartupStep("embeddings", blocking_step(log, "embeddings")),
+            StartupStep("llm", blocking_step(log, "llm")),
+            StartupStep("reranker", blocking_step(log, "reranker")),
+            StartupStep("vector_store", blocking_step(log, "vector_store", 0.05), depends_on=("embeddings",)),
+        ])
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.45  # ~0.25s concurrently vs 0.65s in sequence
+        assert log.index("vector_store:start") > log.index("embeddings:end")
+        assert set(graph.summary().values()) == {READY}
+
+    async def test_optional_failure_skips_dependents_only(self):
+        log = []
+        graph = StartupGraph()
+
+        await graph.run([
+            StartupStep("semantic_cache", failing_step(), critical=False),
+            StartupStep("cache_warmup", blocking_step(log, "cache_warmup", 0), depends_on=("semantic_cache",)),
+            StartupStep("email", blocking_step(log, "email", 0), critical=False),
+        ])
+
+        assert graph.summary() == {"semantic_cache": FAILED, "cache_warmup": SKIPPED, "email": READY}
+        assert graph.status["semantic_cache"].error == "model not found"
+        assert "cache_warmup:start" not in log
+
+    async def test_critical_failure_aborts_startup(self):
+        graph = StartupGraph()
+
+        with pytest.raises(RuntimeError):
+            await graph.run([
+                StartupStep("embeddings", failing_step()),
+                StartupStep("llm", blocking_step([], "llm", 0.5)),
+            ])
+
+        assert graph.status["embeddings"].state == FAILED
+
+    async def test_later_run_waits_for_earlier_steps(self):
+        log = []
+        graph = StartupGraph()
+        await graph.run([StartupStep("settings", blocking_step(log, "settings", 0))], parallel=False)
+
+        warmup = asyncio.create_task(graph.run([
+            StartupStep("reranker", blocking_step(log, "reranker", 0.05), depends_on=("settings",)),
+        ]))
+        await asyncio.sleep(0.01)
+        assert graph.pending() == ["reranker"]
+        await warmup
+
+        assert graph.summary() == {"settings": READY, "reranker": READY}
+        assert log == ["settings:start", "settings:end", "reranker:start", "reranker:end"]
+
+    async def test_unknown_dependency_is_rejected(self):
+        with pytest.raises(ValueError):
+            await StartupGraph().run([StartupStep("llm", blocking_step([], "llm", 0), depends_on=("nope",))])
+
+
+def test_warmup_and_request_create_one_reranker(monkeypatch):
+    """Concurrent first calls (background warm-up and a request) load the model once."""
+    created = []
+
+    def slow_create():
+        time.sleep(0.1)
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(reranker_factory, "_reranker_instance", None)
+    monkeypatch.setattr(reranker_factory, "_create_reranker", slow_create)
+    monkeypatch.setattr(reranker_factory, "settings", SimpleNamespace(app_settings=SimpleNamespace(ENABLE_RERANKER=True)))
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(reranker_factory.get_reranker())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
@@ -0,0 +1,189 @@
+"""
+Tests for single-flight coalescing of identical streamed queries.
+
+The shared generation is a stand-in stream; persistence goes to a fake
+conversation service that records saved responses.
+"""
+
+import asyncio
+
+import pytest
+
+from langchain_core.documents import Document
+
+from app.config.settings import settings
+from app.services.conversation.response import coalescer as coalescer_module
+from app.services.conversation.response.coalescer import StreamCoalescer
+from app.services.conversation.response.pipeline import ResponsePipeline
+from app.services.llm import LLMType
+
+
+async def slow_tokens(tokens, calls):
+    calls.append(1)
+    for token in tokens:
+        await asyncio.sleep(0.01)
+        yield {"type": "token", "content": token}
+
+
+async def collect(stream):
+    return [item async for item in stream]
+
+
+class FakeConversationService:
+    def __init__(self, histories=None):
+        self.saved = []
+        self.histories = histories or {}
+
+    async def get_conversation_history(self, conversation_id, user_id):
+        return self.histories.get(conversation_id, [])
+
+    async def save_assistant_response(self, conversation_id, user_id, user_query, response_text, assistant_meta):
+        self.saved.append((conversation_id, response_text, assistant_meta))
+
+
+class TestStreamCoalescer:
+    """One generation, many followers."""
+
+    @pytest.mark.asyncio
+    async def test_followers_share_one_stream(self):
+        coalescer = StreamCoalescer()
+        calls = []
+
+        leader, is_leader = coalescer.attach("k", lambda flight: slow_tokens(["a", "b", "c"], calls))
+        await asyncio.sleep(0.015)  # Follower arrives after the first token
+        follower, is_follower_leader = coalescer.attach("k", lambda flight: slow_tokens(["x"], calls))
+
+        first, second = await asyncio.gather(collect(leader.follow()), collect(follower.follow()))
+
+        assert is_leader and not is_follower_leader
+        assert len(calls) == 1
+        assert first == second == [{"type": "token", "content": t} for t in "abc"]
+        assert leader.completed
+        assert coalescer.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_generation_cancelled_when_everyone_leaves(self):
+        coalescer = StreamCoalescer()
+        flight, _ = coalescer.attach("k", lambda flight: slow_tokens(["a"] * 50, []))
+
+        follower = flight.follow()
+        await follower.__anext__()
+        await follower.aclose()
+        await asyncio.sleep(0.01)
+
+        assert flight.task.done()
+        assert flight.done and not flight.completed
+        assert coalescer.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_request_does_not_join_a_cancelled_generation(self):
+        coalescer = StreamCoalescer()
+        calls = []
+        abandoned, _ = coalescer.attach("k", lambda flight: slow_tokens(["a"] * 50, calls))
+        follower = abandoned.follow()
+        await follower.__anext__()
+        await follower.aclose()
+
+        # Same tick as the cancellation: the dying generation must not be joined
+        flight, is_leader = coalescer.attach("k", lambda flight: slow_tokens(["b"], calls))
+
+        assert is_leader and flight is not abandoned
+        assert await collect(flight.follow()) == [{"type": "token", "content": "b"}]
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_followers_get_an_error_when_the_generation_is_interrupted(self):
+        coalescer = StreamCoalescer()
+        flight, _ = coalescer.attach("k", lambda flight: slow_tokens(["a"] * 50, []))
+
+        following = asyncio.ensure_future(collect(flight.follow()))
+        await asyncio.sleep(0.015)
+        flight.task.cancel()  # e.g. shutdown
+        items = await following
+
+        assert items[0] == {"type": "token", "content": "a"}
+        assert items[-1]["type"] == "error"
+        assert coalescer.in_flight() == 0
+
+
+class TestPipelineCoalescing:
+    """Followers persist the shared answer to their own conversation."""
+
+    @pytest.fixture(autouse=True)
+    def coalescing(self, monkeypatch):
+        monkeypatch.setattr(settings.llm_settings, "ENABLE_QUERY_COALESCING", True)
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_call_llm_once(self, monkeypatch):
+        monkeypatch.setattr(coalescer_module, "_stream_coalescer", StreamCoalescer())
+        calls = []
+        documents = [Document(page_content="leave policy text", metadata={"file_id": 1})]
+
+        pipeline = ResponsePipeline.__new__(ResponsePipeline)
+        pipeline.conversation_service = FakeConversationService()
+        pipeline._stream_with_fallback = lambda **kwargs: slow_tokens(["Twenty ", "days"], calls)
+        pipeline._build_sources_payload = lambda docs: [{"file_id": 1}]
+
+        def respond(conversation_id, query):
+            return collect(pipeline.stream_rag_response(
+                llm=None, llm_type=LLMType.PRIMARY, user_query=query, documents=documents,
+                cached_context_text=None, conversation_id=conversation_id, user_id=1
+            ))
+
+        leader_items, follower_items = await asyncio.gather(
+            respond("c1", "What is the leave policy?"),
+            respond("c2", "what is the  LEAVE policy?")
+        )
+
+        assert len(calls) == 1
+        assert [i["content"] for i in follower_items if i["type"] == "token"] == ["Twenty ", "days"]
+        assert follower_items[-1] == {"type": "metadata", "sources": [{"file_id": 1}]}
+        assert pipeline.conversation_service.saved == [("c2", "Twenty days", {"sources": [{"file_id": 1}]})]
+
+    @pytest.mark.asyncio
+    async def test_follower_records_the_llm_that_answered(self, monkeypatch):
+        monkeypatch.setattr(coalescer_module, "_stream_coalescer", StreamCoalescer())
+        documents = [Document(page_content="leave policy text", metadata={"file_id": 1})]
+
+        async def answered_by_fallback(on_generated, **kwargs):
+            async for item in slow_tokens(["Twenty days"], []):
+                yield item
+            on_generated(LLMType.FALLBACK)
+
+        pipeline = ResponsePipeline.__new__(ResponsePipeline)
+        pipeline.conversation_service = FakeConversationService()
+        pipeline._stream_with_fallback = answered_by_fallback
+        pipeline._build_sources_payload = lambda docs: []
+
+        def respond(conversation_id):
+            return collect(pipeline.stream_rag_response(
+                llm=None, llm_type=LLMType.PRIMARY, user_query="leave policy?", documents=documents,
+                cached_context_text=None, conversation_id=conversation_id, user_id=1
+            ))
+
+        await asyncio.gather(respond("c1"), respond("c2"))
+
+        assert pipeline.conversation_service.saved == [("c2", "Twenty days", {"used_fallback_llm": True})]
+
+    @pytest.mark.asyncio
+    async def test_different_histories_are_not_coalesced(self, monkeypatch):
+        monkeypatch.setattr(coalescer_module, "_stream_coalescer", StreamCoalescer())
+        calls = []
+        documents = [Document(page_content="leave policy text", metadata={"file_id": 1})]
+
+        pipeline = ResponsePipeline.__new__(ResponsePipeline)
+        pipeline.conversation_service = FakeConversationService(
+            {"c2": [{"role": "user", "content": "Answer in French from now on"}]}
+        )
+        pipeline._stream_with_fallback = lambda **kwargs: slow_tokens([str(kwargs["history"])], calls)
+
+        def respond(conversation_id, user_id):
+            return collect(pipeline.stream_rag_response(
+                llm=None, llm_type=LLMType.PRIMARY, user_query="leave policy?", documents=documents,
+                cached_context_text=None, conversation_id=conversation_id, user_id=user_id
+            ))
+
+        first, second = await asyncio.gather(respond("c1", 1), respond("c2", 2))
+
+        assert len(calls) == 2
+        assert first != second
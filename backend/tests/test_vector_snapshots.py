@@ -0,0 +1,67 @@
+"""
+Tests for versioned vector index snapshots: publishing, pruning and the
+watcher swapping newer versions into the served store.
+"""
+
+import pytest
+
+from app.core import vector_store_factory
+from app.core.vector_snapshots import VectorSnapshotStore, VectorSnapshotWatcher
+
+
+class FakeStore:
+    """Stands in for FAISS: save_local writes one file naming the store."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def save_local(self, folder_path):
+        with open(f"{folder_path}/index.faiss", "w") as f:
+            f.write(self.name)
+
+
+class FakeSnapshotStore(VectorSnapshotStore):
+    def _load_dir(self, path, embeddings, mmap):
+        return FakeStore((path / "index.faiss").read_text())
+
+
+@pytest.fixture
+def served(monkeypatch):
+    """Factory globals as in an API process serving a store loaded at startup."""
+    monkeypatch.setattr(vector_store_factory, "_vector_store_instance", FakeStore("startup"))
+    monkeypatch.setattr(vector_store_factory, "_vector_store_version", 0)
+    monkeypatch.setattr(vector_store_factory, "_retriever_instance", None)
+
+
+class TestVectorSnapshots:
+    """Manifest, versions on disk and hot swapping."""
+
+    def test_publish_advances_manifest_and_prunes(self, tmp_path):
+        snapshots = FakeSnapshotStore(str(tmp_path), keep=2)
+        assert snapshots.current_version() == 0
+
+        for name in ["a", "b", "c"]:
+            snapshots.publish(FakeStore(name))
+
+        assert snapshots.manifest()["path"] == "v00000003"
+        assert sorted(p.name for p in tmp_path.glob("v*")) == ["v00000002", "v00000003"]
+        store, version = snapshots.load(embeddings=None)
+        assert (store.name, version) == ("c", 3)
+
+    @pytest.mark.asyncio
+    async def test_watcher_swaps_in_newer_version(self, tmp_path, served):
+        snapshots = FakeSnapshotStore(str(tmp_path))
+        watcher = VectorSnapshotWatcher(snapshots, embeddings=None)
+
+        assert not await watcher.check()
+
+        snapshots.publish(FakeStore("v1"))
+        assert await watcher.check()
+        assert vector_store_factory.get_vector_store(embeddings=None).name == "v1"
+        assert vector_store_factory.get_vector_store_version() == 1
+        assert not await watcher.check()
+
+    def test_swap_ignores_older_versions(self, served):
+        assert vector_store_factory.swap_vector_store(FakeStore("new"), 2)
+        assert not vector_store_factory.swap_vector_store(FakeStore("old"), 1)
+        assert vector_store_factory.get_vector_store(embeddings=None).name == "new"